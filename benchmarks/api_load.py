@@ -0,0 +1,269 @@
+"""
+Load benchmark of the analytics JSON API (src/api.py): requests per second
+and latencies under concurrent keep-alive clients, with one server process
+and with several worker processes.
+
+The API is started from `--workspace` (the repository root by default, or
+with `--snapshot`) for each process count. Client processes, each running
+several connections, request the endpoints in turn with gzip accepted and
+one request out of `--revalidate-every` revalidating its ETag (304).
+
+Usage:
+    python -m benchmarks.api_load --processes 1 4 --concurrency 32 \
+        --duration 10 --output benchmarks/results/api.json
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "api.json")
+PATHS = [
+    "/api/metrics",
+    "/api/top4",
+    "/api/top4?nutrient=Sugar%20(g)",
+    "/api/ratios",
+    "/api/outliers",
+    "/api/version",
+]
+# Seconds allowed for the server to load its data and start listening
+STARTUP_TIMEOUT = 600
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _connection_loop(
+    port: int, deadline: float, revalidate_every: int, results: list
+) -> None:
+    """Sends requests on one keep-alive connection until `deadline`."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    etags = {}
+    latencies, not_modified, errors = [], 0, 0
+    count = 0
+    while time.perf_counter() < deadline:
+        path = PATHS[count % len(PATHS)]
+        headers = {"Accept-Encoding": "gzip"}
+        if revalidate_every and count % revalidate_every == 0 and path in etags:
+            headers["If-None-Match"] = etags[path]
+        count += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if response.status == 304:
+            not_modified += 1
+        elif response.status == 200:
+            etags[path] = response.getheader("ETag")
+        else:
+            errors += 1
+    connection.close()
+    results.append((latencies, not_modified, errors))
+
+
+def _client(port: int, connections: int, duration: float, revalidate_every, queue):
+    """Client process: runs `connections` connections in threads."""
+    deadline = time.perf_counter() + duration
+    results = []
+    threads = [
+        threading.Thread(
+            target=_connection_loop, args=(port, deadline, revalidate_every, results)
+        )
+        for _ in range(connections)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = [latency for result in results for latency in result[0]]
+    queue.put(
+        (
+            latencies,
+            sum(result[1] for result in results),
+            sum(result[2] for result in results),
+        )
+    )
+
+
+def load(
+    port: int,
+    concurrency: int,
+    duration: float,
+    clients: int,
+    revalidate_every: int = 10,
+) -> dict:
+    """
+    Sends requests to a running API from `clients` processes holding
+    `concurrency` connections in total, for `duration` seconds.
+
+    Returns:
+        dict: Requests per second, latency percentiles (ms), 304 and
+        error counts.
+    """
+    clients = max(1, min(clients, concurrency))
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_client,
+            args=(
+                port,
+                concurrency // clients + (index < concurrency % clients),
+                duration,
+                revalidate_every,
+                queue,
+            ),
+        )
+        for index in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    outputs = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    latencies = sorted(latency for output in outputs for latency in output[0])
+    if not latencies:
+        raise RuntimeError("No request succeeded")
+    return {
+        "requests": len(latencies),
+        "requests_per_s": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(0.99 * (len(latencies) - 1))] * 1000,
+        "not_modified": sum(output[1] for output in outputs),
+        "errors": sum(output[2] for output in outputs),
+    }
+
+
+def start_server(
+    workspace: str, port: int, processes: int, snapshot: str = None
+) -> subprocess.Popen:
+    """Starts the API from `workspace` and waits until it answers."""
+    command = [sys.executable, os.path.join(SRC_DIR, "api.py"), "--port", str(port)]
+    command += ["--processes", str(processes)]
+    if snapshot:
+        command += ["--snapshot", snapshot]
+    # In its own process group, so that stopping it stops its workers too
+    server = subprocess.Popen(command, cwd=workspace, start_new_session=True)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"The API exited with status {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            connection.request("GET", "/api/version")
+            if connection.getresponse().status == 200:
+                connection.close()
+                # The workers of a multi-process server start together, but
+                # give the last ones time to listen
+                time.sleep(1.0)
+                return server
+        except OSError:
+            time.sleep(0.5)
+    stop_server(server)
+    raise RuntimeError("The API did not start in time")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    """Stops the API started by `start_server` and its worker processes."""
+    try:
+        os.killpg(server.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    server.wait(timeout=30)
+
+
+def run(
+    process_counts: list,
+    concurrency: int,
+    duration: float,
+    clients: int,
+    workspace: str,
+    snapshot: str,
+    output: str,
+) -> dict:
+    """Benchmarks the API for each process count and writes the JSON report."""
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "concurrency": concurrency,
+            "duration_s": duration,
+            "clients": clients,
+            "snapshot": bool(snapshot),
+        },
+        "results": {},
+    }
+    for processes in process_counts:
+        port = _free_port()
+        print(f"Starting the API with {processes} process(es)...", flush=True)
+        server = start_server(workspace, port, processes, snapshot)
+        try:
+            metrics = load(port, concurrency, duration, clients)
+        finally:
+            stop_server(server)
+        report["results"][f"{processes}_processes"] = metrics
+        print(
+            f"  {processes} process(es): {metrics['requests_per_s']:9.0f} req/s, "
+            f"p50 {metrics['p50_ms']:.2f} ms, p99 {metrics['p99_ms']:.2f} ms, "
+            f"{metrics['errors']} errors"
+        )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {output}")
+    return report
+
+
+def main(argv: list = None) -> int:
+    """Command line entry point, returns the process exit status."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--processes", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--clients",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2),
+        help="client processes sending the requests",
+    )
+    parser.add_argument("--workspace", default=".")
+    parser.add_argument("--snapshot", default=None)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+    run(
+        args.processes,
+        args.concurrency,
+        args.duration,
+        args.clients,
+        args.workspace,
+        args.snapshot,
+        args.output,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
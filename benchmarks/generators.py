@@ -0,0 +1,210 @@
+"""
+Synthetic dataset generators mimicking the Food.com files used by the app.
+
+The generated files follow the same layout as the real ones, so the app
+modules can load them with their usual relative paths:
+
+- dataset/RAW_recipes.csv.zip
+- dataset/PP_users.csv.zip
+- preprocessed_data/PP_recipes_mangetamain.csv
+- preprocessed_data/PP_interactions_mangetamain.csv
+"""
+
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+NAME_WORDS = [
+    "chicken",
+    "salad",
+    "easy",
+    "vegan",
+    "lemon",
+    "cake",
+    "soup",
+    "garden",
+    "fresh",
+    "bread",
+    "pasta",
+    "spicy",
+    "grilled",
+    "creamy",
+    "apple",
+    "bean",
+]
+TAGS = [
+    "organic",
+    "vegan",
+    "easy",
+    "dessert",
+    "healthy",
+    "main-dish",
+    "fresh",
+    "low-fat",
+    "60-minutes-or-less",
+    "garden",
+    "natural",
+    "meat",
+    "holiday",
+    "breakfast",
+    "beverages",
+    "low-sodium",
+    "seasonal",
+    "whole",
+    "farm",
+]
+TECHNIQUES = "[0, 1, 0, 1, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 1, 0, 0]"
+
+
+def _pool(rng: np.random.Generator, size: int, make) -> np.ndarray:
+    """Draws `size` rows from a pool of distinct pre-built strings."""
+    pool = np.array([make() for _ in range(min(size, 4096))], dtype=object)
+    return pool[rng.integers(0, len(pool), size)]
+
+
+def _list_strings(values: np.ndarray, decimals: int = 1) -> pd.Series:
+    """Formats each row of a 2D array as a stringified Python list."""
+    rounded = np.round(values, decimals)
+    columns = [pd.Series(rounded[:, i]).astype(str) for i in range(values.shape[1])]
+    joined = columns[0]
+    for column in columns[1:]:
+        joined = joined + ", " + column
+    return "[" + joined + "]"
+
+
+def make_raw_recipes(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a RAW_recipes-like DataFrame (name, id, minutes, tags,
+    nutrition, steps, description, ingredients...).
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n_rows, dtype=np.int64) * 7 + 38
+    submitted = pd.Timestamp("2001-01-01") + pd.to_timedelta(
+        rng.integers(0, 6500, n_rows), unit="D"
+    )
+    nutrition = rng.gamma(2.0, [150.0, 15.0, 20.0, 15.0, 15.0, 15.0, 5.0], (n_rows, 7))
+    return pd.DataFrame(
+        {
+            "name": _pool(rng, n_rows, lambda: " ".join(rng.choice(NAME_WORDS, 3))),
+            "id": ids,
+            "minutes": rng.integers(1, 240, n_rows),
+            "contributor_id": rng.integers(1, 50_000, n_rows),
+            "submitted": submitted,
+            "tags": _pool(
+                rng,
+                n_rows,
+                lambda: str(list(rng.choice(TAGS, rng.integers(1, 8), replace=False))),
+            ),
+            "nutrition": _list_strings(nutrition),
+            "n_steps": rng.integers(1, 20, n_rows),
+            "steps": _pool(
+                rng,
+                n_rows,
+                lambda: str(list(rng.choice(NAME_WORDS, rng.integers(2, 8)))),
+            ),
+            "description": _pool(
+                rng, n_rows, lambda: "a " + " ".join(rng.choice(NAME_WORDS, 12))
+            ),
+            "ingredients": _pool(
+                rng, n_rows, lambda: str(list(rng.choice(NAME_WORDS, 5)))
+            ),
+            "n_ingredients": rng.integers(2, 20, n_rows),
+        }
+    )
+
+
+def make_pp_recipes(raw_recipes: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    Generates a PP_recipes_mangetamain-like DataFrame (name, id, nutrition,
+    ingredient_ids) from RAW_recipes-like rows.
+    """
+    rng = np.random.default_rng(seed)
+    ingredient_ids = _pool(
+        rng,
+        len(raw_recipes),
+        lambda: str(
+            sorted(map(int, rng.choice(8000, rng.integers(3, 15), replace=False)))
+        ),
+    )
+    recipes = raw_recipes[["name", "id", "nutrition"]].copy()
+    recipes["ingredient_ids"] = ingredient_ids
+    return recipes
+
+
+def make_interactions(
+    n_rows: int, recipe_ids: np.ndarray, seed: int = 0
+) -> pd.DataFrame:
+    """
+    Generates a PP_interactions_mangetamain-like DataFrame (user_id,
+    recipe_id, date) with a drop of activity after 2011.
+    """
+    rng = np.random.default_rng(seed)
+    before = rng.random(n_rows) < 0.8
+    days = np.where(
+        before, rng.integers(0, 3650, n_rows), rng.integers(3650, 6500, n_rows)
+    )
+    dates = pd.Timestamp("2001-01-01") + pd.to_timedelta(days, unit="D")
+    return pd.DataFrame(
+        {
+            "user_id": rng.integers(1, max(n_rows // 5, 2), n_rows),
+            "recipe_id": recipe_ids[rng.integers(0, len(recipe_ids), n_rows)],
+            "date": dates.strftime("%Y-%m-%d"),
+        }
+    )
+
+
+def make_users(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Generates a PP_users-like DataFrame (u, techniques, n_items...)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "u": np.arange(n_rows),
+            "techniques": _pool(
+                rng, n_rows, lambda: TECHNIQUES.replace("0", str(rng.integers(0, 9)))
+            ),
+            "items": "[1, 2, 3]",
+            "n_items": rng.integers(1, 100, n_rows),
+            "ratings": "[5.0, 4.0, 5.0]",
+            "n_ratings": rng.integers(1, 100, n_rows),
+        }
+    )
+
+
+def _write_zipped_csv(df: pd.DataFrame, zip_path: str) -> None:
+    """Writes a DataFrame as a single CSV member of a ZIP archive."""
+    member = os.path.splitext(os.path.basename(zip_path))[0]
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(member, df.to_csv(index=False))
+
+
+def write_datasets(output_dir: str, n_rows: int, seed: int = 0) -> dict:
+    """
+    Writes the four synthetic datasets with `n_rows` rows each under
+    `output_dir`, using the directory layout expected by the app.
+
+    Returns:
+        dict: Paths of the written files, keyed by dataset name.
+    """
+    os.makedirs(os.path.join(output_dir, "dataset"), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, "preprocessed_data"), exist_ok=True)
+    raw_recipes = make_raw_recipes(n_rows, seed)
+    paths = {
+        "raw_recipes": os.path.join(output_dir, "dataset", "RAW_recipes.csv.zip"),
+        "pp_users": os.path.join(output_dir, "dataset", "PP_users.csv.zip"),
+        "pp_recipes": os.path.join(
+            output_dir, "preprocessed_data", "PP_recipes_mangetamain.csv"
+        ),
+        "pp_interactions": os.path.join(
+            output_dir, "preprocessed_data", "PP_interactions_mangetamain.csv"
+        ),
+    }
+    _write_zipped_csv(raw_recipes, paths["raw_recipes"])
+    _write_zipped_csv(make_users(n_rows, seed), paths["pp_users"])
+    make_pp_recipes(raw_recipes, seed).to_csv(paths["pp_recipes"], index=False)
+    make_interactions(n_rows, raw_recipes["id"].to_numpy(), seed).to_csv(
+        paths["pp_interactions"], index=False
+    )
+    return paths
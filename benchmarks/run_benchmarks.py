@@ -0,0 +1,350 @@
+"""
+Timing and peak-memory benchmarks of the data pipeline stages.
+
+Each stage runs on synthetic datasets of 10k, 100k and 1M rows (see
+`benchmarks.generators`). Wall times are measured over several runs,
+then one extra run under `tracemalloc` gives the peak of Python/NumPy
+allocations. Streamlit caches are cleared before every run so the cold
+path is measured.
+
+Usage:
+    python -m benchmarks.run_benchmarks run --sizes 10k 100k 1m \
+        --output benchmarks/results/current.json
+    python -m benchmarks.run_benchmarks compare \
+        benchmarks/results/baseline.json benchmarks/results/current.json \
+        --threshold 0.25
+
+`compare` exits with status 1 when a stage is slower than the baseline by
+more than the threshold (25% by default).
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.generators import SIZES, write_datasets
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "results", "latest.json")
+# The app modules load their datasets on first access, relative to the working
+# directory: they are imported once from a small workspace, then every stage is
+# called on the benchmark data.
+BOOTSTRAP_ROWS = 1_000
+
+
+def measure(func, setup=None, repeat: int = 3) -> dict:
+    """
+    Measures a stage: wall times over `repeat` runs and the peak traced
+    memory of one extra run. `setup` runs before each call, untimed.
+
+    Returns:
+        dict: `median_s`, `min_s`, `peak_mb` and the `rows` returned by
+        the stage when it returns a sized object.
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    metrics = {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "peak_mb": peak / 2**20,
+    }
+    if hasattr(result, "__len__"):
+        metrics["rows"] = len(result)
+    return metrics
+
+
+def import_pipeline(workspace: str) -> dict:
+    """
+    Imports the app modules from inside `workspace` so that their
+    import-time loads read the bootstrap datasets.
+
+    Returns:
+        dict: The imported modules keyed by name.
+    """
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    previous = os.getcwd()
+    os.chdir(workspace)
+    try:
+        names = ["data_loader", "utils", "nutrition_stats", "outliers", "search"]
+        names += ["recipe_repository", "ingestion", "interaction_cube"]
+        names += ["nutrition_sketches"]
+        names += ["visualisation.graphs", "visualisation.graphs_nutrition"]
+        return {name: importlib.import_module(name) for name in names}
+    finally:
+        os.chdir(previous)
+
+
+def benchmark_size(modules: dict, paths: dict, repeat: int) -> dict:
+    """Runs every pipeline stage on the datasets listed in `paths`."""
+    data_loader = modules["data_loader"]
+    utils = modules["utils"]
+    nutrition_stats = modules["nutrition_stats"]
+    graphs = modules["visualisation.graphs"]
+    graphs_nutrition = modules["visualisation.graphs_nutrition"]
+    outliers = modules["outliers"]
+    search = modules["search"]
+    recipe_repository = modules["recipe_repository"]
+    loader = data_loader.DataLoader()
+    extracted_dir = os.path.splitext(paths["raw_recipes"])[0] + "_extracted"
+
+    def cold_load():
+        data_loader.DataLoader.load_data.clear()
+        data_loader.DataLoader.unzip_data.clear()
+        shutil.rmtree(extracted_dir, ignore_errors=True)
+
+    results = {}
+    results["load_data_zip"] = measure(
+        lambda: loader.load_data(paths["raw_recipes"]), cold_load, repeat
+    )
+    results["load_data_csv"] = measure(
+        lambda: loader.load_data(paths["pp_interactions"]), cold_load, repeat
+    )
+    raw_recipes = loader.load_data(paths["raw_recipes"])
+    pp_recipes = loader.load_data(paths["pp_recipes"])
+    interactions = loader.load_data(paths["pp_interactions"])
+
+    results["filter_dataframebis1"] = measure(
+        lambda: utils.filter_dataframebis1(
+            raw_recipes, utils.column_names, utils.filter_values1_bio
+        ),
+        utils.filter_dataframebis1.clear,
+        repeat,
+    )
+    results["parse_nutrition"] = measure(
+        lambda: pp_recipes["nutrition"].apply(nutrition_stats.parse_nutrition),
+        repeat=repeat,
+    )
+    results["stats_bio"] = measure(
+        lambda: nutrition_stats.stats_bio(pp_recipes), repeat=repeat
+    )
+    results["zscore_outliers"] = measure(
+        lambda: utils.zscore_outliers(pp_recipes)[1], repeat=repeat
+    )
+    combined_df = nutrition_stats.stats_bio(pp_recipes)
+    categories = graphs_nutrition.categories
+    results["figure_top_4"] = measure(
+        lambda: graphs_nutrition.plot_top_4_recipes_by_nutrition(
+            combined_df, categories
+        ),
+        repeat=repeat,
+    )
+    results["figure_ratios"] = measure(
+        lambda: graphs_nutrition.nutrition_bar_ratio_sodium_proteins(
+            combined_df, categories
+        ),
+        repeat=repeat,
+    )
+    results["figure_interactions"] = measure(
+        lambda: graphs.build_interactions_figure(interactions), repeat=repeat
+    )
+    date_counts = modules["ingestion"].count_dates(interactions)
+    DailyInteractions = modules["interaction_cube"].DailyInteractions
+    results["daily_interactions_build"] = measure(
+        lambda: DailyInteractions.from_counts(date_counts), repeat=repeat
+    )
+    daily = DailyInteractions.from_counts(date_counts)
+    results["daily_interactions_views"] = measure(
+        lambda: (
+            daily.rolling_mean(30),
+            daily.year_over_year(),
+            daily.seasonality(),
+        ),
+        repeat=repeat,
+    )
+    TagCube = modules["interaction_cube"].TagCube
+    recipe_month_counts = modules["ingestion"].count_recipe_months(interactions)
+    recipe_tags = raw_recipes[["id"]].assign(
+        tags=raw_recipes["tags"].map(modules["nutrition_sketches"].parse_tags)
+    )
+    results["tag_cube_build"] = measure(
+        lambda: TagCube.from_tables(recipe_month_counts, recipe_tags), repeat=repeat
+    )
+    cube = TagCube.from_tables(recipe_month_counts, recipe_tags)
+    bio_tags = cube.matching_tags(utils.filter_values1_bio[0])
+    results["tag_cube_queries"] = measure(
+        lambda: (
+            cube.compare(bio_tags, "year"),
+            cube.compare(bio_tags, "month"),
+            cube.top_tags(10, "2008", "2010"),
+        ),
+        repeat=repeat,
+    )
+    nutrients = combined_df[categories].to_numpy(dtype="float64")
+    for method, mask in outliers.MASKS.items():
+        results[f"outliers_{method}"] = measure(lambda: mask(nutrients), repeat=repeat)
+    # Training and scoring the isolation forest on one core, then on all
+    for label, n_jobs in (("1_job", None), ("all_jobs", -1)):
+        results[f"isolation_forest_{label}"] = measure(
+            lambda: outliers.isolation_forest_mask(
+                outliers.train_isolation_forest(nutrients, n_jobs), nutrients, n_jobs
+            ),
+            repeat=repeat,
+        )
+    results["search_index_build"] = measure(
+        lambda: search.SearchIndex.build(raw_recipes), repeat=repeat
+    )
+    index = search.SearchIndex.build(raw_recipes)
+    results["search_query"] = measure(
+        lambda: index.search("easy vegan lemon cake", k=10), repeat=repeat
+    )
+    results["recipe_repository_build"] = measure(
+        lambda: recipe_repository.RecipeRepository(
+            raw_recipes, pp_recipes, combined_df
+        ),
+        repeat=repeat,
+    )
+    repository = recipe_repository.RecipeRepository(
+        raw_recipes, pp_recipes, combined_df
+    )
+    # 1000 detail lookups of recipes spread over the whole id range
+    recipe_ids = combined_df["id"].to_numpy()[:: max(len(combined_df) // 1000, 1)]
+    results["recipe_lookup_1000"] = measure(
+        lambda: [repository.get(recipe_id) for recipe_id in recipe_ids[:1000]],
+        repeat=repeat,
+    )
+    return results
+
+
+def run(sizes: list, repeat: int, output: str, keep_data: bool = False) -> dict:
+    """
+    Generates the datasets, benchmarks every stage for each size and
+    writes the results as JSON to `output`.
+    """
+    workdir = tempfile.mkdtemp(prefix="mangetamain_bench_")
+    try:
+        bootstrap = os.path.join(workdir, "bootstrap")
+        write_datasets(bootstrap, BOOTSTRAP_ROWS)
+        modules = import_pipeline(bootstrap)
+        report = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": repeat,
+            },
+            "results": {},
+        }
+        for label in sizes:
+            print(f"Generating {label} rows...", flush=True)
+            paths = write_datasets(os.path.join(workdir, label), SIZES[label])
+            print(f"Benchmarking {label}...", flush=True)
+            report["results"][label] = benchmark_size(modules, paths, repeat)
+            for stage, metrics in report["results"][label].items():
+                print(
+                    f"  {stage:<26} {metrics['median_s']:9.4f} s "
+                    f"{metrics['peak_mb']:9.1f} MB"
+                )
+    finally:
+        if keep_data:
+            print(f"Datasets kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {output}")
+    return report
+
+
+def compare(
+    baseline: dict,
+    current: dict,
+    threshold: float = 0.25,
+    memory_threshold: float = None,
+    min_seconds: float = 0.005,
+) -> list:
+    """
+    Compares two benchmark reports stage by stage.
+
+    Args:
+        baseline (dict): Reference report written by `run`.
+        current (dict): New report written by `run`.
+        threshold (float): Allowed relative slowdown of the median time.
+        memory_threshold (float): Allowed relative increase of the peak
+        memory, not checked when None.
+        min_seconds (float): Stages faster than this in both reports are
+        too noisy to be compared on time.
+
+    Returns:
+        list: One message per regression, empty when none.
+    """
+    regressions = []
+    for size, stages in current["results"].items():
+        for stage, metrics in stages.items():
+            reference = baseline["results"].get(size, {}).get(stage)
+            if reference is None:
+                continue
+            slowest = max(reference["median_s"], metrics["median_s"])
+            ratio = metrics["median_s"] / max(reference["median_s"], 1e-9)
+            if slowest >= min_seconds and ratio > 1 + threshold:
+                regressions.append(
+                    f"{size}/{stage}: {reference['median_s']:.4f} s -> "
+                    f"{metrics['median_s']:.4f} s (x{ratio:.2f})"
+                )
+            if memory_threshold is not None:
+                memory_ratio = metrics["peak_mb"] / max(reference["peak_mb"], 1e-9)
+                if memory_ratio > 1 + memory_threshold:
+                    regressions.append(
+                        f"{size}/{stage}: {reference['peak_mb']:.1f} MB -> "
+                        f"{metrics['peak_mb']:.1f} MB (x{memory_ratio:.2f})"
+                    )
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    """Command line entry point, returns the process exit status."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", nargs="+", choices=SIZES, default=list(SIZES))
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    run_parser.add_argument("--keep-data", action="store_true")
+    compare_parser = commands.add_parser("compare", help="compare two reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.25)
+    compare_parser.add_argument("--memory-threshold", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        run(args.sizes, args.repeat, args.output, args.keep_data)
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    regressions = compare(baseline, current, args.threshold, args.memory_threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if not regressions:
+        print("No regression beyond the thresholds.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
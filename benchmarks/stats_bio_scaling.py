@@ -0,0 +1,101 @@
+"""
+Scaling benchmark of the parallel `stats_bio` (src/parallel_stats.py).
+
+`stats_bio` runs once on synthetic PP_recipes rows (see
+`benchmarks.generators`), then `stats_bio_parallel` runs with each worker
+count. The worker pool is started and warmed up before the timed runs,
+whose result is checked to be identical to the serial one.
+
+Usage:
+    python -m benchmarks.stats_bio_scaling --rows 1000000 --workers 1 2 4 8 \
+        --output benchmarks/results/stats_bio_scaling.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+import pandas as pd
+from benchmarks.generators import make_pp_recipes, make_raw_recipes
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+DEFAULT_OUTPUT = os.path.join(
+    os.path.dirname(__file__), "results", "stats_bio_scaling.json"
+)
+
+
+def timings(func, repeat: int) -> dict:
+    """Returns the median and minimum wall times of `repeat` calls."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(durations), "min_s": min(durations)}
+
+
+def run(rows: int, worker_counts: list, repeat: int, output: str) -> dict:
+    """Benchmarks the serial and parallel runs and writes the JSON report."""
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    import nutrition_stats
+    import parallel_stats
+
+    recipes = make_pp_recipes(make_raw_recipes(rows))
+    serial = timings(lambda: nutrition_stats.stats_bio(recipes), repeat)
+    expected = nutrition_stats.stats_bio(recipes)
+    print(f"  serial: {serial['median_s']:8.3f} s", flush=True)
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "rows": rows,
+            "repeat": repeat,
+        },
+        "results": {"serial": serial},
+    }
+    for workers in worker_counts:
+        start = time.perf_counter()
+        # Starts the pool and checks the result once, untimed
+        result = parallel_stats.stats_bio_parallel(recipes, workers)
+        warm_up = time.perf_counter() - start
+        pd.testing.assert_frame_equal(result, expected, check_exact=True)
+        metrics = timings(
+            lambda: parallel_stats.stats_bio_parallel(recipes, workers), repeat
+        )
+        metrics["first_call_s"] = warm_up
+        metrics["speedup"] = serial["median_s"] / metrics["median_s"]
+        report["results"][f"{workers}_workers"] = metrics
+        print(
+            f"  {workers} worker(s): {metrics['median_s']:8.3f} s, "
+            f"x{metrics['speedup']:.2f} (first call {warm_up:.3f} s)",
+            flush=True,
+        )
+        parallel_stats.shutdown_pools()
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {output}")
+    return report
+
+
+def main(argv: list = None) -> int:
+    """Command line entry point, returns the process exit status."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+    run(args.rows, args.workers, args.repeat, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
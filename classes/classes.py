@@ -1,14 +1,14 @@
-import pandas as pd
+import os
+import sys
 import logging
 
+"""src import files from one file to another file"""
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+from data_loader import DataLoader
 
-# configure logging
-logging.basicConfig(
-    filename="app.log",
-    filemode="a",
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    level=logging.DEBUG,
-)
+
+# Get a logger specific to this module (handlers are set by log_config)
+logger = logging.getLogger(__name__)
 
 
 class Functions:
@@ -21,20 +21,21 @@ class Functions:
     # renvoyer les 5 premières lignes du
     def head_dataframe(path_to_dataframe: str) -> str:
         """_summary_
-        This method is called to display the first 5 lines of any Dataframe.
+        This method is called to display the first 5 lines of any Dataframe
+        (CSV, ZIP containing CSV, XZ containing CSV, or Pickle).
         The dataframe is refered to its relative path as the sole argument.
+        Only the first lines are read (see `DataLoader.peek`).
         Returns:
             str: equivalent to df.head()
         """
 
         try:
-            df = pd.read_csv(path_to_dataframe)
+            head = DataLoader().peek(path_to_dataframe)["head"]
         except Exception as e:
-            # TODO: log the error in the notebook
-            logging.error(
-                f"Erreur lors de la lecture du fichier CSV spécifié à  \ l'emplacement {path_to_dataframe}: {e}"
+            logger.error(
+                f"Erreur lors de la lecture du fichier spécifié à l'emplacement {path_to_dataframe}: {e}"
             )
-            print(e)
+            raise
 
-        to_display = df.head().to_string()
+        to_display = head.to_string()
         return to_display
@@ -0,0 +1,420 @@
+"""
+Headless JSON API over the dashboard analytics, for the services that
+need the numbers of the dashboard without the Streamlit UI.
+
+The data is read from a snapshot (MANGETAMAIN_SNAPSHOT or `--snapshot`)
+or computed from the datasets, as in the app. Every response is
+serialized and gzip-compressed once per version of the data, then served
+from memory: its ETag is the data version, so clients revalidating an
+unchanged resource get an empty 304 response. The version is checked
+every few seconds and the cached responses are dropped when it changes.
+
+With `--processes`, the data is loaded and the responses computed once
+before forking the worker processes, which share the listening socket
+and the loaded data (copy-on-write).
+
+Endpoints (GET):
+- /api/version: version of the data served
+- /api/metrics: key numbers (bio recipes and rate, outliers, users...)
+- /api/top4[?nutrient=Sugar (g)]: the 4 healthiest recipes per nutrient
+- /api/ratios: the protein ratios of the ratio figures
+- /api/outliers: outliers per detector and nutrient, detector agreement
+- /api/recipes/<id>: everything known about a recipe
+
+Usage (from the repository root):
+    python src/api.py --port 8502 --processes 4
+    curl --compressed http://localhost:8502/api/top4
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import tornado.httpserver
+import tornado.netutil
+import tornado.process
+import tornado.web
+from log_config import setup_logging, shutdown_logging
+from nutrition_stats import RATIO_CATEGORIES, protein_ratios, top_k_recipes
+from outliers import CACHE_DIR_ENV, DEFAULT_CACHE_DIR, OutlierDetectors
+from ranking import NUTRIENT_OBJECTIVES
+from recipe_repository import RecipeRepository
+from snapshot import (
+    SNAPSHOT_ENV,
+    SOURCES,
+    build_metrics,
+    build_table,
+    dataset_version,
+    read_snapshot,
+    reset_dataset,
+)
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8502
+# Seconds between two checks of the data version
+VERSION_CHECK_SECONDS = 5.0
+# Responses kept in memory, the least recently used dropped first
+MAX_CACHED_RESPONSES = 4096
+# Smaller bodies are not worth compressing
+GZIP_MIN_BYTES = 256
+# Endpoints computed before serving (and before forking the workers)
+WARM_ENDPOINTS = ("version", "metrics", "top4", "ratios", "outliers")
+RATIO_COLUMNS = [
+    "Protein_Carb_Ratio",
+    "Protein_Sodium_Ratio",
+    "Protein_Saturated_fat_Ratio",
+]
+
+
+def _records(df: pd.DataFrame, columns: list) -> list:
+    """
+    Converts DataFrame rows to JSON-ready dicts, missing and infinite values
+    (e.g. a ratio to a zero nutrient) as None.
+    """
+    valid = df[columns].notna()
+    numeric = df[columns].select_dtypes("number").columns
+    valid[numeric] = np.isfinite(df[numeric])
+    return df[columns].astype(object).where(valid, None).to_dict(orient="records")
+
+
+def _json_default(value):
+    """Serializes the NumPy values `json` does not know."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class CachedResponse:
+    """
+    Serialized response of an endpoint for one data version.
+
+    Args:
+        payload: JSON-ready response data.
+        version (str): Version of the data it was computed from.
+    """
+
+    def __init__(self, payload, version: str) -> None:
+        # NaN and Infinity are not JSON: fail loudly rather than serve them
+        self.body = json.dumps(payload, default=_json_default, allow_nan=False).encode()
+        self.etag = f'"{version}"'
+        self.gzipped = None
+        if len(self.body) >= GZIP_MIN_BYTES:
+            self.gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+
+
+class Analytics:
+    """
+    Dashboard data and computations served by the API, with their
+    serialized responses cached per data version.
+
+    Args:
+        snapshot_dir (str): Snapshot directory (see snapshot.py), the data
+        is computed from the datasets when None.
+        cache_dir (str): Directory of the persisted outlier detectors.
+
+    Example:
+        analytics = Analytics("snapshot")
+        analytics.response("top4", query=(("nutrient", "Sugar (g)"),)).body
+    """
+
+    def __init__(self, snapshot_dir: str = None, cache_dir: str = None) -> None:
+        self.snapshot_dir = snapshot_dir
+        self.cache_dir = cache_dir
+        self._responses = OrderedDict()
+        self._reset()
+        self.version = self._source_version()
+        self._checked = time.monotonic()
+
+    def _reset(self) -> None:
+        self._snapshot = None
+        self._tables = {}
+        self._detectors = None
+        self._repository = None
+        self._responses.clear()
+
+    def _source_version(self) -> str:
+        if self.snapshot_dir is None:
+            return dataset_version()
+        with open(os.path.join(self.snapshot_dir, "manifest.json")) as file:
+            return json.load(file)["dataset_version"]
+
+    def refresh(self) -> bool:
+        """
+        Checks the data version, at most every `VERSION_CHECK_SECONDS`, and
+        drops the loaded data and the cached responses when it changed.
+
+        Returns:
+            bool: Whether the version changed.
+        """
+        now = time.monotonic()
+        if now - self._checked < VERSION_CHECK_SECONDS:
+            return False
+        self._checked = now
+        version = self._source_version()
+        if version == self.version:
+            return False
+        logger.info(f"Data version changed from {self.version} to {version}")
+        if self.snapshot_dir is None:
+            for path in SOURCES:
+                reset_dataset(path)
+        self._reset()
+        self.version = version
+        return True
+
+    def table(self, name: str) -> pd.DataFrame:
+        """Returns one of the snapshot tables (e.g. "combined_df")."""
+        if name not in self._tables:
+            if self.snapshot_dir is None:
+                self._tables[name] = build_table(name)
+            else:
+                self._tables[name] = self._read_snapshot()["tables"][name]
+        return self._tables[name]
+
+    def _read_snapshot(self) -> dict:
+        if self._snapshot is None:
+            self._snapshot = read_snapshot(self.snapshot_dir)
+        return self._snapshot
+
+    def metrics(self) -> dict:
+        """Returns the key numbers of the dashboard."""
+        if self.snapshot_dir is None:
+            return build_metrics()
+        return self._read_snapshot()["metrics"]
+
+    def detectors(self) -> OutlierDetectors:
+        """Returns the outlier detectors over the nutrients of `combined_df`."""
+        if self._detectors is None:
+            self._detectors = OutlierDetectors(
+                self.table("combined_df"),
+                list(NUTRIENT_OBJECTIVES),
+                cache_dir=self.cache_dir,
+            )
+        return self._detectors
+
+    def repository(self) -> RecipeRepository:
+        """Returns the recipe repository (no RAW_recipes in snapshot mode)."""
+        if self._repository is None:
+            raw_recipes = recipe_tags = None
+            if self.snapshot_dir is None:
+                import utils
+
+                raw_recipes = utils.df
+            else:
+                recipe_tags = self.table("recipe_tags")
+            self._repository = RecipeRepository(
+                raw_recipes,
+                self.table("df_preprocessed"),
+                self.table("combined_df"),
+                self.table("recipe_popularity"),
+                self.table("ingredients"),
+                recipe_tags,
+            )
+        return self._repository
+
+    def payload(self, endpoint: str, argument: str = None, query: dict = None):
+        """
+        Computes the response data of an endpoint.
+
+        Args:
+            endpoint (str): One of the endpoint names of `ROUTES`.
+            argument (str): Path argument, e.g. the recipe id.
+            query (dict): Query arguments.
+
+        Raises:
+            tornado.web.HTTPError: 400 for invalid arguments, 404 for
+            unknown resources.
+        """
+        query = query or {}
+        if endpoint == "version":
+            source = "datasets" if self.snapshot_dir is None else "snapshot"
+            return {"version": self.version, "source": source}
+        if endpoint == "metrics":
+            return self.metrics()
+        if endpoint == "top4":
+            nutrients = list(NUTRIENT_OBJECTIVES)
+            if "nutrient" in query:
+                if query["nutrient"] not in NUTRIENT_OBJECTIVES:
+                    raise tornado.web.HTTPError(
+                        400, reason=f"Unknown nutrient: '{query['nutrient']}'"
+                    )
+                nutrients = [query["nutrient"]]
+            combined_df = self.table("combined_df")
+            return {
+                nutrient: _records(
+                    top_k_recipes(combined_df, nutrient), ["id", "name", nutrient]
+                )
+                for nutrient in nutrients
+            }
+        if endpoint == "ratios":
+            combined_df = self.table("combined_df")
+            return {
+                category: _records(
+                    protein_ratios(
+                        top_k_recipes(combined_df, category, healthiest=False)
+                    ),
+                    ["id", "name", category, *RATIO_COLUMNS],
+                )
+                for category in RATIO_CATEGORIES
+            }
+        if endpoint == "outliers":
+            detectors = self.detectors()
+            counts = detectors.counts().astype(object)
+            return {
+                "counts": counts.where(counts.notna(), None).to_dict(),
+                "agreement": detectors.agreement().to_dict(),
+            }
+        if endpoint == "recipe":
+            try:
+                return self.repository().get(int(argument))
+            except KeyError:
+                raise tornado.web.HTTPError(
+                    404, reason=f"Unknown recipe id: {argument}"
+                )
+        raise KeyError(f"Unknown API endpoint: '{endpoint}'")
+
+    def response(
+        self, endpoint: str, argument: str = None, query: tuple = ()
+    ) -> CachedResponse:
+        """
+        Returns the serialized response of an endpoint for the current
+        data version, computed on first request.
+
+        Args:
+            endpoint (str): One of the endpoint names of `ROUTES`.
+            argument (str): Path argument, e.g. the recipe id.
+            query (tuple): Sorted (name, value) pairs of the query arguments.
+        """
+        key = (endpoint, argument, query)
+        response = self._responses.get(key)
+        if response is None:
+            payload = self.payload(endpoint, argument, dict(query))
+            response = CachedResponse(payload, self.version)
+            self._responses[key] = response
+            if len(self._responses) > MAX_CACHED_RESPONSES:
+                self._responses.popitem(last=False)
+        else:
+            self._responses.move_to_end(key)
+        return response
+
+    def warm(self) -> None:
+        """Computes the responses of the `WARM_ENDPOINTS` and the repository."""
+        for endpoint in WARM_ENDPOINTS:
+            self.response(endpoint)
+        self.repository()
+
+
+class AnalyticsHandler(tornado.web.RequestHandler):
+    """
+    Serves the cached response of an endpoint: 304 when the client
+    already has this version, gzip-compressed when the client accepts it.
+    """
+
+    def initialize(self, analytics: Analytics, endpoint: str) -> None:
+        self.analytics = analytics
+        self.endpoint = endpoint
+
+    def get(self, argument: str = None) -> None:
+        self.analytics.refresh()
+        query = tuple(
+            sorted(
+                (name, self.get_query_argument(name))
+                for name in self.request.query_arguments
+            )
+        )
+        response = self.analytics.response(self.endpoint, argument, query)
+        accepts_gzip = "gzip" in self.request.headers.get("Accept-Encoding", "")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("Vary", "Accept-Encoding")
+        self.set_header("ETag", response.etag)
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        if accepts_gzip and response.gzipped is not None:
+            self.set_header("Content-Encoding", "gzip")
+            self.write(response.gzipped)
+        else:
+            self.write(response.body)
+
+    def write_error(self, status_code: int, **kwargs) -> None:
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        self.finish(json.dumps({"error": self._reason, "status": status_code}))
+
+
+# URL pattern and endpoint name of each route
+ROUTES = [
+    (r"/api/version", "version"),
+    (r"/api/metrics", "metrics"),
+    (r"/api/top4", "top4"),
+    (r"/api/ratios", "ratios"),
+    (r"/api/outliers", "outliers"),
+    (r"/api/recipes/([0-9]+)", "recipe"),
+]
+
+
+def make_app(analytics: Analytics) -> tornado.web.Application:
+    """Creates the Tornado application serving the `ROUTES`."""
+    return tornado.web.Application(
+        [
+            (pattern, AnalyticsHandler, {"analytics": analytics, "endpoint": name})
+            for pattern, name in ROUTES
+        ]
+    )
+
+
+async def _serve(app: tornado.web.Application, sockets: list) -> None:
+    server = tornado.httpserver.HTTPServer(app)
+    server.add_sockets(sockets)
+    await asyncio.Event().wait()
+
+
+def main(argv: list = None) -> int:
+    """Command line entry point: serves the API until interrupted."""
+    parser = argparse.ArgumentParser(description="Serve the analytics JSON API.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="worker processes, 0 for one per core",
+    )
+    parser.add_argument(
+        "--snapshot",
+        default=os.environ.get(SNAPSHOT_ENV),
+        help="snapshot directory, the datasets are read when not given",
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    sockets = tornado.netutil.bind_sockets(args.port, args.address)
+    analytics = Analytics(
+        args.snapshot, os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+    )
+    analytics.warm()
+    print(f"Serving the API on http://{args.address}:{args.port}/api/", flush=True)
+    if args.processes != 1:
+        # The log writer thread does not survive the fork: each worker
+        # starts its own
+        shutdown_logging()
+        logging.getLogger().handlers.clear()
+        tornado.process.fork_processes(args.processes)
+        setup_logging()
+    logger.info(f"Serving the API {analytics.version} on port {args.port}")
+    asyncio.run(_serve(make_app(analytics), sockets))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Prefix autocomplete over recipe and ingredient names.
+
+The names are normalized (lowercase, single spaces) and sorted once, so
+the names starting with a prefix are a contiguous range found by two
+binary searches. The most popular names of the range are picked with a
+partial sort; for the short prefixes, whose ranges are the largest, the
+top names are precomputed (the first levels of a trie).
+"""
+
+import bisect
+import logging
+import numpy as np
+import pandas as pd
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Prefixes of up to this many characters get their top names precomputed
+CACHED_PREFIX_LENGTH = 2
+# Number of names precomputed per cached prefix
+CACHED_TOP_K = 20
+# Greater than any character, closes the range of a prefix
+_MAX_CHARACTER = "\U0010ffff"
+
+
+def normalize(name) -> str:
+    """Lowercases a name and collapses its whitespace."""
+    if not isinstance(name, str):
+        return ""
+    return " ".join(name.lower().split())
+
+
+class PrefixIndex:
+    """
+    Sorted-array index answering prefix queries with the most popular
+    matching names.
+
+    Args:
+        names (list): Names, e.g. recipe names.
+        weights (list): Popularity of each name (ties broken
+        alphabetically), 0 by default.
+        ids (list): Identifier of each name, its position by default.
+
+    Example:
+        index = PrefixIndex(["lemon cake", "lemonade"], [12, 40], [1, 2])
+        index.complete("lem", k=5)  # lemonade first
+    """
+
+    def __init__(self, names, weights=None, ids=None) -> None:
+        names = np.asarray(names, dtype=object)
+        weights = np.zeros(len(names)) if weights is None else weights
+        ids = np.arange(len(names)) if ids is None else ids
+        keys = np.array([normalize(name) for name in names], dtype=object)
+        # Sorted by key, the most popular first among equal keys
+        weights = np.asarray(weights, dtype=np.float64)
+        order = np.argsort(-weights, kind="stable")
+        order = order[np.argsort(keys[order], kind="stable")]
+        self.keys = keys[order].tolist()
+        self.names = names[order]
+        self.weights = weights[order]
+        self.ids = np.asarray(ids)[order]
+        self._top = {}
+        for length in range(CACHED_PREFIX_LENGTH + 1):
+            for prefix in sorted({key[:length] for key in self.keys}):
+                self._top[prefix] = self._top_positions(prefix, CACHED_TOP_K)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _range(self, prefix: str) -> tuple:
+        """Returns the positions of the keys starting with `prefix`."""
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + _MAX_CHARACTER, lo=start)
+        return start, end
+
+    def _top_positions(self, prefix: str, k: int) -> np.ndarray:
+        """Returns the positions of the k most popular keys of a prefix."""
+        start, end = self._range(prefix)
+        weights = self.weights[start:end]
+        if end - start > k:
+            # Candidates of the top k, ties included, then sorted
+            threshold = np.partition(weights, end - start - k)[end - start - k]
+            candidates = np.flatnonzero(weights >= threshold)
+        else:
+            candidates = np.arange(end - start)
+        # Most popular first, then in alphabetical (position) order
+        candidates = candidates[np.lexsort((candidates, -weights[candidates]))]
+        return start + candidates[:k]
+
+    def complete(self, prefix: str, k: int = 10) -> pd.DataFrame:
+        """
+        Returns the k most popular names starting with `prefix` (case and
+        extra spaces ignored).
+
+        Returns:
+            pd.DataFrame: `name`, `id` and `weight` columns, most popular
+            first.
+        """
+        key = normalize(prefix)
+        if prefix[-1:].isspace() and key:
+            key += " "  # "lemon " only matches names with "lemon" as a word
+        cached = self._top.get(key)
+        if cached is not None and k <= CACHED_TOP_K:
+            positions = cached[:k]
+        else:
+            positions = self._top_positions(key, k)
+        return pd.DataFrame(
+            {
+                "name": self.names[positions],
+                "id": self.ids[positions],
+                "weight": self.weights[positions],
+            }
+        )
+
+
+def recipe_autocomplete(
+    names: list, ids: list, recipe_popularity: pd.DataFrame
+) -> PrefixIndex:
+    """
+    Builds the autocomplete of the recipe names, the recipes with the most
+    interactions first.
+
+    Args:
+        names (list): Recipe names.
+        ids (list): Recipe ids.
+        recipe_popularity (pd.DataFrame): `recipe_id` and
+        `interaction_count` columns (see popularity.py).
+    """
+    counts = recipe_popularity.set_index("recipe_id")["interaction_count"]
+    weights = counts.reindex(ids).fillna(0).to_numpy()
+    return PrefixIndex(names, weights, ids)
+
+
+def ingredient_autocomplete(ingredients: pd.DataFrame) -> PrefixIndex:
+    """
+    Builds the autocomplete of the ingredient names of `ingr_map.pkl`, the
+    ingredients used by the most recipes first.
+
+    Args:
+        ingredients (pd.DataFrame): `replaced` (ingredient name), `id` and
+        `count` columns, e.g. the "ingredients" snapshot table (rows
+        repeating an id are ignored).
+
+    Raises:
+        KeyError: If a column is not in the DataFrame.
+    """
+    for column in ("replaced", "id", "count"):
+        if column not in ingredients.columns:
+            raise KeyError(f"The column '{column}' is not in the DataFrame.")
+    unique = ingredients.drop_duplicates("id")
+    return PrefixIndex(unique["replaced"], unique["count"], unique["id"])
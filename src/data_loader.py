@@ -1,13 +1,89 @@
+import contextlib
+import io
 import os
 import logging
+import shutil
+import tempfile
 import zipfile
 import lzma
 import pandas as pd
 import streamlit as st
+from instrumentation import describe_result, track_stage
+from locking import exclusive
 
 # Get a logger specific to this module
 logger = logging.getLogger(__name__)
 
+# Records read by `DataLoader.peek` to infer the schema and the row count
+PEEK_SAMPLE_ROWS = 1000
+# Rows per DataFrame yielded by `DataLoader.iter_chunks`
+CHUNK_ROWS = 100_000
+
+
+def _read_varint(data: bytes, position: int) -> tuple:
+    """Decodes the variable-length integer of the xz format at `position`."""
+    value, shift = 0, 0
+    while True:
+        byte = data[position]
+        value |= (byte & 0x7F) << shift
+        position += 1
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+def _xz_uncompressed_size(file_name: str):
+    """
+    Reads the uncompressed size of a single-stream .xz file from the index at
+    its end, without decompressing it.
+
+    Returns:
+        int: The uncompressed size in bytes, or None if the index cannot be
+        read (e.g. several concatenated streams).
+    """
+    try:
+        with open(file_name, "rb") as file:
+            file.seek(-12, os.SEEK_END)
+            footer = file.read(12)
+            if footer[10:] != b"YZ":
+                return None
+            index_size = (int.from_bytes(footer[4:8], "little") + 1) * 4
+            file.seek(-12 - index_size, os.SEEK_END)
+            index = file.read(index_size)
+        if index[0] != 0:
+            return None
+        records, position = _read_varint(index, 1)
+        size = 0
+        for _ in range(records):
+            _, position = _read_varint(index, position)
+            uncompressed, position = _read_varint(index, position)
+            size += uncompressed
+        return size
+    except (OSError, IndexError):
+        return None
+
+
+def _read_records(stream, max_records: int) -> tuple:
+    """
+    Reads the header line and up to `max_records` CSV records from a binary
+    stream. A quoted field spanning several lines stays in one record.
+
+    Returns:
+        tuple: `(data, complete)` where `data` holds the bytes read and
+        `complete` tells whether the end of the stream was reached.
+    """
+    lines, records, in_quotes = [], -1, False
+    while records < max_records:
+        line = stream.readline()
+        if not line:
+            return b"".join(lines), True
+        lines.append(line)
+        # An odd number of quotes opens or closes a quoted field
+        in_quotes ^= line.count(b'"') % 2 == 1
+        if not in_quotes:
+            records += 1
+    return b"".join(lines), not stream.read(1)
+
 
 class DataLoader:
     def __init__(self):
@@ -24,7 +100,7 @@ class DataLoader:
         try:
             with lzma.open(file_name, "rb") as xz_file:
                 with open(output_file, "wb") as out_file:
-                    out_file.write(xz_file.read())
+                    shutil.copyfileobj(xz_file, out_file)
             return output_file
         except Exception as e:
             logger.error(f"Error while decompressing {file_name}: {e}")
@@ -35,60 +111,188 @@ class DataLoader:
         """
         Unzips a ZIP or decompresses an XZ file
         and returns a list of the extracted files.
+
+        The archive is extracted once into `<name>_extracted`, even when
+        several sessions or processes ask for it at the same time: the
+        extraction runs under a lock (`<name>_extracted.lock`) in a
+        temporary directory renamed into place once complete, so readers
+        never see a partially extracted file.
         """
+        if not file_name.endswith((".zip", ".xz")):
+            raise ValueError(f"Unsupported file type for {file_name}")
         try:
             extracted_dir = os.path.splitext(file_name)[0] + "_extracted"
             if not os.path.exists(extracted_dir):
-                os.makedirs(extracted_dir)
-
-                if file_name.endswith(".zip"):
-                    with zipfile.ZipFile(file_name, "r") as zip_ref:
-                        zip_ref.extractall(extracted_dir)
-                elif file_name.endswith(".xz"):
-                    decompressed_file = _self.decompress_xz(file_name, extracted_dir)
-                    return [
-                        decompressed_file
-                    ]  # This should return a list with the decompressed file
-                else:
-                    raise ValueError(f"Unsupported file type for {file_name}")
-
+                with exclusive(f"{extracted_dir}.lock"):
+                    # Another session may have extracted it while we waited
+                    if not os.path.exists(extracted_dir):
+                        _self._extract(file_name, extracted_dir)
             return [os.path.join(extracted_dir, f) for f in os.listdir(extracted_dir)]
         except Exception as e:
             logger.error(f"Error while extracting {file_name}: {e}")
             raise
 
+    def _extract(self, file_name: str, extracted_dir: str) -> None:
+        """Extracts an archive to a staging directory renamed `extracted_dir`."""
+        staging = tempfile.mkdtemp(
+            prefix=f".{os.path.basename(extracted_dir)}-",
+            dir=os.path.dirname(extracted_dir) or ".",
+        )
+        try:
+            if file_name.endswith(".zip"):
+                with zipfile.ZipFile(file_name, "r") as zip_ref:
+                    zip_ref.extractall(staging)
+            else:
+                self.decompress_xz(file_name, staging)
+            os.rename(staging, extracted_dir)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logger.info(f"Extracted {file_name} to {extracted_dir}")
+
     @st.cache_data(ttl=3600)
     def load_data(_self, file_name: str) -> pd.DataFrame:
         """
         Loads data from a file (CSV, ZIP containing CSV, or XZ containing CSV).
+
+        `st.cache_data` computes each file once per process: concurrent
+        sessions asking for the same file wait on its per-key lock and get
+        the cached result.
         """
         logger.info(f"Loading data from {file_name}")  # Log when data is being loaded
         try:
-            if file_name.endswith(".csv"):
-                df = pd.read_csv(file_name)
-                logger.info(f"Loaded CSV file: {file_name}")
-
-            elif file_name.endswith(".zip"):
-                extracted_files = _self.unzip_data(file_name)
-                csv_file = [f for f in extracted_files if f.endswith(".csv")][0]
-                df = pd.read_csv(csv_file)
-                logger.info(f"Loaded CSV from ZIP: {csv_file}")
-
-            elif file_name.endswith(".xz"):
-                extracted_files = _self.unzip_data(file_name)
-                csv_file = extracted_files[0]
-                df = pd.read_csv(csv_file)
-                logger.info(f"Loaded CSV from XZ: {csv_file}")
-
-            elif file_name.endswith(".pkl"):
-                df = pd.read_pickle(file_name)
-                logger.info(f"Loaded Pickle file: {file_name}")
+            source = os.path.basename(file_name)
+            with track_stage(f"load_data:{source}", source=source) as stage:
+                if file_name.endswith(".csv"):
+                    df = pd.read_csv(file_name)
+                    logger.info(f"Loaded CSV file: {file_name}")
 
-            else:
-                raise ValueError(f"Unsupported file type: {file_name}")
+                elif file_name.endswith(".zip"):
+                    extracted_files = _self.unzip_data(file_name)
+                    csv_file = [f for f in extracted_files if f.endswith(".csv")][0]
+                    df = pd.read_csv(csv_file)
+                    logger.info(f"Loaded CSV from ZIP: {csv_file}")
+
+                elif file_name.endswith(".xz"):
+                    extracted_files = _self.unzip_data(file_name)
+                    csv_file = extracted_files[0]
+                    df = pd.read_csv(csv_file)
+                    logger.info(f"Loaded CSV from XZ: {csv_file}")
 
+                elif file_name.endswith(".pkl"):
+                    df = pd.read_pickle(file_name)
+                    logger.info(f"Loaded Pickle file: {file_name}")
+
+                else:
+                    raise ValueError(f"Unsupported file type: {file_name}")
+                stage.update(describe_result(df))
             return df
 
         except Exception as e:
             logger.error(f"Error while loading data from {file_name}: {e}")
             raise
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _open_csv(file_name: str):
+        """
+        Opens the CSV of a file (CSV, ZIP containing CSV, or XZ containing
+        CSV) as a binary stream, decompressed on the fly from the archives.
+
+        Yields:
+            tuple: `(stream, size)` where `size` is the uncompressed size of
+            the CSV in bytes, or None if unknown.
+        """
+        if file_name.endswith(".csv"):
+            with open(file_name, "rb") as stream:
+                yield stream, os.path.getsize(file_name)
+        elif file_name.endswith(".zip"):
+            with zipfile.ZipFile(file_name, "r") as zip_ref:
+                # Like `load_data`, only the CSV files at the top of the archive
+                members = [
+                    info
+                    for info in zip_ref.infolist()
+                    if info.filename.endswith(".csv") and "/" not in info.filename
+                ]
+                if not members:
+                    raise ValueError(f"No CSV file in {file_name}")
+                with zip_ref.open(members[0]) as stream:
+                    yield stream, members[0].file_size
+        elif file_name.endswith(".xz"):
+            with lzma.open(file_name, "rb") as stream:
+                yield stream, _xz_uncompressed_size(file_name)
+        else:
+            raise ValueError(f"Unsupported file type: {file_name}")
+
+    def peek(
+        self, file_name: str, n_rows: int = 5, sample_rows: int = PEEK_SAMPLE_ROWS
+    ) -> dict:
+        """
+        Inspects a file (CSV, ZIP containing CSV, XZ containing CSV, or
+        Pickle) without loading it: only the header and the first
+        `sample_rows` records are read, streamed from inside the archives
+        without extracting them. A Pickle file cannot be read partially and
+        is loaded whole.
+
+        Args:
+            file_name (str): Path of the file.
+            n_rows (int): Number of rows of `head`.
+            sample_rows (int): Records read to infer the column types and
+            estimate the row count.
+
+        Returns:
+            dict: `head` (the first `n_rows` rows), `columns`, `dtypes`
+            (column -> type inferred from the sample), `rows` (the row
+            count, None if unknown) and `rows_exact` (False when `rows` is
+            estimated from the average size of the sampled records, which
+            assumes the first records are representative of the file).
+
+        Raises:
+            ValueError: If the file type is not supported.
+        """
+        try:
+            if file_name.endswith(".pkl"):
+                sample = pd.read_pickle(file_name)
+                rows, rows_exact = len(sample), True
+            else:
+                with self._open_csv(file_name) as (stream, size):
+                    data, complete = _read_records(stream, sample_rows)
+                sample = pd.read_csv(io.BytesIO(data))
+                header = data.find(b"\n") + 1
+                if complete:
+                    rows, rows_exact = len(sample), True
+                elif size is None:
+                    rows, rows_exact = None, False
+                else:
+                    average = (len(data) - header) / len(sample)
+                    rows, rows_exact = round((size - header) / average), False
+        except Exception as e:
+            logger.error(f"Error while peeking at {file_name}: {e}")
+            raise
+        logger.info(f"Peeked at {file_name}: {len(sample.columns)} columns")
+        return {
+            "head": sample.head(n_rows),
+            "columns": list(sample.columns),
+            "dtypes": {column: str(dtype) for column, dtype in sample.dtypes.items()},
+            "rows": rows,
+            "rows_exact": rows_exact,
+        }
+
+    def iter_chunks(self, file_name: str, chunk_rows: int = CHUNK_ROWS):
+        """
+        Reads a file (CSV, ZIP containing CSV, XZ containing CSV, or Pickle)
+        `chunk_rows` rows at a time, streaming the CSV from inside the
+        archives without extracting them. A Pickle file cannot be read
+        partially and is yielded whole.
+
+        Yields:
+            pd.DataFrame: The successive chunks of the file.
+
+        Raises:
+            ValueError: If the file type is not supported.
+        """
+        if file_name.endswith(".pkl"):
+            yield pd.read_pickle(file_name)
+            return
+        with self._open_csv(file_name) as (stream, _):
+            yield from pd.read_csv(stream, chunksize=chunk_rows)
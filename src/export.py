@@ -0,0 +1,185 @@
+"""
+Chunked export of recipe sets to CSV or Parquet.
+
+A set is written `CHUNK_ROWS` rows at a time: each chunk is serialized and
+written to the output file before the next one, so only one serialized
+chunk is held in memory, whatever the size of the set. Parquet files get
+one row group per chunk. The file is written next to its destination
+and renamed into place, so readers never see a partial export.
+
+Recipe sets (see `RECIPE_SETS`):
+- bio_recipes: RAW_recipes filtered on the bio tags (`df_filtered_bio`)
+- zscore_outliers: preprocessed recipes with a nutrient z-score above 3
+  (`outliers_zscore_df`)
+- top_k: the k healthiest recipes of `combined_df` for a nutrient
+
+Usage (from the repository root):
+    python src/export.py bio_recipes --output bio_recipes.parquet
+    python src/export.py top_k --nutrient "Sugar (g)" --k 1000 --output low_sugar.csv
+"""
+
+import argparse
+import logging
+import os
+import sys
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from nutrition_stats import top_k_recipes
+from ranking import NUTRIENT_OBJECTIVES
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "parquet")
+# Rows serialized at once
+CHUNK_ROWS = 50_000
+DEFAULT_K = 100
+RECIPE_SETS = {
+    "bio_recipes": "Bio recipes",
+    "zscore_outliers": "Z-score outliers",
+    "top_k": "Top k recipes for a nutrient",
+}
+
+
+def recipe_set(
+    name: str, nutrient: str = None, k: int = DEFAULT_K, tables: dict = None
+) -> pd.DataFrame:
+    """
+    Computes one of the `RECIPE_SETS`.
+
+    Args:
+        name (str): Name of the set.
+        nutrient (str): Nutritional component of the "top_k" set.
+        k (int): Number of recipes of the "top_k" set.
+        tables (dict): "df_preprocessed" and "combined_df" tables to use
+        (e.g. read from a snapshot), loaded from the datasets by default.
+
+    Returns:
+        pd.DataFrame: The recipes of the set.
+
+    Raises:
+        KeyError: If `name` or `nutrient` is unknown.
+    """
+    import utils
+
+    tables = tables or {}
+    if name == "bio_recipes":
+        return utils.df_filtered_bio
+    if name == "zscore_outliers":
+        if "df_preprocessed" in tables:
+            return utils.zscore_outliers(tables["df_preprocessed"])[1]
+        return utils.outliers_zscore_df
+    if name == "top_k":
+        if nutrient not in NUTRIENT_OBJECTIVES:
+            raise KeyError(f"Unknown nutrient: '{nutrient}'")
+        if "combined_df" in tables:
+            combined_df = tables["combined_df"]
+        else:
+            import nutrition_stats
+
+            combined_df = nutrition_stats.combined_df
+        # Ranked as in the top 4 figures
+        return top_k_recipes(combined_df, nutrient, k=k)
+    raise KeyError(f"Unknown recipe set: '{name}'")
+
+
+def iter_csv(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS):
+    """
+    Serializes a DataFrame to CSV chunk by chunk (without its index).
+
+    Yields:
+        bytes: The header and the rows of the first chunk, then the rows of
+        each following chunk.
+    """
+    if df.empty:
+        yield df.to_csv(index=False).encode()
+        return
+    for start in range(0, len(df), chunk_rows):
+        end = start + chunk_rows
+        yield df.iloc[start:end].to_csv(index=False, header=start == 0).encode()
+
+
+def write_parquet(df: pd.DataFrame, file, chunk_rows: int = CHUNK_ROWS) -> None:
+    """
+    Writes a DataFrame to Parquet (without its index), one row group per
+    chunk. The schema is inferred from the whole DataFrame, so a chunk of
+    missing values keeps the type of its column.
+
+    Args:
+        df (pd.DataFrame): Data to write.
+        file: Path or binary file object.
+        chunk_rows (int): Rows per row group.
+    """
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(file, schema) as writer:
+        for start in range(0, len(df), chunk_rows):
+            end = start + chunk_rows
+            writer.write_table(
+                pa.Table.from_pandas(
+                    df.iloc[start:end], schema=schema, preserve_index=False
+                )
+            )
+
+
+def export(
+    df: pd.DataFrame, output: str, fmt: str = None, chunk_rows: int = CHUNK_ROWS
+) -> str:
+    """
+    Writes a DataFrame to a CSV or Parquet file in chunks.
+
+    Args:
+        df (pd.DataFrame): Data to export.
+        output (str): Path of the file.
+        fmt (str): One of the `FORMATS`, from the extension of `output` by
+        default.
+        chunk_rows (int): Rows serialized at once.
+
+    Returns:
+        str: The path of the written file.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    fmt = fmt or os.path.splitext(output)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: '{fmt}' (use {FORMATS})")
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+    temporary = f"{output}.tmp-{os.getpid()}"
+    try:
+        with open(temporary, "wb") as file:
+            if fmt == "csv":
+                for chunk in iter_csv(df, chunk_rows):
+                    file.write(chunk)
+            else:
+                write_parquet(df, file, chunk_rows)
+        os.replace(temporary, output)
+    except Exception as e:
+        logger.error(f"Error while exporting {len(df)} rows to {output}: {e}")
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    logger.info(f"Exported {len(df)} rows to {output}")
+    return output
+
+
+def main(argv: list = None) -> int:
+    """Command line entry point: exports a recipe set to a file."""
+    parser = argparse.ArgumentParser(description="Export a recipe set.")
+    parser.add_argument("recipe_set", choices=RECIPE_SETS)
+    parser.add_argument("--output", required=True, help="CSV or Parquet file")
+    parser.add_argument("--format", choices=FORMATS, help="from the extension")
+    parser.add_argument("--nutrient", choices=NUTRIENT_OBJECTIVES, default="Calories")
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    df = recipe_set(args.recipe_set, args.nutrient, args.k)
+    export(df, args.output, args.format, args.chunk_rows)
+    print(f"{len(df)} recipes written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,500 @@
+"""
+Incremental ingestion of interaction and recipe batches.
+
+Batches (CSV or Parquet) are appended to a columnar store, one Parquet part
+per batch, and the aggregates shown by the dashboard are updated from the
+new rows only:
+
+- date_counts: number of interactions per day (interactions histogram)
+- recipe_month_counts: interactions per recipe and month (interactions x
+  tags cube, see interaction_cube.py)
+- recipe_popularity / user_activity: per-recipe and per-user interaction
+  counts (see popularity.py)
+- nutrient_stats: running count, mean and M2 of each nutrient, from which
+  the z-scores of any recipe are computed (see `zscore_outliers`)
+- nutrition_top_k: the k lowest and k highest recipes of each nutrient,
+  enough to draw the top 4 and ratio figures exactly
+
+Each append bumps the version of its dataset, so that the app only drops
+the data derived from that dataset.
+
+Usage (from the repository root):
+    python src/ingestion.py --store store init
+    python src/ingestion.py --store store append interactions new.csv
+    MANGETAMAIN_STORE=store streamlit run src/main.py
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import numpy as np
+import pandas as pd
+from locking import exclusive
+from nutrition_stats import stats_bio
+from outliers import THRESHOLDS
+from popularity import aggregate_interactions, merge_aggregates
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Environment variable naming the store the app reads its aggregates from
+STORE_ENV = "MANGETAMAIN_STORE"
+
+# Columns required in the batches of each dataset
+DATASETS = {
+    "interactions": ["user_id", "recipe_id", "date"],
+    "recipes": ["name", "id", "nutrition"],
+}
+# Aggregates updated by the batches of each dataset
+AGGREGATES = {
+    "interactions": [
+        "date_counts",
+        "recipe_popularity",
+        "user_activity",
+        "recipe_month_counts",
+    ],
+    "recipes": ["nutrient_stats", "nutrition_top_k"],
+}
+# Dashboard items computed from the aggregates of each dataset, dropped by
+# the app when the dataset version changes
+DEPENDENTS = {
+    "interactions": [
+        "interactions",
+        "recipe_popularity",
+        "user_activity",
+        "date_counts",
+        "recipe_month_counts",
+    ],
+    "recipes": ["nutrition_hist", "nutrition_hist_ratio", "store_zscore_outliers"],
+}
+NUTRIENTS = [
+    "Calories",
+    "Total Fat (g)",
+    "Sugar (g)",
+    "Sodium (mg)",
+    "Protein (g)",
+    "Saturated Fat (g)",
+    "Carbohydrates (g)",
+]
+
+
+def read_batch(path: str) -> pd.DataFrame:
+    """
+    Reads a batch file.
+
+    Raises:
+        ValueError: If the file is neither a CSV nor a Parquet file.
+    """
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    raise ValueError(f"Unsupported batch file type: {path}")
+
+
+def count_dates(interactions: pd.DataFrame, date_column: str = "date") -> pd.DataFrame:
+    """
+    Counts the interactions per day; unparsable dates are ignored.
+
+    Returns:
+        pd.DataFrame: `date` (datetime) and `count` columns, sorted by date.
+    """
+    dates = pd.to_datetime(interactions[date_column], errors="coerce").dropna()
+    counts = dates.dt.normalize().value_counts().sort_index()
+    return pd.DataFrame({"date": counts.index, "count": counts.to_numpy()})
+
+
+def merge_date_counts(current: pd.DataFrame, update: pd.DataFrame) -> pd.DataFrame:
+    """Adds two per-day count tables written by `count_dates`."""
+    merged = pd.concat([current, update]).groupby("date", as_index=False)["count"]
+    return merged.sum().sort_values("date", ignore_index=True)
+
+
+def count_recipe_months(
+    interactions: pd.DataFrame, date_column: str = "date"
+) -> pd.DataFrame:
+    """
+    Counts the interactions per recipe and month; unparsable dates are
+    ignored.
+
+    Returns:
+        pd.DataFrame: `recipe_id`, `month` (first day of the month) and
+        `count` columns, sorted by recipe and month.
+    """
+    dates = pd.to_datetime(interactions[date_column], errors="coerce")
+    valid = dates.notna()
+    keys = pd.DataFrame(
+        {
+            "recipe_id": interactions["recipe_id"][valid].to_numpy(),
+            "month": dates[valid].dt.to_period("M").dt.to_timestamp().to_numpy(),
+        }
+    )
+    counts = keys.groupby(["recipe_id", "month"]).size()
+    return counts.rename("count").reset_index()
+
+
+def merge_recipe_month_counts(
+    current: pd.DataFrame, update: pd.DataFrame
+) -> pd.DataFrame:
+    """Adds two per-recipe and month count tables of `count_recipe_months`."""
+    merged = pd.concat([current, update]).groupby(["recipe_id", "month"])["count"]
+    return merged.sum().reset_index()
+
+
+def nutrient_stats(nutrients: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes the count, mean and sum of squared deviations (M2) of each
+    nutrient column, the mergeable state of a running standard deviation.
+
+    Returns:
+        pd.DataFrame: One row per nutrient, indexed by nutrient name.
+    """
+    values = nutrients[NUTRIENTS]
+    mean = values.mean()
+    return pd.DataFrame(
+        {
+            "count": values.count().astype(np.int64),
+            "mean": mean.fillna(0.0),
+            "m2": ((values - mean) ** 2).sum(),
+        }
+    )
+
+
+def merge_nutrient_stats(current: pd.DataFrame, update: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merges two `nutrient_stats` tables as if computed over the union of
+    their rows (parallel variance formula of Chan et al.).
+    """
+    count = current["count"] + update["count"]
+    safe_count = count.where(count > 0, 1)
+    delta = update["mean"] - current["mean"]
+    mean = current["mean"] + delta * update["count"] / safe_count
+    m2 = current["m2"] + update["m2"]
+    m2 = m2 + delta**2 * current["count"] * update["count"] / safe_count
+    return pd.DataFrame({"count": count, "mean": mean, "m2": m2})
+
+
+def zscores(nutrients: pd.DataFrame, stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes the z-scores of recipes against running `nutrient_stats`
+    (population standard deviation, as `scipy.stats.zscore`).
+    """
+    std = np.sqrt(stats["m2"] / stats["count"].where(stats["count"] > 0))
+    return (nutrients[NUTRIENTS] - stats["mean"]) / std
+
+
+def top_k_nutrients(nutrients: pd.DataFrame, k: int = 4) -> pd.DataFrame:
+    """
+    Keeps the recipes among the k lowest or k highest of any nutrient,
+    ties included, in their original order.
+
+    The top 4 and ratio figures only look at these rows and break ties by
+    row order, so building them from this table gives the same result as
+    from the full `combined_df`.
+    """
+    positions = set()
+    for nutrient in NUTRIENTS:
+        column = nutrients[nutrient].reset_index(drop=True)
+        positions.update(column.nsmallest(k, keep="all").index)
+        positions.update(column.nlargest(k, keep="all").index)
+    selected = nutrients.iloc[sorted(positions)]
+    return selected[["name", "id", *NUTRIENTS]].reset_index(drop=True)
+
+
+def _write_table(table: pd.DataFrame, path: str) -> None:
+    """Writes a Parquet file atomically (temporary file then rename)."""
+    temporary = f"{path}.tmp-{os.getpid()}"
+    table.to_parquet(temporary)
+    os.replace(temporary, path)
+
+
+class DatasetStore:
+    """
+    Append-only columnar store of the interaction and recipe batches, with
+    incrementally maintained aggregates and per-dataset versions.
+
+    Layout of the store directory:
+
+    - state.json: version and number of parts of each dataset
+    - <dataset>/part-<n>.parquet: one file per appended batch
+    - aggregates/<name>.parquet: the aggregates listed in `AGGREGATES`
+
+    Appends are serialized by a file lock, so several processes may ingest
+    into the same store. Files are renamed into place once complete and
+    readers only list the parts recorded in state.json, so they never see
+    a partial batch.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def state(self) -> dict:
+        """Returns the version and number of parts of each dataset."""
+        try:
+            with open(self._path("state.json")) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {name: {"version": 0, "parts": 0} for name in DATASETS}
+
+    def versions(self) -> dict:
+        """Returns the current version of each dataset (0 when empty)."""
+        return {name: entry["version"] for name, entry in self.state().items()}
+
+    def read(self, dataset: str, columns: list = None) -> pd.DataFrame:
+        """
+        Reads every batch of a dataset.
+
+        Args:
+            dataset (str): "interactions" or "recipes".
+            columns (list): Optional subset of columns to read.
+
+        Returns:
+            pd.DataFrame: The concatenated batches, in append order.
+        """
+        parts = self.state()[dataset]["parts"]
+        frames = [
+            pd.read_parquet(
+                self._path(dataset, f"part-{n:05d}.parquet"), columns=columns
+            )
+            for n in range(parts)
+        ]
+        if not frames:
+            return pd.DataFrame(columns=columns or DATASETS[dataset])
+        return pd.concat(frames, ignore_index=True)
+
+    def aggregate(self, name: str) -> pd.DataFrame:
+        """
+        Reads an aggregate table.
+
+        Raises:
+            FileNotFoundError: If no batch has produced it yet.
+        """
+        return pd.read_parquet(self._path("aggregates", f"{name}.parquet"))
+
+    def append(self, dataset: str, batch: pd.DataFrame) -> int:
+        """
+        Appends a batch to a dataset, updates its aggregates from the new
+        rows only and bumps the dataset version.
+
+        Args:
+            dataset (str): "interactions" or "recipes".
+            batch (pd.DataFrame): New rows, with the columns of `DATASETS`.
+
+        Returns:
+            int: The new version of the dataset.
+
+        Raises:
+            KeyError: If the dataset is unknown or a column is missing.
+        """
+        if dataset not in DATASETS:
+            raise KeyError(f"Unknown dataset: '{dataset}'")
+        for column in DATASETS[dataset]:
+            if column not in batch.columns:
+                raise KeyError(f"The column '{column}' is not in the DataFrame.")
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            with exclusive(self._path(".lock")):
+                state = self.state()
+                entry = state[dataset]
+                os.makedirs(self._path(dataset), exist_ok=True)
+                os.makedirs(self._path("aggregates"), exist_ok=True)
+                part = f"part-{entry['parts']:05d}.parquet"
+                _write_table(batch.reset_index(drop=True), self._path(dataset, part))
+                for name, table in self._updated_aggregates(dataset, batch).items():
+                    _write_table(table, self._path("aggregates", f"{name}.parquet"))
+                state[dataset] = {
+                    "version": entry["version"] + 1,
+                    "parts": entry["parts"] + 1,
+                }
+                temporary = self._path(f"state.json.tmp-{os.getpid()}")
+                with open(temporary, "w") as file:
+                    json.dump(state, file, indent=2)
+                os.replace(temporary, self._path("state.json"))
+        except Exception as e:
+            logger.error(f"Error while appending a batch to {dataset}: {e}")
+            raise
+        logger.info(
+            f"Appended {len(batch)} rows to {dataset} "
+            f"(version {state[dataset]['version']})"
+        )
+        return state[dataset]["version"]
+
+    def recipe_month_counts(self) -> pd.DataFrame:
+        """
+        Reads the interactions per recipe and month, counted from the
+        stored batches when they were appended before this aggregate
+        existed.
+
+        Raises:
+            FileNotFoundError: If no interactions batch was appended yet.
+        """
+        try:
+            return self.aggregate("recipe_month_counts")
+        except FileNotFoundError:
+            if not self.state()["interactions"]["parts"]:
+                raise
+            logger.info("Counting the stored interactions per recipe and month")
+            return count_recipe_months(self.read("interactions", ["recipe_id", "date"]))
+
+    def user_activity(self) -> pd.DataFrame:
+        """
+        Reads the per-user interaction aggregates, computed from the stored
+        batches when they were appended before this aggregate existed.
+
+        Raises:
+            FileNotFoundError: If no interactions batch was appended yet.
+        """
+        try:
+            return self.aggregate("user_activity")
+        except FileNotFoundError:
+            if not self.state()["interactions"]["parts"]:
+                raise
+            logger.info("Aggregating the stored interactions per user")
+            return aggregate_interactions(
+                self.read("interactions", ["user_id", "date"]), "user_id"
+            )
+
+    def _current(
+        self, name: str, update: pd.DataFrame, merge, read=None
+    ) -> pd.DataFrame:
+        """
+        Merges `update` into the stored aggregate (read by `read`, if given),
+        if there is one.
+        """
+        try:
+            current = read() if read else self.aggregate(name)
+        except FileNotFoundError:
+            return update
+        return merge(current, update)
+
+    def _updated_aggregates(self, dataset: str, batch: pd.DataFrame) -> dict:
+        """Computes the aggregates of a batch and merges them into the store."""
+        if dataset == "interactions":
+            return {
+                "date_counts": self._current(
+                    "date_counts", count_dates(batch), merge_date_counts
+                ),
+                "recipe_popularity": self._current(
+                    "recipe_popularity",
+                    aggregate_interactions(batch, "recipe_id"),
+                    lambda current, update: merge_aggregates(
+                        current, update, "recipe_id"
+                    ),
+                ),
+                "user_activity": self._current(
+                    "user_activity",
+                    aggregate_interactions(batch, "user_id"),
+                    lambda current, update: merge_aggregates(
+                        current, update, "user_id"
+                    ),
+                    self.user_activity,
+                ),
+                "recipe_month_counts": self._current(
+                    "recipe_month_counts",
+                    count_recipe_months(batch),
+                    merge_recipe_month_counts,
+                    self.recipe_month_counts,
+                ),
+            }
+        nutrients = stats_bio(batch)
+        return {
+            "nutrient_stats": self._current(
+                "nutrient_stats", nutrient_stats(nutrients), merge_nutrient_stats
+            ),
+            "nutrition_top_k": self._current(
+                "nutrition_top_k",
+                top_k_nutrients(nutrients),
+                lambda current, update: top_k_nutrients(
+                    pd.concat([current, update], ignore_index=True)
+                ),
+            ),
+        }
+
+
+def zscore_outliers(
+    store: DatasetStore, threshold: float = THRESHOLDS["zscore"]
+) -> pd.DataFrame:
+    """
+    Returns the stored recipes with a nutrient whose absolute z-score,
+    against the running `nutrient_stats` of the store, is above `threshold`.
+    The mean and standard deviation are not computed over the batches again.
+
+    Returns:
+        pd.DataFrame: `name`, `id` and the nutrients of the flagged recipes.
+    """
+    nutrients = stats_bio(store.read("recipes", DATASETS["recipes"]))
+    scores = zscores(nutrients, store.aggregate("nutrient_stats"))
+    flagged = (scores.abs() > threshold).any(axis=1)
+    return nutrients.loc[flagged, ["name", "id", *NUTRIENTS]].reset_index(drop=True)
+
+
+def build_dashboard_item(store: DatasetStore, name: str):
+    """
+    Computes one of the dashboard items listed in `DEPENDENTS` from the
+    aggregates of the store, without reading the batches.
+
+    Raises:
+        KeyError: If `name` is not computed from the store.
+    """
+    from visualisation import graphs, graphs_nutrition
+
+    if name == "interactions":
+        return graphs.build_interactions_figure_from_counts(
+            store.aggregate("date_counts")
+        )
+    if name == "recipe_popularity":
+        return store.aggregate("recipe_popularity")
+    if name == "user_activity":
+        return store.user_activity()
+    if name == "date_counts":
+        return store.aggregate("date_counts")
+    if name == "recipe_month_counts":
+        return store.recipe_month_counts()
+    if name == "nutrition_hist":
+        return graphs_nutrition.plot_top_4_recipes_by_nutrition(
+            store.aggregate("nutrition_top_k"), NUTRIENTS
+        )
+    if name == "nutrition_hist_ratio":
+        return graphs_nutrition.nutrition_bar_ratio_sodium_proteins(
+            store.aggregate("nutrition_top_k"), NUTRIENTS
+        )
+    if name == "store_zscore_outliers":
+        return zscore_outliers(store)
+    raise KeyError(f"Unknown store item: '{name}'")
+
+
+def main(argv: list = None) -> int:
+    """
+    Command line entry point: `init` ingests the preprocessed datasets as
+    the first batches, `append` ingests a new batch file.
+    """
+    parser = argparse.ArgumentParser(description="Ingest dataset batches.")
+    parser.add_argument("--store", default="store", help="store directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init", help="ingest the preprocessed datasets")
+    append_parser = commands.add_parser("append", help="ingest a batch file")
+    append_parser.add_argument("dataset", choices=DATASETS)
+    append_parser.add_argument("path", help="CSV or Parquet batch")
+    args = parser.parse_args(argv)
+
+    store = DatasetStore(args.store)
+    if args.command == "init":
+        batches = {
+            "recipes": "preprocessed_data/PP_recipes_mangetamain.csv",
+            "interactions": "preprocessed_data/PP_interactions_mangetamain.csv",
+        }
+    else:
+        batches = {args.dataset: args.path}
+    for dataset, path in batches.items():
+        version = store.append(dataset, read_batch(path))
+        print(f"{dataset}: {path} ingested, version {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# Stage records go through the handlers configured by log_config
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """
+    Returns the resident set size of the process in bytes.
+
+    Reads /proc/self/statm on Linux; elsewhere falls back to the peak RSS
+    reported by `resource`, or 0 when neither is available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def describe_result(result) -> dict:
+    """
+    Returns the number of rows and the shallow size in bytes of a stage
+    result (DataFrame, Series, NumPy array or sized container).
+    """
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return {"rows": len(result), "bytes": int(result.memory_usage().sum())}
+    if isinstance(result, np.ndarray):
+        return {"rows": len(result), "bytes": int(result.nbytes)}
+    if isinstance(result, tuple) and result:
+        return describe_result(result[-1])
+    if hasattr(result, "__len__"):
+        return {"rows": len(result), "bytes": None}
+    return {"rows": None, "bytes": None}
+
+
+class PerformanceTracker:
+    """
+    Keeps the most recent stage records in memory (thread-safe) and
+    summarises them per stage for the "Performance" panel.
+    """
+
+    def __init__(self, max_records: int = 1000) -> None:
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def add(self, record: dict) -> None:
+        """Appends a stage record, dropping the oldest one when full."""
+        with self._lock:
+            self._records.append(record)
+
+    def records(self) -> list:
+        """Returns a copy of the stored records, oldest first."""
+        with self._lock:
+            return list(self._records)
+
+    def clear(self) -> None:
+        """Forgets every stored record."""
+        with self._lock:
+            self._records.clear()
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Aggregates the stored records per stage.
+
+        Returns:
+            pd.DataFrame: One row per stage, slowest total first, with the
+            number of calls, mean/max/last wall time, total CPU time, rows
+            and bytes of the last call and the largest RSS increase.
+        """
+        records = pd.DataFrame(self.records())
+        if records.empty:
+            return pd.DataFrame(
+                columns=[
+                    "stage",
+                    "calls",
+                    "wall_mean_s",
+                    "wall_max_s",
+                    "wall_last_s",
+                    "cpu_total_s",
+                    "rows_last",
+                    "mb_last",
+                    "rss_delta_max_mb",
+                ]
+            )
+        grouped = records.groupby("stage", sort=False)
+        summary = pd.DataFrame(
+            {
+                "calls": grouped.size(),
+                "wall_mean_s": grouped["wall_s"].mean(),
+                "wall_max_s": grouped["wall_s"].max(),
+                "wall_last_s": grouped["wall_s"].last(),
+                "wall_total_s": grouped["wall_s"].sum(),
+                "cpu_total_s": grouped["cpu_s"].sum(),
+                "rows_last": grouped["rows"].last(),
+                "mb_last": grouped["bytes"].last() / 2**20,
+                "rss_delta_max_mb": grouped["rss_delta"].max() / 2**20,
+            }
+        )
+        summary = summary.sort_values("wall_total_s", ascending=False)
+        return summary.drop(columns="wall_total_s").reset_index()
+
+
+# Process-wide tracker shared by every Streamlit session
+tracker = PerformanceTracker()
+
+
+@contextmanager
+def track_stage(stage: str, **fields):
+    """
+    Measures a load/transform/figure stage: wall time, CPU time, RSS delta
+    and, when the caller fills them in, rows and bytes.
+
+    The record is kept by `tracker` and logged at INFO level with its
+    fields attached to the log record (`extra`), so formatters can emit
+    them as structured data.
+
+    Args:
+        stage (str): Name of the stage, e.g. "load_data".
+        **fields: Extra fields stored with the record (e.g. source file).
+
+    Yields:
+        dict: Mutable record where the caller may set `rows` and `bytes`.
+
+    Example:
+        with track_stage("stats_bio") as stage:
+            combined_df = stats_bio(df)
+            stage["rows"] = len(combined_df)
+    """
+    record = {"stage": stage, "rows": None, "bytes": None, **fields}
+    rss_before = current_rss()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    status = "ok"
+    try:
+        yield record
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        record.update(
+            {
+                "wall_s": time.perf_counter() - wall_start,
+                "cpu_s": time.process_time() - cpu_start,
+                "rss_delta": current_rss() - rss_before,
+                "status": status,
+                "timestamp": time.time(),
+            }
+        )
+        tracker.add(record)
+        logger.info(
+            f"stage={stage} status={status} wall={record['wall_s']:.4f}s "
+            f"cpu={record['cpu_s']:.4f}s rows={record['rows']} "
+            f"bytes={record['bytes']} rss_delta={record['rss_delta']}",
+            extra={"perf": dict(record)},
+        )
+
+
+def instrumented(stage: str = None):
+    """
+    Decorator recording every call of a function with `track_stage`; rows
+    and bytes are taken from the returned value (see `describe_result`).
+
+    Args:
+        stage (str): Stage name, defaults to the function name.
+    """
+
+    def decorator(func):
+        name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track_stage(name) as record:
+                result = func(*args, **kwargs)
+                record.update(describe_result(result))
+            return result
+
+        return wrapper
+
+    return decorator
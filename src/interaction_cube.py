@@ -0,0 +1,334 @@
+"""
+Precomputed aggregates of the interactions over time.
+
+`DailyInteractions` holds the number of interactions of every day between
+the first and the last interaction in one dense array (a few thousand
+values rather than a row per interaction). It is built once from the
+per-day counts (`ingestion.count_dates`, the "date_counts" table of the
+snapshots and aggregate of the ingestion store), and its views are
+computed with vectorized NumPy over that array:
+
+- rolling means over a window of days
+- totals per year and month, and their year-over-year change
+- the mean number of interactions per day, per weekday and month
+
+`TagCube` crosses the interactions with the recipe tags: the interactions
+per month and recipe (the "recipe_month_counts" table) are held in a
+sparse months x recipes matrix and the tags in a sparse recipes x tags
+matrix, so that the interactions of any set of tags, over any period,
+rolled up per month or year, take a sparse product instead of a join of
+every interaction with the tags of its recipe.
+"""
+
+import logging
+import re
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+MONTHS = [
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+]
+
+
+class DailyInteractions:
+    """
+    Number of interactions per day, from `start` to the last day with an
+    interaction; the days without interactions count 0.
+
+    Args:
+        start (np.datetime64): First day.
+        counts (np.ndarray): Interactions of each day from `start`.
+
+    Example:
+        daily = DailyInteractions.from_counts(count_dates(interactions))
+        monthly_mean = daily.rolling_mean(30)
+    """
+
+    def __init__(self, start: np.datetime64, counts: np.ndarray) -> None:
+        self.start = np.datetime64(start, "D")
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.dates = self.start + np.arange(len(self.counts))
+        self._years = self.dates.astype("datetime64[Y]").astype(np.int64) + 1970
+        self._months = self.dates.astype("datetime64[M]").astype(np.int64) % 12
+        # 1970-01-01 was a Thursday
+        self._weekdays = (self.dates.astype(np.int64) + 3) % 7
+
+    @classmethod
+    def from_counts(cls, date_counts: pd.DataFrame) -> "DailyInteractions":
+        """
+        Builds the dense array from per-day counts (`date` and `count`
+        columns, in any order, a day possibly repeated).
+        """
+        dates = pd.to_datetime(date_counts["date"]).to_numpy().astype("datetime64[D]")
+        if len(dates) == 0:
+            return cls(np.datetime64("1970-01-01"), np.zeros(0, dtype=np.int64))
+        start = dates.min()
+        positions = (dates - start).astype(np.int64)
+        counts = np.bincount(positions, weights=date_counts["count"].to_numpy())
+        daily = cls(start, counts.round().astype(np.int64))
+        logger.info(
+            f"Daily interactions: {len(daily)} days, {daily.counts.sum()} interactions"
+        )
+        return daily
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """
+        Returns the mean number of interactions over the `window` days
+        ending on each day, NaN for the first `window - 1` days.
+
+        Raises:
+            ValueError: If `window` is not positive.
+        """
+        if window < 1:
+            raise ValueError(f"The window must be positive, got {window}")
+        means = np.full(len(self), np.nan)
+        if window <= len(self):
+            sums = np.concatenate(([0], np.cumsum(self.counts)))
+            first, stop = window - 1, len(sums) - window
+            means[first:] = (sums[window:] - sums[:stop]) / window
+        return means
+
+    def monthly_totals(self) -> tuple:
+        """
+        Returns the interactions per year and month. The months the array
+        only partly covers (before the first or after the last day) are
+        NaN, so that they are not compared with complete months.
+
+        Returns:
+            tuple: `(years, totals)` where `totals[i, m]` holds the
+            interactions of month `m` (0 for January) of `years[i]`.
+        """
+        if not len(self):
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 12))
+        first = self._years[0]
+        years = np.arange(first, self._years[-1] + 1)
+        cells = (self._years - first) * 12 + self._months
+        size = len(years) * 12
+        totals = np.bincount(cells, weights=self.counts, minlength=size)
+        covered = np.bincount(cells, minlength=size)
+        months = np.datetime64(f"{first}-01", "M") + np.arange(size)
+        days = (months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")
+        totals[covered < days.astype(np.int64)] = np.nan
+        return years, totals.reshape(len(years), 12)
+
+    def year_over_year(self) -> tuple:
+        """
+        Returns the relative change of the monthly totals from the same
+        month of the previous year (0.1 for +10%), NaN when either month is
+        incomplete or the previous one has no interactions.
+
+        Returns:
+            tuple: `(years, changes)`, from the second year of the array.
+        """
+        years, totals = self.monthly_totals()
+        previous, current = totals[:-1], totals[1:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            changes = np.where(previous > 0, current / previous - 1, np.nan)
+        return years[1:], changes
+
+    def seasonality(self) -> np.ndarray:
+        """
+        Returns the mean number of interactions per day for each weekday
+        (rows, Monday first) and month (columns, January first), NaN for
+        the combinations the array does not cover.
+        """
+        cells = self._weekdays * 12 + self._months
+        totals = np.bincount(cells, weights=self.counts, minlength=84)
+        days = np.bincount(cells, minlength=84)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(days > 0, totals / days, np.nan).reshape(7, 12)
+
+
+class TagCube:
+    """
+    Interactions per month and recipe tag.
+
+    The recipes are kept as a dimension, so that the interactions of a set
+    of tags count each interaction once even when its recipe has several
+    of these tags. The per-tag counts (`tag_counts`) count it once per tag.
+
+    Args:
+        start (np.datetime64): First month.
+        counts (sparse.csr_matrix): Interactions of each month (rows, from
+        `start`) and recipe (columns).
+        tags (np.ndarray): Name of each tag.
+        membership (sparse.csr_matrix): 1 where a recipe (rows) has a tag
+        (columns).
+
+    Example:
+        cube = TagCube.from_tables(recipe_month_counts, all_recipe_tags)
+        years, counts = cube.roll_up(cube.tag_interactions(["vegan"]))
+    """
+
+    def __init__(
+        self,
+        start: np.datetime64,
+        counts: sparse.csr_matrix,
+        tags: np.ndarray,
+        membership: sparse.csr_matrix,
+    ) -> None:
+        self.start = np.datetime64(start, "M")
+        self.counts = sparse.csr_matrix(counts, dtype=np.int64)
+        self.tags = np.asarray(tags, dtype=object)
+        self.membership = sparse.csr_matrix(membership, dtype=np.int64)
+        self.months = self.start + np.arange(self.counts.shape[0])
+        self.years = self.months.astype("datetime64[Y]").astype(np.int64) + 1970
+        self.totals = np.asarray(self.counts.sum(axis=1)).ravel()
+        self.tag_counts = (self.counts @ self.membership).toarray()
+
+    @classmethod
+    def from_tables(
+        cls, recipe_month_counts: pd.DataFrame, recipe_tags: pd.DataFrame
+    ) -> "TagCube":
+        """
+        Builds the cube from the interactions per recipe and month
+        (`recipe_id`, `month` and `count` columns) and the tags of the
+        recipes (`id` and `tags` columns, lists of tags). The recipes
+        without tags only count in the totals.
+        """
+        months = pd.to_datetime(recipe_month_counts["month"]).to_numpy()
+        months = months.astype("datetime64[M]")
+        recipe_codes, recipe_ids = pd.factorize(recipe_month_counts["recipe_id"])
+        start = months.min() if len(months) else np.datetime64("1970-01", "M")
+        rows = (months - start).astype(np.int64)
+        counts = sparse.csr_matrix(
+            (recipe_month_counts["count"].to_numpy(np.int64), (rows, recipe_codes)),
+            shape=(rows.max() + 1 if len(rows) else 0, len(recipe_ids)),
+        )
+        # Only the tags of the recipes having interactions are kept
+        tagged = recipe_tags[["id", "tags"]].explode("tags").dropna()
+        positions = recipe_ids.get_indexer(tagged["id"])
+        tagged = tagged[positions >= 0]
+        tag_codes, tags = pd.factorize(tagged["tags"], sort=True)
+        membership = sparse.csr_matrix(
+            (np.ones(len(tagged), np.int64), (positions[positions >= 0], tag_codes)),
+            shape=(len(recipe_ids), len(tags)),
+        )
+        # A tag listed twice for a recipe is one tag
+        membership.data[:] = 1
+        cube = cls(start, counts, tags.to_numpy(), membership)
+        logger.info(
+            f"Tags cube: {len(cube)} months, {len(recipe_ids)} recipes, "
+            f"{len(tags)} tags, {cube.totals.sum()} interactions"
+        )
+        return cube
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    def matching_tags(self, keywords: list) -> np.ndarray:
+        """
+        Returns the mask of the tags containing any of the keywords, case
+        insensitive (the matching of `utils.filter_dataframebis1`).
+        """
+        if not keywords:
+            return np.zeros(len(self.tags), dtype=bool)
+        pattern = "|".join(map(re.escape, keywords))
+        return (
+            pd.Series(self.tags, dtype=object)
+            .str.contains(pattern, case=False, regex=True)
+            .to_numpy(dtype=bool)
+        )
+
+    def tag_interactions(self, tags) -> np.ndarray:
+        """
+        Returns the interactions per month of the recipes having at least
+        one of `tags` (tag names, or a mask over `self.tags`).
+        """
+        mask = np.asarray(tags)
+        if mask.dtype != bool:
+            mask = np.isin(self.tags, mask)
+        recipes = (self.membership @ mask.astype(np.int64)) > 0
+        return self.counts @ recipes.astype(np.int64)
+
+    def period(self, start=None, end=None) -> slice:
+        """
+        Returns the slice of the months from `start` to `end` included,
+        years or months such as "2008" or "2008-06", from the first or to
+        the last month when not given.
+        """
+        first, stop = 0, len(self)
+        if start is not None:
+            first = self._offset(np.datetime64(start))
+        if end is not None:
+            # The month following the end year or month
+            stop = self._offset(np.datetime64(end) + 1)
+        return slice(min(max(first, 0), len(self)), min(max(stop, 0), len(self)))
+
+    def _offset(self, date: np.datetime64) -> int:
+        """Returns the position of the month of `date` from `start`."""
+        return int((date.astype("datetime64[M]") - self.start).astype(np.int64))
+
+    def roll_up(self, monthly: np.ndarray, level: str = "year") -> tuple:
+        """
+        Sums values per month (first axis) per year, or leaves them per
+        month.
+
+        Args:
+            monthly (np.ndarray): Values of each month of the cube.
+            level (str): "year" or "month".
+
+        Returns:
+            tuple: `(periods, values)`, the years or months and their sums.
+
+        Raises:
+            ValueError: If `level` is neither "year" nor "month".
+        """
+        if level == "month":
+            return self.months, monthly
+        if level != "year":
+            raise ValueError(f"Unknown level: '{level}'")
+        if not len(self):
+            return np.zeros(0, dtype=np.int64), monthly
+        starts = np.flatnonzero(np.diff(self.years, prepend=self.years[0] - 1))
+        return self.years[starts], np.add.reduceat(monthly, starts, axis=0)
+
+    def top_tags(self, n: int = 10, start=None, end=None) -> pd.Series:
+        """
+        Returns the `n` tags with the most interactions from `start` to
+        `end` (see `period`), with their interactions.
+        """
+        totals = self.tag_counts[self.period(start, end)].sum(axis=0)
+        order = np.argsort(-totals, kind="stable")[:n]
+        return pd.Series(totals[order], index=self.tags[order], name="interactions")
+
+    def compare(self, tags, level: str = "year") -> pd.DataFrame:
+        """
+        Splits the interactions between the recipes having at least one of
+        `tags` (see `tag_interactions`) and the others.
+
+        Returns:
+            pd.DataFrame: `period`, `tagged` and `other` interactions and
+            the `share` of tagged ones (NaN without interactions).
+        """
+        periods, tagged = self.roll_up(self.tag_interactions(tags), level)
+        _, totals = self.roll_up(self.totals, level)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(totals > 0, tagged / totals, np.nan)
+        return pd.DataFrame(
+            {
+                "period": periods,
+                "tagged": tagged,
+                "other": totals - tagged,
+                "share": share,
+            }
+        )
@@ -0,0 +1,66 @@
+import sys
+import threading
+
+
+def lazy_attributes(namespace: dict, loaders: dict):
+    """
+    Builds a module-level `__getattr__` (PEP 562) computing the datasets of
+    a module on first access instead of at import time.
+
+    Once computed, a value is stored in the module globals, so later
+    accesses are plain attribute lookups. Each value has its own lock:
+    concurrent threads compute it only once, while independent values can
+    be computed in parallel.
+
+    Args:
+        namespace (dict): The `globals()` of the module.
+        loaders (dict): Attribute name -> function receiving the module and
+        returning the value. A tuple of names maps to a function returning
+        one value per name.
+
+    Returns:
+        function: The `__getattr__` to assign in the module.
+
+    Example:
+        __getattr__ = lazy_attributes(
+            globals(), {"df": lambda module: module.data_loader.load_data(path)}
+        )
+    """
+    locks = {key: threading.RLock() for key in loaders}
+    keys = {}
+    for key in loaders:
+        for name in key if isinstance(key, tuple) else (key,):
+            keys[name] = key
+
+    def __getattr__(name: str):
+        key = keys.get(name)
+        if key is None:
+            raise AttributeError(
+                f"module '{namespace['__name__']}' has no attribute '{name}'"
+            )
+        with locks[key]:
+            if name not in namespace:
+                value = loaders[key](sys.modules[namespace["__name__"]])
+                if isinstance(key, tuple):
+                    namespace.update(zip(key, value))
+                else:
+                    namespace[key] = value
+        return namespace[name]
+
+    def reset() -> None:
+        """Drops the computed values, computed again on next access."""
+        for key, lock in locks.items():
+            with lock:
+                for name in key if isinstance(key, tuple) else (key,):
+                    namespace.pop(name, None)
+
+    __getattr__.reset = reset
+    return __getattr__
+
+
+def reset_lazy_attributes(module) -> None:
+    """
+    Drops the values computed by the `lazy_attributes` of a module, e.g.
+    when the dataset they were loaded from changed.
+    """
+    module.__getattr__.reset()
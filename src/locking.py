@@ -0,0 +1,37 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the threads of this process are serialized
+    fcntl = None
+
+# One lock per lock file path, shared by the threads of this process
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+@contextmanager
+def exclusive(lock_path: str):
+    """
+    Holds an exclusive lock on `lock_path`: threads of this process queue
+    on an in-process lock, other processes on an `flock` of the lock file
+    (created if needed).
+
+    Example:
+        with exclusive("dataset/RAW_recipes.csv_extracted.lock"):
+            ...  # extract the archive once
+    """
+    with _locks_guard:
+        lock = _locks.setdefault(os.path.abspath(lock_path), threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        with open(lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -1,5 +1,39 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Environment variables read by setup_logging
+LOG_LEVELS_ENV = "MANGETAMAIN_LOG_LEVELS"
+LOG_ROTATION_ENV = "MANGETAMAIN_LOG_ROTATION"
+LOG_MAX_BYTES_ENV = "MANGETAMAIN_LOG_MAX_BYTES"
+LOG_BACKUP_COUNT_ENV = "MANGETAMAIN_LOG_BACKUP_COUNT"
+LOG_WHEN_ENV = "MANGETAMAIN_LOG_WHEN"
+LOG_FORMAT_ENV = "MANGETAMAIN_LOG_FORMAT"
+LOG_SAMPLING_ENV = "MANGETAMAIN_LOG_SAMPLING"
+LOG_RATE_LIMIT_ENV = "MANGETAMAIN_LOG_RATE_LIMIT"
+
+# Fields of the `perf` record attached by instrumentation.track_stage,
+# renamed for the JSON output
+PERF_FIELDS = {
+    "stage": "stage",
+    "wall_s": "duration",
+    "cpu_s": "cpu",
+    "rows": "rows",
+    "bytes": "bytes",
+    "rss_delta": "rss_delta",
+    "status": "status",
+}
+
+# Background thread writing the queued records to the log files
+_listener = None
 
 
 class MaxLevelFilter(logging.Filter):
@@ -15,19 +49,245 @@ class MaxLevelFilter(logging.Filter):
         return record.levelno <= self.max_level
 
 
-def setup_logging() -> None:
+class SessionContextFilter(logging.Filter):
+    """
+    Adds the id of the Streamlit session emitting the record (None outside
+    a script run). Must run in the calling thread, i.e. on the QueueHandler.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = get_script_run_ctx(suppress_warning=True)
+        record.session_id = ctx.session_id if ctx is not None else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the DEBUG/INFO records of the configured
+    loggers (and their children); WARNING and above are always kept.
+    Kept records carry their `sample_rate` so counts can be re-weighted.
+    """
+
+    def __init__(self, rates: dict, rng=random.random) -> None:
+        self.rates = rates
+        self.rng = rng
+        super().__init__()
+
+    def _rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return self.rates.get("root", 1.0)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0:
+            return True
+        record.sample_rate = rate
+        return self.rng() < rate
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `max_records` DEBUG/INFO records per call site
+    (logger, file and line) in each `period` seconds; WARNING and above
+    are always kept, and so are the stage measurements (records with a
+    `perf` attribute), which all come from one call site and are
+    aggregated offline. The first record of a new window carries the
+    number of records dropped during the previous one (`suppressed`).
+    """
+
+    def __init__(self, max_records: int, period: float, clock=time.monotonic) -> None:
+        self.max_records = max_records
+        self.period = period
+        self.clock = clock
+        self._windows = {}
+        self._lock = threading.Lock()
+        super().__init__()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or hasattr(record, "perf"):
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = self.clock()
+        with self._lock:
+            start, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - start >= self.period:
+                if suppressed:
+                    record.suppressed = suppressed
+                start, count, suppressed = now, 0, 0
+            if count < self.max_records:
+                self._windows[key] = (start, count + 1, suppressed)
+                return True
+            self._windows[key] = (start, count, suppressed + 1)
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line: time, level, logger,
+    message and session id, plus the stage measurements (stage, duration,
+    rows...) when the record comes from instrumentation.track_stage.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "session_id": getattr(record, "session_id", None),
+        }
+        perf = getattr(record, "perf", None) or {}
+        for field, name in PERF_FIELDS.items():
+            if field in perf:
+                entry[name] = perf[field]
+        for name in ("sample_rate", "suppressed"):
+            if hasattr(record, name):
+                entry[name] = getattr(record, name)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_log_levels(spec: str) -> dict:
+    """
+    Parses a per-module level specification such as
+    "data_loader=INFO,instrumentation=WARNING,root=DEBUG".
+
+    Args:
+        spec (str): Comma-separated `logger=LEVEL` pairs.
+
+    Returns:
+        dict: Logger name -> numeric level ("root" is the root logger).
+
+    Raises:
+        ValueError: If a pair is malformed or a level is unknown.
+    """
+    levels = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, separator, level = item.partition("=")
+        numeric_level = logging.getLevelName(level.strip().upper())
+        if not separator or not name.strip() or not isinstance(numeric_level, int):
+            raise ValueError(f"Invalid log level specification: '{item}'")
+        levels[name.strip()] = numeric_level
+    return levels
+
+
+def parse_sampling_rates(spec: str) -> dict:
+    """
+    Parses a per-module sampling specification such as
+    "instrumentation=0.1,data_loader=0.5".
+
+    Returns:
+        dict: Logger name -> fraction of DEBUG/INFO records kept.
+
+    Raises:
+        ValueError: If a pair is malformed or a rate is not in [0, 1].
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, separator, rate = item.partition("=")
+        try:
+            rate = float(rate)
+        except ValueError:
+            rate = None
+        if not separator or not name.strip() or rate is None or not 0 <= rate <= 1:
+            raise ValueError(f"Invalid log sampling specification: '{item}'")
+        rates[name.strip()] = rate
+    return rates
+
+
+def parse_rate_limit(spec: str) -> tuple:
+    """
+    Parses a rate limit such as "50/60" (50 records per 60 seconds).
+
+    Returns:
+        tuple: (max_records, period), or None when the limit is disabled
+        ("" or "0").
+
+    Raises:
+        ValueError: If the specification is malformed.
+    """
+    spec = (spec or "").strip()
+    if spec in ("", "0"):
+        return None
+    max_records, _, period = spec.partition("/")
+    try:
+        limit = (int(max_records), float(period or 1))
+    except ValueError:
+        limit = (0, 0)
+    if limit[0] <= 0 or limit[1] <= 0:
+        raise ValueError(f"Invalid log rate limit specification: '{spec}'")
+    return limit
+
+
+def _file_handler(path: str) -> logging.Handler:
+    """
+    Creates a rotating file handler: by size (default) or, when
+    MANGETAMAIN_LOG_ROTATION is "time", at the MANGETAMAIN_LOG_WHEN interval.
+    """
+    backup_count = int(os.environ.get(LOG_BACKUP_COUNT_ENV, 5))
+    if os.environ.get(LOG_ROTATION_ENV, "size") == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            path,
+            when=os.environ.get(LOG_WHEN_ENV, "midnight"),
+            backupCount=backup_count,
+            delay=True,
+        )
+    return logging.handlers.RotatingFileHandler(
+        path,
+        mode="a",
+        maxBytes=int(os.environ.get(LOG_MAX_BYTES_ENV, 10 * 2**20)),
+        backupCount=backup_count,
+        delay=True,
+    )
+
+
+def _formatter(json_lines: bool) -> logging.Formatter:
+    """Returns the JSON-lines formatter or the free-text one."""
+    if json_lines:
+        return JsonFormatter()
+    return logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+def setup_logging(levels: dict = None) -> None:
     """
     Configures the global logging for the application, ensuring logs are
-    written to files.
+    written to files without blocking the callers.
 
     - Creates a "src/logs" directory if it doesn't exist.
-    - Sets up two separate log files: one for debug-level logs (DEBUG, INFO,
-      WARNING) and one for error-level logs (ERROR, CRITICAL).
+    - The root logger only gets a `QueueHandler`: a log call puts the record
+      on an in-memory queue, and a `QueueListener` thread writes it to the
+      files in the background.
+    - Sets up two separate rotating log files: one for debug-level logs
+      (DEBUG, INFO, WARNING) and one for error-level logs (ERROR, CRITICAL).
+    - Applies per-module levels from `levels` and from the
+      MANGETAMAIN_LOG_LEVELS environment variable
+      (e.g. "data_loader=INFO,instrumentation=WARNING").
+    - Registers an exit hook flushing the queue (see `shutdown_logging`).
     - Adds the module name to log messages.
+    - With MANGETAMAIN_LOG_FORMAT=json, writes JSON lines (app_debug.jsonl,
+      app_error.jsonl) with the session id and stage measurements.
+    - Samples DEBUG/INFO records per module (MANGETAMAIN_LOG_SAMPLING, e.g.
+      "instrumentation=0.1") and rate-limits them per call site
+      (MANGETAMAIN_LOG_RATE_LIMIT, e.g. "50/60", off by default); the
+      stage measurements are never rate-limited.
+
+    Args:
+        levels (dict): Optional logger name -> level overrides, applied
+        after the environment variable.
 
     Raises:
         OSError: If the log directory cannot be created.
+        ValueError: If one of the environment variables is malformed.
     """
+    global _listener
 
     # Define the directory where log files will be stored
     log_directory: str = "src/logs"
@@ -43,29 +303,65 @@ def setup_logging() -> None:
     # Add handlers only if none exist
     if not logger.hasHandlers():
 
+        # Free text by default, one JSON object per line when requested
+        json_lines = os.environ.get(LOG_FORMAT_ENV, "text").lower() == "json"
+        extension = ".jsonl" if json_lines else ".log"
+
         # Set up a file handler for debug-level logs (app_debug.log)
-        debug_handler = logging.FileHandler(
-            os.path.join(log_directory, "app_debug.log"), mode="a"
+        debug_handler = _file_handler(
+            os.path.join(log_directory, f"app_debug{extension}")
         )
 
         # Capture DEBUG, INFO, and WARNING logs
         debug_handler.setLevel(logging.DEBUG)
-        debug_handler.setFormatter(
-            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-        )
+        debug_handler.setFormatter(_formatter(json_lines))
         debug_handler.addFilter(MaxLevelFilter(logging.WARNING))
 
         # Set up a file handler for error-level logs (app_error.log)
-        error_handler = logging.FileHandler(
-            os.path.join(log_directory, "app_error.log"), mode="a"
+        error_handler = _file_handler(
+            os.path.join(log_directory, f"app_error{extension}")
         )
 
         # Capture only ERROR and CRITICAL logs
         error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(
-            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        error_handler.setFormatter(_formatter(json_lines))
+
+        # The file handlers run in the listener thread, fed by the queue
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(
+            log_queue, debug_handler, error_handler, respect_handler_level=True
         )
+        _listener.start()
+
+        # Session id, sampling and rate limiting run in the calling thread,
+        # so dropped records are never queued
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(SessionContextFilter())
+        sampling_rates = parse_sampling_rates(os.environ.get(LOG_SAMPLING_ENV, ""))
+        if sampling_rates:
+            queue_handler.addFilter(SamplingFilter(sampling_rates))
+        rate_limit = parse_rate_limit(os.environ.get(LOG_RATE_LIMIT_ENV, ""))
+        if rate_limit:
+            queue_handler.addFilter(RateLimitFilter(*rate_limit))
+        logger.addHandler(queue_handler)
+        atexit.register(shutdown_logging)
 
-        # Add both handlers to the root logger
-        logger.addHandler(debug_handler)
-        logger.addHandler(error_handler)
+    # Per-module levels: environment first, explicit overrides last
+    configured = parse_log_levels(os.environ.get(LOG_LEVELS_ENV, ""))
+    configured.update(levels or {})
+    for name, level in configured.items():
+        logging.getLogger(None if name == "root" else name).setLevel(level)
+
+
+def shutdown_logging() -> None:
+    """
+    Stops the background writer after it has written every queued record,
+    then closes the log files. Registered with `atexit` by `setup_logging`.
+    """
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
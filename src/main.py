@@ -1,900 +1,2008 @@
-import streamlit as st
-import pandas as pd
-
-st.set_page_config(layout="wide")
-from data_loader import DataLoader
-from log_config import setup_logging
-from utils import (
-    df_preprocessed,
-    rate_bio_recipes,
-    outliers_zscore_df,
-)
-from visualisation.graphs import fig2
-from visualisation.graphs_nutrition import (
-    categories,
-    nutrition_hist,
-    nutrition_hist_ratio,
-)
-
-
-# Initialize logging and set page configuration
-setup_logging()
-# Use session state to avoid reloading data multiple times
-if "data_loader" not in st.session_state:
-    st.session_state.data_loader = DataLoader()
-
-
-# Load data files once using caching
-@st.cache_data(ttl=3600)
-def load_data_files():
-    """
-    Load data files required for the application.
-
-    Uses the `data_loader` from `st.session_state` to load:
-    1. `PP_users`: A CSV file containing user data, stored as a zipped CSV.
-    2. `ingredients`: A pickled file mapping ingredients with metadata.
-
-    Returns:
-        tuple: Two pandas DataFrames:
-            - `df_PP_users`: DataFrame containing user data.
-            - `df_ingredients`: DataFrame mapping ingredients and their metadata.
-
-    Notes:
-        - `data_loader` must exist in `st.session_state`.
-        - and include a `load_data` method.
-        - Data paths are relative to the "dataset" directory.
-    """
-    data_loader = st.session_state.data_loader
-    df_PP_users = data_loader.load_data("dataset/PP_users.csv.zip")
-    df_ingredients = data_loader.load_data("dataset/ingr_map.pkl")
-    return df_PP_users, df_ingredients
-
-
-df_PP_users, df_ingredients = load_data_files()
-
-
-@st.fragment
-def set_global_styles():
-    """
-    Apply custom global styles to the Streamlit app using CSS.
-
-    This function customizes:
-    - Font: 'Times New Roman', bold, black text.
-    - Background color: #D2B48C (tan).
-
-    Behavior:
-        - Injects CSS using `st.markdown`.
-        - `unsafe_allow_html` is used to enable custom HTML and CSS.
-    """
-    st.markdown(
-        """
-        <style>
-        body {
-            color: #000000; /* black text */
-            font-family: 'Times New Roman', without-serif;
-            font-weight: bold; /* bold */
-        }
-        .stApp {
-            background-color: #D2B48C; /* Clear color */
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-
-@st.fragment
-def display_featureengineeringsteps() -> None:
-    """
-    Display the steps of feature engineering in interactions and recipes data
-
-    Explains the project's two main themes:
-    1. **interactions data feature engineering steps**:
-    2. **recipes data feature engineering steps**:
-    Behavior:
-        - Uses `st.markdown` to display formatted project details.
-        - Highlights data-driven insights on bio recipes and health.
-    """
-    # interactions data
-    st.title("Feature engineering for interactions dataset")
-    feature_engineering_text_interactions = """
-        **Feature Engineering steps (preprocessed_data folder in the file
-        PP_interactions_mangetamain.csv) :**
-        1. **Data Parsing and Cleaning**
-        - **Remove Irrelevant Columns**: Dropping columns
-        that are not useful for analysis
-        - `review`
-        - `cuisine`
-        - `rating`
-        - `interaction_type`
-        - **Remove outliers**: using z-score method
-        - **Deleting rows with duplicates**
-        2. **Date-related features:**
-        - Extracting day, month, year from the `date` column.
-
-        3. **Interaction type:**
-        - Interaction count: Counting the number of interactions per `recipe_id`.
-
-        4. **User-based features:**
-        - Total interactions per user: Counting how many recipes
-          a user has interacted with.
-
-        5. **Handling missing data:**
-        - Filling missing values in numeric columns with NaN values.
-        ---
-
-        **Summary about the columns :**
-        1. **Columns to Drop:**
-        - `review`
-        - `cuisine`
-        - `rating`
-        - `interaction_type`
-        2. **Columns to Retain:**
-        - `recipe_id`
-        - `date`
-    """
-    st.markdown(feature_engineering_text_interactions)
-    st.title("Feature engineering for recipes dataset")
-    # Step 1: Data Parsing and Cleaning
-    st.markdown(
-        """
-        preprocessed_data folder (PP_recipes_mangetamain.csv)
-        1. Data parsing and cleaning
-        - **Nutrition data**: The `nutrition` column contains a
-        list of values representing
-        different nutritional components. Spliting it into separate columns for
-        - Calories
-        - Total Fat
-        - Proteins
-        - Carbohydrates
-        - Sugar
-        - Sodium
-        - Saturated Fat
-        - **Ingredient IDs**: The `ingredient_ids` column stores a list of
-        ingredient IDs.
-        - **Tags**: Filtering the dataframe by using the `tags`
-        column related to the bio keywords (substainable, eco-friendly,
-        fresh, natural and so on).
-        - **Remove irrelevant columns**: Dropping columns
-        that are not useful for analysis.
-        """
-    )
-
-    # Step 2: Feature Engineering on Nutrition Data
-    st.markdown(
-        """
-        2. Feature Engineering on nutrition data
-        - Creating new columns from the `nutrition`
-        data as described above.
-        - Studying the values and the international unit measures of each
-        nutritional component
-        """
-    )
-
-    # Step 3: Handling Ingredient IDs
-    st.markdown(
-        """
-        3. Handling ingredient IDs
-        - **Ingredient Count**: Adding a feature
-        representing the total number of ingredients
-        in each recipe.
-        """
-    )
-
-    # Step 4: Integrating User Interaction Data
-    st.markdown(
-        """
-        4. Integrating user interaction data
-        - **Join Interaction Data**: Merging the recipe
-        dataset with user interaction data to
-        enrich it with features like:
-            - Total interaction count per recipe.
-        """
-    )
-
-    # Step 5: Handling Missing Values
-    st.markdown(
-        """
-         5. Handling missing
-         values
-        - **Dropping rows/columns**: Removing rows or columns with excessive missing
-        data.
-        """
-    )
-
-    # Step 6: Advanced Transformations and Modeling
-    st.markdown(
-        """
-        6. Advanced transformations and modeling
-        - **Normalization/Standardization**: Scaling numerical
-        features using methods like
-        Min-Max scaling or Z-score normalization for better model performance.
-        Deleting outliers (recipes with `minutes` column values equal
-        to 0 and superior to 3600 minutes)
-        """
-    )
-    st.markdown(
-        """
-        **Summary about the columns:**
-        1. **Columns to Drop:**
-        - `minutes`
-        - `contributor_id`
-        - `submitted`
-        - `tags`
-        - `n_steps`
-        - `steps`
-        - `description`
-        2. **Columns to Retain:**
-        - `name`
-        - `id`
-        - `nutrition`
-        - `ingredient_ids`
-        """
-    )
-
-
-@st.fragment
-def display_explications_webapp() -> None:
-    """
-    Display the introduction and purpose of the web application.
-
-    Explains the project's two main themes:
-    1. **Bio Recipes Analysis**:
-       - Evaluates bio recipe counts and ingredients.
-       - Calculates KPIs such as ingredient variety and recipe proportions.
-    2. **Nutritional Analysis**:
-       - Ranks top recipes by nutritional content (e.g., proteins, carbs).
-       - Provides insights for dietary goals like muscle strengthening.
-
-    Behavior:
-        - Uses `st.write` to display formatted project details.
-        - Highlights data-driven insights on bio recipes and health.
-    """
-    st.write(
-        "**Welcome to the Mangetamain webapp,** "
-        "**where we dive deep into the world of bio recipes.** "
-        "**This project is based on two central themes,** "
-        "**both focused on providing valuable insights** "
-        "**into healthier eating and optimal nutrition.**"
-    )
-
-    st.write(
-        "**The first part of the project focuses on bio recipes.** "
-        "**Here, I worked on generating KPI's** "
-        "**to share meaningful patterns and observations.** "
-        "**We analyzed the number of ingredients** "
-        "**in bio recipes, calculated the percentage of recipes within the original** "
-        "**raw recipes** "
-        "**dataset and examined the total number of bio recipes available.** "
-        "**These metrics provide a clear** "
-        "**picture of the scope and richness of bio-based cooking.** "
-        "**I showed other indicators about users (techniques, number of users)** "
-        "**and ingredients.** "
-    )
-
-    st.write(
-        "**The second theme revolves around studying the nutritional** "
-        "**components of bio recipes.** "
-        "**By ranking the top 4 recipes for each nutritional component,** "
-        "**we can identify which dishes align best with specific dietary needs.** "
-        "**This ranking provides practical guidance for those seeking** "
-        "**recipes that support muscular development, control blood sugar** "
-        "**or promote overall health.** "
-        "**I decided to maximize the proteins quantities in the ranking.** "
-        "**The recipes with the lower values are chosen** "
-        "**about the other nutritional components.** "
-    )
-
-    st.write(
-        "**In addition to the rankings, I created various visualizations** "
-        "**such as charts illustrating** "
-        "**the ratio of proteins to sodium,** "
-        "**proteins to carbohydrates and the proteins to saturated fat.** "
-        "**For each chart, I selected the recipe that has the highest ratio value.** "
-        "**These insights are crucial for** "
-        "**users who want to optimize their diet to strive against diabete,** "
-        "**high blood pressure, bad cholesterol** "
-        "**or strengthen muscles.** "
-        "**Visualizing these ratios** "
-        "**makes it easier for users to adopt the right recipes for their goals.** "
-    )
-
-    st.write(
-        "**To give the efficient recommendations,** "
-        "**I included a table showcasing the ideal recipes tailored** "
-        "**for users with specific dietary goals. It refers to** "
-        "**muscular development, reducing the risk of diabete or bad cholesterol.** "
-        "**This table combines all the insights in an available format.** "
-        "**It empowers users to make informed choices.**"
-    )
-
-    st.write(
-        "**The results from these analyses have been enlightening.** "
-        "**The nutritional content of some recipes was lower** "
-        "**than expected, giving insights in their potential health benefits.** "
-        "**This exploration has also provided** "
-        "**me with a deeper understanding of how bio recipes can** "
-        "**contribute to healthier eating habits.**"
-    )
-
-    st.write(
-        "**Through this project, I have gained valuable insights that will guide** "
-        "**future work.** "
-        "**By focusing on both nutrient composition and practical dietary advice,** "
-        "**I believe this webapp offers users the** "
-        "**tools they need to make healthier, more informed food choices.**"
-    )
-
-
-@st.fragment
-def display_title() -> None:
-    """Displays the main title of the project"""
-    st.markdown(
-        "<h1 style='font-size: 36px; text-align: center;'>Mangetamain world</h1>",
-        unsafe_allow_html=True,
-    )
-
-
-@st.cache_data(ttl=3600)
-@st.fragment
-def display_statistics(
-    df_preprocessed: pd.DataFrame, rate_bio_recipes: float, outliers_zscore_df: int
-) -> None:
-    """
-    Display key statistics using `st.metric` widgets.
-
-    Args:
-        df_preprocessed (pd.DataFrame):
-            DataFrame containing preprocessed bio recipe data.
-        rate_bio_recipes (float):
-            Proportion of bio recipes as a percentage.
-        outliers_zscore_df (int):
-            Number of outliers detected using Z-score analysis.
-
-    Behavior:
-        - Metrics for total bio recipes, contributors, and ingredients.
-        - Displays three-column layout for clear visualization.
-        - Uses Streamlit's `st.metric` widgets for dynamic data display.
-
-    Example:
-        ```python
-        display_statistics(df, 45.6, 100)
-    """
-    # Calculate unique techniques from df_PP_users
-    num_different_techniques = df_PP_users["techniques"].nunique()
-    # Section 1: Bio Recipes Overview
-    st.markdown(
-        """
-        <div style="border: 2px solid #e0e0e0; padding: 20px; margin-bottom: 20px;">
-            <h2 style="text-align: center; font-size: 32px;">Bio Recipes Overview</h2>
-            <div style="margin-top: 10px; font-size: 27px;">
-                <p>Total bio recipes:</p>
-                <b style="font-size: 26px;color: green;">{}</b>
-            </div>
-            <div style="margin-top: 10px; font-size: 27px;">
-                <p>Bio recipes proportion (%):</p>
-                <b style="font-size: 26px;color: green;">{:.2f}%</b>
-            </div>
-            <div style="margin-top: 10px; font-size: 27px;">
-                <p>Outliers detected:</p>
-                <b style="font-size: 26px;color: green;">{}</b>
-            </div>
-        </div>
-        """.format(
-            f"{df_preprocessed.shape[0]:,}".replace(",", " "),
-            rate_bio_recipes,
-            (
-                len(outliers_zscore_df)
-                if isinstance(outliers_zscore_df, (list, pd.DataFrame))
-                else outliers_zscore_df
-            ),
-        ),
-        unsafe_allow_html=True,
-    )
-
-    # Section 2: Community Contributions
-    st.markdown(
-        """
-        <div style="border: 2px solid #e0e0e0; padding: 20px; margin-bottom: 20px;">
-            <h2 style="text-align: center; font-size: 32px;">Community Insights</h2>
-            <div style="margin-top: 10px; font-size: 27px;">
-                <p>Total users:</p>
-                <b style="font-size: 26px;color: #ff69b4;">{}</b>
-            </div>
-            <div style="margin-top: 10px; font-size: 27px;">
-                <p>New users (last month):</p>
-                <b style="font-size: 26px;color: #ff69b4;">452</b>
-            </div>
-            <div style="margin-top: 10px; font-size: 27px;">
-                <p>Number of different techniques:</p>
-                <b style="font-size: 26px;color: #ff69b4;">{}</b>
-            </div>
-        </div>
-        """.format(
-            f"{df_PP_users.shape[0]:,}".replace(",", " "),
-            f"{num_different_techniques:,}".replace(",", " "),
-        ),
-        unsafe_allow_html=True,
-    )
-
-    # Section 3: Ingredient Insights
-    st.markdown(
-        """
-        <div style="border: 2px solid #e0e0e0; padding: 20px;">
-            <h2 style="text-align: center; font-size: 32px;">Ingredient Insights</h2>
-            <div style="margin-top: 10px; font-size: 27px;">
-                <p>Unique ingredients:</p>
-                <b style="font-size: 26px;color: orange;">{}</b>
-            </div>
-        </div>
-        """.format(
-            f"{df_ingredients.shape[0]:,}".replace(",", " "),
-        ),
-        unsafe_allow_html=True,
-    )
-
-
-@st.fragment
-def add_background_from_url(url: str) -> None:
-    """Adds a background image to the Streamlit app using CSS.
-    This function embeds custom CSS to set a background image for the entire
-    Streamlit app by applying the style to the `.stApp` class. The image is
-    sourced from the specified URL and styled to provide a visually appealing
-    full-screen background.
-
-    Args:
-        url (str):
-            A direct URL pointing to the image file (e.g., PNG, JPG, or GIF)
-            that will be used as the background.
-
-    Behavior:
-        - The background image is resized to cover the entire viewport.
-        - The image is centered both horizontally and vertically.
-        - The image does not repeat and remains fixed during scrolling.
-
-    Example:
-        ```python
-        import streamlit as st
-
-        add_background_from_url("https://example.com/background.jpg")
-        st.title("Welcome to My Streamlit App!")
-        ```
-    """
-    st.markdown(
-        f"""
-        <style>
-        .stApp {{
-            background-image: url("{url}");
-            background-size: cover;
-            background-position: center;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-
-@st.fragment
-def display_general_observations() -> None:
-    """Displays general analysis charts"""
-    st.plotly_chart(fig2, key="unique_key_for_selectbox_50", use_container_width=True)
-
-
-@st.fragment
-def display_nutritional_analysis() -> None:
-    """Displays a dropdown and chart for nutritional components analysis
-    Displays a dropdown and chart for nutritional component analysis.
-
-    This function provides an interface for users to select a nutritional
-    component (e.g., calories) via a radio button and displays a histogram
-    for the top four recipes in the selected category.
-
-    Behavior:
-        - Displays a subheader for the analysis.
-        - Allows selection of a nutritional component through a radio button.
-        - Renders an interactive Plotly chart for the selected component.
-
-    Example:
-        ```python
-        display_nutritional_analysis()
-    """
-    st.subheader("🥥 Top 4 Recipes per nutritional component (calories in Kcal)")
-    # Help button with an interactive display
-    if st.button("ℹ️ Current Daily Value (DV) guide"):
-        st.markdown(
-            """
-            <div style='padding: 20px; background-color: #000000; border-radius: 10px;'>
-                <h4 style='color: #ff69b4;'>Nutritional components</h4>
-                <ul style="list-style-type: square; color: #ff69b4;">
-                    <li><strong>Calories:</strong> 2,000 Kcal</li>
-                    <li><strong>Total fat:</strong> 78 g</li>
-                    <li><strong>Sugar:</strong> 50 g</li>
-                    <li><strong>Sodium:</strong> 2,300 mg</li>
-                    <li><strong>Protein:</strong> 50 g</li>
-                    <li><strong>Saturated fat:</strong> 20 g</li>
-                    <li><strong>Carbohydrates:</strong> 275 g</li>
-                </ul>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-    # Layout with columns: 85% for the graph, 15% for the form
-    col1, col2 = st.columns([8.0, 2.0])
-
-    with col1:
-        # Custom HTML to wrap the radio button inside a div with class for styling
-        selected_category = st.radio(
-            "🔥 Select a nutritional component",
-            categories,
-            key="unique_key_for_selectbox_1",
-        )
-        # Add border and margin around the chart to separate it from the radio buttons
-        st.markdown(
-            """
-            <style>
-                .chart-container {
-                    margin-top: 20px;  /* Space between radio buttons and the chart */
-                    border: 2px solid #e0e0e0;
-                    padding: 15px;
-                    border-radius: 8px;
-                    background-color: #f9f9f9;
-                }
-            </style>
-            """,
-            unsafe_allow_html=True,
-        )
-
-        # Plot the selected nutritional analysis chart
-        st.plotly_chart(
-            nutrition_hist[selected_category],
-            key="unique_key_for_selectbox_8",
-            use_container_width=True,
-        )
-    with col2:
-        # Add margin to align the form vertically with the graph
-        # Apply custom styling to the form container
-        st.markdown(
-            """
-            <style>
-                .form-container {
-                    margin-top: 20px;
-                    padding: 15px;
-                    border: 2px solid #ff69b4;
-                    border-radius: 10px;
-                    background-color: #ff69b4;
-                    box-shadow: 2px 2px 5px rgba(0, 0, 0, 0.1);
-                }
-                .stSelectbox, .stNumberInput {
-                    margin-bottom: 15px;
-                }
-                .stButton>button {
-                    background-color: #2E8B57;
-                    color: green;
-                    border-radius: 5px;
-                    border: none;
-                    padding: 8px 20px;
-                    cursor: pointer;
-                }
-                .stButton>button:hover {
-                    background-color: #ff69b4;
-                }
-            </style>
-            """,
-            unsafe_allow_html=True,
-        )
-        # Add form within styled container
-        st.markdown("<div class='form-container'>", unsafe_allow_html=True)
-        # CDV Conversion Form
-        st.markdown("% Daily Value ---> g/mg")
-        with st.form("dv_conversion_form"):
-            # Select component for conversion
-            component = st.selectbox(
-                "Nutritional component:",
-                [
-                    "Total fat",
-                    "Sugar",
-                    "Sodium",
-                    "Protein",
-                    "Saturated fat",
-                    "Carbohydrates",
-                ],
-            )
-
-            # Input for %CDV
-            dv = st.number_input(
-                f"% Daily Value for {component}:",
-                min_value=0.0,
-                max_value=100.0,
-                step=1.0,
-            )
-
-            # Submit button for the form
-            submitted = st.form_submit_button("Convert")
-
-            if submitted:
-                # Daily values for each component
-                daily_values = {
-                    "Total fat": 78,
-                    "Sugar": 50,
-                    "Sodium": 2300,
-                    "Protein": 50,
-                    "Saturated fat": 20,
-                    "Carbohydrates": 275,
-                }
-
-                if component in daily_values:
-                    # Perform conversion based on daily value and %CDV input
-                    converted_value = (dv * daily_values[component]) / 100
-                    unit = "mg" if component == "Sodium" else "g"
-
-                    # Display conversion result
-                    st.success(f"{converted_value:.2f} {unit}.")
-
-
-@st.fragment
-def display_nutritional_analysis_ratio(context_key: str = "default") -> None:
-    """Displays a dropdown and chart for nutritional components analysis ratio.
-    This function enables users to analyze ratios for different nutritional
-    components by selecting a category. The chart adapts based on the selected
-    category and a context-specific key to ensure uniqueness in Streamlit's state.
-
-    Args:
-        context_key (str):
-            A unique identifier for differentiating between similar widgets in
-            different contexts. Defaults to 'default'.
-
-    Behavior:
-        - Provides a radio button for selecting nutritional categories.
-        - Displays an interactive Plotly chart based on the selected category.
-
-    Example:
-        ```python
-        display_nutritional_analysis_ratio(context_key="unique_context")
-    """
-    # Categories that exist in the dictionary
-    categories = [
-        "Protein (g)",
-        "Sodium (mg)",
-        "Saturated Fat (g)",
-        "Carbohydrates (g)",
-    ]
-
-    # Add border and style to the radio buttons container
-    selected_category = st.radio(
-        "Select a nutritional component",
-        categories,
-        key=f"selectbox_{context_key}",  # Dynamically generate a unique key
-    )
-    # Add border and margin around the chart to separate it from the radio buttons
-    st.markdown(
-        """
-        <style>
-            .chart-container {
-                margin-top: 20px;  /* Space between radio buttons and the chart */
-                border: 2px solid #e0e0e0;
-                padding: 15px;
-                border-radius: 8px;
-                background-color: #f9f9f9;
-            }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    # Plot the selected nutritional analysis ratio chart
-    st.plotly_chart(
-        nutrition_hist_ratio[selected_category],
-        key="unique_key_for_selectbox_670",
-        use_container_width=True,
-    )
-
-
-@st.fragment
-def display_ideal_recipes_health() -> None:
-    """Displays the ideal recipes for the health contributors .
-    This function creates and displays a dataframe that lists ideal recipes
-    for various health goals like muscle strengthening and managing
-    diabete or high blood pressure.
-
-    Behavior:
-        - Constructs a pandas DataFrame with health categories and recipes.
-        - Displays the dataframe as an interactive table in Streamlit.
-
-    Example:
-        ```python
-        display_ideal_recipes_health()
-    """
-    # Categories that exist in the dictionary
-    data = {
-        "Category": [
-            "🏋️‍♂️ Muscle strengthening and obesity",
-            "🏋️‍♂️ Muscle strengthening and obesity",
-            "🫀 Diabete and high blood pressure",
-            "🫀 Diabete and high blood pressure",
-            "🫀 Diabete and high blood pressure",
-            "🫀 Diabete and high blood pressure",
-            "🥓 Bad cholesterol",
-            "🥓 Bad cholesterol",
-            "🥓 Bad cholesterol",
-        ],
-        "🍉 Recipes (selecting the highest ratio value and ideally higher than 1.0)": [
-            "lighter pistachio pudding salad",
-            "basic baked fish easy dressing",
-            "creamy cucumber bites",
-            "lighter pistachio pudding salad",
-            "light and fluffy vegan lemon scones",
-            "basic baked fish easy dressing",
-            "easy cinnamon sugar muffins",
-            "libbie s corn for freezing",
-            "basic baked fish easy dressing",
-        ],
-    }
-
-    # Dataframe creation
-    df = pd.DataFrame(data)
-    # Style the dataframe with Pandas Styler (green text for all content)
-    styled_df = df.style.set_properties(
-        **{
-            "color": "white",  # white  text for the content
-        }
-    ).set_table_styles(
-        [{"selector": "th", "props": [("color", "#006400")]}]  # Dark green for headers
-    )
-    # Display the styled dataframe
-    st.write(styled_df.hide(axis="index").to_html(), unsafe_allow_html=True)
-
-
-@st.fragment
-def clear_cache_button() -> None:
-    """Empty cache
-    This function renders a button that allows users to clear both data
-    and resource caches in Streamlit. This is useful for refreshing data
-    or freeing up memory during app development and testing.
-
-    Behavior:
-        - Clears the `st.cache_data` and `st.cache_resource`
-
-    Example:
-        ```python
-        clear_cache_button()
-    """
-    if st.button("Empty cache and refresh"):
-        # Vider le cache de Streamlit
-        st.cache_data.clear()
-        st.cache_resource.clear()
-
-        # Rafraîchir la page sans cache en ajoutant un paramètre unique
-        st.markdown(
-            """
-            <script>
-            window.location.href = window.location.href.split('?')[0] + '?nocache=';
-            </script>
-            """,
-            unsafe_allow_html=True,
-        )
-
-
-def main():
-    st.markdown(
-        """<style>
-            header[data-testid="stHeader"] {
-                display: none;
-            }
-            footer {
-                display: none;
-            }
-            [data-testid="stSidebar"] {
-                background-color: #2E8B57;  /* Vert foncé */
-                padding: 20px;
-            }
-            </style>
-            """,
-        unsafe_allow_html=True,
-    )
-    background_url = (
-        "https://assets.afcdn.com/imsite1/acc11_691465/"
-        "acc1257x1257a871129_w450h311c1.jpg"
-    )  # Image URL
-    add_background_from_url(background_url)
-    # set_global_styles()
-    display_title()
-    # Sidebar setup
-    st.markdown(
-        """
-        <style>
-            /* Sidebar color */
-            [data-testid="stSidebar"] {
-                background-color: #2E8B57,
-                padding: 0;
-                margin: 0;
-                overflow: hidden;
-            }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-    clear_cache_button()
-    # Expander for general observations
-    with st.sidebar.expander("🍒 Storytelling and feature engineering"):
-        show_storytelling = st.checkbox(
-            "Storytelling for my webapp",
-            True,
-            key="storytelling_checkbox3490",
-        )
-        show_feature_engineering = st.checkbox(
-            "Feature engineering", True, key="feature_engineering_checkbox4443"
-        )
-    # Expander for general observations
-    with st.sidebar.expander("📊 General observations"):
-        show_general_obs = st.checkbox(
-            "Key numbers for recipes, ingredients and community",
-            True,
-            key="general_observations_checkbox34",
-        )
-        show_inter_obs = st.checkbox(
-            "Interactions", True, key="general_observations_checkbox4453"
-        )
-    # Expander for nutritional components analysis
-    with st.sidebar.expander("🥒 Nutritional components findings"):
-        show_nutritional_analysis = st.checkbox(
-            "Recipes ranking/nutritional component",
-            True,
-            key="nutritional_analysis_checkbox58",
-        )
-        show_nutritional_analysis_1 = st.checkbox(
-            "Recipes ranking/nutritional component ratio",
-            True,
-            key="nutritional_analysis_checkbox_576",
-        )
-    # Expander for health diets
-    with st.sidebar.expander("🍽️ Food diets"):
-        show_health_diets = st.checkbox(
-            "Diet plans: diabete, obesity, muscle strenghtening & bad cholesterol",
-            True,
-            key="health_diet",
-        )
-    # Expander for cache clearing
-    with st.sidebar.expander("🛠️ Advanced options", expanded=False):
-        if st.checkbox("🔄 Refresh Page", key="refresh_page_button"):
-            st.markdown(
-                """
-                <script>
-                window.location.reload();
-                </script>
-                """,
-                unsafe_allow_html=True,
-            )
-    # storytelling button
-    if show_storytelling:
-        display_explications_webapp()
-    # feature engineering button
-    if show_feature_engineering:
-        display_featureengineeringsteps()
-    # Main content
-    if show_general_obs:
-        st.subheader("Key numbers for recipes")
-        display_statistics(df_preprocessed, rate_bio_recipes, outliers_zscore_df)
-
-    if show_inter_obs:
-        st.subheader("👨🏻‍💻 Interactions graph")
-        display_general_observations()
-
-    if show_nutritional_analysis:
-        st.subheader(
-            "🎯 Observations of recipes regarding their nutritional components"
-        )
-        display_nutritional_analysis()
-
-    if show_nutritional_analysis_1:
-        st.subheader("📈 Observations of recipes regarding their components ratio")
-        display_nutritional_analysis_ratio(context_key="nutritional_components")
-
-    if show_health_diets:
-        st.subheader("ﮩـﮩﮩ٨ـ🫀ﮩ٨ـﮩﮩ٨ـ Top recipes for optimal health")
-        display_ideal_recipes_health()
-
-
-if __name__ == "__main__":
-    main()
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+import streamlit as st
+import numpy as np
+import pandas as pd
+
+st.set_page_config(layout="wide")
+from log_config import setup_logging
+
+# Initialize logging before the data modules load their datasets
+setup_logging()
+from ingestion import DEPENDENTS, STORE_ENV, DatasetStore, build_dashboard_item
+from autocomplete import PrefixIndex, ingredient_autocomplete, recipe_autocomplete
+from export import DEFAULT_K, FORMATS, RECIPE_SETS, export, recipe_set
+from instrumentation import instrumented, tracker
+from interaction_cube import DailyInteractions, TagCube
+from locking import exclusive
+from nutrition_sketches import NutrientSketchIndex
+from outliers import CACHE_DIR_ENV, DEFAULT_CACHE_DIR, METHODS, OutlierDetectors
+from popularity import filter_min_interactions, join_popularity
+from prefetch import LOW_PRIORITY, PrefetchScheduler
+from profiler import profile_dataset
+from ranking import NUTRIENT_OBJECTIVES, RecipeRanker
+from recipe_repository import RecipeRepository
+from recipe_similarity import IngredientSimilarityIndex, MinHashLSH
+from search import SearchIndex, load_or_build
+from utils import filter_values1_bio
+from snapshot import (
+    DEPENDENCIES,
+    FIGURES,
+    RAW_RECIPES,
+    SNAPSHOT_ENV,
+    SOURCES,
+    TABLES,
+    build_figure,
+    build_metrics,
+    build_search_index,
+    build_table,
+    dataset_version,
+    read_snapshot,
+    reset_dataset,
+)
+from visualisation.graphs import (
+    build_rolling_figure,
+    build_seasonality_figure,
+    build_tag_trend_figure,
+    build_top_tags_figure,
+    build_year_over_year_figure,
+)
+from visualisation.graphs_nutrition import (
+    categories,
+    nutrition_bar_ratio_sodium_proteins,
+    plot_binned_histogram,
+    plot_sketch_boxes,
+    plot_sketch_histogram,
+    plot_summary_boxes,
+    plot_top_4_recipes_by_nutrition,
+)
+
+
+def _snapshot_part(scheduler: PrefetchScheduler, kind: str, name: str = None):
+    """Returns a part (table, figure, metrics...) of the prefetched snapshot."""
+    part = scheduler.result("snapshot")[kind]
+    return part if name is None else part[name]
+
+
+@st.cache_resource
+def get_prefetcher() -> PrefetchScheduler:
+    """
+    Creates the process-wide scheduler computing the dashboard data in
+    background threads, one task per table, figure or index, with the
+    sources each task depends on.
+
+    When the MANGETAMAIN_SNAPSHOT environment variable names a snapshot
+    directory (built with `python src/snapshot.py`), the data is read from
+    it and no raw dataset is loaded. Otherwise it is computed from the
+    datasets. When MANGETAMAIN_STORE names an ingestion store (see
+    `python src/ingestion.py`), the interactions and nutrition data are
+    computed from its incrementally updated aggregates instead.
+
+    Returns:
+        PrefetchScheduler: The scheduler used by `dashboard_item`.
+    """
+    scheduler = PrefetchScheduler(max_workers=4)
+    snapshot_dir = os.environ.get(SNAPSHOT_ENV)
+    if snapshot_dir:
+        source = f"snapshot:{snapshot_dir}"
+        scheduler.add_source(source)
+        scheduler.register("snapshot", partial(read_snapshot, snapshot_dir), [source])
+        for kind, names in (("tables", TABLES), ("figures", FIGURES)):
+            for name in names:
+                part = partial(_snapshot_part, scheduler, kind, name)
+                scheduler.register(name, part, ["snapshot"])
+        for kind in ("metrics", "search_index"):
+            part = partial(_snapshot_part, scheduler, kind)
+            scheduler.register(kind, part, ["snapshot"])
+    else:
+        for path in SOURCES:
+            scheduler.add_source(f"dataset:{path}", partial(reset_dataset, path))
+        builders = {name: partial(build_table, name) for name in TABLES}
+        builders.update({name: partial(build_figure, name) for name in FIGURES})
+        builders["metrics"] = build_metrics
+        builders["search_index"] = load_search_index
+        for name, builder in builders.items():
+            sources = [f"dataset:{path}" for path in DEPENDENCIES[name]]
+            scheduler.register(name, builder, sources)
+    store_dir = os.environ.get(STORE_ENV)
+    if store_dir:
+        store = DatasetStore(store_dir)
+        for dataset, names in DEPENDENTS.items():
+            scheduler.add_source(f"store:{dataset}")
+            for name in names:
+                builder = partial(build_dashboard_item, store, name)
+                scheduler.register(name, builder, [f"store:{dataset}"])
+    scheduler.register(
+        "popular_recipes", load_popular_recipes, ["combined_df", "recipe_popularity"]
+    )
+    scheduler.register("daily_interactions", load_daily_interactions, ["date_counts"])
+    scheduler.register(
+        "tag_cube", load_tag_cube, ["recipe_month_counts", "all_recipe_tags"]
+    )
+    scheduler.register("recipe_ranker", load_recipe_ranker, ["combined_df"])
+    scheduler.register(
+        "recipe_autocomplete",
+        load_recipe_autocomplete,
+        ["search_index", "recipe_popularity"],
+    )
+    scheduler.register(
+        "ingredient_autocomplete", load_ingredient_autocomplete, ["ingredients"]
+    )
+    # RAW_recipes is not part of the snapshots: their recipe details come
+    # from the snapshot tables only, the tags from "recipe_tags"
+    repository_sources = [
+        "df_preprocessed",
+        "combined_df",
+        "recipe_popularity",
+        "ingredients",
+        "recipe_tags" if snapshot_dir else f"dataset:{RAW_RECIPES}",
+    ]
+    scheduler.register(
+        "recipe_repository",
+        partial(load_recipe_repository, with_raw_recipes=not snapshot_dir),
+        repository_sources,
+    )
+    scheduler.register("outlier_detectors", load_outlier_detectors, ["combined_df"])
+    scheduler.register(
+        "nutrient_sketches", load_nutrient_sketches, ["combined_df", "recipe_tags"]
+    )
+    scheduler.register(
+        "similarity_indexes", load_similarity_indexes, ["df_preprocessed"]
+    )
+    return scheduler
+
+
+@st.cache_resource
+def seen_store_versions() -> dict:
+    """Returns the store dataset versions the prefetched data was built from."""
+    return {}
+
+
+def refresh_store() -> None:
+    """
+    Invalidates the prefetched data derived from the ingestion store
+    datasets that received new batches since the previous run, so they
+    show up without recomputing anything else.
+    """
+    store_dir = os.environ.get(STORE_ENV)
+    if not store_dir:
+        return
+    versions = DatasetStore(store_dir).versions()
+    seen = seen_store_versions()
+    changed = [
+        f"store:{dataset}"
+        for dataset, version in versions.items()
+        if seen.get(dataset, version) != version
+    ]
+    get_prefetcher().invalidate(changed)
+    seen.update(versions)
+
+
+def dashboard_item(name: str):
+    """
+    Returns a piece of dashboard data (e.g. "combined_df", "interactions",
+    "metrics"), waiting for its prefetch task or computing it right away
+    when it has not started yet.
+    """
+    return get_prefetcher().result(name)
+
+
+@instrumented()
+def load_popular_recipes() -> pd.DataFrame:
+    """
+    Joins the interaction count of each recipe onto `combined_df`.
+
+    The per-recipe aggregates are computed from the preprocessed
+    interactions with the rest of the dashboard data.
+
+    Returns:
+        pd.DataFrame: `combined_df` with an extra `interaction_count` column.
+    """
+    return join_popularity(
+        dashboard_item("combined_df"), dashboard_item("recipe_popularity")
+    )
+
+
+@instrumented()
+def build_nutrition_figures(name: str, min_interactions: int) -> dict:
+    """
+    Builds the top 4 ("nutrition_hist") or ratio ("nutrition_hist_ratio")
+    figures restricted to the recipes having at least `min_interactions`
+    interactions.
+
+    Args:
+        name (str): "nutrition_hist" or "nutrition_hist_ratio".
+        min_interactions (int): Minimum number of interactions per recipe.
+
+    Returns:
+        dict: Plotly figures keyed by nutritional category.
+    """
+    popular_df = filter_min_interactions(
+        dashboard_item("popular_recipes"), min_interactions
+    )
+    if name == "nutrition_hist":
+        return plot_top_4_recipes_by_nutrition(popular_df, categories)
+    return nutrition_bar_ratio_sodium_proteins(popular_df, categories)
+
+
+# Filtered figure tasks kept registered, the least recently used ones being
+# dropped, so that typing many thresholds does not keep every figure
+MAX_FILTERED_FIGURES = 8
+
+
+@st.cache_resource
+def filtered_figure_tasks() -> tuple:
+    """
+    Returns the registered filtered figure tasks, least recently used
+    first, and the lock guarding them.
+    """
+    return OrderedDict(), threading.Lock()
+
+
+def nutrition_figures(name: str, min_interactions: int) -> dict:
+    """
+    Returns the top 4 or ratio figures over every recipe, or over the
+    recipes having at least `min_interactions` interactions when positive.
+    The filtered figures are a task of their own, invalidated with
+    "popular_recipes"; only the `MAX_FILTERED_FIGURES` most recently used
+    ones stay registered.
+    """
+    if min_interactions <= 0:
+        return dashboard_item(name)
+    prefetcher = get_prefetcher()
+    task = f"{name}:min_interactions={min_interactions}"
+    tasks, lock = filtered_figure_tasks()
+    builder = partial(build_nutrition_figures, name, min_interactions)
+    with lock:
+        prefetcher.register(task, builder, ["popular_recipes"])
+        tasks[task] = None
+        tasks.move_to_end(task)
+        while len(tasks) > MAX_FILTERED_FIGURES:
+            prefetcher.unregister(tasks.popitem(last=False)[0])
+    return dashboard_item(task)
+
+
+@st.fragment
+def set_global_styles():
+    """
+    Apply custom global styles to the Streamlit app using CSS.
+
+    This function customizes:
+    - Font: 'Times New Roman', bold, black text.
+    - Background color: #D2B48C (tan).
+
+    Behavior:
+        - Injects CSS using `st.markdown`.
+        - `unsafe_allow_html` is used to enable custom HTML and CSS.
+    """
+    st.markdown(
+        """
+        <style>
+        body {
+            color: #000000; /* black text */
+            font-family: 'Times New Roman', without-serif;
+            font-weight: bold; /* bold */
+        }
+        .stApp {
+            background-color: #D2B48C; /* Clear color */
+        }
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
+
+
+@st.fragment
+def display_featureengineeringsteps() -> None:
+    """
+    Display the steps of feature engineering in interactions and recipes data
+
+    Explains the project's two main themes:
+    1. **interactions data feature engineering steps**:
+    2. **recipes data feature engineering steps**:
+    Behavior:
+        - Uses `st.markdown` to display formatted project details.
+        - Highlights data-driven insights on bio recipes and health.
+    """
+    # interactions data
+    st.title("Feature engineering for interactions dataset")
+    feature_engineering_text_interactions = """
+        **Feature Engineering steps (preprocessed_data folder in the file
+        PP_interactions_mangetamain.csv) :**
+        1. **Data Parsing and Cleaning**
+        - **Remove Irrelevant Columns**: Dropping columns
+        that are not useful for analysis
+        - `review`
+        - `cuisine`
+        - `rating`
+        - `interaction_type`
+        - **Remove outliers**: using z-score method
+        - **Deleting rows with duplicates**
+        2. **Date-related features:**
+        - Extracting day, month, year from the `date` column.
+
+        3. **Interaction type:**
+        - Interaction count: Counting the number of interactions per `recipe_id`.
+
+        4. **User-based features:**
+        - Total interactions per user: Counting how many recipes
+          a user has interacted with.
+
+        5. **Handling missing data:**
+        - Filling missing values in numeric columns with NaN values.
+        ---
+
+        **Summary about the columns :**
+        1. **Columns to Drop:**
+        - `review`
+        - `cuisine`
+        - `rating`
+        - `interaction_type`
+        2. **Columns to Retain:**
+        - `recipe_id`
+        - `date`
+    """
+    st.markdown(feature_engineering_text_interactions)
+    st.title("Feature engineering for recipes dataset")
+    # Step 1: Data Parsing and Cleaning
+    st.markdown(
+        """
+        preprocessed_data folder (PP_recipes_mangetamain.csv)
+        1. Data parsing and cleaning
+        - **Nutrition data**: The `nutrition` column contains a
+        list of values representing
+        different nutritional components. Spliting it into separate columns for
+        - Calories
+        - Total Fat
+        - Proteins
+        - Carbohydrates
+        - Sugar
+        - Sodium
+        - Saturated Fat
+        - **Ingredient IDs**: The `ingredient_ids` column stores a list of
+        ingredient IDs.
+        - **Tags**: Filtering the dataframe by using the `tags`
+        column related to the bio keywords (substainable, eco-friendly,
+        fresh, natural and so on).
+        - **Remove irrelevant columns**: Dropping columns
+        that are not useful for analysis.
+        """
+    )
+
+    # Step 2: Feature Engineering on Nutrition Data
+    st.markdown(
+        """
+        2. Feature Engineering on nutrition data
+        - Creating new columns from the `nutrition`
+        data as described above.
+        - Studying the values and the international unit measures of each
+        nutritional component
+        """
+    )
+
+    # Step 3: Handling Ingredient IDs
+    st.markdown(
+        """
+        3. Handling ingredient IDs
+        - **Ingredient Count**: Adding a feature
+        representing the total number of ingredients
+        in each recipe.
+        """
+    )
+
+    # Step 4: Integrating User Interaction Data
+    st.markdown(
+        """
+        4. Integrating user interaction data
+        - **Join Interaction Data**: Merging the recipe
+        dataset with user interaction data to
+        enrich it with features like:
+            - Total interaction count per recipe.
+        """
+    )
+
+    # Step 5: Handling Missing Values
+    st.markdown(
+        """
+         5. Handling missing
+         values
+        - **Dropping rows/columns**: Removing rows or columns with excessive missing
+        data.
+        """
+    )
+
+    # Step 6: Advanced Transformations and Modeling
+    st.markdown(
+        """
+        6. Advanced transformations and modeling
+        - **Normalization/Standardization**: Scaling numerical
+        features using methods like
+        Min-Max scaling or Z-score normalization for better model performance.
+        Deleting outliers (recipes with `minutes` column values equal
+        to 0 and superior to 3600 minutes)
+        """
+    )
+    st.markdown(
+        """
+        **Summary about the columns:**
+        1. **Columns to Drop:**
+        - `minutes`
+        - `contributor_id`
+        - `submitted`
+        - `tags`
+        - `n_steps`
+        - `steps`
+        - `description`
+        2. **Columns to Retain:**
+        - `name`
+        - `id`
+        - `nutrition`
+        - `ingredient_ids`
+        """
+    )
+
+
+@st.fragment
+def display_explications_webapp() -> None:
+    """
+    Display the introduction and purpose of the web application.
+
+    Explains the project's two main themes:
+    1. **Bio Recipes Analysis**:
+       - Evaluates bio recipe counts and ingredients.
+       - Calculates KPIs such as ingredient variety and recipe proportions.
+    2. **Nutritional Analysis**:
+       - Ranks top recipes by nutritional content (e.g., proteins, carbs).
+       - Provides insights for dietary goals like muscle strengthening.
+
+    Behavior:
+        - Uses `st.write` to display formatted project details.
+        - Highlights data-driven insights on bio recipes and health.
+    """
+    st.write(
+        "**Welcome to the Mangetamain webapp,** "
+        "**where we dive deep into the world of bio recipes.** "
+        "**This project is based on two central themes,** "
+        "**both focused on providing valuable insights** "
+        "**into healthier eating and optimal nutrition.**"
+    )
+
+    st.write(
+        "**The first part of the project focuses on bio recipes.** "
+        "**Here, I worked on generating KPI's** "
+        "**to share meaningful patterns and observations.** "
+        "**We analyzed the number of ingredients** "
+        "**in bio recipes, calculated the percentage of recipes within the original** "
+        "**raw recipes** "
+        "**dataset and examined the total number of bio recipes available.** "
+        "**These metrics provide a clear** "
+        "**picture of the scope and richness of bio-based cooking.** "
+        "**I showed other indicators about users (techniques, number of users)** "
+        "**and ingredients.** "
+    )
+
+    st.write(
+        "**The second theme revolves around studying the nutritional** "
+        "**components of bio recipes.** "
+        "**By ranking the top 4 recipes for each nutritional component,** "
+        "**we can identify which dishes align best with specific dietary needs.** "
+        "**This ranking provides practical guidance for those seeking** "
+        "**recipes that support muscular development, control blood sugar** "
+        "**or promote overall health.** "
+        "**I decided to maximize the proteins quantities in the ranking.** "
+        "**The recipes with the lower values are chosen** "
+        "**about the other nutritional components.** "
+    )
+
+    st.write(
+        "**In addition to the rankings, I created various visualizations** "
+        "**such as charts illustrating** "
+        "**the ratio of proteins to sodium,** "
+        "**proteins to carbohydrates and the proteins to saturated fat.** "
+        "**For each chart, I selected the recipe that has the highest ratio value.** "
+        "**These insights are crucial for** "
+        "**users who want to optimize their diet to strive against diabete,** "
+        "**high blood pressure, bad cholesterol** "
+        "**or strengthen muscles.** "
+        "**Visualizing these ratios** "
+        "**makes it easier for users to adopt the right recipes for their goals.** "
+    )
+
+    st.write(
+        "**To give the efficient recommendations,** "
+        "**I included a table showcasing the ideal recipes tailored** "
+        "**for users with specific dietary goals. It refers to** "
+        "**muscular development, reducing the risk of diabete or bad cholesterol.** "
+        "**This table combines all the insights in an available format.** "
+        "**It empowers users to make informed choices.**"
+    )
+
+    st.write(
+        "**The results from these analyses have been enlightening.** "
+        "**The nutritional content of some recipes was lower** "
+        "**than expected, giving insights in their potential health benefits.** "
+        "**This exploration has also provided** "
+        "**me with a deeper understanding of how bio recipes can** "
+        "**contribute to healthier eating habits.**"
+    )
+
+    st.write(
+        "**Through this project, I have gained valuable insights that will guide** "
+        "**future work.** "
+        "**By focusing on both nutrient composition and practical dietary advice,** "
+        "**I believe this webapp offers users the** "
+        "**tools they need to make healthier, more informed food choices.**"
+    )
+
+
+@st.fragment
+def display_title() -> None:
+    """Displays the main title of the project"""
+    st.markdown(
+        "<h1 style='font-size: 36px; text-align: center;'>Mangetamain world</h1>",
+        unsafe_allow_html=True,
+    )
+
+
+@st.cache_data(ttl=3600)
+@st.fragment
+def display_statistics(metrics: dict) -> None:
+    """
+    Display key statistics using `st.metric` widgets.
+
+    Args:
+        metrics (dict):
+            Scalar metrics of the dashboard data (see `snapshot.py`): number
+            of bio recipes, their proportion (%), number of Z-score
+            outliers, users, techniques and ingredients.
+
+    Behavior:
+        - Metrics for total bio recipes, contributors, and ingredients.
+        - Displays three-column layout for clear visualization.
+        - Uses Streamlit's `st.metric` widgets for dynamic data display.
+
+    Example:
+        ```python
+        display_statistics(dashboard_item("metrics"))
+    """
+    # Section 1: Bio Recipes Overview
+    st.markdown(
+        """
+        <div style="border: 2px solid #e0e0e0; padding: 20px; margin-bottom: 20px;">
+            <h2 style="text-align: center; font-size: 32px;">Bio Recipes Overview</h2>
+            <div style="margin-top: 10px; font-size: 27px;">
+                <p>Total bio recipes:</p>
+                <b style="font-size: 26px;color: green;">{}</b>
+            </div>
+            <div style="margin-top: 10px; font-size: 27px;">
+                <p>Bio recipes proportion (%):</p>
+                <b style="font-size: 26px;color: green;">{:.2f}%</b>
+            </div>
+            <div style="margin-top: 10px; font-size: 27px;">
+                <p>Outliers detected:</p>
+                <b style="font-size: 26px;color: green;">{}</b>
+            </div>
+        </div>
+        """.format(
+            f"{metrics['bio_recipes']:,}".replace(",", " "),
+            metrics["rate_bio_recipes"],
+            metrics["outliers"],
+        ),
+        unsafe_allow_html=True,
+    )
+
+    # Section 2: Community Contributions
+    st.markdown(
+        """
+        <div style="border: 2px solid #e0e0e0; padding: 20px; margin-bottom: 20px;">
+            <h2 style="text-align: center; font-size: 32px;">Community Insights</h2>
+            <div style="margin-top: 10px; font-size: 27px;">
+                <p>Total users:</p>
+                <b style="font-size: 26px;color: #ff69b4;">{}</b>
+            </div>
+            <div style="margin-top: 10px; font-size: 27px;">
+                <p>New users (last month):</p>
+                <b style="font-size: 26px;color: #ff69b4;">452</b>
+            </div>
+            <div style="margin-top: 10px; font-size: 27px;">
+                <p>Number of different techniques:</p>
+                <b style="font-size: 26px;color: #ff69b4;">{}</b>
+            </div>
+        </div>
+        """.format(
+            f"{metrics['users']:,}".replace(",", " "),
+            f"{metrics['techniques']:,}".replace(",", " "),
+        ),
+        unsafe_allow_html=True,
+    )
+
+    # Section 3: Ingredient Insights
+    st.markdown(
+        """
+        <div style="border: 2px solid #e0e0e0; padding: 20px;">
+            <h2 style="text-align: center; font-size: 32px;">Ingredient Insights</h2>
+            <div style="margin-top: 10px; font-size: 27px;">
+                <p>Unique ingredients:</p>
+                <b style="font-size: 26px;color: orange;">{}</b>
+            </div>
+        </div>
+        """.format(
+            f"{metrics['ingredients']:,}".replace(",", " "),
+        ),
+        unsafe_allow_html=True,
+    )
+
+
+@st.fragment
+def add_background_from_url(url: str) -> None:
+    """Adds a background image to the Streamlit app using CSS.
+    This function embeds custom CSS to set a background image for the entire
+    Streamlit app by applying the style to the `.stApp` class. The image is
+    sourced from the specified URL and styled to provide a visually appealing
+    full-screen background.
+
+    Args:
+        url (str):
+            A direct URL pointing to the image file (e.g., PNG, JPG, or GIF)
+            that will be used as the background.
+
+    Behavior:
+        - The background image is resized to cover the entire viewport.
+        - The image is centered both horizontally and vertically.
+        - The image does not repeat and remains fixed during scrolling.
+
+    Example:
+        ```python
+        import streamlit as st
+
+        add_background_from_url("https://example.com/background.jpg")
+        st.title("Welcome to My Streamlit App!")
+        ```
+    """
+    st.markdown(
+        f"""
+        <style>
+        .stApp {{
+            background-image: url("{url}");
+            background-size: cover;
+            background-position: center;
+            background-repeat: no-repeat;
+            background-attachment: fixed;
+        }}
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
+
+
+@st.fragment
+def display_general_observations() -> None:
+    """Displays general analysis charts"""
+    st.plotly_chart(
+        dashboard_item("interactions"),
+        key="unique_key_for_selectbox_50",
+        use_container_width=True,
+    )
+    display_interaction_trends()
+
+
+@instrumented()
+def load_daily_interactions() -> DailyInteractions:
+    """
+    Builds the dense array of the interactions per day from the per-day
+    counts ("date_counts"), computed once per version of the interactions.
+    """
+    return DailyInteractions.from_counts(dashboard_item("date_counts"))
+
+
+@instrumented()
+def load_tag_cube() -> TagCube:
+    """
+    Builds the cube of the interactions per month and recipe tag from the
+    interactions per recipe and month ("recipe_month_counts") and the tags
+    of every recipe ("all_recipe_tags").
+    """
+    return TagCube.from_tables(
+        dashboard_item("recipe_month_counts"), dashboard_item("all_recipe_tags")
+    )
+
+
+@st.fragment
+def display_interaction_trends() -> None:
+    """Displays the rolling and seasonal views of the interactions
+    This function renders three tabs computed from the interactions per
+    day: the rolling mean over a chosen number of days, the monthly totals
+    compared year over year and the weekday x month seasonality heatmap,
+    plus the interactions on bio recipes against the others and on the
+    most interacted tags from the interactions x tags cube.
+
+    Behavior:
+        - Select slider of the rolling window (7 to 365 days).
+        - Line charts of the daily counts and monthly totals per year.
+        - Heatmap of the mean interactions per day per weekday and month.
+        - Stacked bars of the bio and other interactions per year or month,
+          bio being the recipes with a tag containing a bio keyword.
+        - Bars of the interactions on the 10 most interacted tags and on
+          the other tags.
+
+    Example:
+        ```python
+        display_interaction_trends()
+    """
+    daily = dashboard_item("daily_interactions")
+    if not len(daily):
+        st.caption("No interaction to show.")
+        return
+    rolling, year_over_year, seasonality, bio, top_tags = st.tabs(
+        [
+            "📈 Rolling mean",
+            "📅 Year over year",
+            "🗓️ Seasonality",
+            "🌱 Bio vs other",
+            "🏷️ Top tags",
+        ]
+    )
+    with rolling:
+        window = st.select_slider(
+            "Rolling window (days)",
+            options=[7, 30, 90, 365],
+            value=30,
+            key="interactions_rolling_window",
+        )
+        st.plotly_chart(
+            build_rolling_figure(daily, window),
+            key="interactions_rolling_chart",
+            use_container_width=True,
+        )
+    with year_over_year:
+        st.plotly_chart(
+            build_year_over_year_figure(daily),
+            key="interactions_year_over_year_chart",
+            use_container_width=True,
+        )
+    with seasonality:
+        st.plotly_chart(
+            build_seasonality_figure(daily),
+            key="interactions_seasonality_chart",
+            use_container_width=True,
+        )
+    with bio:
+        level = st.radio(
+            "Per",
+            ["year", "month"],
+            horizontal=True,
+            key="interactions_bio_level",
+        )
+        cube = dashboard_item("tag_cube")
+        st.plotly_chart(
+            build_tag_trend_figure(
+                cube, cube.matching_tags(filter_values1_bio[0]), "Bio", level
+            ),
+            key="interactions_bio_chart",
+            use_container_width=True,
+        )
+    with top_tags:
+        st.plotly_chart(
+            build_top_tags_figure(cube),
+            key="interactions_top_tags_chart",
+            use_container_width=True,
+        )
+
+
+@st.fragment
+def display_nutritional_analysis(figures: dict = None) -> None:
+    """Displays a dropdown and chart for nutritional components analysis
+    Displays a dropdown and chart for nutritional component analysis.
+
+    This function provides an interface for users to select a nutritional
+    component (e.g., calories) via a radio button and displays a histogram
+    for the top four recipes in the selected category.
+
+    Args:
+        figures (dict):
+            Plotly figures keyed by nutritional category. Defaults to the
+            figures built over every recipe.
+
+    Behavior:
+        - Displays a subheader for the analysis.
+        - Allows selection of a nutritional component through a radio button.
+        - Renders an interactive Plotly chart for the selected component.
+
+    Example:
+        ```python
+        display_nutritional_analysis(top_k_figures)
+    """
+    if figures is None:
+        figures = dashboard_item("nutrition_hist")
+    st.subheader("🥥 Top 4 Recipes per nutritional component (calories in Kcal)")
+    # Help button with an interactive display
+    if st.button("ℹ️ Current Daily Value (DV) guide"):
+        st.markdown(
+            """
+            <div style='padding: 20px; background-color: #000000; border-radius: 10px;'>
+                <h4 style='color: #ff69b4;'>Nutritional components</h4>
+                <ul style="list-style-type: square; color: #ff69b4;">
+                    <li><strong>Calories:</strong> 2,000 Kcal</li>
+                    <li><strong>Total fat:</strong> 78 g</li>
+                    <li><strong>Sugar:</strong> 50 g</li>
+                    <li><strong>Sodium:</strong> 2,300 mg</li>
+                    <li><strong>Protein:</strong> 50 g</li>
+                    <li><strong>Saturated fat:</strong> 20 g</li>
+                    <li><strong>Carbohydrates:</strong> 275 g</li>
+                </ul>
+            </div>
+            """,
+            unsafe_allow_html=True,
+        )
+    # Layout with columns: 85% for the graph, 15% for the form
+    col1, col2 = st.columns([8.0, 2.0])
+
+    with col1:
+        # Custom HTML to wrap the radio button inside a div with class for styling
+        selected_category = st.radio(
+            "🔥 Select a nutritional component",
+            categories,
+            key="unique_key_for_selectbox_1",
+        )
+        # Add border and margin around the chart to separate it from the radio buttons
+        st.markdown(
+            """
+            <style>
+                .chart-container {
+                    margin-top: 20px;  /* Space between radio buttons and the chart */
+                    border: 2px solid #e0e0e0;
+                    padding: 15px;
+                    border-radius: 8px;
+                    background-color: #f9f9f9;
+                }
+            </style>
+            """,
+            unsafe_allow_html=True,
+        )
+
+        # Plot the selected nutritional analysis chart
+        st.plotly_chart(
+            figures[selected_category],
+            key="unique_key_for_selectbox_8",
+            use_container_width=True,
+        )
+    with col2:
+        # Add margin to align the form vertically with the graph
+        # Apply custom styling to the form container
+        st.markdown(
+            """
+            <style>
+                .form-container {
+                    margin-top: 20px;
+                    padding: 15px;
+                    border: 2px solid #ff69b4;
+                    border-radius: 10px;
+                    background-color: #ff69b4;
+                    box-shadow: 2px 2px 5px rgba(0, 0, 0, 0.1);
+                }
+                .stSelectbox, .stNumberInput {
+                    margin-bottom: 15px;
+                }
+                .stButton>button {
+                    background-color: #2E8B57;
+                    color: green;
+                    border-radius: 5px;
+                    border: none;
+                    padding: 8px 20px;
+                    cursor: pointer;
+                }
+                .stButton>button:hover {
+                    background-color: #ff69b4;
+                }
+            </style>
+            """,
+            unsafe_allow_html=True,
+        )
+        # Add form within styled container
+        st.markdown("<div class='form-container'>", unsafe_allow_html=True)
+        # CDV Conversion Form
+        st.markdown("% Daily Value ---> g/mg")
+        with st.form("dv_conversion_form"):
+            # Select component for conversion
+            component = st.selectbox(
+                "Nutritional component:",
+                [
+                    "Total fat",
+                    "Sugar",
+                    "Sodium",
+                    "Protein",
+                    "Saturated fat",
+                    "Carbohydrates",
+                ],
+            )
+
+            # Input for %CDV
+            dv = st.number_input(
+                f"% Daily Value for {component}:",
+                min_value=0.0,
+                max_value=100.0,
+                step=1.0,
+            )
+
+            # Submit button for the form
+            submitted = st.form_submit_button("Convert")
+
+            if submitted:
+                # Daily values for each component
+                daily_values = {
+                    "Total fat": 78,
+                    "Sugar": 50,
+                    "Sodium": 2300,
+                    "Protein": 50,
+                    "Saturated fat": 20,
+                    "Carbohydrates": 275,
+                }
+
+                if component in daily_values:
+                    # Perform conversion based on daily value and %CDV input
+                    converted_value = (dv * daily_values[component]) / 100
+                    unit = "mg" if component == "Sodium" else "g"
+
+                    # Display conversion result
+                    st.success(f"{converted_value:.2f} {unit}.")
+
+
+@st.fragment
+def display_nutritional_analysis_ratio(
+    context_key: str = "default", figures: dict = None
+) -> None:
+    """Displays a dropdown and chart for nutritional components analysis ratio.
+    This function enables users to analyze ratios for different nutritional
+    components by selecting a category. The chart adapts based on the selected
+    category and a context-specific key to ensure uniqueness in Streamlit's state.
+
+    Args:
+        context_key (str):
+            A unique identifier for differentiating between similar widgets in
+            different contexts. Defaults to 'default'.
+        figures (dict):
+            Plotly ratio figures keyed by nutritional category. Defaults to
+            the figures built over every recipe.
+
+    Behavior:
+        - Provides a radio button for selecting nutritional categories.
+        - Displays an interactive Plotly chart based on the selected category.
+
+    Example:
+        ```python
+        display_nutritional_analysis_ratio(context_key="unique_context")
+    """
+    if figures is None:
+        figures = dashboard_item("nutrition_hist_ratio")
+    # Categories that exist in the dictionary
+    categories = [
+        "Protein (g)",
+        "Sodium (mg)",
+        "Saturated Fat (g)",
+        "Carbohydrates (g)",
+    ]
+
+    # Add border and style to the radio buttons container
+    selected_category = st.radio(
+        "Select a nutritional component",
+        categories,
+        key=f"selectbox_{context_key}",  # Dynamically generate a unique key
+    )
+    # Add border and margin around the chart to separate it from the radio buttons
+    st.markdown(
+        """
+        <style>
+            .chart-container {
+                margin-top: 20px;  /* Space between radio buttons and the chart */
+                border: 2px solid #e0e0e0;
+                padding: 15px;
+                border-radius: 8px;
+                background-color: #f9f9f9;
+            }
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # Plot the selected nutritional analysis ratio chart
+    st.plotly_chart(
+        figures[selected_category],
+        key="unique_key_for_selectbox_670",
+        use_container_width=True,
+    )
+
+
+@st.fragment
+def display_ideal_recipes_health() -> None:
+    """Displays the ideal recipes for the health contributors .
+    This function creates and displays a dataframe that lists ideal recipes
+    for various health goals like muscle strengthening and managing
+    diabete or high blood pressure.
+
+    Behavior:
+        - Constructs a pandas DataFrame with health categories and recipes.
+        - Displays the dataframe as an interactive table in Streamlit.
+
+    Example:
+        ```python
+        display_ideal_recipes_health()
+    """
+    # Categories that exist in the dictionary
+    data = {
+        "Category": [
+            "🏋️‍♂️ Muscle strengthening and obesity",
+            "🏋️‍♂️ Muscle strengthening and obesity",
+            "🫀 Diabete and high blood pressure",
+            "🫀 Diabete and high blood pressure",
+            "🫀 Diabete and high blood pressure",
+            "🫀 Diabete and high blood pressure",
+            "🥓 Bad cholesterol",
+            "🥓 Bad cholesterol",
+            "🥓 Bad cholesterol",
+        ],
+        "🍉 Recipes (selecting the highest ratio value and ideally higher than 1.0)": [
+            "lighter pistachio pudding salad",
+            "basic baked fish easy dressing",
+            "creamy cucumber bites",
+            "lighter pistachio pudding salad",
+            "light and fluffy vegan lemon scones",
+            "basic baked fish easy dressing",
+            "easy cinnamon sugar muffins",
+            "libbie s corn for freezing",
+            "basic baked fish easy dressing",
+        ],
+    }
+
+    # Dataframe creation
+    df = pd.DataFrame(data)
+    # Style the dataframe with Pandas Styler (green text for all content)
+    styled_df = df.style.set_properties(
+        **{
+            "color": "white",  # white  text for the content
+        }
+    ).set_table_styles(
+        [{"selector": "th", "props": [("color", "#006400")]}]  # Dark green for headers
+    )
+    # Display the styled dataframe
+    st.write(styled_df.hide(axis="index").to_html(), unsafe_allow_html=True)
+
+
+@instrumented()
+def load_recipe_ranker() -> RecipeRanker:
+    """
+    Builds the multi-objective ranker over `combined_df` (normalized
+    nutrient matrix and Pareto front), prefetched once per server process.
+
+    Returns:
+        RecipeRanker: The ranker used by `display_healthy_ranking`.
+    """
+    return RecipeRanker(dashboard_item("combined_df"))
+
+
+@st.fragment
+def display_healthy_ranking() -> None:
+    """Displays the healthy recipes ranking with user-adjustable weights.
+    Each nutrient gets a weight slider; the composite score of every recipe
+    is recomputed from the cached nutrient matrix on each change, and the
+    recipes on the Pareto front (not beaten on all nutrients at once by
+    another recipe) are flagged.
+
+    Behavior:
+        - One weight slider per nutritional component.
+        - Toggle to rank only the Pareto-optimal recipes.
+        - Table of the best recipes with their score.
+
+    Example:
+        ```python
+        display_healthy_ranking()
+    """
+    ranker = dashboard_item("recipe_ranker")
+    st.write(
+        f"**{int(ranker.pareto_mask.sum()):,} recipes are Pareto-optimal** "
+        "(maximizing the proteins, minimizing the other components)."
+    )
+    weights = {}
+    columns = st.columns(len(NUTRIENT_OBJECTIVES))
+    for column, nutrient in zip(columns, NUTRIENT_OBJECTIVES):
+        with column:
+            weights[nutrient] = st.slider(
+                nutrient, 0.0, 5.0, 1.0, 0.5, key=f"ranking_weight_{nutrient}"
+            )
+    pareto_only = st.toggle(
+        "Only Pareto-optimal recipes", value=True, key="ranking_pareto_only"
+    )
+    ranked = ranker.top(weights, k=10, pareto_only=pareto_only)
+    st.dataframe(
+        ranked[["name", *NUTRIENT_OBJECTIVES, "Score", "Pareto optimal"]],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+@instrumented()
+def load_search_index() -> SearchIndex:
+    """
+    Loads the full-text search index of RAW_recipes from the cache
+    directory (MANGETAMAIN_CACHE_DIR, "cache" by default), building it
+    on first use for each version of the dataset.
+
+    Returns:
+        SearchIndex: The index used by `display_recipe_search`.
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+    directory = os.path.join(cache_dir, "search", dataset_version([RAW_RECIPES]))
+    return load_or_build(directory, build_search_index)
+
+
+@st.fragment
+def display_recipe_search() -> None:
+    """Displays a search box over the recipe names, descriptions, tags and
+    steps, with the recipes ranked by relevance (BM25).
+
+    Behavior:
+        - Text input for the query and number input for the results.
+        - Table of the best matching recipes with their score.
+
+    Example:
+        ```python
+        display_recipe_search()
+    """
+    index = dashboard_item("search_index")
+    col1, col2 = st.columns([3.0, 1.0])
+    with col1:
+        query = st.text_input(
+            "🔎 Search recipes (name, description, tags, steps)",
+            key="recipe_search_query",
+        )
+    with col2:
+        k = st.number_input("Results", 1, 100, 10, key="recipe_search_k")
+    if not query:
+        return
+    start = time.perf_counter()
+    results = index.search(query, k=int(k))
+    elapsed = (time.perf_counter() - start) * 1000
+    if results.empty:
+        st.info("No recipe matches this search.")
+        return
+    st.caption(f"{len(results)} best matches in {elapsed:.1f} ms")
+    st.dataframe(
+        results.rename(columns={"name": "Recipe", "score": "Relevance"})
+        .drop(columns="id")
+        .round(2),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+@instrumented()
+def load_recipe_autocomplete() -> PrefixIndex:
+    """
+    Builds the autocomplete of the recipe names (those of the search
+    index), the recipes with the most interactions first.
+
+    Returns:
+        PrefixIndex: The index used by `display_autocomplete`.
+    """
+    index = dashboard_item("search_index")
+    return recipe_autocomplete(
+        index.names, index.ids, dashboard_item("recipe_popularity")
+    )
+
+
+@instrumented()
+def load_ingredient_autocomplete() -> PrefixIndex:
+    """
+    Builds the autocomplete of the ingredient names, the ingredients used
+    by the most recipes first.
+
+    Returns:
+        PrefixIndex: The index used by `display_autocomplete`.
+    """
+    return ingredient_autocomplete(dashboard_item("ingredients"))
+
+
+@st.fragment
+def display_autocomplete() -> None:
+    """Displays the most popular recipe or ingredient names starting with
+    the typed text. Each lookup is a binary search in the sorted names
+    instead of a scan of the recipes.
+
+    Behavior:
+        - Radio button to look up recipes or ingredients.
+        - Text input for the beginning of the name.
+        - Table of the suggestions with their popularity.
+
+    Example:
+        ```python
+        display_autocomplete()
+    """
+    kinds = {
+        "Recipes": ("recipe_autocomplete", "Interactions"),
+        "Ingredients": ("ingredient_autocomplete", "Recipes using it"),
+    }
+    kind = st.radio("Look up", list(kinds), horizontal=True, key="autocomplete_kind")
+    item, weight_label = kinds[kind]
+    prefix = st.text_input("Name starts with", key="autocomplete_prefix")
+    if not prefix:
+        return
+    index = dashboard_item(item)
+    start = time.perf_counter()
+    suggestions = index.complete(prefix, k=10)
+    elapsed = (time.perf_counter() - start) * 1000
+    if suggestions.empty:
+        st.info(f"No {kind.lower()} name starts with this text.")
+        return
+    st.caption(f"{len(suggestions)} suggestions in {elapsed:.2f} ms")
+    st.dataframe(
+        suggestions.rename(columns={"name": "Name", "weight": weight_label})
+        .drop(columns="id")
+        .astype({weight_label: int}),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+@instrumented()
+def load_recipe_repository(with_raw_recipes: bool = True) -> RecipeRepository:
+    """
+    Indexes the recipe tables by recipe id for the detail view.
+
+    Args:
+        with_raw_recipes (bool): Whether RAW_recipes (steps, description,
+        tags...) is loaded, which is not the case in snapshot mode.
+
+    Returns:
+        RecipeRepository: The repository used by `display_recipe_details`.
+    """
+    raw_recipes = None
+    if with_raw_recipes:
+        import utils
+
+        raw_recipes = utils.df
+    return RecipeRepository(
+        raw_recipes,
+        dashboard_item("df_preprocessed"),
+        dashboard_item("combined_df"),
+        dashboard_item("recipe_popularity"),
+        dashboard_item("ingredients"),
+        None if with_raw_recipes else dashboard_item("recipe_tags"),
+    )
+
+
+@st.fragment
+def display_recipe_details() -> None:
+    """Displays everything known about one recipe, picked by name or id:
+    its nutrition and ranks, tags, ingredients, steps and interactions. The
+    record is read from precomputed id indexes, without scanning the tables.
+
+    Behavior:
+        - Text input for the beginning of the name or the recipe id.
+        - Select box of the matching names, most popular first.
+        - Key numbers, nutrition table with the ranks, ingredients and steps.
+
+    Example:
+        ```python
+        display_recipe_details()
+    """
+    text = st.text_input("Recipe name or id", key="recipe_details_text")
+    if not text:
+        return
+    if text.strip().isdigit():
+        recipe_id = int(text)
+    else:
+        suggestions = dashboard_item("recipe_autocomplete").complete(text, k=10)
+        if suggestions.empty:
+            st.info("No recipe name starts with this text.")
+            return
+        labels = dict(zip(suggestions["id"], suggestions["name"]))
+        recipe_id = st.selectbox(
+            "Recipe",
+            list(labels),
+            format_func=lambda recipe_id: f"{labels[recipe_id]} (#{recipe_id})",
+            key="recipe_details_choice",
+        )
+    repository = dashboard_item("recipe_repository")
+    start = time.perf_counter()
+    try:
+        record = repository.get(recipe_id)
+    except KeyError:
+        st.info(f"No recipe has the id {recipe_id}.")
+        return
+    elapsed = (time.perf_counter() - start) * 1000
+    st.markdown(f"### {record.get('name') or 'Unnamed recipe'}")
+    st.caption(f"Recipe #{record['id']}, read in {elapsed:.2f} ms")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Minutes", record.get("minutes", "-"))
+    col2.metric("Ingredients", len(record.get("ingredient_ids", [])))
+    col3.metric("Interactions", record.get("interaction_count", "-"))
+    if record.get("description"):
+        st.write(record["description"])
+    if record.get("tags"):
+        st.caption(" · ".join(record["tags"]))
+    if "nutrition" in record:
+        nutrition = pd.DataFrame(
+            {
+                "Value": record["nutrition"],
+                "Rank": {
+                    nutrient: f"{rank} / {repository.n_ranked}"
+                    for nutrient, rank in record["ranks"].items()
+                },
+            }
+        )
+        st.dataframe(nutrition.round(1), use_container_width=True)
+        if record["top_4"]:
+            st.success(f"Among the top 4 recipes for: {', '.join(record['top_4'])}")
+    elif "daily_values" in record:
+        st.caption("Filtered out of the nutritional analysis (a value under 1).")
+    col1, col2 = st.columns([1.0, 2.0])
+    with col1:
+        ingredients = record.get("ingredients") or [
+            name for name in record.get("ingredient_names", []) if name
+        ]
+        st.markdown("**Ingredients**")
+        st.markdown("\n".join(f"- {ingredient}" for ingredient in ingredients))
+    with col2:
+        if record.get("steps"):
+            st.markdown("**Steps**")
+            st.markdown(
+                "\n".join(
+                    f"{number}. {step}"
+                    for number, step in enumerate(record["steps"], start=1)
+                )
+            )
+
+
+def data_version() -> str:
+    """Returns the version of the data shown: the snapshot or the datasets."""
+    if os.environ.get(SNAPSHOT_ENV):
+        return dashboard_item("snapshot")["manifest"]["dataset_version"]
+    return dataset_version()
+
+
+@st.fragment
+def display_export() -> None:
+    """Displays the export of a recipe set (bio recipes, z-score outliers or
+    top k recipes for a nutrient) to CSV or Parquet. The file is written in
+    chunks to the cache directory once per version of the data, then
+    offered for download. Use `python src/export.py` for large exports.
+
+    Behavior:
+        - Select box of the recipe set, and the nutrient and number of
+          recipes of the top k.
+        - Radio button of the format.
+        - Button writing the file, then download button.
+
+    Example:
+        ```python
+        display_export()
+    """
+    snapshot_mode = bool(os.environ.get(SNAPSHOT_ENV))
+    # The bio recipes are filtered from RAW_recipes, not part of snapshots
+    sets = {
+        name: label
+        for name, label in RECIPE_SETS.items()
+        if not (snapshot_mode and name == "bio_recipes")
+    }
+    name = st.selectbox("Recipes", list(sets), format_func=sets.get, key="export_set")
+    nutrient, k, suffix = None, DEFAULT_K, ""
+    if name == "top_k":
+        col1, col2 = st.columns(2)
+        with col1:
+            nutrient = st.selectbox(
+                "Nutritional component",
+                list(NUTRIENT_OBJECTIVES),
+                key="export_nutrient",
+            )
+        with col2:
+            k = int(st.number_input("Recipes", 1, 1_000_000, DEFAULT_K, key="export_k"))
+        suffix = f"_{nutrient.split(' (')[0].lower().replace(' ', '_')}_{k}"
+    fmt = st.radio("Format", FORMATS, horizontal=True, key="export_format")
+    file_name = f"{name}{suffix}.{fmt}"
+    cache_dir = os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR)
+    path = os.path.join(cache_dir, "exports", data_version(), file_name)
+    if not os.path.exists(path):
+        if not st.button("Prepare the file", key="export_prepare"):
+            return
+        tables = None
+        if snapshot_mode:
+            tables = {
+                "df_preprocessed": dashboard_item("df_preprocessed"),
+                "combined_df": dashboard_item("combined_df"),
+            }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Sessions asking for the same file write it once
+        with exclusive(f"{path}.lock"), st.spinner("Writing the file..."):
+            if not os.path.exists(path):
+                export(recipe_set(name, nutrient, k, tables), path, fmt)
+    st.caption(f"{os.path.getsize(path) / 1e6:.1f} MB")
+    mime = "text/csv" if fmt == "csv" else "application/vnd.apache.parquet"
+    with open(path, "rb") as file:
+        st.download_button(
+            f"📥 Download {file_name}",
+            file,
+            file_name=file_name,
+            mime=mime,
+            key="export_download",
+        )
+
+
+@instrumented()
+def load_outlier_detectors() -> OutlierDetectors:
+    """
+    Runs every outlier detector over the nutritional components of
+    `combined_df`, prefetched once per server process. The bitmaps and the
+    isolation forest are persisted per dataset version in the
+    MANGETAMAIN_CACHE_DIR directory ("cache" by default).
+
+    Returns:
+        OutlierDetectors: The detectors used by `display_outlier_explorer`.
+    """
+    detectors = OutlierDetectors(
+        dashboard_item("combined_df"),
+        list(NUTRIENT_OBJECTIVES),
+        cache_dir=os.environ.get(CACHE_DIR_ENV, DEFAULT_CACHE_DIR),
+        n_jobs=-1,
+    )
+    detectors.counts()
+    return detectors
+
+
+@st.fragment
+def display_outlier_explorer() -> None:
+    """Displays the outliers found by each detector in the nutritional
+    components of the recipes, and how much the detectors agree.
+
+    Behavior:
+        - Table of the outliers per component and detector.
+        - Table of the agreement (Jaccard similarity) between detectors.
+        - Selectbox of a detector and table of the recipes it flags.
+        - Box plots of the components of the flagged recipes and histogram
+          of a selected component, both reduced on the server.
+        - With an ingestion store, table of the stored recipes flagged by
+          the z-scores against the running statistics of the store.
+
+    Example:
+        ```python
+        display_outlier_explorer()
+    """
+    detectors = dashboard_item("outlier_detectors")
+    labels = {
+        "zscore": "Z-score (> 3)",
+        "mad": "Robust z-score (MAD > 3.5)",
+        "iqr": "Tukey fences (1.5 IQR)",
+        "isolation_forest": "Isolation forest",
+    }
+    col1, col2 = st.columns([1.2, 1.0])
+    with col1:
+        st.write("**Outliers per nutritional component**")
+        st.dataframe(
+            detectors.counts().rename(columns=labels), use_container_width=True
+        )
+    with col2:
+        st.write("**Agreement between detectors (flagged recipes)**")
+        agreement = detectors.agreement().rename(index=labels, columns=labels)
+        st.dataframe(agreement.round(2), use_container_width=True)
+    method = st.selectbox(
+        "Detector", METHODS, format_func=labels.get, key="outlier_explorer_method"
+    )
+    outliers = detectors.outliers(method)
+    st.write(f"**{len(outliers):,} recipes flagged** (first 100 shown)")
+    st.dataframe(
+        outliers[["name", *detectors.columns]].head(100),
+        hide_index=True,
+        use_container_width=True,
+    )
+    if len(outliers):
+        col1, col2 = st.columns([1.0, 1.0])
+        with col1:
+            st.plotly_chart(
+                plot_summary_boxes(
+                    outliers,
+                    detectors.columns,
+                    f"Components of the recipes flagged by {labels[method]}",
+                ),
+                use_container_width=True,
+            )
+        with col2:
+            nutrient = st.selectbox(
+                "Nutritional component",
+                detectors.columns,
+                key="outlier_explorer_nutrient",
+            )
+            st.plotly_chart(
+                plot_binned_histogram(outliers, nutrient), use_container_width=True
+            )
+    if os.environ.get(STORE_ENV):
+        stored = dashboard_item("store_zscore_outliers")
+        st.write(
+            f"**{len(stored):,} ingested recipes flagged by {labels['zscore']}** "
+            "against the running statistics of the store (first 100 shown)"
+        )
+        st.dataframe(stored.head(100), hide_index=True, use_container_width=True)
+
+
+@instrumented()
+def load_nutrient_sketches() -> NutrientSketchIndex:
+    """
+    Builds the nutrient sketches of all the recipes of `combined_df` and of
+    each of their tags, prefetched once per server process.
+
+    Returns:
+        NutrientSketchIndex: The sketches used by `display_nutrition_explorer`.
+    """
+    return NutrientSketchIndex(
+        dashboard_item("combined_df"),
+        dashboard_item("recipe_tags"),
+        list(NUTRIENT_OBJECTIVES),
+    )
+
+
+@st.fragment
+def display_nutrition_explorer() -> None:
+    """Displays the distribution of the nutritional components of the recipes
+    carrying some tags. The distributions are merged from the precomputed
+    sketches of the selected tags, so no recipe is scanned on interaction.
+
+    Behavior:
+        - Text input to narrow down the tags, multiselect of the matching tags.
+        - Histogram of the selected nutritional component.
+        - Percentiles table and box plots of every component.
+
+    Example:
+        ```python
+        display_nutrition_explorer()
+    """
+    index = dashboard_item("nutrient_sketches")
+    keyword = st.text_input("🔎 Tag contains", key="nutrition_explorer_search")
+    matching = index.matching_tags(keyword) if keyword else []
+    if keyword and not matching:
+        st.info("No tag matches this keyword.")
+        return
+    tags = st.multiselect(
+        "Tags (all recipes when empty)",
+        matching,
+        default=matching[:5],
+        key="nutrition_explorer_tags",
+    )
+    sketch = index.sketch(tags or None)
+    recipes = sketch.count(index.nutrients[0])
+    if recipes == 0:
+        st.info("No recipe carries these tags.")
+        return
+    st.write(f"**{recipes:,} recipes** (counted once per selected tag)")
+    col1, col2 = st.columns([2.0, 1.0])
+    with col1:
+        nutrient = st.selectbox(
+            "Nutritional component", index.nutrients, key="nutrition_explorer_nutrient"
+        )
+        st.plotly_chart(
+            plot_sketch_histogram(sketch, nutrient), use_container_width=True
+        )
+    with col2:
+        percentiles = [0.05, 0.25, 0.5, 0.75, 0.95]
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Percentile": [f"P{round(q * 100)}" for q in percentiles],
+                    nutrient: np.round(sketch.quantiles(nutrient, percentiles), 1),
+                }
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+    st.plotly_chart(
+        plot_sketch_boxes(sketch, index.nutrients), use_container_width=True
+    )
+
+
+@instrumented()
+def load_similarity_indexes() -> tuple:
+    """
+    Builds the ingredient similarity indexes, prefetched once per server
+    process.
+
+    Returns:
+        tuple: The exact `IngredientSimilarityIndex` and the approximate
+        `MinHashLSH` index built over the preprocessed recipes.
+    """
+    index = IngredientSimilarityIndex(dashboard_item("df_preprocessed"))
+    return index, MinHashLSH(index.incidence)
+
+
+@st.fragment
+def display_similar_recipes() -> None:
+    """Displays the recipes sharing the most ingredients with a chosen recipe.
+    The user looks a recipe up by name, then chooses between the exact
+    TF-IDF cosine ranking and the approximate MinHash-LSH candidates.
+
+    Behavior:
+        - Text input to narrow down the recipe names.
+        - Selectbox with the matching recipes (first 50 matches).
+        - Table of the most similar recipes with their score.
+
+    Example:
+        ```python
+        display_similar_recipes()
+    """
+    index, lsh = dashboard_item("similarity_indexes")
+    df_preprocessed = dashboard_item("df_preprocessed")
+    search = st.text_input("🔎 Recipe name contains", key="similar_recipes_search")
+    names = df_preprocessed["name"]
+    matches = df_preprocessed[
+        names.str.contains(search, case=False, na=False, regex=False)
+    ].head(50)
+    if matches.empty:
+        st.info("No recipe matches this name.")
+        return
+    recipe_id = st.selectbox(
+        "Recipe",
+        matches["id"],
+        format_func=dict(zip(matches["id"], matches["name"])).get,
+        key="similar_recipes_select",
+    )
+    col1, col2 = st.columns([3.0, 1.0])
+    with col1:
+        method = st.radio(
+            "Method",
+            ["Exact (TF-IDF cosine)", "Approximate (MinHash-LSH)"],
+            horizontal=True,
+            key="similar_recipes_method",
+        )
+    with col2:
+        k = st.number_input("Results", 1, 50, 10, key="similar_recipes_k")
+    position = index.positions(recipe_id)[0]
+    if method.startswith("Exact"):
+        ((rows, scores),) = index.most_similar_positions(position, k)
+        score_label = "Cosine similarity"
+    else:
+        rows, scores = lsh.query(position, k)
+        score_label = "Estimated Jaccard"
+    similar = pd.DataFrame(
+        {
+            "Recipe": df_preprocessed["name"].to_numpy()[rows],
+            score_label: np.round(scores, 3),
+        }
+    )
+    st.dataframe(similar, hide_index=True, use_container_width=True)
+
+
+def display_performance_panel() -> None:
+    """Displays the stage timings recorded by the instrumentation layer.
+    Every load, transform and figure stage executed by this server process
+    is summarised with its wall time, CPU time, size and RSS increase.
+
+    Behavior:
+        - Table of the stages, the slowest in total first.
+        - Number of prefetched data tasks per state.
+        - Button to reset the recorded measurements.
+
+    Example:
+        ```python
+        display_performance_panel()
+    """
+    summary = tracker.summary()
+    if summary.empty:
+        st.caption("No stage recorded yet.")
+    else:
+        total = (summary["wall_mean_s"] * summary["calls"]).sum()
+        st.caption(f"Total recorded stage time: {total:.2f} s")
+        st.dataframe(
+            summary.round(4),
+            hide_index=True,
+            use_container_width=True,
+        )
+    states = pd.Series(get_prefetcher().status(), dtype=object).value_counts()
+    counts = ", ".join(f"{count} {state}" for state, count in states.items())
+    st.caption(f"Prefetched data: {counts or 'none'}")
+    if st.button("Reset measurements", key="reset_performance_button"):
+        tracker.clear()
+
+
+def display_data_catalog() -> None:
+    """Displays the profile of a source dataset.
+    The profile is computed in one streaming pass over the dataset the
+    first time it is shown, then read from the file stored next to the
+    dataset until the dataset changes.
+
+    Behavior:
+        - Selectbox of the source datasets present on disk.
+        - Caption with the rows, the memory once loaded and the profiling time.
+        - Table of the columns: dtype, nulls, approximate distinct values,
+          minimum, maximum and memory.
+
+    Example:
+        ```python
+        display_data_catalog()
+    """
+    datasets = [path for path in SOURCES if os.path.exists(path)]
+    if not datasets:
+        st.caption("No source dataset on disk (e.g. started from a snapshot).")
+        return
+    dataset = st.selectbox("Dataset", datasets, key="data_catalog_dataset")
+    with st.spinner(f"Profiling {dataset}..."):
+        profile = profile_dataset(dataset)
+    st.caption(
+        f"{profile['rows']:,} rows, {profile['memory_bytes'] / 2**20:.1f} MiB "
+        f"once loaded, profiled in {profile['seconds']:.2f} s "
+        f"({profile['created'][:19].replace('T', ' ')} UTC)"
+    )
+    columns = pd.DataFrame(profile["columns"])
+    for bound in ("min", "max"):
+        # Long texts are shortened, mixed types are shown as text
+        columns[bound] = columns[bound].map(
+            lambda value: None if value is None else str(value)[:60]
+        )
+    st.dataframe(columns, hide_index=True, use_container_width=True)
+
+
+@st.fragment
+def clear_cache_button() -> None:
+    """Refresh data sources
+    This function renders a selector of the data sources (datasets,
+    snapshot or ingestion store) and a button invalidating the chosen ones.
+    Only the cached data computed from these sources is dropped; it is then
+    recomputed once, the other sessions waiting on the same computation.
+
+    Behavior:
+        - Multiselect of the data sources.
+        - Button invalidating them and rerunning the app.
+        - Caption listing the data invalidated by the last refresh.
+
+    Example:
+        ```python
+        clear_cache_button()
+    """
+    scheduler = get_prefetcher()
+    sources = st.multiselect(
+        "Data sources to refresh", scheduler.sources(), key="refresh_sources"
+    )
+    if st.button(
+        "Refresh selected data", disabled=not sources, key="refresh_sources_button"
+    ):
+        invalidated = scheduler.invalidate(sources)
+        st.session_state["refreshed_data"] = [
+            name for name in invalidated if name not in sources
+        ]
+        st.rerun()
+    if "refreshed_data" in st.session_state:
+        refreshed = ", ".join(st.session_state["refreshed_data"]) or "nothing"
+        st.caption(f"Recomputed: {refreshed}")
+
+
+def main():
+    st.markdown(
+        """<style>
+            header[data-testid="stHeader"] {
+                display: none;
+            }
+            footer {
+                display: none;
+            }
+            [data-testid="stSidebar"] {
+                background-color: #2E8B57;  /* Vert foncé */
+                padding: 20px;
+            }
+            </style>
+            """,
+        unsafe_allow_html=True,
+    )
+    background_url = (
+        "https://assets.afcdn.com/imsite1/acc11_691465/"
+        "acc1257x1257a871129_w450h311c1.jpg"
+    )  # Image URL
+    add_background_from_url(background_url)
+    # set_global_styles()
+    display_title()
+    # Sidebar setup
+    st.markdown(
+        """
+        <style>
+            /* Sidebar color */
+            [data-testid="stSidebar"] {
+                background-color: #2E8B57,
+                padding: 0;
+                margin: 0;
+                overflow: hidden;
+            }
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
+    # Expander for general observations
+    with st.sidebar.expander("🍒 Storytelling and feature engineering"):
+        show_storytelling = st.checkbox(
+            "Storytelling for my webapp",
+            True,
+            key="storytelling_checkbox3490",
+        )
+        show_feature_engineering = st.checkbox(
+            "Feature engineering", True, key="feature_engineering_checkbox4443"
+        )
+    # Expander for general observations
+    with st.sidebar.expander("📊 General observations"):
+        show_general_obs = st.checkbox(
+            "Key numbers for recipes, ingredients and community",
+            True,
+            key="general_observations_checkbox34",
+        )
+        show_inter_obs = st.checkbox(
+            "Interactions", True, key="general_observations_checkbox4453"
+        )
+        show_outlier_explorer = st.checkbox(
+            "Outliers per detector", False, key="outlier_explorer_checkbox"
+        )
+    # Expander for nutritional components analysis
+    with st.sidebar.expander("🥒 Nutritional components findings"):
+        show_nutritional_analysis = st.checkbox(
+            "Recipes ranking/nutritional component",
+            True,
+            key="nutritional_analysis_checkbox58",
+        )
+        show_nutritional_analysis_1 = st.checkbox(
+            "Recipes ranking/nutritional component ratio",
+            True,
+            key="nutritional_analysis_checkbox_576",
+        )
+        show_healthy_ranking = st.checkbox(
+            "Healthy recipes ranking (adjustable weights)",
+            False,
+            key="healthy_ranking_checkbox",
+        )
+        show_nutrition_explorer = st.checkbox(
+            "Nutritional components distribution per tag",
+            False,
+            key="nutrition_explorer_checkbox",
+        )
+        min_interactions = st.number_input(
+            "Minimum interactions per recipe",
+            min_value=0,
+            value=0,
+            step=1,
+            key="min_interactions_input",
+        )
+    # Expander for the full-text search
+    with st.sidebar.expander("🔎 Search"):
+        show_recipe_search = st.checkbox(
+            "Full-text recipe search", False, key="recipe_search_checkbox"
+        )
+        show_autocomplete = st.checkbox(
+            "Recipe and ingredient names autocomplete",
+            False,
+            key="autocomplete_checkbox",
+        )
+        show_recipe_details = st.checkbox(
+            "Recipe details", False, key="recipe_details_checkbox"
+        )
+    # Expander for ingredient based lookups
+    with st.sidebar.expander("🧂 Ingredients"):
+        show_similar_recipes = st.checkbox(
+            "Recipes sharing ingredients", False, key="similar_recipes_checkbox"
+        )
+    # Expander for health diets
+    with st.sidebar.expander("🍽️ Food diets"):
+        show_health_diets = st.checkbox(
+            "Diet plans: diabete, obesity, muscle strenghtening & bad cholesterol",
+            True,
+            key="health_diet",
+        )
+    # Expander for the exports
+    with st.sidebar.expander("📥 Export"):
+        show_export = st.checkbox(
+            "Export recipe sets (CSV, Parquet)", False, key="export_checkbox"
+        )
+    # Expander for cache clearing
+    with st.sidebar.expander("🛠️ Advanced options", expanded=False):
+        if st.checkbox("🔄 Refresh Page", key="refresh_page_button"):
+            st.markdown(
+                """
+                <script>
+                window.location.reload();
+                </script>
+                """,
+                unsafe_allow_html=True,
+            )
+        if st.checkbox("⏱️ Performance", key="performance_checkbox"):
+            display_performance_panel()
+        if st.checkbox("🗂️ Data catalog", key="data_catalog_checkbox"):
+            display_data_catalog()
+        clear_cache_button()
+    # Start computing the data of the displayed sections in page order (the
+    # order in which they are rendered below), then the data of the hidden
+    # ones in the background
+    min_interactions = int(min_interactions)
+    outlier_items = ["outlier_detectors"]
+    if os.environ.get(STORE_ENV):
+        outlier_items.append("store_zscore_outliers")
+    section_data = [
+        (show_recipe_search, ["search_index"]),
+        (show_autocomplete, ["recipe_autocomplete", "ingredient_autocomplete"]),
+        (show_recipe_details, ["recipe_repository", "recipe_autocomplete"]),
+        (show_export, ["df_preprocessed", "combined_df"]),
+        (show_general_obs, ["metrics"]),
+        (show_inter_obs, ["interactions", "daily_interactions", "tag_cube"]),
+        (show_outlier_explorer, outlier_items),
+        (min_interactions > 0, ["popular_recipes"]),
+        (show_nutritional_analysis, ["nutrition_hist"]),
+        (show_nutritional_analysis_1, ["nutrition_hist_ratio"]),
+        (show_healthy_ranking, ["recipe_ranker"]),
+        (show_nutrition_explorer, ["nutrient_sketches"]),
+        (show_similar_recipes, ["similarity_indexes"]),
+    ]
+    # Drop the data of the store datasets that received new batches
+    refresh_store()
+    prefetcher = get_prefetcher()
+    prefetcher.prefetch(
+        [name for shown, names in section_data if shown for name in names]
+    )
+    prefetcher.prefetch(
+        [name for shown, names in section_data if not shown for name in names],
+        LOW_PRIORITY,
+    )
+    if show_recipe_search:
+        st.subheader("🔎 Recipe search")
+        display_recipe_search()
+    if show_autocomplete:
+        st.subheader("🔤 Names autocomplete")
+        display_autocomplete()
+    if show_recipe_details:
+        st.subheader("📖 Recipe details")
+        display_recipe_details()
+    if show_export:
+        st.subheader("📥 Export recipe sets")
+        display_export()
+    # storytelling button
+    if show_storytelling:
+        display_explications_webapp()
+    # feature engineering button
+    if show_feature_engineering:
+        display_featureengineeringsteps()
+    # Main content
+    if show_general_obs:
+        st.subheader("Key numbers for recipes")
+        display_statistics(dashboard_item("metrics"))
+
+    if show_inter_obs:
+        st.subheader("👨🏻‍💻 Interactions graph")
+        display_general_observations()
+
+    if show_outlier_explorer:
+        st.subheader("🔍 Outliers in the nutritional components")
+        display_outlier_explorer()
+
+    if show_nutritional_analysis:
+        st.subheader(
+            "🎯 Observations of recipes regarding their nutritional components"
+        )
+        display_nutritional_analysis(
+            figures=nutrition_figures("nutrition_hist", min_interactions)
+        )
+
+    if show_nutritional_analysis_1:
+        st.subheader("📈 Observations of recipes regarding their components ratio")
+        display_nutritional_analysis_ratio(
+            context_key="nutritional_components",
+            figures=nutrition_figures("nutrition_hist_ratio", min_interactions),
+        )
+
+    if show_healthy_ranking:
+        st.subheader("⚖️ Healthy recipes ranking over all nutritional components")
+        display_healthy_ranking()
+
+    if show_nutrition_explorer:
+        st.subheader("🏷️ Nutritional components distribution per tag")
+        display_nutrition_explorer()
+
+    if show_health_diets:
+        st.subheader("ﮩـﮩﮩ٨ـ🫀ﮩ٨ـﮩﮩ٨ـ Top recipes for optimal health")
+        display_ideal_recipes_health()
+
+    if show_similar_recipes:
+        st.subheader("🧂 Recipes sharing ingredients")
+        display_similar_recipes()
+
+
+if __name__ == "__main__":
+    main()
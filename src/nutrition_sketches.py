@@ -0,0 +1,293 @@
+"""
+Mergeable distribution sketches of the nutrients, per recipe tag.
+
+A sketch is a fixed-bin histogram of each nutrient with its count, sum,
+minimum and maximum. All the sketches of an index share the same
+(log-spaced) bin edges, so two sketches are merged by adding their
+arrays: the distribution of any combination of tags is answered by
+merging the sketches of these tags instead of scanning the recipes again.
+
+Quantiles are interpolated inside the bins, so their relative error is
+bounded by the bin width (about 2% with the default 512 bins over five
+orders of magnitude).
+"""
+
+import logging
+import re
+import numpy as np
+import pandas as pd
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_BINS = 512
+_TAG_PATTERN = re.compile(r"'([^']*)'")
+
+
+def parse_tags(tags) -> list:
+    """
+    Extracts the tags of a recipe from the `tags` column of RAW_recipes,
+    a stringified list such as "['60-minutes-or-less', 'healthy']".
+
+    Returns:
+        list: The tags, empty when there are none or the value is missing.
+    """
+    if not isinstance(tags, str):
+        return []
+    return _TAG_PATTERN.findall(tags)
+
+
+class NutrientSketch:
+    """
+    Histogram of each nutrient over shared bin edges, with the exact count,
+    sum, minimum and maximum. Built with `NutrientSketchIndex`.
+
+    Example:
+        sketch = index.sketch(["vegan", "low-fat"])
+        median = sketch.quantiles("Calories", [0.5])[0]
+    """
+
+    def __init__(
+        self,
+        nutrients: list,
+        edges: np.ndarray,
+        counts: np.ndarray,
+        sums: np.ndarray,
+        minimum: np.ndarray,
+        maximum: np.ndarray,
+    ) -> None:
+        self.nutrients = list(nutrients)
+        self.edges = edges
+        self.counts = counts
+        self.sums = sums
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def merge(self, other: "NutrientSketch") -> "NutrientSketch":
+        """
+        Returns the sketch of the recipes of both sketches.
+
+        Raises:
+            ValueError: If the sketches do not share the same bins.
+        """
+        if self.nutrients != other.nutrients or not np.array_equal(
+            self.edges, other.edges
+        ):
+            raise ValueError("Only sketches sharing the same bins can be merged.")
+        return NutrientSketch(
+            self.nutrients,
+            self.edges,
+            self.counts + other.counts,
+            self.sums + other.sums,
+            np.fmin(self.minimum, other.minimum),
+            np.fmax(self.maximum, other.maximum),
+        )
+
+    def count(self, nutrient: str) -> int:
+        """Returns the number of values of a nutrient."""
+        return int(self.counts[self._position(nutrient)].sum())
+
+    def quantiles(self, nutrient: str, qs: list) -> np.ndarray:
+        """
+        Estimates quantiles of a nutrient, interpolating inside the bins.
+
+        Args:
+            nutrient (str): Nutrient column.
+            qs (list): Quantiles between 0 and 1.
+
+        Returns:
+            np.ndarray: One value per quantile (NaN for an empty sketch).
+        """
+        position = self._position(nutrient)
+        counts = self.counts[position]
+        total = counts.sum()
+        if total == 0:
+            return np.full(len(qs), np.nan)
+        cumulative = np.cumsum(counts)
+        ranks = np.asarray(qs, dtype=float) * total
+        bins = np.minimum(np.searchsorted(cumulative, ranks), len(counts) - 1)
+        before = cumulative[bins] - counts[bins]
+        fraction = (ranks - before) / np.maximum(counts[bins], 1)
+        edges = self.edges[position]
+        values = edges[bins] + fraction * (edges[bins + 1] - edges[bins])
+        return np.clip(values, self.minimum[position], self.maximum[position])
+
+    def summary(self, nutrient: str) -> dict:
+        """
+        Returns the box plot statistics of a nutrient, with the keys of
+        `reducers.quantile_summary`.
+        """
+        position = self._position(nutrient)
+        count = self.count(nutrient)
+        q1, median, q3 = self.quantiles(nutrient, [0.25, 0.5, 0.75])
+        low, high = self.minimum[position], self.maximum[position]
+        return {
+            "count": count,
+            "mean": self.sums[position] / count if count else np.nan,
+            "min": low,
+            "q1": q1,
+            "median": median,
+            "q3": q3,
+            "max": high,
+            "lowerfence": max(q1 - 1.5 * (q3 - q1), low),
+            "upperfence": min(q3 + 1.5 * (q3 - q1), high),
+        }
+
+    def histogram(self, nutrient: str, max_bins: int = 50) -> pd.DataFrame:
+        """
+        Returns the histogram of a nutrient, adjacent bins merged so that
+        at most `max_bins` non-empty bins are left, from the first to the
+        last non-empty bin.
+
+        Returns:
+            pd.DataFrame: `left`, `right` and `count` of each bin.
+        """
+        position = self._position(nutrient)
+        counts = self.counts[position]
+        filled = np.flatnonzero(counts)
+        if len(filled) == 0:
+            return pd.DataFrame(columns=["left", "right", "count"])
+        first, last = filled[0], filled[-1] + 1
+        width = -(-(last - first) // max_bins)
+        starts = np.arange(first, last, width)
+        ends = np.minimum(starts + width, last)
+        edges = self.edges[position]
+        return pd.DataFrame(
+            {
+                "left": edges[starts],
+                "right": edges[ends],
+                "count": np.add.reduceat(counts[first:last], starts - first),
+            }
+        )
+
+    def _position(self, nutrient: str) -> int:
+        if nutrient not in self.nutrients:
+            raise KeyError(f"The column '{nutrient}' is not in the DataFrame.")
+        return self.nutrients.index(nutrient)
+
+
+class NutrientSketchIndex:
+    """
+    Sketches of the nutrients of all the recipes and of each tag, built in
+    one pass over the (recipe, tag) pairs.
+
+    Args:
+        recipes (pd.DataFrame): Recipes with an `id` column and one column
+        per nutrient (e.g. `combined_df`); values must be positive.
+        recipe_tags (pd.DataFrame): `id` and `tags` (list of tags) columns.
+        nutrients (list): Nutrient columns.
+        bins (int): Number of log-spaced bins per nutrient.
+
+    Raises:
+        KeyError: If a column is missing.
+
+    Example:
+        index = NutrientSketchIndex(combined_df, recipe_tags, nutrients)
+        index.sketch(index.matching_tags("vegan")).histogram("Calories")
+    """
+
+    def __init__(
+        self,
+        recipes: pd.DataFrame,
+        recipe_tags: pd.DataFrame,
+        nutrients: list,
+        bins: int = DEFAULT_BINS,
+    ) -> None:
+        for column in ["id", *nutrients]:
+            if column not in recipes.columns:
+                raise KeyError(f"The column '{column}' is not in the DataFrame.")
+        self.nutrients = list(nutrients)
+        values = recipes[self.nutrients].to_numpy(dtype=np.float64)
+        # Log-spaced edges: the nutrients span several orders of magnitude
+        low = np.nanmin(values, axis=0, initial=np.inf)
+        high = np.nanmax(values, axis=0, initial=-np.inf)
+        low = np.where(np.isfinite(low) & (low > 0), low, 1.0)
+        high = np.where(np.isfinite(high) & (high > low), high, low * 2)
+        edges = np.geomspace(low * (1 - 1e-9), high * (1 + 1e-9), bins + 1).T
+        self.edges = edges
+
+        tagged = recipe_tags[["id", "tags"]].explode("tags").dropna()
+        self.tags, tag_codes = np.unique(
+            tagged["tags"].to_numpy(str), return_inverse=True
+        )
+        rows = pd.Index(recipes["id"]).get_indexer(tagged["id"])
+        known = rows >= 0
+        rows, tag_codes = rows[known], tag_codes[known]
+        n_groups = len(self.tags) + 1  # the last group holds all the recipes
+        groups = np.concatenate([tag_codes, np.full(len(values), len(self.tags))])
+        rows = np.concatenate([rows, np.arange(len(values))])
+
+        shape = (n_groups, len(self.nutrients))
+        self._counts = np.zeros((*shape, bins), dtype=np.int64)
+        self._sums = np.zeros(shape)
+        self._minimum = np.full(shape, np.nan)
+        self._maximum = np.full(shape, np.nan)
+        for position in range(len(self.nutrients)):
+            column = values[rows, position]
+            valid = ~np.isnan(column)
+            group, column = groups[valid], column[valid]
+            bin_index = np.clip(
+                np.searchsorted(edges[position], column, side="right") - 1,
+                0,
+                bins - 1,
+            )
+            self._counts[:, position] = np.bincount(
+                group * bins + bin_index, minlength=n_groups * bins
+            ).reshape(n_groups, bins)
+            self._sums[:, position] = np.bincount(group, column, n_groups)
+            extremes = pd.Series(column).groupby(group)
+            self._minimum[extremes.min().index, position] = extremes.min()
+            self._maximum[extremes.max().index, position] = extremes.max()
+        logger.info(
+            f"Built nutrient sketches of {len(values)} recipes "
+            f"and {len(self.tags)} tags"
+        )
+
+    def matching_tags(self, keyword: str) -> list:
+        """Returns the tags containing `keyword` (case-insensitive)."""
+        keyword = keyword.lower()
+        return [str(tag) for tag in self.tags if keyword in tag.lower()]
+
+    def sketch(self, tags: list = None) -> NutrientSketch:
+        """
+        Returns the sketch of all the recipes, or the merged sketches of
+        `tags`. A recipe carrying several of the tags is counted once per
+        tag, so tag combinations are exact for disjoint tags and weighted
+        towards recipes with many matching tags otherwise.
+
+        Raises:
+            KeyError: If a tag is unknown.
+        """
+        if tags is None:
+            return self._group(len(self.tags))
+        sketch = None
+        for tag in tags:
+            position = np.searchsorted(self.tags, tag)
+            if position == len(self.tags) or self.tags[position] != tag:
+                raise KeyError(f"Unknown tag: '{tag}'")
+            group = self._group(position)
+            sketch = group if sketch is None else sketch.merge(group)
+        if sketch is None:
+            return self._empty()
+        return sketch
+
+    def _group(self, group: int) -> NutrientSketch:
+        return NutrientSketch(
+            self.nutrients,
+            self.edges,
+            self._counts[group],
+            self._sums[group],
+            self._minimum[group],
+            self._maximum[group],
+        )
+
+    def _empty(self) -> NutrientSketch:
+        shape = len(self.nutrients)
+        return NutrientSketch(
+            self.nutrients,
+            self.edges,
+            np.zeros_like(self._counts[0]),
+            np.zeros(shape),
+            np.full(shape, np.nan),
+            np.full(shape, np.nan),
+        )
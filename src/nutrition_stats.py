@@ -1,7 +1,51 @@
-from utils import df_preprocessed
+import utils
+from instrumentation import instrumented
+from lazy_loading import lazy_attributes
 import ast
+import os
 import pandas as pd
 
+# Environment variable setting the processes parsing the nutrition strings
+# of `combined_df` (see parallel_stats.py), 1 by default
+STATS_WORKERS_ENV = "MANGETAMAIN_STATS_WORKERS"
+# Components of the `nutrition` column of the recipes, in order
+NUTRITION_COLUMNS = [
+    "Calories",
+    "Total Fat (g)",
+    "Sugar (g)",
+    "Sodium (mg)",
+    "Protein (g)",
+    "Saturated Fat (g)",
+    "Carbohydrates (g)",
+]
+# current daily values found in
+# https://www.fda.gov/food/nutrition-facts-label/daily-value-nutrition-and-supplement-facts-labels
+DAILY_VALUES = {
+    "Total Fat (g)": 78,
+    "Sugar (g)": 50,
+    "Sodium (mg)": 2300,
+    "Protein (g)": 50,
+    "Saturated Fat (g)": 20,
+    "Carbohydrates (g)": 275,
+}
+# Flag columns of the top 4 recipes of each nutritional component
+TOP_4_FLAGS = {
+    "Calories": "Top 4 Calories",
+    "Total Fat (g)": "Top 4 Total Fat",
+    "Sugar (g)": "Top 4 Sugar",
+    "Sodium (mg)": "Top 4 Sodium",
+    "Saturated Fat (g)": "Top 4 Saturated Fat",
+    "Carbohydrates (g)": "Top 4 Carbohydrates",
+    "Protein (g)": "Top 4 Protein",
+}
+# Components of the protein ratio figures
+RATIO_CATEGORIES = [
+    "Protein (g)",
+    "Sodium (mg)",
+    "Saturated Fat (g)",
+    "Carbohydrates (g)",
+]
+
 
 def parse_nutrition(nutrition_str):
     """
@@ -53,6 +97,7 @@ def parse_nutrition(nutrition_str):
         return [None] * 7
 
 
+@instrumented()
 def stats_bio(df_preprocessed: pd.DataFrame) -> pd.DataFrame:
     """
     This function processes a filtered DataFrame of bio recipes and performs.
@@ -89,81 +134,116 @@ def stats_bio(df_preprocessed: pd.DataFrame) -> pd.DataFrame:
     nutrition_data = df_preprocessed["nutrition"].dropna().apply(parse_nutrition)
     # Keep only rows where the parsed data has exactly 7 elements
     nutrition_data = nutrition_data[nutrition_data.apply(lambda x: len(x) == 7)]
-    # current daily values found in
-    # https://www.fda.gov/food/nutrition-facts-label/daily-value-nutrition-and-supplement-facts-labels
-    current_daily_total_fat = 78
-    current_daily_total_sugar = 50
-    current_daily_total_sodium = 2300
-    current_daily_total_protein = 50
-    current_daily_total_saturated_fat = 20
-    current_daily_total_carbo = 275
     # Convert the list of nutrition data into a DataFrame with appropriate column names
-    nutrition_df = pd.DataFrame(
-        nutrition_data.tolist(),
-        columns=[
-            "Calories",
-            "Total Fat (g)",
-            "Sugar (g)",
-            "Sodium (mg)",
-            "Protein (g)",
-            "Saturated Fat (g)",
-            "Carbohydrates (g)",
-        ],
-    )
-    # convert %daily value to interational measures(g,mg)
-    nutrition_df["Total Fat (g)"] = (
-        nutrition_df["Total Fat (g)"] * current_daily_total_fat
-    ) / 100
-    nutrition_df["Sugar (g)"] = (
-        nutrition_df["Sugar (g)"] * current_daily_total_sugar
-    ) / 100
-    nutrition_df["Sodium (mg)"] = (
-        nutrition_df["Sodium (mg)"] * current_daily_total_sodium
-    ) / 100
-    nutrition_df["Protein (g)"] = (
-        nutrition_df["Protein (g)"] * current_daily_total_protein
-    ) / 100
-    nutrition_df["Saturated Fat (g)"] = (
-        nutrition_df["Saturated Fat (g)"] * current_daily_total_saturated_fat
-    ) / 100
-    nutrition_df["Carbohydrates (g)"] = (
-        nutrition_df["Carbohydrates (g)"] * current_daily_total_carbo
-    ) / 100
-    # Calculate basic statistical indicators: mean, median, standard deviation, min, max
+    nutrition_df = pd.DataFrame(nutrition_data.tolist(), columns=NUTRITION_COLUMNS)
+    convert_daily_values(nutrition_df)
+    # The parsed values are matched with the recipes by position
     combined_df = pd.concat(
         [df_preprocessed.reset_index(drop=True), nutrition_df], axis=1
     )
-    # filter values of combined_df by putting values higher than 1
-    combined_df = combined_df[combined_df["Calories"] > 1]
-    combined_df = combined_df[combined_df["Total Fat (g)"] > 1]
-    combined_df = combined_df[combined_df["Sugar (g)"] > 1]
-    combined_df = combined_df[combined_df["Sodium (mg)"] > 1]
-    combined_df = combined_df[combined_df["Saturated Fat (g)"] > 1]
-    combined_df = combined_df[combined_df["Protein (g)"] > 1]
-    combined_df = combined_df[combined_df["Carbohydrates (g)"] > 1]
-    # Sort each nutritional component in ascending order to get the lowest values
-    # Flag the top 4 for each nutrient by sorting and selecting the first 4 rows
-    # Get the indices of the top 4 for each nutritional component
-    # maximizing the protein ranking but minimizing the others
-    top_4_calories = combined_df["Calories"].nsmallest(4).index
-    top_4_fat = combined_df["Total Fat (g)"].nsmallest(4).index
-    top_4_sugar = combined_df["Sugar (g)"].nsmallest(4).index
-    top_4_sodium = combined_df["Sodium (mg)"].nsmallest(4).index
-    top_4_saturated_fat = combined_df["Saturated Fat (g)"].nsmallest(4).index
-    top_4_carbohydrates = combined_df["Carbohydrates (g)"].nsmallest(4).index
-    top_4_protein = combined_df["Protein (g)"].nlargest(4).index
-
-    # Flag the top 4 for each nutritional component
-    # Using vectorized operations (boolean column value)
-    combined_df["Top 4 Calories"] = combined_df.index.isin(top_4_calories)
-    combined_df["Top 4 Total Fat"] = combined_df.index.isin(top_4_fat)
-    combined_df["Top 4 Sugar"] = combined_df.index.isin(top_4_sugar)
-    combined_df["Top 4 Sodium"] = combined_df.index.isin(top_4_sodium)
-    combined_df["Top 4 Saturated Fat"] = combined_df.index.isin(top_4_saturated_fat)
-    combined_df["Top 4 Carbohydrates"] = combined_df.index.isin(top_4_carbohydrates)
-    combined_df["Top 4 Protein"] = combined_df.index.isin(top_4_protein)
+    combined_df = combined_df[healthy_mask(combined_df)]
+    return flag_top_4(combined_df, top_4_index(combined_df))
+
+
+def convert_daily_values(nutrition_df: pd.DataFrame) -> None:
+    """
+    Converts the nutritional components given in % of the daily value to
+    international measures (g, mg), in place (see `DAILY_VALUES`).
+    """
+    for column, daily_value in DAILY_VALUES.items():
+        nutrition_df[column] = (nutrition_df[column] * daily_value) / 100
+
+
+def healthy_mask(nutrition_df: pd.DataFrame) -> pd.Series:
+    """Flags the recipes whose nutritional components are all higher than 1."""
+    return (nutrition_df[NUTRITION_COLUMNS] > 1).all(axis=1)
+
+
+def top_4_index(nutrition_df: pd.DataFrame) -> dict:
+    """
+    Returns the index of the top 4 recipes for each nutritional component:
+    maximizing the protein but minimizing the others, ties in the order of
+    the DataFrame.
+
+    Returns:
+        dict: Nutritional component -> index of its 4 top recipes.
+    """
+    return {
+        column: (
+            nutrition_df[column].nlargest(4)
+            if column == "Protein (g)"
+            else nutrition_df[column].nsmallest(4)
+        ).index
+        for column in TOP_4_FLAGS
+    }
+
+
+def flag_top_4(combined_df: pd.DataFrame, top_index: dict) -> pd.DataFrame:
+    """
+    Adds the boolean "Top 4 ..." columns flagging the top recipes of each
+    nutritional component (see `top_4_index`).
+    """
+    for column, flag in TOP_4_FLAGS.items():
+        combined_df[flag] = combined_df.index.isin(top_index[column])
     return combined_df
 
 
-combined_df = stats_bio(df_preprocessed)
-print(combined_df)
+def top_k_recipes(
+    combined_df: pd.DataFrame, category: str, healthiest: bool = True, k: int = 4
+) -> pd.DataFrame:
+    """
+    Returns the top `k` recipes (4 in the figures) for a nutritional
+    component, ties in the order of the DataFrame.
+
+    Args:
+        combined_df (pd.DataFrame): Recipes with the nutritional components.
+        category (str): Nutritional component, e.g. "Sugar (g)".
+        healthiest (bool): Whether the highest values come first for the
+        protein (the healthiest recipes); the lowest values always come
+        first when False.
+        k (int): Number of recipes returned.
+
+    Returns:
+        pd.DataFrame: The `k` rows of the top recipes, best first.
+    """
+    ascending = not (healthiest and category == "Protein (g)")
+    return combined_df.sort_values(
+        by=category, ascending=ascending, kind="stable"
+    ).head(k)
+
+
+def protein_ratios(recipes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds the protein ratios shown by the ratio figures to a copy of the
+    recipes:
+    - Protein_Carb_Ratio = Protein (g) / Carbohydrates (g)
+    - Protein_Sodium_Ratio = Protein (g) / Sodium (g)
+    - Protein_Saturated_fat_Ratio = Protein (g) / Saturated Fat (g)
+
+    Args:
+        recipes (pd.DataFrame): Recipes with the nutritional components.
+
+    Returns:
+        pd.DataFrame: The recipes with the three ratio columns.
+    """
+    return recipes.assign(
+        Protein_Carb_Ratio=recipes["Protein (g)"] / recipes["Carbohydrates (g)"],
+        # Convert Sodium to grams
+        Protein_Sodium_Ratio=recipes["Protein (g)"] / (recipes["Sodium (mg)"] * 0.001),
+        Protein_Saturated_fat_Ratio=(
+            recipes["Protein (g)"] / recipes["Saturated Fat (g)"]
+        ),
+    )
+
+
+def _combined_df(module) -> pd.DataFrame:
+    workers = int(os.environ.get(STATS_WORKERS_ENV, 1))
+    if workers > 1:
+        from parallel_stats import stats_bio_parallel
+
+        return stats_bio_parallel(utils.df_preprocessed, workers)
+    return stats_bio(utils.df_preprocessed)
+
+
+# Computed from the preprocessed recipes on first access
+__getattr__ = lazy_attributes(globals(), {"combined_df": _combined_df})
@@ -0,0 +1,293 @@
+"""
+Outlier detectors over the numeric columns of a DataFrame.
+
+- zscore: |x - mean| / std above 3
+- mad: robust z-score 0.6745 * |x - median| / MAD above 3.5
+  (Iglewicz and Hoaglin), insensitive to the outliers themselves
+- iqr: outside [Q1 - 1.5 IQR, Q3 + 1.5 IQR] (Tukey fences)
+- isolation_forest: scikit-learn IsolationForest over all the columns at
+  once, one flag per row
+
+The univariate detectors work on the whole value matrix at once and give
+one flag per value. `OutlierDetectors` caches these bitmaps per dataset
+version in memory and, when a cache directory is given, on disk (packed
+8 flags per byte) with the trained forest, so the forest is trained once
+per version of the data.
+"""
+
+import hashlib
+import logging
+import os
+from importlib.metadata import version
+import joblib
+import numpy as np
+import pandas as pd
+from locking import exclusive
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Environment variable naming the directory of the persisted caches
+CACHE_DIR_ENV = "MANGETAMAIN_CACHE_DIR"
+DEFAULT_CACHE_DIR = "cache"
+
+METHODS = ("zscore", "mad", "iqr", "isolation_forest")
+# Detectors giving one flag per row instead of one per value
+MULTIVARIATE = ("isolation_forest",)
+THRESHOLDS = {"zscore": 3.0, "mad": 3.5, "iqr": 1.5}
+# Parameters of the isolation forest, part of the cache version
+FOREST_PARAMETERS = {"n_estimators": 100, "contamination": "auto", "random_state": 0}
+
+
+def zscore_mask(values: np.ndarray, threshold: float = THRESHOLDS["zscore"]):
+    """
+    Flags the values whose absolute z-score (population standard
+    deviation, as `scipy.stats.zscore`) is above `threshold`. Missing
+    values and constant columns are never flagged.
+
+    Args:
+        values (np.ndarray): Matrix with one column per variable.
+        threshold (float): Absolute z-score above which a value is flagged.
+
+    Returns:
+        np.ndarray: Boolean matrix of the shape of `values`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    std = np.nanstd(values, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.abs(values - np.nanmean(values, axis=0)) / std
+    return np.where(std > 0, scores > threshold, False)
+
+
+def mad_mask(values: np.ndarray, threshold: float = THRESHOLDS["mad"]):
+    """
+    Flags the values whose robust z-score, based on the median absolute
+    deviation (MAD), is above `threshold`. When more than half of a column
+    equals its median (MAD of 0), the mean absolute deviation is used
+    instead.
+
+    Args:
+        values (np.ndarray): Matrix with one column per variable.
+        threshold (float): Robust z-score above which a value is flagged.
+
+    Returns:
+        np.ndarray: Boolean matrix of the shape of `values`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    deviations = np.abs(values - np.nanmedian(values, axis=0))
+    mad = np.nanmedian(deviations, axis=0)
+    # 0.6745 and 0.7979 scale the MAD and the mean absolute deviation to
+    # the standard deviation of a normal distribution
+    scale = np.where(mad > 0, mad / 0.6745, np.nanmean(deviations, axis=0) / 0.7979)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = deviations / scale
+    return np.where(scale > 0, scores > threshold, False)
+
+
+def iqr_mask(values: np.ndarray, k: float = THRESHOLDS["iqr"]):
+    """
+    Flags the values outside the Tukey fences [Q1 - k IQR, Q3 + k IQR].
+
+    Args:
+        values (np.ndarray): Matrix with one column per variable.
+        k (float): Multiple of the interquartile range.
+
+    Returns:
+        np.ndarray: Boolean matrix of the shape of `values`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    q1, q3 = np.nanpercentile(values, [25, 75], axis=0)
+    iqr = q3 - q1
+    return (values < q1 - k * iqr) | (values > q3 + k * iqr)
+
+
+def train_isolation_forest(values: np.ndarray, n_jobs: int = None):
+    """
+    Trains an IsolationForest on a value matrix, missing values replaced
+    by the median of their column.
+
+    Args:
+        values (np.ndarray): Matrix with one column per variable.
+        n_jobs (int): Number of parallel jobs of scikit-learn (-1 for all
+        the cores), one by default.
+
+    Returns:
+        IsolationForest: The trained forest.
+    """
+    # Imported on first use: loading scikit-learn takes seconds
+    from sklearn.ensemble import IsolationForest
+
+    forest = IsolationForest(n_jobs=n_jobs, **FOREST_PARAMETERS)
+    return forest.fit(_fill_missing(values))
+
+
+def isolation_forest_mask(forest, values: np.ndarray, n_jobs: int = None):
+    """
+    Flags the rows a trained IsolationForest isolates as outliers.
+
+    Args:
+        forest (IsolationForest): Forest returned by `train_isolation_forest`.
+        values (np.ndarray): Matrix with one column per variable.
+        n_jobs (int): Number of threads scoring the trees, one by default
+        (scikit-learn only parallelizes the scoring through joblib).
+
+    Returns:
+        np.ndarray: Boolean matrix with a single column.
+    """
+    with joblib.parallel_config(n_jobs=n_jobs):
+        return (forest.predict(_fill_missing(values)) == -1)[:, None]
+
+
+def _fill_missing(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    medians = np.nan_to_num(np.nanmedian(values, axis=0))
+    return np.where(np.isnan(values), medians, values)
+
+
+MASKS = {"zscore": zscore_mask, "mad": mad_mask, "iqr": iqr_mask}
+
+
+def data_version(df: pd.DataFrame) -> str:
+    """
+    Returns a short fingerprint of the values and columns of a DataFrame,
+    the detector parameters and the scikit-learn version (the persisted
+    forests can only be loaded by the version that wrote them).
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(repr((list(df.columns), THRESHOLDS, FOREST_PARAMETERS)).encode())
+    digest.update(version("scikit-learn").encode())
+    return digest.hexdigest()[:16]
+
+
+class OutlierDetectors:
+    """
+    Runs the detectors of `METHODS` over the numeric columns of a DataFrame
+    and caches their bitmaps for its version.
+
+    Args:
+        df (pd.DataFrame): Data, e.g. `combined_df`.
+        columns (list): Columns analysed, the numeric columns by default.
+        cache_dir (str): Directory where the bitmaps and the trained forest
+        are persisted, under `outliers/<version>/`; memory only when None.
+        n_jobs (int): Parallel jobs training and scoring the isolation forest.
+
+    Raises:
+        KeyError: If a column is not in the DataFrame.
+
+    Example:
+        detectors = OutlierDetectors(combined_df, NUTRIENTS, cache_dir="cache")
+        detectors.counts()
+        detectors.outliers("mad")
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        columns: list = None,
+        cache_dir: str = None,
+        n_jobs: int = None,
+    ) -> None:
+        if columns is None:
+            columns = df.select_dtypes(include="number").columns
+        for column in columns:
+            if column not in df.columns:
+                raise KeyError(f"The column '{column}' is not in the DataFrame.")
+        self.df = df
+        self.columns = list(columns)
+        self.n_jobs = n_jobs
+        self.values = df[self.columns].to_numpy(dtype=np.float64)
+        self.version = data_version(df[self.columns])
+        self.directory = None
+        if cache_dir is not None:
+            self.directory = os.path.join(cache_dir, "outliers", self.version)
+        self._bitmaps = {}
+
+    def bitmap(self, method: str) -> np.ndarray:
+        """
+        Returns the outlier flags of a detector: one column per analysed
+        column, or a single column for the `MULTIVARIATE` detectors.
+
+        Raises:
+            KeyError: If `method` is not one of the `METHODS`.
+        """
+        if method not in METHODS:
+            raise KeyError(f"Unknown outlier detector: '{method}'")
+        if method not in self._bitmaps:
+            if self.directory is None:
+                self._bitmaps[method] = self._detect(method)
+            else:
+                os.makedirs(self.directory, exist_ok=True)
+                # Processes sharing the cache compute each bitmap once
+                with exclusive(os.path.join(self.directory, f"{method}.lock")):
+                    self._bitmaps[method] = self._load_or_detect(method)
+        return self._bitmaps[method]
+
+    def rows(self, method: str) -> np.ndarray:
+        """Returns, for each row, whether a detector flags any of its values."""
+        return self.bitmap(method).any(axis=1)
+
+    def outliers(self, method: str) -> pd.DataFrame:
+        """Returns the rows flagged by a detector."""
+        return self.df[self.rows(method)]
+
+    def counts(self) -> pd.DataFrame:
+        """
+        Counts the outliers of each detector per column, plus the rows with
+        at least one outlier ("Any column"). The multivariate detectors
+        only have the latter.
+
+        Returns:
+            pd.DataFrame: One row per column, one column per detector.
+        """
+        counts = pd.DataFrame(index=[*self.columns, "Any column"], columns=METHODS)
+        for method in METHODS:
+            if method not in MULTIVARIATE:
+                counts.loc[self.columns, method] = self.bitmap(method).sum(axis=0)
+            counts.loc["Any column", method] = self.rows(method).sum()
+        return counts.astype("Int64")
+
+    def agreement(self) -> pd.DataFrame:
+        """
+        Returns the Jaccard similarity of the flagged rows of each pair of
+        detectors (1 when they flag the same rows).
+        """
+        flags = np.column_stack([self.rows(method) for method in METHODS])
+        flags = flags.astype(np.int64)
+        both = flags.T @ flags
+        either = flags.sum(axis=0)[:, None] + flags.sum(axis=0)[None, :] - both
+        with np.errstate(divide="ignore", invalid="ignore"):
+            jaccard = np.where(either > 0, both / either, 1.0)
+        return pd.DataFrame(jaccard, index=METHODS, columns=METHODS)
+
+    def _detect(self, method: str) -> np.ndarray:
+        if method in MASKS:
+            return MASKS[method](self.values)
+        return isolation_forest_mask(self._forest(), self.values, self.n_jobs)
+
+    def _forest(self):
+        """Loads the persisted forest of this version or trains it."""
+        path = None
+        if self.directory is not None:
+            path = os.path.join(self.directory, "isolation_forest.joblib")
+            if os.path.exists(path):
+                return joblib.load(path)
+        forest = train_isolation_forest(self.values, self.n_jobs)
+        if path is not None:
+            temporary = f"{path}.tmp-{os.getpid()}"
+            joblib.dump(forest, temporary)
+            os.replace(temporary, path)
+        logger.info(f"Isolation forest trained on {len(self.values)} rows")
+        return forest
+
+    def _load_or_detect(self, method: str) -> np.ndarray:
+        path = os.path.join(self.directory, f"{method}.npy")
+        if os.path.exists(path):
+            packed = np.load(path)
+            return np.unpackbits(packed, axis=0, count=len(self.values)).astype(bool)
+        bitmap = self._detect(method)
+        temporary = f"{path}.tmp-{os.getpid()}"
+        with open(temporary, "wb") as file:
+            np.save(file, np.packbits(bitmap, axis=0))
+        os.replace(temporary, path)
+        return bitmap
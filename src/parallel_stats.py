@@ -0,0 +1,227 @@
+"""
+Parallel `stats_bio` over a pool of worker processes.
+
+Parsing the `nutrition` strings (`parse_nutrition`) is the costly part of
+`stats_bio` and runs on one core. Here the strings are encoded once into a
+shared memory buffer (with their offsets) and split into contiguous
+shards. Each worker parses its shards straight from the buffer and writes
+the values into a shared output array, so neither the strings nor the
+parsed values are pickled between the processes. A worker also returns the
+top 4 candidates of its shards for each nutritional component; the global
+top 4 are picked among these candidates instead of scanning every recipe
+again.
+
+The result is identical to the one of `stats_bio`: same rows, values,
+dtypes and flags (ties in the order of the recipes).
+
+Example:
+    combined_df = stats_bio_parallel(df_preprocessed, workers=4)
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+from nutrition_stats import (
+    NUTRITION_COLUMNS,
+    TOP_4_FLAGS,
+    convert_daily_values,
+    flag_top_4,
+    healthy_mask,
+    parse_nutrition,
+    stats_bio,
+    top_4_index,
+)
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Shards per worker, so that a slow shard does not keep the others waiting
+SHARDS_PER_WORKER = 4
+
+# Worker pools kept between calls, by number of workers: starting the
+# processes (and importing the app modules in them) costs more than
+# parsing a small DataFrame
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Returns the pool of `workers` processes, started on first use. The
+    processes are spawned rather than forked, as the app process runs
+    threads (Streamlit, prefetching, logging).
+    """
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pools[workers]
+
+
+def shutdown_pools() -> None:
+    """Stops the worker processes of every pool."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown()
+        _pools.clear()
+
+
+def _attach(name: str, dtype, shape: tuple) -> tuple:
+    """Opens a shared memory block created by the parent as an array."""
+    memory = SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _parse_shard(names: dict, n_strings: int, start: int, end: int) -> tuple:
+    """
+    Parses the nutrition strings `start` to `end` of the shared buffer into
+    the shared output array.
+
+    Returns:
+        tuple: `(n_valid, integers, candidates)`: the number of strings
+        parsed into 7 values, whether each component only got integers
+        (`pd.DataFrame` then keeps an integer column) and the top 4
+        candidates of each component, as `(value, position)` pairs where
+        `position` counts the valid rows of the shard.
+    """
+    blocks = []
+    try:
+        memory, offsets = _attach(names["offsets"], np.int64, (n_strings + 1,))
+        blocks.append(memory)
+        size = max(int(offsets[-1]), 1)
+        memory, data = _attach(names["data"], np.uint8, (size,))
+        blocks.append(memory)
+        memory, values = _attach(names["values"], np.float64, (n_strings, 7))
+        blocks.append(memory)
+        memory, valid = _attach(names["valid"], np.bool_, (n_strings,))
+        blocks.append(memory)
+
+        # Only the bytes of the shard are copied out of the buffer
+        first = int(offsets[start])
+        end_byte = int(offsets[end])
+        buffer = data[first:end_byte].tobytes()
+        rows = []
+        for i in range(start, end):
+            string_start = int(offsets[i]) - first
+            string_end = int(offsets[i + 1]) - first
+            parsed = parse_nutrition(buffer[string_start:string_end].decode())
+            if len(parsed) == 7:
+                rows.append(parsed)
+                valid[i] = True
+        # Stops at the first float of a column, i.e. at once on real data
+        integers = [all(type(row[j]) is int for row in rows) for j in range(7)]
+        if rows:
+            # None becomes NaN, as in the DataFrame built by `stats_bio`
+            values[start:end][valid[start:end]] = np.array(rows, dtype=np.float64)
+        nutrition_df = pd.DataFrame(
+            values[start:end][valid[start:end]], columns=NUTRITION_COLUMNS
+        )
+        convert_daily_values(nutrition_df)
+        healthy = nutrition_df[healthy_mask(nutrition_df)]
+        candidates = {
+            column: [(healthy.at[position, column], position) for position in index]
+            for column, index in top_4_index(healthy).items()
+        }
+        return len(rows), integers, candidates
+    finally:
+        for memory in blocks:
+            memory.close()
+
+
+def _merge_candidates(results: list) -> dict:
+    """
+    Picks the global top 4 of each component among the candidates of the
+    shards, with their positions among all the valid rows.
+    """
+    top_index = {}
+    for column in TOP_4_FLAGS:
+        candidates = []
+        first = 0
+        for n_valid, _, shard_candidates in results:
+            candidates += [
+                (value, first + position)
+                for value, position in shard_candidates[column]
+            ]
+            first += n_valid
+        if column == "Protein (g)":
+            candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        else:
+            candidates.sort()
+        top_index[column] = pd.Index([position for _, position in candidates[:4]])
+    return top_index
+
+
+def stats_bio_parallel(
+    df_preprocessed: pd.DataFrame, workers: int = None, shards: int = None
+) -> pd.DataFrame:
+    """
+    Computes `stats_bio` with the `nutrition` strings parsed in parallel.
+
+    Args:
+        df_preprocessed (pd.DataFrame): Recipes with a 'nutrition' column.
+        workers (int): Worker processes, one per core by default.
+        shards (int): Contiguous shards of the strings,
+        `SHARDS_PER_WORKER` per worker by default.
+
+    Returns:
+        pd.DataFrame: The same DataFrame as `stats_bio(df_preprocessed)`.
+    """
+    workers = workers or os.cpu_count() or 1
+    strings = df_preprocessed["nutrition"].dropna()
+    if strings.empty or pd.api.types.infer_dtype(strings, skipna=False) != "string":
+        # Nothing to share, or values `parse_nutrition` gets as objects
+        return stats_bio(df_preprocessed)
+    encoded = [string.encode() for string in strings]
+    n_strings = len(encoded)
+    offsets = np.zeros(n_strings + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in encoded], out=offsets[1:])
+
+    sizes = {
+        "offsets": offsets.nbytes,
+        "data": max(int(offsets[-1]), 1),
+        "values": n_strings * 7 * 8,
+        "valid": n_strings,
+    }
+    blocks = {}
+    try:
+        for key, size in sizes.items():
+            blocks[key] = SharedMemory(create=True, size=size)
+        np.ndarray(offsets.shape, np.int64, blocks["offsets"].buf)[:] = offsets
+        blocks["data"].buf[: offsets[-1]] = b"".join(encoded)
+        values = np.ndarray((n_strings, 7), np.float64, blocks["values"].buf)
+        valid = np.ndarray((n_strings,), np.bool_, blocks["valid"].buf)
+        valid[:] = False
+        names = {key: block.name for key, block in blocks.items()}
+
+        shards = max(1, min(shards or workers * SHARDS_PER_WORKER, n_strings))
+        bounds = np.linspace(0, n_strings, shards + 1).astype(int)
+        futures = [
+            get_pool(workers).submit(_parse_shard, names, n_strings, start, end)
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        results = [future.result() for future in futures]
+
+        nutrition_df = pd.DataFrame(values[valid], columns=NUTRITION_COLUMNS)
+    finally:
+        for block in blocks.values():
+            block.close()
+            block.unlink()
+    if nutrition_df.empty:
+        return stats_bio(df_preprocessed)
+    for j, column in enumerate(NUTRITION_COLUMNS):
+        if all(result[1][j] for result in results):
+            nutrition_df[column] = nutrition_df[column].astype(np.int64)
+    logger.info(f"Parsed {n_strings} nutrition strings in {shards} shards")
+
+    convert_daily_values(nutrition_df)
+    combined_df = pd.concat(
+        [df_preprocessed.reset_index(drop=True), nutrition_df], axis=1
+    )
+    combined_df = combined_df[healthy_mask(combined_df)]
+    return flag_top_4(combined_df, _merge_candidates(results))
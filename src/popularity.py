@@ -0,0 +1,175 @@
+import logging
+import numpy as np
+import pandas as pd
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+
+def aggregate_interactions(
+    interactions: pd.DataFrame, key: str = "recipe_id", date_column: str = "date"
+) -> pd.DataFrame:
+    """
+    Aggregates the interactions per recipe (or per user) in a single pass
+    over factorized ids, using `np.bincount` instead of a pandas groupby.
+
+    Args:
+        interactions (pd.DataFrame): Interactions with at least the `key` and
+        `date_column` columns (e.g. PP_interactions_mangetamain.csv).
+        key (str): Column to group by, e.g. "recipe_id" or "user_id".
+        date_column (str): Column holding the interaction dates.
+
+    Returns:
+        pd.DataFrame: One row per distinct `key`, sorted by `key`, with the
+        columns:
+            - `key`: the grouped identifier.
+            - `interaction_count`: number of interactions.
+            - `first_interaction` / `last_interaction`: earliest and latest
+              valid dates (NaT when no date could be parsed).
+            - `interactions_<year>`: number of interactions for each year.
+
+    Raises:
+        KeyError: If `key` or `date_column` is not in the DataFrame.
+    """
+    for column in (key, date_column):
+        if column not in interactions.columns:
+            raise KeyError(f"The column '{column}' is not in the DataFrame.")
+    interactions = interactions[interactions[key].notna()]
+    codes, uniques = pd.factorize(interactions[key], sort=True)
+    n_groups = len(uniques)
+    counts = np.bincount(codes, minlength=n_groups)
+
+    dates = pd.to_datetime(interactions[date_column], errors="coerce").to_numpy()
+    valid = ~np.isnat(dates)
+    days = dates[valid].astype("datetime64[D]").astype(np.int64)
+    valid_codes = codes[valid]
+    dated_counts = np.bincount(valid_codes, minlength=n_groups)
+
+    # Sorting by (group, day) puts each group's first and last date at the
+    # edges of its contiguous block
+    order = np.lexsort((days, valid_codes))
+    sorted_days = days[order]
+    ends = np.cumsum(dated_counts)
+    starts = ends - dated_counts
+    has_date = dated_counts > 0
+    first = np.full(n_groups, np.datetime64("NaT"), dtype="datetime64[D]")
+    last = first.copy()
+    first[has_date] = sorted_days[starts[has_date]].astype("datetime64[D]")
+    last[has_date] = sorted_days[ends[has_date] - 1].astype("datetime64[D]")
+
+    aggregates = {
+        key: np.asarray(uniques),
+        "interaction_count": counts,
+        "first_interaction": first.astype("datetime64[ns]"),
+        "last_interaction": last.astype("datetime64[ns]"),
+    }
+    if len(days):
+        years = days.astype("datetime64[D]").astype("datetime64[Y]").astype(int) + 1970
+        first_year = years.min()
+        n_years = years.max() - first_year + 1
+        per_year = np.bincount(
+            valid_codes * n_years + (years - first_year),
+            minlength=n_groups * n_years,
+        ).reshape(n_groups, n_years)
+        for offset in range(n_years):
+            aggregates[f"interactions_{first_year + offset}"] = per_year[:, offset]
+    return pd.DataFrame(aggregates)
+
+
+def merge_aggregates(
+    current: pd.DataFrame, update: pd.DataFrame, key: str = "recipe_id"
+) -> pd.DataFrame:
+    """
+    Merges two outputs of `aggregate_interactions` into the aggregates of
+    the union of their interactions, so new interactions can be added
+    without aggregating the previous ones again.
+
+    Args:
+        current (pd.DataFrame): Aggregates of the previous interactions.
+        update (pd.DataFrame): Aggregates of the new interactions.
+        key (str): Column the aggregates are grouped by.
+
+    Returns:
+        pd.DataFrame: The merged aggregates, sorted by `key`, with the year
+        columns of both inputs (0 when a year is missing on one side).
+    """
+    combined = pd.concat([current, update], ignore_index=True)
+    year_columns = sorted(
+        column for column in combined.columns if column.startswith("interactions_")
+    )
+    combined[year_columns] = combined[year_columns].fillna(0)
+    grouped = combined.groupby(key, sort=True)
+    merged = grouped[["interaction_count", *year_columns]].sum().astype(np.int64)
+    merged.insert(1, "first_interaction", grouped["first_interaction"].min())
+    merged.insert(2, "last_interaction", grouped["last_interaction"].max())
+    return merged.reset_index()
+
+
+def compute_popularity(interactions: pd.DataFrame, date_column: str = "date") -> dict:
+    """
+    Computes the per-recipe and, when a `user_id` column is available,
+    the per-user interaction aggregates.
+
+    Args:
+        interactions (pd.DataFrame): Interactions DataFrame.
+        date_column (str): Column holding the interaction dates.
+
+    Returns:
+        dict: Aggregates keyed by table name ("recipe_popularity" and
+        optionally "user_activity").
+    """
+    tables = {
+        "recipe_popularity": aggregate_interactions(
+            interactions, "recipe_id", date_column
+        )
+    }
+    if "user_id" in interactions.columns:
+        tables["user_activity"] = aggregate_interactions(
+            interactions, "user_id", date_column
+        )
+    sizes = ", ".join(f"{name} ({len(df)} rows)" for name, df in tables.items())
+    logger.info(f"Computed popularity aggregates: {sizes}")
+    return tables
+
+
+def join_popularity(
+    recipes: pd.DataFrame, recipe_popularity: pd.DataFrame, id_column: str = "id"
+) -> pd.DataFrame:
+    """
+    Adds the `interaction_count` of each recipe to a recipes DataFrame
+    (e.g. `combined_df`), keeping its index. Recipes without interactions
+    get a count of 0.
+
+    Args:
+        recipes (pd.DataFrame): Recipes with an `id_column`.
+        recipe_popularity (pd.DataFrame): Output of `aggregate_interactions`
+        grouped by "recipe_id".
+        id_column (str): Recipe identifier column in `recipes`.
+
+    Returns:
+        pd.DataFrame: A copy of `recipes` with an `interaction_count` column.
+    """
+    counts = pd.Series(
+        recipe_popularity["interaction_count"].to_numpy(),
+        index=recipe_popularity["recipe_id"].to_numpy(),
+    )
+    joined = recipes.copy()
+    joined["interaction_count"] = (
+        joined[id_column].map(counts).fillna(0).astype(np.int64)
+    )
+    return joined
+
+
+def filter_min_interactions(
+    recipes: pd.DataFrame, min_interactions: int
+) -> pd.DataFrame:
+    """
+    Keeps the recipes having at least `min_interactions` interactions.
+
+    Raises:
+        KeyError: If `recipes` has no `interaction_count` column
+        (see `join_popularity`).
+    """
+    if "interaction_count" not in recipes.columns:
+        raise KeyError("The column 'interaction_count' is not in the DataFrame.")
+    return recipes[recipes["interaction_count"] >= min_interactions]
@@ -0,0 +1,272 @@
+import itertools
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Priority given to the data of the sections that are not displayed
+LOW_PRIORITY = 1000
+
+_THREAD_PREFIX = "prefetch"
+
+
+class _PrefetchThreadFilter(logging.Filter):
+    """
+    Drops Streamlit's "missing ScriptRunContext" warning for the prefetch
+    threads: they only compute data and never draw on the page.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not threading.current_thread().name.startswith(_THREAD_PREFIX):
+            return True
+        return "missing ScriptRunContext" not in record.getMessage()
+
+
+_CONTEXT_LOGGER = "streamlit.runtime.scriptrunner_utils.script_run_context"
+logging.getLogger(_CONTEXT_LOGGER).addFilter(_PrefetchThreadFilter())
+
+
+class PrefetchScheduler:
+    """
+    Computes named tasks in background threads, in priority order, and
+    keeps their results as futures.
+
+    Tasks are registered once with `register`, queued with `prefetch` and
+    awaited with `result`. A task is run only once; when `result` asks for
+    a task no thread has started yet, it runs in the calling thread instead
+    of waiting for a free worker, so tasks may depend on other tasks.
+    Failed tasks are forgotten and run again on the next request.
+
+    Tasks may declare the tasks and sources they are computed from.
+    Sources are namespaced names of the underlying data (e.g.
+    "dataset:<path>") with an optional function resetting their lower-level
+    caches. Invalidating a source or a task forgets the results of
+    everything depending on it, and nothing else; the next request
+    recomputes each of them once, concurrent requests waiting on the same
+    computation.
+
+    Worker threads are started on demand, up to `max_workers`, and exit as
+    soon as the queue is empty.
+
+    Example:
+        scheduler = PrefetchScheduler()
+        scheduler.add_source("dataset:recipes.csv")
+        scheduler.register("combined_df", load_combined_df, ["dataset:recipes.csv"])
+        scheduler.prefetch(["combined_df"])
+        combined_df = scheduler.result("combined_df")
+        scheduler.invalidate(["dataset:recipes.csv"])
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self._tasks = {}
+        self._sources = {}
+        self._dependents = {}
+        self._futures = {}
+        self._started = set()
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers = 0
+        self._lock = threading.Lock()
+
+    def add_source(self, name: str, reset=None) -> None:
+        """
+        Declares a source the tasks can depend on.
+
+        Args:
+            name (str): Namespaced name, e.g. "dataset:<path>".
+            reset (callable): Function without arguments dropping the caches
+            of the source, called when it is invalidated.
+        """
+        with self._lock:
+            self._sources[name] = reset
+
+    def register(self, name: str, func, depends_on: list = ()) -> None:
+        """
+        Registers the function computing a task.
+
+        Args:
+            name (str): Name of the task.
+            func (callable): Function without arguments returning the result.
+            depends_on (list): Names of the tasks and sources the result is
+            computed from.
+        """
+        with self._lock:
+            self._tasks[name] = func
+            for dependency in depends_on:
+                self._dependents.setdefault(dependency, set()).add(name)
+
+    def unregister(self, name: str) -> None:
+        """
+        Forgets a task, its result and the dependencies declared for it,
+        e.g. a task computed for one value of a parameter that is no
+        longer needed. Callers already waiting on it still get its result.
+
+        Args:
+            name (str): Name of the task; unknown names are ignored.
+        """
+        with self._lock:
+            self._tasks.pop(name, None)
+            self._futures.pop(name, None)
+            self._started.discard(name)
+            for dependents in self._dependents.values():
+                dependents.discard(name)
+
+    def sources(self) -> list:
+        """Returns the names of the declared sources, sorted."""
+        with self._lock:
+            return sorted(self._sources)
+
+    def dependents(self, names: list) -> list:
+        """
+        Returns the given names and everything depending on them, directly
+        or transitively, sorted.
+        """
+        with self._lock:
+            found = set()
+            stack = list(names)
+            while stack:
+                name = stack.pop()
+                if name not in found:
+                    found.add(name)
+                    stack.extend(self._dependents.get(name, ()))
+        return sorted(found)
+
+    def prefetch(self, names: list, priority: int = 0) -> None:
+        """
+        Queues tasks in the given order: the first one gets `priority`, the
+        next ones increasing values (lower values run first). Queuing a
+        pending task again with a better priority moves it ahead.
+
+        Args:
+            names (list): Names of registered tasks.
+            priority (int): Priority of the first task.
+
+        Raises:
+            KeyError: If a task is not registered.
+        """
+        with self._lock:
+            for offset, name in enumerate(names):
+                if name not in self._tasks:
+                    raise KeyError(f"The task '{name}' is not registered.")
+                if name in self._started:
+                    continue
+                self._futures.setdefault(name, Future())
+                self._queue.put((priority + offset, next(self._sequence), name))
+            while self._workers < min(self.max_workers, self._queue.qsize()):
+                self._workers += 1
+                threading.Thread(
+                    target=self._work,
+                    name=f"{_THREAD_PREFIX}-{next(self._sequence)}",
+                    daemon=True,
+                ).start()
+
+    def result(self, name: str, timeout: float = None):
+        """
+        Returns the result of a task, waiting for it when another thread is
+        computing it and computing it here when nobody has started it.
+
+        Args:
+            name (str): Name of a registered task.
+            timeout (float): Maximum waiting time in seconds.
+
+        Returns:
+            The value returned by the task function.
+
+        Raises:
+            KeyError: If the task is not registered.
+            TimeoutError: If the result is not ready within `timeout`.
+            Exception: Any exception raised by the task.
+        """
+        future, claimed = self._claim(name)
+        if claimed:
+            self._run(name, future)
+        return future.result(timeout)
+
+    def invalidate(self, names: list) -> list:
+        """
+        Resets the given sources and forgets the results of the given tasks
+        and of everything depending on them, so that they run again on the
+        next `prefetch` or `result`. A task still running keeps its current
+        result for the callers already waiting on it.
+
+        Args:
+            names (list): Names of sources or tasks; unknown names are
+            ignored.
+
+        Returns:
+            list: The invalidated names, sorted.
+        """
+        invalidated = [
+            name
+            for name in self.dependents(names)
+            if name in self._tasks or name in self._sources
+        ]
+        for name in invalidated:
+            reset = self._sources.get(name)
+            if reset is not None:
+                reset()
+        with self._lock:
+            for name in invalidated:
+                if name in self._started:
+                    self._started.discard(name)
+                    self._futures.pop(name, None)
+        if invalidated:
+            logger.info(f"Invalidated {', '.join(invalidated)}")
+        return invalidated
+
+    def status(self) -> dict:
+        """Returns the state of each known task: pending, running or done."""
+        with self._lock:
+            futures = dict(self._futures)
+            started = set(self._started)
+        return {
+            name: (
+                "done" if future.done() else "running" if name in started else "pending"
+            )
+            for name, future in futures.items()
+        }
+
+    def _claim(self, name: str) -> tuple:
+        """Returns the future of a task and whether the caller must run it."""
+        with self._lock:
+            if name not in self._tasks:
+                raise KeyError(f"The task '{name}' is not registered.")
+            future = self._futures.setdefault(name, Future())
+            claimed = name not in self._started
+            self._started.add(name)
+        if claimed:
+            future.set_running_or_notify_cancel()
+        return future, claimed
+
+    def _run(self, name: str, future: Future) -> None:
+        """Runs a claimed task and stores its result or exception."""
+        try:
+            result = self._tasks[name]()
+        except Exception as e:
+            logger.error(f"Prefetch task '{name}' failed: {e}")
+            with self._lock:
+                self._futures.pop(name, None)
+                self._started.discard(name)
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    def _work(self) -> None:
+        """Worker loop: runs queued tasks until the queue is empty."""
+        while True:
+            with self._lock:
+                try:
+                    _, _, name = self._queue.get_nowait()
+                except queue.Empty:
+                    self._workers -= 1
+                    return
+                if name not in self._tasks:
+                    # Unregistered since it was queued
+                    continue
+            future, claimed = self._claim(name)
+            if claimed:
+                self._run(name, future)
@@ -0,0 +1,279 @@
+"""
+Streaming profiler of the datasets, feeding the data catalog.
+
+A dataset is read once, chunk by chunk (`DataLoader.iter_chunks`), and each
+column is summarized without keeping the chunks: dtype, null count, minimum
+and maximum, memory used once loaded by pandas, and an approximate number
+of distinct values counted with a HyperLogLog sketch (about 1% error with
+the default precision, in 16 KiB per column).
+
+The profile is stored next to the dataset (`<dataset>.profile.json`) with
+the fingerprint of the file (name, size and modification time), and
+computed again only when the file changes.
+
+Usage (from the repository root):
+    python src/profiler.py dataset/RAW_recipes.csv.zip
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from data_loader import CHUNK_ROWS, DataLoader
+from locking import exclusive
+from snapshot import SOURCES, dataset_version
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the content of a profile changes
+PROFILE_FORMAT_VERSION = 1
+# log2 of the number of HyperLogLog registers
+DEFAULT_PRECISION = 14
+
+
+class HyperLogLog:
+    """
+    Approximate count of the distinct values added, in `2 ** precision`
+    one-byte registers. Two sketches of the same precision are merged by
+    taking the maximum of their registers.
+
+    Args:
+        precision (int): log2 of the number of registers, from 11 to 18
+        (relative standard error of about `1.04 / sqrt(2 ** precision)`).
+
+    Raises:
+        ValueError: If `precision` is out of range.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        # The hash bits left after the register index must fit in a float64
+        if not 11 <= precision <= 18:
+            raise ValueError(f"The precision must be in [11, 18], got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(2**precision, dtype=np.uint8)
+
+    def add(self, values: pd.Series) -> None:
+        """Adds the non-missing values of a Series."""
+        values = values.dropna()
+        if values.empty:
+            return
+        # The same number hashes the same whether its chunk holds integers
+        # or floats
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(
+            values
+        ):
+            values = values.astype(np.float64)
+        try:
+            hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        except TypeError:
+            hashes = pd.util.hash_pandas_object(
+                values.astype(str), index=False
+            ).to_numpy()
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # Position of the first 1 bit of `rest`, counted from its highest bit
+        exponents = np.frexp(rest.astype(np.float64))[1]
+        ranks = np.where(rest == 0, bits + 1, bits + 1 - exponents).astype(np.uint8)
+        np.maximum.at(self.registers, index, ranks)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Adds the values counted by another sketch of the same precision."""
+        if other.precision != self.precision:
+            raise ValueError("Only sketches of the same precision can be merged")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        """Returns the estimated number of distinct values."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+def _scalar(value):
+    """Converts a minimum or maximum to a JSON value (None if missing)."""
+    if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _common_dtype(dtypes: list) -> str:
+    """Returns the dtype of a column read as several chunks."""
+    unique = list(dict.fromkeys(dtypes))
+    if len(unique) == 1:
+        return unique[0]
+    try:
+        return str(np.result_type(*unique))
+    except TypeError:
+        return "object"
+
+
+def profile_chunks(chunks, precision: int = DEFAULT_PRECISION) -> dict:
+    """
+    Summarizes the columns of a dataset read as successive DataFrames.
+
+    Args:
+        chunks: Iterable of DataFrames with the same columns.
+        precision (int): Precision of the distinct counts (see `HyperLogLog`).
+
+    Returns:
+        dict: `rows`, `chunks`, `memory_bytes` and `columns`, the list of
+        the column summaries (`name`, `dtype`, `nulls`, `distinct`, `min`,
+        `max`, `memory_bytes`).
+    """
+    columns = {}
+    rows = n_chunks = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        n_chunks += 1
+        memory = chunk.memory_usage(deep=True, index=False)
+        for name in chunk.columns:
+            values = chunk[name]
+            column = columns.setdefault(
+                name,
+                {
+                    "dtypes": [],
+                    "nulls": 0,
+                    "sketch": HyperLogLog(precision),
+                    "comparable": True,
+                    "min": None,
+                    "max": None,
+                    "memory_bytes": 0,
+                },
+            )
+            column["dtypes"].append(str(values.dtype))
+            column["nulls"] += int(values.isna().sum())
+            column["memory_bytes"] += int(memory[name])
+            column["sketch"].add(values)
+            present = values.dropna()
+            if column["comparable"] and not present.empty:
+                try:
+                    bounds = [column["min"], _scalar(present.min())]
+                    bounds += [column["max"], _scalar(present.max())]
+                    bounds = [bound for bound in bounds if bound is not None]
+                    if bounds:
+                        column["min"], column["max"] = min(bounds), max(bounds)
+                except TypeError:
+                    # Values of different types (e.g. strings and numbers)
+                    column["comparable"] = False
+                    column["min"] = column["max"] = None
+    summaries = [
+        {
+            "name": str(name),
+            "dtype": _common_dtype(column["dtypes"]),
+            "nulls": column["nulls"],
+            "distinct": min(column["sketch"].count(), rows - column["nulls"]),
+            "min": column["min"],
+            "max": column["max"],
+            "memory_bytes": column["memory_bytes"],
+        }
+        for name, column in columns.items()
+    ]
+    return {
+        "rows": rows,
+        "chunks": n_chunks,
+        "memory_bytes": sum(column["memory_bytes"] for column in summaries),
+        "columns": summaries,
+    }
+
+
+def profile_path(file_name: str) -> str:
+    """Returns the path of the stored profile of a dataset."""
+    return f"{file_name}.profile.json"
+
+
+def _fingerprint(file_name: str) -> str:
+    return f"{PROFILE_FORMAT_VERSION}:{dataset_version([file_name])}"
+
+
+def _read_profile(file_name: str):
+    """Returns the stored profile of a dataset if it is up to date, else None."""
+    try:
+        with open(profile_path(file_name)) as file:
+            profile = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return profile if profile.get("fingerprint") == _fingerprint(file_name) else None
+
+
+def profile_dataset(file_name: str, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """
+    Profiles a dataset in one streaming pass and stores the profile next to
+    it, unless the stored profile matches the fingerprint of the file. The
+    profile is computed once even when several sessions or processes ask
+    for it at the same time.
+
+    Args:
+        file_name (str): Path of the dataset (see `DataLoader.iter_chunks`).
+        chunk_rows (int): Rows read at once.
+
+    Returns:
+        dict: The summary of `profile_chunks`, with the `file`, its
+        `fingerprint`, the `created` date and the `seconds` spent.
+
+    Raises:
+        FileNotFoundError: If the dataset does not exist.
+    """
+    if not os.path.exists(file_name):
+        raise FileNotFoundError(f"No dataset at {file_name}")
+    profile = _read_profile(file_name)
+    if profile is not None:
+        return profile
+    path = profile_path(file_name)
+    with exclusive(f"{path}.lock"):
+        # Another session may have profiled it while we waited
+        profile = _read_profile(file_name)
+        if profile is not None:
+            return profile
+        fingerprint = _fingerprint(file_name)
+        start = time.perf_counter()
+        try:
+            summary = profile_chunks(DataLoader().iter_chunks(file_name, chunk_rows))
+        except Exception as e:
+            logger.error(f"Error while profiling {file_name}: {e}")
+            raise
+        profile = {
+            "file": file_name,
+            "fingerprint": fingerprint,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "seconds": round(time.perf_counter() - start, 3),
+            **summary,
+        }
+        temporary = f"{path}.tmp-{os.getpid()}"
+        with open(temporary, "w") as file:
+            json.dump(profile, file, indent=2, default=str)
+        os.replace(temporary, path)
+    logger.info(
+        f"Profiled {file_name}: {profile['rows']} rows in {profile['seconds']} s"
+    )
+    return profile
+
+
+def main(argv: list = None) -> int:
+    """Command line entry point: profiles datasets and prints their columns."""
+    parser = argparse.ArgumentParser(description="Profile datasets.")
+    parser.add_argument("datasets", nargs="*", help="the source datasets by default")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    for file_name in args.datasets or [p for p in SOURCES if os.path.exists(p)]:
+        profile = profile_dataset(file_name, args.chunk_rows)
+        print(f"{file_name}: {profile['rows']} rows, {profile['seconds']} s")
+        columns = pd.DataFrame(profile["columns"]).drop(columns=["min", "max"])
+        print(columns.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import logging
+import numpy as np
+import pandas as pd
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Same directions as stats_bio: maximizing the proteins, minimizing the others
+NUTRIENT_OBJECTIVES = {
+    "Calories": "min",
+    "Total Fat (g)": "min",
+    "Sugar (g)": "min",
+    "Sodium (mg)": "min",
+    "Protein (g)": "max",
+    "Saturated Fat (g)": "min",
+    "Carbohydrates (g)": "min",
+}
+
+
+def normalized_costs(df: pd.DataFrame, objectives: dict) -> np.ndarray:
+    """
+    Builds a (n_recipes, n_nutrients) matrix of costs scaled to [0, 1],
+    where 0 is the best value of a nutrient and 1 the worst one.
+
+    Args:
+        df (pd.DataFrame): Recipes with one column per nutrient.
+        objectives (dict): Nutrient column -> "min" or "max".
+
+    Returns:
+        np.ndarray: The normalized cost matrix (float64).
+
+    Raises:
+        KeyError: If a nutrient column is not in the DataFrame.
+        ValueError: If an objective is neither "min" nor "max".
+    """
+    for column, direction in objectives.items():
+        if column not in df.columns:
+            raise KeyError(f"The column '{column}' is not in the DataFrame.")
+        if direction not in ("min", "max"):
+            raise ValueError(f"Unknown objective '{direction}' for '{column}'.")
+    costs = df[list(objectives)].to_numpy(dtype=np.float64, copy=True)
+    signs = np.array([1.0 if d == "min" else -1.0 for d in objectives.values()])
+    costs *= signs
+    lowest = costs.min(axis=0, initial=np.inf)
+    spread = costs.max(axis=0, initial=-np.inf) - lowest
+    spread[~(spread > 0)] = 1.0
+    return (costs - lowest) / spread
+
+
+def pareto_front(
+    costs: np.ndarray, block_size: int = 4096, skyline_chunk: int = 256
+) -> np.ndarray:
+    """
+    Returns the mask of the Pareto-optimal rows of a cost matrix (lower is
+    better in every column) with a sort-filter-skyline algorithm.
+
+    Rows are sorted by the sum of their costs, so a row can only be
+    dominated by rows placed before it. Rows are then processed in blocks:
+    each block is checked against the skyline found so far, strongest
+    skyline rows first so that most dominated rows are discarded after the
+    first chunk, then the survivors are checked against each other. All
+    dominance tests are vectorized, and the work grows with
+    n x skyline size instead of n².
+
+    Args:
+        costs (np.ndarray): (n_rows, n_objectives) cost matrix without NaN.
+        block_size (int): Number of rows processed at once.
+        skyline_chunk (int): Number of skyline rows compared at once.
+
+    Returns:
+        np.ndarray: Boolean mask, True for the non-dominated rows.
+    """
+    n_rows = costs.shape[0]
+    mask = np.zeros(n_rows, dtype=bool)
+    if n_rows == 0:
+        return mask
+    # Ties on the sum are broken lexicographically so a dominating row
+    # always comes first, even with rounding errors on the sum
+    order = np.lexsort(tuple(costs.T[::-1]) + (costs.sum(axis=1),))
+    sorted_costs = costs[order]
+    skyline = np.empty((0, costs.shape[1]))
+    for start in range(0, n_rows, block_size):
+        stop = start + block_size
+        block = sorted_costs[start:stop]
+        alive = np.arange(len(block))
+        for sky_start in range(0, len(skyline), skyline_chunk):
+            if len(alive) == 0:
+                break
+            sky_stop = sky_start + skyline_chunk
+            dominated = _dominated_by_any(block[alive], skyline[sky_start:sky_stop])
+            alive = alive[~dominated]
+        # Pairwise dominance between the block survivors
+        alive = alive[~_dominated_by_any(block[alive], block[alive])]
+        mask[order[start + alive]] = True
+        skyline = np.vstack([skyline, block[alive]])
+    return mask
+
+
+def _dominated_by_any(points: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """
+    For each row of `points`, tells whether at least one row of `others`
+    is lower or equal everywhere and strictly lower somewhere.
+    """
+    dominated = np.zeros(len(points), dtype=bool)
+    if len(others) == 0 or len(points) == 0:
+        return dominated
+    # One 2D comparison per objective is much cheaper than a 3D broadcast
+    lower_equal = np.ones((len(points), len(others)), dtype=bool)
+    for column in range(points.shape[1]):
+        lower_equal &= others[:, column] <= points[:, column, None]
+    point_rows, other_rows = np.nonzero(lower_equal)
+    strict = (others[other_rows] != points[point_rows]).any(axis=1)
+    dominated[point_rows[strict]] = True
+    return dominated
+
+
+class RecipeRanker:
+    """
+    Multi-objective ranking of recipes over all nutrients at once.
+
+    The normalized cost matrix and the Pareto front are computed once;
+    a weighted composite score is then a single matrix-vector product, so
+    new weights are applied to the whole recipe set in milliseconds.
+    """
+
+    def __init__(self, df: pd.DataFrame, objectives: dict = None) -> None:
+        self.objectives = dict(objectives or NUTRIENT_OBJECTIVES)
+        self.df = df
+        self.costs = normalized_costs(df, self.objectives)
+        self.pareto_mask = pareto_front(self.costs)
+        logger.info(
+            f"Ranked {len(df)} recipes: {int(self.pareto_mask.sum())} "
+            "are Pareto-optimal"
+        )
+
+    def score(self, weights: dict = None) -> np.ndarray:
+        """
+        Computes the weighted composite score of every recipe, between 0
+        (worst value for every nutrient) and 1 (best value everywhere).
+
+        Args:
+            weights (dict): Nutrient -> non-negative weight. Missing
+            nutrients get a weight of 1, and all zero weights behave as
+            equal weights.
+
+        Returns:
+            np.ndarray: One score per recipe, in the DataFrame order.
+
+        Raises:
+            ValueError: If a weight is negative or refers to an unknown
+            nutrient.
+        """
+        weights = weights or {}
+        unknown = set(weights) - set(self.objectives)
+        if unknown:
+            raise ValueError(f"Unknown nutrients in weights: {sorted(unknown)}")
+        vector = np.array([float(weights.get(c, 1.0)) for c in self.objectives])
+        if (vector < 0).any():
+            raise ValueError("Weights must be non-negative.")
+        if vector.sum() == 0:
+            vector[:] = 1.0
+        return 1.0 - self.costs @ (vector / vector.sum())
+
+    def top(
+        self, weights: dict = None, k: int = 10, pareto_only: bool = False
+    ) -> pd.DataFrame:
+        """
+        Returns the `k` best recipes for the given weights.
+
+        Args:
+            weights (dict): Nutrient weights, see `score`.
+            k (int): Number of recipes to return.
+            pareto_only (bool): Restrict the ranking to the Pareto front.
+
+        Returns:
+            pd.DataFrame: The selected rows of the DataFrame with the
+            `Score` and `Pareto optimal` columns, best first.
+        """
+        scores = self.score(weights)
+        candidates = np.flatnonzero(self.pareto_mask) if pareto_only else None
+        pool = scores if candidates is None else scores[candidates]
+        k = min(k, len(pool))
+        best = np.argpartition(-pool, k - 1)[:k] if k > 0 else np.empty(0, int)
+        best = best[np.argsort(-pool[best], kind="stable")]
+        rows = best if candidates is None else candidates[best]
+        ranked = self.df.iloc[rows].copy()
+        ranked["Score"] = scores[rows]
+        ranked["Pareto optimal"] = self.pareto_mask[rows]
+        return ranked
@@ -0,0 +1,267 @@
+"""
+Constant-time lookup of everything known about a recipe.
+
+Each source table (RAW_recipes, the preprocessed recipes, `combined_df`,
+the popularity aggregates, the ingredient map) gets a dense index from
+recipe id to row position: an array as long as the largest id, holding
+the row of each id (-1 when absent). A lookup is then one array access
+per source instead of a boolean scan of each table.
+"""
+
+import ast
+import logging
+import numpy as np
+import pandas as pd
+from nutrition_sketches import parse_tags
+from ranking import NUTRIENT_OBJECTIVES
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Columns of RAW_recipes holding stringified lists
+LIST_COLUMNS = ("tags", "steps", "ingredients", "ingredient_ids")
+# Columns of RAW_recipes copied into the records
+RAW_COLUMNS = (
+    "name",
+    "minutes",
+    "contributor_id",
+    "submitted",
+    "description",
+    "n_steps",
+    "n_ingredients",
+    "tags",
+    "steps",
+    "ingredients",
+)
+# Nutrients of the `nutrition` lists of the datasets, in order
+NUTRIENT_LABELS = tuple(nutrient.split(" (")[0] for nutrient in NUTRIENT_OBJECTIVES)
+
+
+def parse_list(value) -> list:
+    """
+    Parses a stringified list of RAW_recipes or PP_recipes such as
+    "['mix', 'bake']" or "[12, 7]".
+
+    Returns:
+        list: The values, empty when the value is missing or not a list.
+    """
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return list(value)  # Already parsed, e.g. read from Parquet
+    if not isinstance(value, str):
+        return []
+    try:
+        parsed = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        # e.g. "[np.str_('vegan')]": keep the quoted strings
+        return parse_tags(value)
+    return list(parsed) if isinstance(parsed, (list, tuple)) else []
+
+
+def _python_value(value):
+    """Converts a NumPy scalar to the matching Python value."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class IdIndex:
+    """
+    Dense index from integer ids to row positions.
+
+    Args:
+        ids (list): Non-negative id of each row (the last row of a
+        repeated id wins).
+
+    Example:
+        index = IdIndex([38, 45, 52])
+        index.position(45)  # 1
+        index.position(7)  # -1
+    """
+
+    def __init__(self, ids) -> None:
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) and ids.min() < 0:
+            raise ValueError("Ids must not be negative.")
+        size = int(ids.max()) + 1 if len(ids) else 0
+        self.rows = np.full(size, -1, dtype=np.int32)
+        self.rows[ids] = np.arange(len(ids), dtype=np.int32)
+
+    def position(self, row_id) -> int:
+        """Returns the row of an id, -1 when the id is unknown."""
+        try:
+            row_id = int(row_id)
+        except (TypeError, ValueError):
+            return -1
+        if 0 <= row_id < len(self.rows):
+            return int(self.rows[row_id])
+        return -1
+
+    def positions(self, ids) -> np.ndarray:
+        """Returns the rows of several ids at once, -1 for unknown ids."""
+        ids = np.asarray(ids, dtype=np.int64)
+        known = (ids >= 0) & (ids < len(self.rows))
+        return np.where(known, self.rows[np.where(known, ids, 0)], -1)
+
+
+class RecipeRepository:
+    """
+    Joined view of the recipe tables, indexed by recipe id.
+
+    Every table is optional: the records only hold the fields of the
+    tables given (e.g. no steps when RAW_recipes is not loaded).
+
+    Args:
+        raw_recipes (pd.DataFrame): RAW_recipes (`id` column).
+        preprocessed (pd.DataFrame): Preprocessed recipes (`id`,
+        `ingredient_ids` and `nutrition` columns).
+        combined_df (pd.DataFrame): Recipes with the nutrients converted
+        to g/mg and the top 4 flags (see nutrition_stats.stats_bio).
+        recipe_popularity (pd.DataFrame): `recipe_id` and
+        `interaction_count` columns (see popularity.py).
+        ingredients (pd.DataFrame): `replaced` (ingredient name) and `id`
+        columns of ingr_map.pkl.
+        recipe_tags (pd.DataFrame): `id` and `tags` columns, the tags used
+        when RAW_recipes is not given (see the "recipe_tags" snapshot table).
+
+    Example:
+        repository = RecipeRepository(raw_recipes, combined_df=combined_df)
+        repository.get(38)["nutrition"]["Calories"]
+    """
+
+    def __init__(
+        self,
+        raw_recipes: pd.DataFrame = None,
+        preprocessed: pd.DataFrame = None,
+        combined_df: pd.DataFrame = None,
+        recipe_popularity: pd.DataFrame = None,
+        ingredients: pd.DataFrame = None,
+        recipe_tags: pd.DataFrame = None,
+    ) -> None:
+        # Columns of each table as arrays, with the index of its ids
+        self._tables = {}
+        # Number of recipes the nutrient ranks are computed over
+        self.n_ranked = 0
+        if raw_recipes is not None:
+            columns = [column for column in RAW_COLUMNS if column in raw_recipes]
+            self._add("raw", raw_recipes, "id", columns)
+        if preprocessed is not None:
+            columns = [
+                column
+                for column in ("name", "ingredient_ids", "nutrition")
+                if column in preprocessed
+            ]
+            self._add("preprocessed", preprocessed, "id", columns)
+        if combined_df is not None:
+            nutrients = list(NUTRIENT_OBJECTIVES)
+            top_4 = [f"Top 4 {label}" for label in NUTRIENT_LABELS]
+            top_4 = [column for column in top_4 if column in combined_df]
+            self._add("combined", combined_df, "id", ["name", *nutrients, *top_4])
+            # Rank of each recipe per nutrient, 1 for the healthiest value
+            table = self._tables["combined"]
+            for nutrient, objective in NUTRIENT_OBJECTIVES.items():
+                ranks = combined_df[nutrient].rank(
+                    method="min", ascending=objective == "min"
+                )
+                table["columns"][f"rank {nutrient}"] = ranks.to_numpy()
+            self.n_ranked = len(combined_df)
+        if recipe_popularity is not None:
+            self._add(
+                "popularity", recipe_popularity, "recipe_id", ["interaction_count"]
+            )
+        if ingredients is not None:
+            ingredients = ingredients.drop_duplicates("id")
+            self._add("ingredients", ingredients, "id", ["replaced"])
+        if recipe_tags is not None:
+            self._add("tags", recipe_tags, "id", ["tags"])
+        sizes = ", ".join(
+            f"{name} ({len(table['index'].rows)} ids)"
+            for name, table in self._tables.items()
+        )
+        logger.info(f"Recipe repository indexed over {sizes}")
+
+    def _add(self, name: str, df: pd.DataFrame, id_column: str, columns) -> None:
+        for column in [id_column, *columns]:
+            if column not in df.columns:
+                raise KeyError(f"The column '{column}' is not in the DataFrame.")
+        self._tables[name] = {
+            "index": IdIndex(df[id_column].to_numpy()),
+            "columns": {column: df[column].to_numpy() for column in columns},
+        }
+
+    def _row(self, table: str, recipe_id) -> tuple:
+        """Returns the columns of a table and the row of a recipe (-1 if absent)."""
+        if table not in self._tables:
+            return None, -1
+        entry = self._tables[table]
+        return entry["columns"], entry["index"].position(recipe_id)
+
+    def __contains__(self, recipe_id) -> bool:
+        return any(
+            self._row(table, recipe_id)[1] >= 0
+            for table in ("raw", "preprocessed", "combined")
+        )
+
+    def get(self, recipe_id) -> dict:
+        """
+        Returns everything known about a recipe:
+
+        - the RAW_recipes fields (name, minutes, description, tags, steps,
+          ingredients...), the lists parsed
+        - `ingredient_ids` and their names (`ingredient_names`)
+        - `daily_values`: the nutrition of the dataset (calories, then the
+          percentages of the daily values)
+        - `nutrition`: the nutrients converted to g/mg, `ranks`: their rank
+          among the `n_ranked` recipes (1 for the healthiest value) and
+          `top_4`: the nutrients for which the recipe is in the top 4
+        - `interaction_count`
+
+        Raises:
+            KeyError: If no recipe table holds this id.
+        """
+        if recipe_id not in self:
+            raise KeyError(f"Unknown recipe id: {recipe_id}")
+        record = {"id": int(recipe_id)}
+        # Text fields, RAW_recipes winning over the other tables
+        for table in ("combined", "preprocessed", "tags", "raw"):
+            columns, row = self._row(table, recipe_id)
+            if row < 0:
+                continue
+            for column in columns:
+                if column in RAW_COLUMNS or column == "ingredient_ids":
+                    value = columns[column][row]
+                    if column in LIST_COLUMNS:
+                        value = parse_list(value)
+                    record[column] = _python_value(value)
+
+        columns, row = self._row("preprocessed", recipe_id)
+        if row >= 0 and "nutrition" in columns:
+            values = parse_list(columns["nutrition"][row])
+            record["daily_values"] = dict(zip(NUTRIENT_LABELS, values))
+
+        columns, row = self._row("combined", recipe_id)
+        if row >= 0:
+            record["nutrition"] = {
+                nutrient: float(columns[nutrient][row])
+                for nutrient in NUTRIENT_OBJECTIVES
+            }
+            record["ranks"] = {
+                nutrient: int(columns[f"rank {nutrient}"][row])
+                for nutrient in NUTRIENT_OBJECTIVES
+            }
+            record["top_4"] = [
+                column.removeprefix("Top 4 ")
+                for column in columns
+                if column.startswith("Top 4 ") and columns[column][row]
+            ]
+
+        if "ingredient_ids" in record and "ingredients" in self._tables:
+            table = self._tables["ingredients"]
+            rows = table["index"].positions(record["ingredient_ids"])
+            names = table["columns"]["replaced"]
+            record["ingredient_names"] = [
+                names[row] if row >= 0 else None for row in rows
+            ]
+
+        if "popularity" in self._tables:
+            columns, row = self._row("popularity", recipe_id)
+            count = columns["interaction_count"][row] if row >= 0 else 0
+            record["interaction_count"] = int(count)
+        return record
@@ -0,0 +1,275 @@
+import logging
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Mersenne prime used as modulus for the MinHash universal hash family
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def parse_id_lists(values: pd.Series) -> tuple:
+    """
+    Parses a column of stringified id lists (e.g. "[389, 7655, 6270]")
+    into a flat CSR-like representation without calling `ast.literal_eval`
+    on every row.
+
+    Args:
+        values (pd.Series): Column holding stringified lists of integer ids.
+        Missing values are treated as empty lists.
+
+    Returns:
+        tuple: `(indptr, ids)` where `ids[indptr[i]:indptr[i + 1]]` are the
+        ids of row `i`.
+    """
+    stripped = values.fillna("[]").astype(str).str.strip().str.strip("[]").str.strip()
+    lengths = np.where(
+        stripped.str.len().to_numpy() > 0, stripped.str.count(",").to_numpy() + 1, 0
+    )
+    flat = ",".join(s for s in stripped if s)
+    ids = np.fromstring(flat, sep=",", dtype=np.int64)
+    if len(ids) != lengths.sum():
+        raise ValueError("Malformed id list: could not parse every element.")
+    indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    return indptr, ids
+
+
+def build_ingredient_matrix(df: pd.DataFrame, column: str = "ingredient_ids") -> tuple:
+    """
+    Builds a sparse recipe x ingredient incidence matrix.
+
+    Args:
+        df (pd.DataFrame): Recipes DataFrame with a stringified list column.
+        column (str): Name of the column holding the ingredient ids.
+
+    Returns:
+        tuple: `(matrix, ingredient_ids)` where `matrix` is a binary
+        `scipy.sparse.csr_matrix` of shape (n_recipes, n_ingredients) and
+        `ingredient_ids` maps each matrix column back to its ingredient id.
+
+    Raises:
+        KeyError: If `column` is not in the DataFrame.
+    """
+    if column not in df.columns:
+        raise KeyError(f"The column '{column}' is not in the DataFrame.")
+    indptr, ids = parse_id_lists(df[column])
+    ingredient_ids, codes = np.unique(ids, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(codes), dtype=np.float32), codes, indptr),
+        shape=(len(df), len(ingredient_ids)),
+    )
+    # Collapse ingredients listed twice in the same recipe
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+    return matrix, ingredient_ids
+
+
+def tfidf_normalize(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """
+    Weights a binary incidence matrix by smoothed inverse document frequency
+    and L2-normalizes its rows, so that a dot product is a cosine similarity.
+
+    Args:
+        matrix (sparse.csr_matrix): Binary recipe x ingredient matrix.
+
+    Returns:
+        sparse.csr_matrix: The TF-IDF weighted, row-normalized matrix.
+    """
+    n_rows = matrix.shape[0]
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + n_rows) / (1 + document_frequency)) + 1.0
+    weighted = matrix.multiply(idf.astype(np.float32)).tocsr()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags((1.0 / norms).astype(np.float32)) @ weighted
+
+
+def _top_k_per_row(block: sparse.csr_matrix, k: int, exclude: np.ndarray) -> list:
+    """
+    Extracts the `k` largest entries of each row of a sparse block, ignoring
+    the column given in `exclude` for the corresponding row.
+    """
+    block = block.tocsr()
+    rows = np.repeat(np.arange(block.shape[0]), np.diff(block.indptr))
+    keep = block.indices != exclude[rows]
+    rows, cols, vals = rows[keep], block.indices[keep], block.data[keep]
+    # Sort by row, then by decreasing score, then by column for stable ties
+    order = np.lexsort((cols, -vals, rows))
+    rows, cols, vals = rows[order], cols[order], vals[order]
+    starts = np.searchsorted(rows, np.arange(block.shape[0]), side="left")
+    ends = np.minimum(
+        np.searchsorted(rows, np.arange(block.shape[0]), side="right"), starts + k
+    )
+    return [(cols[s:e], vals[s:e]) for s, e in zip(starts, ends)]
+
+
+class IngredientSimilarityIndex:
+    """
+    Exact "recipes sharing ingredients" lookups based on the cosine similarity
+    of TF-IDF weighted ingredient vectors.
+
+    Similarities are computed with sparse matrix products over chunks of
+    query rows, so memory stays bounded by `chunk_size` x `n_recipes` non-zero
+    entries whatever the number of queried recipes.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        id_column: str = "id",
+        ingredient_column: str = "ingredient_ids",
+        chunk_size: int = 512,
+    ) -> None:
+        self.recipe_ids = df[id_column].to_numpy()
+        self.incidence, self.ingredient_ids = build_ingredient_matrix(
+            df, ingredient_column
+        )
+        self.matrix = tfidf_normalize(self.incidence)
+        self._matrix_t = self.matrix.T.tocsr()
+        self.chunk_size = chunk_size
+        self._positions = pd.Series(
+            np.arange(len(self.recipe_ids)), index=self.recipe_ids
+        )
+        logger.info(
+            f"Built ingredient similarity index: {self.matrix.shape[0]} recipes, "
+            f"{self.matrix.shape[1]} ingredients, {self.matrix.nnz} entries"
+        )
+
+    def positions(self, recipe_ids) -> np.ndarray:
+        """
+        Returns the matrix row of each recipe id.
+
+        Raises:
+            KeyError: If a recipe id is not in the index.
+        """
+        return self._positions.loc[np.atleast_1d(recipe_ids)].to_numpy()
+
+    def most_similar_positions(self, positions, k: int = 10) -> list:
+        """
+        Returns the `k` most similar recipes for each matrix row in
+        `positions` as a list of `(row_positions, scores)` pairs.
+        """
+        positions = np.atleast_1d(np.asarray(positions, dtype=np.int64))
+        results = []
+        for start in range(0, len(positions), self.chunk_size):
+            stop = start + self.chunk_size
+            chunk = positions[start:stop]
+            block = self.matrix[chunk] @ self._matrix_t
+            results.extend(_top_k_per_row(block, k, exclude=chunk))
+        return results
+
+    def most_similar(self, recipe_id, k: int = 10) -> pd.DataFrame:
+        """
+        Returns the `k` recipes with the highest cosine similarity to
+        `recipe_id`, excluding the recipe itself.
+
+        Args:
+            recipe_id: Identifier of the query recipe.
+            k (int): Number of neighbours to return.
+
+        Returns:
+            pd.DataFrame: Columns `id` and `similarity`, sorted by decreasing
+            similarity.
+        """
+        ((cols, scores),) = self.most_similar_positions(self.positions(recipe_id), k)
+        return pd.DataFrame({"id": self.recipe_ids[cols], "similarity": scores})
+
+
+class MinHashLSH:
+    """
+    Approximate "recipes sharing ingredients" candidate retrieval.
+
+    Each recipe's ingredient set is summarised by `num_perm` MinHash values,
+    split into `bands` bands of `num_perm // bands` rows. Recipes whose
+    signatures agree on a whole band share a bucket; buckets are stored as
+    sorted key arrays so a lookup is a handful of binary searches.
+    """
+
+    def __init__(
+        self,
+        incidence: sparse.csr_matrix,
+        num_perm: int = 64,
+        bands: int = 16,
+        seed: int = 42,
+        max_bucket_size: int = 1000,
+    ) -> None:
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.max_bucket_size = max_bucket_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.signatures = self._signatures(incidence.tocsr())
+        self._band_keys, self._band_rows = self._build_buckets()
+
+    def _signatures(self, incidence: sparse.csr_matrix) -> np.ndarray:
+        """Computes the (n_rows, num_perm) MinHash signature matrix."""
+        n_rows = incidence.shape[0]
+        signatures = np.full((n_rows, self.num_perm), _MAX_HASH, dtype=np.uint64)
+        non_empty = np.diff(incidence.indptr) > 0
+        if incidence.nnz == 0:
+            return signatures
+        starts = incidence.indptr[:-1][non_empty]
+        columns = incidence.indices.astype(np.uint64)
+        # One permutation at a time keeps the temporary at nnz values
+        for p in range(self.num_perm):
+            hashed = ((self._a[p] * columns + self._b[p]) % _MERSENNE_PRIME) & _MAX_HASH
+            signatures[non_empty, p] = np.minimum.reduceat(hashed, starts)
+        return signatures
+
+    def _band_hash(self, signatures: np.ndarray) -> np.ndarray:
+        """Hashes each band of each signature into a single uint64 key."""
+        shaped = signatures.reshape(-1, self.bands, self.rows_per_band)
+        keys = np.zeros(shaped.shape[:2], dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for r in range(self.rows_per_band):
+                keys = keys * np.uint64(1000003) ^ shaped[:, :, r]
+        return keys
+
+    def _build_buckets(self) -> tuple:
+        """Sorts the band keys so that each bucket is a contiguous slice."""
+        keys = self._band_hash(self.signatures)
+        band_keys, band_rows = [], []
+        for band in range(self.bands):
+            order = np.argsort(keys[:, band], kind="stable")
+            band_keys.append(keys[order, band])
+            band_rows.append(order)
+        return band_keys, band_rows
+
+    def candidates(self, position: int) -> np.ndarray:
+        """
+        Returns the rows sharing at least one LSH bucket with `position`.
+        Recipes without ingredients have no candidates.
+        """
+        if (self.signatures[position] == _MAX_HASH).all():
+            return np.empty(0, dtype=np.int64)
+        query = self._band_hash(self.signatures[[position]])[0]
+        found = []
+        for band in range(self.bands):
+            keys = self._band_keys[band]
+            lo = np.searchsorted(keys, query[band], side="left")
+            hi = np.searchsorted(keys, query[band], side="right")
+            hi = min(hi, lo + self.max_bucket_size)
+            found.append(self._band_rows[band][lo:hi])
+        found = np.unique(np.concatenate(found))
+        return found[found != position]
+
+    def query(self, position: int, k: int = 10) -> tuple:
+        """
+        Returns up to `k` candidate rows ranked by estimated Jaccard
+        similarity (fraction of agreeing MinHash values).
+
+        Returns:
+            tuple: `(row_positions, estimated_jaccard)`.
+        """
+        found = self.candidates(position)
+        estimates = (self.signatures[found] == self.signatures[position]).mean(axis=1)
+        order = np.argsort(-estimates, kind="stable")[:k]
+        return found[order], estimates[order]
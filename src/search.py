@@ -0,0 +1,309 @@
+"""
+Full-text search over the recipes with an inverted index and BM25 scoring.
+
+The index maps every term of the recipe names, descriptions, tags and
+steps to its postings: the recipes containing it and the (field-weighted)
+number of occurrences. Postings are stored term after term in flat NumPy
+arrays, so a query only reads the postings of its terms and scores them
+with vectorized operations instead of scanning the recipes.
+
+The index is persisted as a directory of `.npy` files, memory-mapped when
+loaded: a new process opens it instantly and the operating system shares
+its pages between processes.
+
+Usage (from the repository root):
+    index = SearchIndex.build(raw_recipes)
+    index.save("cache/search/<version>")
+    SearchIndex.load("cache/search/<version>").search("lemon chicken", k=10)
+"""
+
+import logging
+import os
+import re
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from locking import exclusive
+from nutrition_sketches import parse_tags
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Weight of an occurrence of a term in each field of RAW_recipes
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "description": 1.0, "steps": 1.0}
+# BM25 parameters: term frequency saturation and length normalization
+K1 = 1.2
+B = 0.75
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Recipes tokenized at once while building an index
+CHUNK_ROWS = 20_000
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the then this "
+    "to until with".split()
+)
+# Arrays of a saved index, one .npy file each
+_ARRAYS = (
+    "ids",
+    "offsets",
+    "postings",
+    "frequencies",
+    "lengths",
+    "terms",
+    "term_ends",
+    "names",
+    "name_ends",
+)
+
+
+def tokenize(text) -> list:
+    """
+    Splits a text into lowercase alphanumeric terms, stop words removed.
+
+    Returns:
+        list: The terms, in order (empty for a missing value).
+    """
+    if not isinstance(text, str):
+        return []
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def _field_text(recipes: pd.DataFrame, field: str) -> pd.Series:
+    """Returns the searchable text of a field (tag lists joined by spaces)."""
+    if field == "tags":
+        return recipes[field].map(lambda tags: " ".join(parse_tags(tags)))
+    return recipes[field].fillna("").astype(str)
+
+
+def _pack(strings) -> tuple:
+    """Encodes strings as one UTF-8 byte array and their end offsets."""
+    encoded = [string.encode() for string in strings]
+    ends = np.cumsum([len(string) for string in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), ends
+
+
+def _unpack(data: np.ndarray, ends: np.ndarray) -> list:
+    """Decodes the strings encoded by `_pack`."""
+    data = bytes(data)
+    starts = np.concatenate([[0], ends[:-1]])
+    return [data[start:end].decode() for start, end in zip(starts, ends)]
+
+
+class SearchIndex:
+    """
+    BM25-ranked inverted index over the recipes.
+
+    Build it with `SearchIndex.build` or read a saved one with
+    `SearchIndex.load`.
+
+    Example:
+        index = SearchIndex.build(raw_recipes)
+        index.search("vegan lemon cake", k=10)
+    """
+
+    def __init__(self, arrays: dict) -> None:
+        self.ids = arrays["ids"]
+        self.offsets = arrays["offsets"]
+        self.postings = arrays["postings"]
+        self.frequencies = arrays["frequencies"]
+        self.lengths = arrays["lengths"]
+        self._arrays = arrays
+        terms = _unpack(arrays["terms"], arrays["term_ends"])
+        self.vocabulary = {term: position for position, term in enumerate(terms)}
+        self.names = np.array(
+            _unpack(arrays["names"], arrays["name_ends"]), dtype=object
+        )
+        average_length = float(self.lengths.mean()) if len(self.lengths) else 1.0
+        # Length normalization of the BM25 term frequency of each recipe
+        self._norms = K1 * (1 - B + B * self.lengths / average_length)
+
+    @classmethod
+    def build(cls, recipes: pd.DataFrame, weights: dict = None) -> "SearchIndex":
+        """
+        Indexes the recipes of RAW_recipes.
+
+        Args:
+            recipes (pd.DataFrame): Recipes with an `id` column and the
+            text columns of `weights`.
+            weights (dict): Weight of each indexed column, `FIELD_WEIGHTS`
+            by default.
+
+        Returns:
+            SearchIndex: The index.
+
+        Raises:
+            KeyError: If a column is not in the DataFrame.
+        """
+        weights = FIELD_WEIGHTS if weights is None else weights
+        for column in ["id", "name", *weights]:
+            if column not in recipes.columns:
+                raise KeyError(f"The column '{column}' is not in the DataFrame.")
+        recipes = recipes.reset_index(drop=True)
+        n_documents = len(recipes)
+        # Terms get integer codes as they appear, and the postings of each
+        # chunk of recipes are aggregated right away: only the postings are
+        # kept in memory, not every occurrence of every term
+        vocabulary = {}
+        keys, frequencies = [], []
+        lengths = np.zeros(n_documents)
+        for start in range(0, n_documents, CHUNK_ROWS):
+            end = start + CHUNK_ROWS
+            chunk = recipes.iloc[start:end]
+            chunk_keys, chunk_weights = [], []
+            for field, weight in weights.items():
+                terms = (
+                    _field_text(chunk, field).str.lower().str.findall(_TOKEN_PATTERN)
+                )
+                terms = terms.explode().dropna()
+                terms = terms[~terms.isin(STOPWORDS)]
+                local_codes, local_terms = pd.factorize(terms.to_numpy(dtype=object))
+                codes = np.array(
+                    [
+                        vocabulary.setdefault(term, len(vocabulary))
+                        for term in local_terms
+                    ],
+                    dtype=np.int64,
+                )[local_codes]
+                documents = terms.index.to_numpy(dtype=np.int64)
+                chunk_keys.append(codes * n_documents + documents)
+                chunk_weights.append(np.full(len(terms), weight))
+                lengths += np.bincount(documents, minlength=n_documents) * weight
+            unique_keys, inverse = np.unique(
+                np.concatenate(chunk_keys), return_inverse=True
+            )
+            keys.append(unique_keys)
+            frequencies.append(np.bincount(inverse, np.concatenate(chunk_weights)))
+
+        # Sorted vocabulary: postings ordered by term, then by recipe
+        terms = np.array(list(vocabulary), dtype=object)
+        order = np.argsort(terms)
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[order] = np.arange(len(terms))
+        terms = terms[order]
+        keys = np.concatenate([np.array([], dtype=np.int64), *keys])
+        frequencies = np.concatenate([np.array([]), *frequencies])
+        base = max(n_documents, 1)
+        documents = keys % base
+        keys = rank[keys // base] * base + documents
+        sort = np.argsort(keys)
+        documents, frequencies = documents[sort], frequencies[sort]
+        offsets = np.searchsorted(keys[sort] // base, np.arange(len(terms) + 1))
+
+        term_data, term_ends = _pack(terms)
+        name_data, name_ends = _pack(recipes["name"].fillna("").astype(str))
+        logger.info(
+            f"Indexed {n_documents} recipes: {len(terms)} terms, "
+            f"{len(documents)} postings"
+        )
+        return cls(
+            {
+                "ids": recipes["id"].to_numpy(dtype=np.int64),
+                "offsets": offsets.astype(np.int64),
+                "postings": documents.astype(np.int32),
+                "frequencies": frequencies.astype(np.float32),
+                "lengths": lengths.astype(np.float32),
+                "terms": term_data,
+                "term_ends": term_ends,
+                "names": name_data,
+                "name_ends": name_ends,
+            }
+        )
+
+    def save(self, directory: str) -> None:
+        """
+        Writes the index to `directory`, one `.npy` file per array. The
+        files are written to a temporary directory renamed into place, so
+        readers never see a partial index.
+        """
+        directory = os.path.abspath(directory)
+        parent = os.path.dirname(directory)
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".search-", dir=parent)
+        try:
+            for name in _ARRAYS:
+                np.save(os.path.join(staging, f"{name}.npy"), self._arrays[name])
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+            os.rename(staging, directory)
+        except Exception as e:
+            logger.error(f"Error while writing the search index {directory}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, directory: str) -> "SearchIndex":
+        """
+        Reads an index written by `save`, memory-mapping its arrays.
+
+        Raises:
+            FileNotFoundError: If the directory holds no index.
+        """
+        return cls(
+            {
+                name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+                for name in _ARRAYS
+            }
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """
+        Returns the BM25 score of every recipe for a query (0 for the
+        recipes without any of its terms).
+        """
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        n_documents = len(self.ids)
+        for term in set(tokenize(query)):
+            position = self.vocabulary.get(term)
+            if position is None:
+                continue
+            start, end = self.offsets[position], self.offsets[position + 1]
+            documents = self.postings[start:end]
+            frequencies = self.frequencies[start:end]
+            idf = np.log(1 + (n_documents - (end - start) + 0.5) / (end - start + 0.5))
+            norms = self._norms[documents]
+            # A recipe appears once in the postings of a term
+            scores[documents] += idf * (K1 + 1) * frequencies / (frequencies + norms)
+        return scores
+
+    def search(self, query: str, k: int = 10) -> pd.DataFrame:
+        """
+        Returns the k recipes best matching a query, best first.
+
+        Args:
+            query (str): Free text, e.g. "lemon chicken soup".
+            k (int): Maximum number of results.
+
+        Returns:
+            pd.DataFrame: `id`, `name` and `score` of the matching recipes.
+        """
+        scores = self.scores(query)
+        matches = np.flatnonzero(scores)
+        if len(matches) > k:
+            matches = matches[np.argpartition(-scores[matches], k - 1)[:k]]
+        # Best score first, ties in index order
+        matches = matches[np.lexsort((matches, -scores[matches]))]
+        return pd.DataFrame(
+            {
+                "id": np.asarray(self.ids[matches]),
+                "name": self.names[matches],
+                "score": scores[matches],
+            }
+        )
+
+
+def load_or_build(directory: str, build) -> SearchIndex:
+    """
+    Loads the index saved in `directory`, or builds it with `build` (a
+    function returning a `SearchIndex`) and saves it there. Processes
+    sharing the directory build it once.
+    """
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    with exclusive(f"{os.path.abspath(directory)}.lock"):
+        if not os.path.exists(directory):
+            build().save(directory)
+    return SearchIndex.load(directory)
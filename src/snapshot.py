@@ -0,0 +1,376 @@
+"""
+Precomputed "app snapshot": everything the dashboard shows, computed once
+from the datasets and written to a versioned directory, so that new app
+processes start without loading any raw dataset.
+
+Layout of a snapshot directory:
+
+- manifest.json: format version, dataset version, creation date, scalar
+  metrics and the list of tables and figures
+- tables/<name>.parquet: columnar tables (combined_df, df_preprocessed,
+  recipe_popularity, user_activity, recipe_tags, ingredients, date_counts,
+  recipe_month_counts, all_recipe_tags)
+- figures.json: the Plotly figures serialized as JSON
+- search_index/: the full-text search index of the recipes (see search.py)
+
+Usage (from the repository root):
+    python src/snapshot.py --output snapshot
+    MANGETAMAIN_SNAPSHOT=snapshot streamlit run src/main.py
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+import pandas as pd
+import plotly.io as pio
+from data_loader import DataLoader
+from instrumentation import instrumented
+from lazy_loading import reset_lazy_attributes
+from search import SearchIndex
+
+# Get a logger specific to this module
+logger = logging.getLogger(__name__)
+
+# Environment variable naming the snapshot the app boots from
+SNAPSHOT_ENV = "MANGETAMAIN_SNAPSHOT"
+# Bumped whenever the layout or the content of a snapshot changes
+SNAPSHOT_FORMAT_VERSION = 7
+
+RAW_RECIPES = "dataset/RAW_recipes.csv.zip"
+USERS = "dataset/PP_users.csv.zip"
+INGREDIENTS = "dataset/ingr_map.pkl"
+PP_RECIPES = "preprocessed_data/PP_recipes_mangetamain.csv"
+PP_INTERACTIONS = "preprocessed_data/PP_interactions_mangetamain.csv"
+SOURCES = [RAW_RECIPES, USERS, INGREDIENTS, PP_RECIPES, PP_INTERACTIONS]
+# Lazily loaded modules holding data computed from each source
+SOURCE_MODULES = {
+    RAW_RECIPES: ["utils"],
+    PP_RECIPES: ["utils", "nutrition_stats", "visualisation.graphs_nutrition"],
+    PP_INTERACTIONS: ["visualisation.graphs"],
+}
+
+
+def dataset_version(paths: list = SOURCES) -> str:
+    """
+    Returns a short fingerprint of the source datasets (name, size and
+    modification time), identifying the data a snapshot was built from.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+# Parts of the dashboard data, each computed by `build_table`,
+# `build_figure` or `build_metrics`
+TABLES = (
+    "combined_df",
+    "df_preprocessed",
+    "recipe_popularity",
+    "user_activity",
+    "recipe_tags",
+    "ingredients",
+    "date_counts",
+    "recipe_month_counts",
+    "all_recipe_tags",
+)
+FIGURES = ("interactions", "nutrition_hist", "nutrition_hist_ratio")
+# Sources each part is computed from
+DEPENDENCIES = {
+    "combined_df": [PP_RECIPES],
+    "df_preprocessed": [PP_RECIPES],
+    "recipe_popularity": [PP_INTERACTIONS],
+    "user_activity": [PP_INTERACTIONS],
+    "recipe_tags": [RAW_RECIPES, PP_RECIPES],
+    "ingredients": [INGREDIENTS],
+    "date_counts": [PP_INTERACTIONS],
+    "recipe_month_counts": [PP_INTERACTIONS],
+    "all_recipe_tags": [RAW_RECIPES],
+    "interactions": [PP_INTERACTIONS],
+    "nutrition_hist": [PP_RECIPES],
+    "nutrition_hist_ratio": [PP_RECIPES],
+    "metrics": [RAW_RECIPES, PP_RECIPES, USERS, INGREDIENTS],
+    "search_index": [RAW_RECIPES],
+}
+
+
+def reset_dataset(path: str) -> None:
+    """
+    Drops the cached loads of a source dataset and the data the app
+    modules computed from it, so they are loaded again on next access.
+    """
+    data_loader = DataLoader()
+    data_loader.load_data.clear(path)
+    data_loader.unzip_data.clear(path)
+    for module_name in SOURCE_MODULES.get(path, []):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            reset_lazy_attributes(module)
+
+
+def build_table(name: str) -> pd.DataFrame:
+    """
+    Computes one of the `TABLES` from the datasets, through the (lazily
+    loaded) app modules.
+
+    Raises:
+        KeyError: If `name` is not one of the `TABLES`.
+    """
+    import nutrition_stats
+    import utils
+    from nutrition_sketches import parse_tags
+    from visualisation import graphs
+
+    if name == "combined_df":
+        return nutrition_stats.combined_df
+    if name == "df_preprocessed":
+        return utils.df_preprocessed
+    if name in ("recipe_popularity", "user_activity"):
+        # Both computed in one pass over the interactions (see popularity.py)
+        return graphs.popularity[name]
+    if name == "recipe_tags":
+        # Tags of the recipes of `combined_df`, as lists of strings
+        recipes = utils.df[utils.df["id"].isin(nutrition_stats.combined_df["id"])]
+        return pd.DataFrame(
+            {
+                "id": recipes["id"].to_numpy(),
+                "tags": recipes["tags"].map(parse_tags).to_numpy(),
+            }
+        )
+    if name == "ingredients":
+        # One row per ingredient (ingr_map has one per raw spelling)
+        ingredients = DataLoader().load_data(INGREDIENTS)
+        ingredients = ingredients[["replaced", "id", "count"]].drop_duplicates("id")
+        return ingredients.reset_index(drop=True)
+    if name == "date_counts":
+        # Interactions per day, from which the daily views are computed
+        from ingestion import count_dates
+
+        return count_dates(graphs.interactions_preprocessed)
+    if name == "recipe_month_counts":
+        # Interactions per recipe and month, the cells of the tags cube
+        from ingestion import count_recipe_months
+
+        return count_recipe_months(graphs.interactions_preprocessed)
+    if name == "all_recipe_tags":
+        # Tags of every recipe, whether in `combined_df` or not
+        return pd.DataFrame(
+            {
+                "id": utils.df["id"].to_numpy(),
+                "tags": utils.df["tags"].map(parse_tags).to_numpy(),
+            }
+        )
+    raise KeyError(f"Unknown snapshot table: '{name}'")
+
+
+def build_figure(name: str):
+    """
+    Computes one of the `FIGURES`: the interactions figure, or the
+    nutrition figures keyed by category.
+
+    Raises:
+        KeyError: If `name` is not one of the `FIGURES`.
+    """
+    from visualisation import graphs, graphs_nutrition
+
+    if name == "interactions":
+        return graphs.fig2
+    if name in ("nutrition_hist", "nutrition_hist_ratio"):
+        return getattr(graphs_nutrition, name)
+    raise KeyError(f"Unknown snapshot figure: '{name}'")
+
+
+def build_metrics() -> dict:
+    """
+    Computes the key numbers of the dashboard: bio recipes, their
+    proportion (%), Z-score outliers, filtered bio recipes, users,
+    techniques and ingredients.
+    """
+    import utils
+
+    data_loader = DataLoader()
+    df_PP_users = data_loader.load_data("dataset/PP_users.csv.zip")
+    df_ingredients = data_loader.load_data("dataset/ingr_map.pkl")
+    return {
+        "bio_recipes": len(utils.df_preprocessed),
+        "rate_bio_recipes": float(utils.rate_bio_recipes),
+        "outliers": len(utils.outliers_zscore_df),
+        "filtered_bio_recipes": len(utils.df_filtered_bio),
+        "users": len(df_PP_users),
+        "techniques": int(df_PP_users["techniques"].nunique()),
+        "ingredients": len(df_ingredients),
+    }
+
+
+def build_search_index() -> SearchIndex:
+    """Indexes the names, descriptions, tags and steps of RAW_recipes."""
+    import utils
+
+    return SearchIndex.build(utils.df)
+
+
+def build_snapshot_data() -> dict:
+    """
+    Computes the tables, figures and metrics shown by the dashboard from
+    the datasets.
+
+    Returns:
+        dict: "tables" (DataFrames), "figures" (the interactions figure
+        and the nutrition figures keyed by category), "metrics" and the
+        "search_index".
+    """
+    return {
+        "tables": {name: build_table(name) for name in TABLES},
+        "figures": {name: build_figure(name) for name in FIGURES},
+        "metrics": build_metrics(),
+        "search_index": build_search_index(),
+    }
+
+
+def _figures_to_json(figures: dict) -> dict:
+    """Serializes a (nested) dictionary of Plotly figures."""
+    return {
+        name: (
+            _figures_to_json(figure)
+            if isinstance(figure, dict)
+            else json.loads(pio.to_json(figure, validate=False))
+        )
+        for name, figure in figures.items()
+    }
+
+
+def _figures_from_json(figures: dict) -> dict:
+    """Rebuilds the Plotly figures serialized by `_figures_to_json`."""
+    return {
+        name: (
+            _figures_from_json(figure)
+            if "data" not in figure
+            else pio.from_json(json.dumps(figure), skip_invalid=True)
+        )
+        for name, figure in figures.items()
+    }
+
+
+def write_snapshot(data: dict, output_dir: str, version: str = None) -> str:
+    """
+    Writes a snapshot to `output_dir`, replacing any previous one.
+
+    The snapshot is written to a temporary directory next to `output_dir`
+    and renamed into place, so the app never reads a partial snapshot.
+
+    Args:
+        data (dict): Output of `build_snapshot_data`.
+        output_dir (str): Snapshot directory.
+        version (str): Dataset version, defaults to `dataset_version()`.
+
+    Returns:
+        str: Path of the written manifest.
+    """
+    output_dir = os.path.abspath(output_dir)
+    parent = os.path.dirname(output_dir)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".snapshot-", dir=parent)
+    try:
+        os.makedirs(os.path.join(staging, "tables"))
+        tables = {}
+        for name, table in data["tables"].items():
+            tables[name] = os.path.join("tables", f"{name}.parquet")
+            table.to_parquet(os.path.join(staging, tables[name]))
+        with open(os.path.join(staging, "figures.json"), "w") as file:
+            json.dump(_figures_to_json(data["figures"]), file)
+        if "search_index" in data:
+            data["search_index"].save(os.path.join(staging, "search_index"))
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "dataset_version": version or dataset_version(),
+            "created": datetime.now(timezone.utc).isoformat(),
+            "tables": tables,
+            "figures": "figures.json",
+            "metrics": data["metrics"],
+        }
+        if "search_index" in data:
+            manifest["search_index"] = "search_index"
+        with open(os.path.join(staging, "manifest.json"), "w") as file:
+            json.dump(manifest, file, indent=2)
+
+        previous = None
+        if os.path.exists(output_dir):
+            previous = f"{staging}.previous"
+            os.rename(output_dir, previous)
+        os.rename(staging, output_dir)
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+    except Exception as e:
+        logger.error(f"Error while writing the snapshot {output_dir}: {e}")
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    logger.info(f"Snapshot {manifest['dataset_version']} written to {output_dir}")
+    return os.path.join(output_dir, "manifest.json")
+
+
+@instrumented()
+def read_snapshot(snapshot_dir: str) -> dict:
+    """
+    Reads a snapshot written by `write_snapshot`.
+
+    Args:
+        snapshot_dir (str): Snapshot directory.
+
+    Returns:
+        dict: "tables", "figures", "metrics" and "search_index" (when
+        written) as returned by `build_snapshot_data`, plus the "manifest".
+
+    Raises:
+        FileNotFoundError: If the directory holds no snapshot.
+        ValueError: If the snapshot was written in another format version.
+    """
+    try:
+        with open(os.path.join(snapshot_dir, "manifest.json")) as file:
+            manifest = json.load(file)
+        if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(
+                f"Snapshot format {manifest.get('format_version')} is not "
+                f"supported (expected {SNAPSHOT_FORMAT_VERSION}), rebuild it."
+            )
+        tables = {
+            name: pd.read_parquet(os.path.join(snapshot_dir, path))
+            for name, path in manifest["tables"].items()
+        }
+        with open(os.path.join(snapshot_dir, manifest["figures"])) as file:
+            figures = _figures_from_json(json.load(file))
+        snapshot = {
+            "tables": tables,
+            "figures": figures,
+            "metrics": manifest["metrics"],
+            "manifest": manifest,
+        }
+        if "search_index" in manifest:
+            snapshot["search_index"] = SearchIndex.load(
+                os.path.join(snapshot_dir, manifest["search_index"])
+            )
+    except Exception as e:
+        logger.error(f"Error while reading the snapshot {snapshot_dir}: {e}")
+        raise
+    return snapshot
+
+
+def main(argv: list = None) -> int:
+    """Command line entry point: builds the snapshot from the datasets."""
+    parser = argparse.ArgumentParser(description="Build the app snapshot.")
+    parser.add_argument("--output", default="snapshot", help="snapshot directory")
+    args = parser.parse_args(argv)
+    manifest_path = write_snapshot(build_snapshot_data(), args.output)
+    print(f"Snapshot written: {manifest_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
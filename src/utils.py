@@ -1,17 +1,18 @@
 import pandas as pd
 import re  # N'oubliez pas d'importer le module `re` pour les expressions régulières
 from data_loader import DataLoader
-from scipy import stats
+from instrumentation import instrumented
+from lazy_loading import lazy_attributes
+from outliers import zscore_mask
 import streamlit as st
 
 # Loads the raw interactions dataset using the data_loader module
 data_loader = DataLoader()
 # interactions = data_loader.load_data("dataset/RAW_interactions.csv.zip")
-df = data_loader.load_data("dataset/RAW_recipes.csv.zip")
-df_preprocessed = data_loader.load_data("preprocessed_data/PP_recipes_mangetamain.csv")
 
 
 @st.cache_data(ttl=3600)
+@instrumented()
 def filter_dataframebis1(
     df: pd.DataFrame, column_names: list, filter_values: list
 ) -> pd.DataFrame:
@@ -77,6 +78,30 @@ def filter_dataframebis1(
     return filtered_df
 
 
+@instrumented()
+def zscore_outliers(df: pd.DataFrame, threshold: float = 3) -> tuple:
+    """
+    Detects outliers in the numeric columns of a DataFrame with the z-score
+    method.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to analyse.
+        threshold (float): Absolute z-score above which a value is an outlier.
+
+    Returns:
+        tuple: `(outliers_zscore, outliers_zscore_df)` where
+        `outliers_zscore` counts the outliers per numeric column and
+        `outliers_zscore_df` holds the rows with at least one outlier.
+    """
+    # Select numeric columns
+    numeric_columns = df.select_dtypes(include=["float64", "int64"]).columns
+    # Identify outliers (Z-score > 3 ou < -3), all the columns at once
+    flags = zscore_mask(df[numeric_columns].to_numpy(dtype="float64"), threshold)
+    outliers_zscore = pd.Series(flags.sum(axis=0), index=numeric_columns)
+    outliers_zscore_df = df[flags.any(axis=1)]
+    return outliers_zscore, outliers_zscore_df
+
+
 # tags bio recipes column
 column_names = ["tags"]
 # tags bio recipes
@@ -104,12 +129,23 @@ filter_values1_bio = [
     ]
 ]
 
-df_filtered_bio = filter_dataframebis1(df, column_names, filter_values1_bio)
-rate_bio_recipes = round((len(df_preprocessed) / len(df)) * 100, 2)
-# Select numeric columns from df_filtered_bio
-numeric_columns = df_preprocessed.select_dtypes(include=["float64", "int64"]).columns
-# Calculate z-score for each column.
-z_scores = stats.zscore(df_preprocessed[numeric_columns])
-# Identify outliers (Z-score > 3 ou < -3).
-outliers_zscore = (abs(z_scores) > 3).sum(axis=0)
-outliers_zscore_df = df_preprocessed[(abs(z_scores) > 3).any(axis=1)]
+# The datasets and the values derived from them are computed on first
+# access (e.g. `from utils import df_preprocessed`), not at import time
+__getattr__ = lazy_attributes(
+    globals(),
+    {
+        "df": lambda utils: utils.data_loader.load_data("dataset/RAW_recipes.csv.zip"),
+        "df_preprocessed": lambda utils: utils.data_loader.load_data(
+            "preprocessed_data/PP_recipes_mangetamain.csv"
+        ),
+        "df_filtered_bio": lambda utils: filter_dataframebis1(
+            utils.df, column_names, filter_values1_bio
+        ),
+        "rate_bio_recipes": lambda utils: round(
+            (len(utils.df_preprocessed) / len(utils.df)) * 100, 2
+        ),
+        ("outliers_zscore", "outliers_zscore_df"): lambda utils: zscore_outliers(
+            utils.df_preprocessed
+        ),
+    },
+)
@@ -1,43 +1,318 @@
+import numpy as np
+import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 
 from data_loader import DataLoader
+from instrumentation import instrumented
+from interaction_cube import MONTHS, WEEKDAYS, DailyInteractions, TagCube
+from lazy_loading import lazy_attributes
+from popularity import compute_popularity
+from visualisation.reducers import (
+    count_by_period,
+    downsample_series,
+    point_budget,
+    top_n_with_other,
+)
 
 # Loads the raw interactions dataset using the data_loader module
 data_loader = DataLoader()
-interactions_preprocessed = data_loader.load_data(
-    "preprocessed_data/PP_interactions_mangetamain.csv"
-)
-# Creates a histogram to show the dynamics of interactions over time
-fig2 = px.histogram(interactions_preprocessed.date, color_discrete_sequence=["green"])
-# Add an annotation for the interaction drop with hover info
-# Add an annotation for the interaction drop with hover info
-fig2.add_annotation(
-    x="2011-01-01",  # Adjust the date as needed
-    y=4500,  # Adjust y based on your data
-    text="🔻",  # Emoji to make it visible, you can use other small characters
-    showarrow=True,
-    arrowhead=3,
-    arrowcolor="pink",
-    ax=0,  # Adjust horizontal offset for the arrowhead
-    ay=-100,  # Adjust vertical offset
-    hovertext=(
-        "🌟 The website was highly visited before 2011. "
-        "Instagram's rise impacted visitor numbers after 2011."
-    ),
-    hoverlabel=dict(
-        bgcolor="pink",  # Changed to a more noticeable color
-        font_size=14,
-        font_color="black",
-    ),
-)
-# Update the layout
-fig2.update_layout(
-    xaxis_title="Time",  # x-axis label
-    yaxis_title="Number of interactions",  # y-axis label
-    title=dict(
-        text="Evolution of Interactions Over Time",
-        x=0.5,  # Center the title
-        font=dict(size=20),
-    ),
-    hovermode="x unified",  # Unified hover across the x-axis
+
+
+@instrumented()
+def build_interactions_figure(
+    interactions: pd.DataFrame, max_points: int = None
+) -> go.Figure:
+    """
+    Creates the histogram showing the dynamics of interactions over time,
+    annotated with the 2011 drop.
+
+    Args:
+        interactions (pd.DataFrame): Interactions with a `date` column.
+        max_points (int): Point budget (see `reducers.point_budget`).
+
+    Returns:
+        go.Figure: The annotated Plotly histogram.
+    """
+    # Count the interactions per period on the server rather than sending
+    # every interaction date to the browser
+    date_counts = count_by_period(interactions.date, max_points=max_points)
+    return build_interactions_figure_from_counts(date_counts, max_points)
+
+
+@instrumented()
+def build_interactions_figure_from_counts(
+    date_counts: pd.DataFrame, max_points: int = None
+) -> go.Figure:
+    """
+    Creates the same histogram as `build_interactions_figure` from the
+    number of interactions per day, e.g. the incrementally maintained
+    `date_counts` aggregate of the ingestion store.
+
+    Args:
+        date_counts (pd.DataFrame): `date` and `count` columns.
+        max_points (int): Point budget (see `reducers.point_budget`).
+
+    Returns:
+        go.Figure: The annotated Plotly histogram.
+    """
+    date_counts = count_by_period(date_counts["date"], date_counts["count"], max_points)
+    # Creates a histogram to show the dynamics of interactions over time
+    fig2 = px.histogram(
+        date_counts,
+        x="date",
+        y="count",
+        histfunc="sum",
+        color_discrete_sequence=["green"],
+    )
+    return _annotate_interactions_figure(fig2)
+
+
+def _annotate_interactions_figure(fig2: go.Figure) -> go.Figure:
+    """Adds the 2011 drop annotation and the layout of the interactions figure."""
+    # Add an annotation for the interaction drop with hover info
+    # Add an annotation for the interaction drop with hover info
+    fig2.add_annotation(
+        x="2011-01-01",  # Adjust the date as needed
+        y=4500,  # Adjust y based on your data
+        text="🔻",  # Emoji to make it visible, you can use other small characters
+        showarrow=True,
+        arrowhead=3,
+        arrowcolor="pink",
+        ax=0,  # Adjust horizontal offset for the arrowhead
+        ay=-100,  # Adjust vertical offset
+        hovertext=(
+            "🌟 The website was highly visited before 2011. "
+            "Instagram's rise impacted visitor numbers after 2011."
+        ),
+        hoverlabel=dict(
+            bgcolor="pink",  # Changed to a more noticeable color
+            font_size=14,
+            font_color="black",
+        ),
+    )
+    # Update the layout
+    fig2.update_layout(
+        xaxis_title="Time",  # x-axis label
+        yaxis_title="Number of interactions",  # y-axis label
+        title=dict(
+            text="Evolution of Interactions Over Time",
+            x=0.5,  # Center the title
+            font=dict(size=20),
+        ),
+        hovermode="x unified",  # Unified hover across the x-axis
+    )
+    return fig2
+
+
+@instrumented()
+def build_rolling_figure(
+    daily: DailyInteractions, window: int, max_points: int = None
+) -> go.Figure:
+    """
+    Creates the line chart of the interactions per day and their rolling
+    mean over `window` days.
+
+    Args:
+        daily (DailyInteractions): Interactions per day.
+        window (int): Days of the rolling mean.
+        max_points (int): Point budget shared by the two lines (see
+        `reducers.point_budget`).
+
+    Returns:
+        go.Figure: The Plotly line chart.
+    """
+    threshold = max(point_budget(max_points) // 2, 3)
+    means = daily.rolling_mean(window)
+    fig = go.Figure()
+    for name, values, color in (
+        ("Interactions per day", daily.counts, "lightgreen"),
+        (f"{window}-day mean", means, "green"),
+    ):
+        # Downsample the days of each line, keeping its peaks and drops
+        series = pd.DataFrame({"date": daily.dates, "value": values}).dropna()
+        series = downsample_series(series, "date", "value", threshold)
+        fig.add_trace(
+            go.Scatter(
+                x=series["date"],
+                y=series["value"],
+                mode="lines",
+                name=name,
+                line=dict(color=color),
+            )
+        )
+    fig.update_layout(
+        xaxis_title="Time",
+        yaxis_title="Number of interactions",
+        title=dict(text="Interactions per day", x=0.5, font=dict(size=20)),
+        hovermode="x unified",
+    )
+    return fig
+
+
+@instrumented()
+def build_year_over_year_figure(daily: DailyInteractions) -> go.Figure:
+    """
+    Creates the line chart of the interactions per month, one line per
+    year, with the change from the same month of the previous year on
+    hover. The months only partly covered by the data are left out.
+
+    Returns:
+        go.Figure: The Plotly line chart.
+    """
+    years, totals = daily.monthly_totals()
+    changes = np.vstack([np.full((1, 12), np.nan), daily.year_over_year()[1]])
+    fig = go.Figure()
+    for year, total, change in zip(years, totals, changes):
+        fig.add_trace(
+            go.Scatter(
+                x=MONTHS,
+                y=total,
+                customdata=change * 100,
+                mode="lines+markers",
+                name=str(year),
+                hovertemplate="%{y:,.0f} interactions (%{customdata:+.1f}%)",
+            )
+        )
+    fig.update_layout(
+        xaxis_title="Month",
+        yaxis_title="Number of interactions",
+        title=dict(text="Interactions per month and year", x=0.5, font=dict(size=20)),
+        hovermode="x unified",
+    )
+    return fig
+
+
+@instrumented()
+def build_seasonality_figure(daily: DailyInteractions) -> go.Figure:
+    """
+    Creates the heatmap of the mean number of interactions per day, per
+    weekday and month.
+
+    Returns:
+        go.Figure: The Plotly heatmap.
+    """
+    fig = go.Figure(
+        go.Heatmap(
+            z=daily.seasonality(),
+            x=MONTHS,
+            y=WEEKDAYS,
+            colorscale="Greens",
+            hovertemplate="%{y} in %{x}: %{z:.1f} interactions per day<extra></extra>",
+        )
+    )
+    fig.update_layout(
+        xaxis_title="Month",
+        yaxis=dict(title="Weekday", autorange="reversed"),
+        title=dict(
+            text="Interactions per weekday and month", x=0.5, font=dict(size=20)
+        ),
+    )
+    return fig
+
+
+@instrumented()
+def build_tag_trend_figure(
+    cube: TagCube, tags, label: str, level: str = "year"
+) -> go.Figure:
+    """
+    Creates the stacked bar chart of the interactions on the recipes
+    having at least one of `tags` and on the other recipes, per year or
+    month, with the share of the former on a second axis.
+
+    Args:
+        cube (TagCube): Interactions per month and tag.
+        tags: Tag names, or a mask over `cube.tags`.
+        label (str): Name of the tagged recipes (e.g. "Bio").
+        level (str): "year" or "month".
+
+    Returns:
+        go.Figure: The Plotly bar chart.
+    """
+    comparison = cube.compare(tags, level)
+    periods = comparison["period"]
+    if level == "month":
+        periods = periods.astype("datetime64[ns]")
+    fig = go.Figure()
+    for column, name, color in (
+        ("tagged", f"{label} recipes", "green"),
+        ("other", "Other recipes", "lightgray"),
+    ):
+        fig.add_trace(
+            go.Bar(x=periods, y=comparison[column], name=name, marker_color=color)
+        )
+    fig.add_trace(
+        go.Scatter(
+            x=periods,
+            y=comparison["share"] * 100,
+            name=f"{label} share (%)",
+            mode="lines+markers",
+            line=dict(color="darkgreen"),
+            yaxis="y2",
+        )
+    )
+    fig.update_layout(
+        barmode="stack",
+        xaxis_title="Year" if level == "year" else "Month",
+        yaxis_title="Number of interactions",
+        yaxis2=dict(
+            title=f"{label} share (%)", overlaying="y", side="right", rangemode="tozero"
+        ),
+        title=dict(
+            text=f"Interactions on {label.lower()} and other recipes",
+            x=0.5,
+            font=dict(size=20),
+        ),
+        hovermode="x unified",
+    )
+    return fig
+
+
+@instrumented()
+def build_top_tags_figure(cube: TagCube, n: int = 10) -> go.Figure:
+    """
+    Creates the bar chart of the interactions on the `n` most interacted
+    tags, the interactions on all the other tags summed into one "Other"
+    bar (see `reducers.top_n_with_other`) rather than a bar per tag.
+
+    Args:
+        cube (TagCube): Interactions per month and tag.
+        n (int): Number of tags drawn.
+
+    Returns:
+        go.Figure: The Plotly bar chart.
+    """
+    totals = pd.Series(cube.tag_counts.sum(axis=0), index=cube.tags)
+    top = top_n_with_other(totals, n)
+    fig = go.Figure(
+        go.Bar(
+            x=top.index,
+            y=top.to_numpy(),
+            # The "Other" bar, after the n tags, in gray
+            marker_color=np.where(np.arange(len(top)) < n, "green", "lightgray"),
+        )
+    )
+    fig.update_layout(
+        xaxis_title="Tag",
+        yaxis_title="Number of interactions (once per tag of the recipe)",
+        title=dict(text=f"Interactions on the top {n} tags", x=0.5, font=dict(size=20)),
+    )
+    return fig
+
+
+# The interactions, their figure and their per-recipe and per-user
+# aggregates are built on first access
+__getattr__ = lazy_attributes(
+    globals(),
+    {
+        "interactions_preprocessed": lambda graphs: graphs.data_loader.load_data(
+            "preprocessed_data/PP_interactions_mangetamain.csv"
+        ),
+        "popularity": lambda graphs: compute_popularity(
+            graphs.interactions_preprocessed
+        ),
+        "fig2": lambda graphs: build_interactions_figure(
+            graphs.interactions_preprocessed
+        ),
+    },
 )
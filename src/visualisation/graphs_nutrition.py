@@ -1,8 +1,13 @@
-from nutrition_stats import combined_df
+import nutrition_stats
+from instrumentation import instrumented
+from lazy_loading import lazy_attributes
+from visualisation.reducers import bin_values, quantile_summary
 import plotly.express as px
+import plotly.graph_objects as go
 import pandas as pd
 
 
+@instrumented()
 def plot_top_4_recipes_by_nutrition(
     combined_df: pd.DataFrame, categories: list
 ) -> dict:
@@ -19,14 +24,8 @@ def plot_top_4_recipes_by_nutrition(
     """
     figures = {}
     for category in categories:
-        # Sort recipes depending on the category
-        if category == "Protein (g)":
-            top_4_recipes = combined_df.sort_values(by=category, ascending=False).head(
-                4
-            )
-        else:
-            # Sort recipes depending on the category (ascending order by default)
-            top_4_recipes = combined_df.sort_values(by=category, ascending=True).head(4)
+        # Highest protein, lowest values for the other components
+        top_4_recipes = nutrition_stats.top_k_recipes(combined_df, category)
 
         fig = px.bar(
             top_4_recipes,
@@ -42,6 +41,7 @@ def plot_top_4_recipes_by_nutrition(
     return figures
 
 
+@instrumented()
 def nutrition_bar_ratio_sodium_proteins(
     combined_df: pd.DataFrame, categories: list
 ) -> dict:
@@ -57,33 +57,15 @@ def nutrition_bar_ratio_sodium_proteins(
         and values are Plotly figures and the ratios
     """
     # Filter the relevant categories
-    categories = [
-        "Protein (g)",
-        "Sodium (mg)",
-        "Saturated Fat (g)",
-        "Carbohydrates (g)",
-    ]
+    categories = nutrition_stats.RATIO_CATEGORIES
     figures = {}
     for category in categories:
         # Ensure the category exists in the DataFrame columns
         if category not in combined_df.columns:
             raise ValueError(f"Category '{category}' not found in the DataFrame")
-        # Sort recipes depending on the category
-        top_4_recipes = combined_df.sort_values(by=category).head(4)
-
-        # Calculate the Protein/Carbohydrate Ratio
-        top_4_recipes["Protein_Carb_Ratio"] = (
-            top_4_recipes["Protein (g)"] / top_4_recipes["Carbohydrates (g)"]
-        )
-
-        # Calculate the Protein/Sodium Ratio
-        top_4_recipes["Protein_Sodium_Ratio"] = top_4_recipes["Protein (g)"] / (
-            top_4_recipes["Sodium (mg)"] * 0.001
-        )  # Convert Sodium to grams
-
-        # Calculate the Protein/Saturated fat Ratio
-        top_4_recipes["Protein_Saturated_fat_Ratio"] = (
-            top_4_recipes["Protein (g)"] / top_4_recipes["Saturated Fat (g)"]
+        # Lowest values of the category, with their protein ratios
+        top_4_recipes = nutrition_stats.protein_ratios(
+            nutrition_stats.top_k_recipes(combined_df, category, healthiest=False)
         )
 
         # Reshape data to have both ratios as columns for grouped bar plot
@@ -146,6 +128,133 @@ def nutrition_bar_ratio_sodium_proteins(
     return figures
 
 
+def plot_sketch_histogram(sketch, nutrient: str, max_bins: int = 50) -> go.Figure:
+    """
+    Plots the distribution of a nutrient from a `NutrientSketch`, as a step
+    area over a logarithmic axis (the bins of the sketch are log-spaced).
+    Args:
+        sketch (NutrientSketch): Sketch of the selected recipes.
+        nutrient (str): Nutritional component to be plotted.
+        max_bins (int): Maximum number of bins drawn.
+    Returns:
+        go.Figure: The histogram, empty when the sketch holds no recipe.
+    """
+    bins = sketch.histogram(nutrient, max_bins=max_bins)
+    # The last count is repeated to close the last step at its right edge
+    x = [*bins["left"], *bins["right"].tail(1)]
+    y = [*bins["count"], *bins["count"].tail(1)]
+    fig = go.Figure(
+        go.Scatter(
+            x=x, y=y, line_shape="hv", fill="tozeroy", line_color="green", name=""
+        )
+    )
+    fig.update_layout(
+        title=f"Distribution of {nutrient}",
+        title_x=0.5,
+        xaxis=dict(title=nutrient, type="log"),
+        yaxis_title="Recipes",
+        template="plotly_white",
+    )
+    return fig
+
+
+def plot_sketch_boxes(sketch, nutrients: list) -> go.Figure:
+    """
+    Draws one box per nutrient from the quantiles of a `NutrientSketch`,
+    without sending the values of the recipes to the browser.
+    Args:
+        sketch (NutrientSketch): Sketch of the selected recipes.
+        nutrients (list): Nutritional components to be plotted.
+    Returns:
+        go.Figure: The box plots, over a logarithmic axis.
+    """
+    summaries = [(nutrient, sketch.summary(nutrient)) for nutrient in nutrients]
+    return _summary_boxes(
+        summaries, "Nutritional components (quartiles and 1.5 IQR fences)"
+    )
+
+
+def plot_summary_boxes(recipes: pd.DataFrame, nutrients: list, title: str) -> go.Figure:
+    """
+    Draws one box per nutrient from the `reducers.quantile_summary` of some
+    recipes (e.g. the outliers of a detector), so the browser receives the
+    box statistics rather than the values of every recipe.
+    Args:
+        recipes (pd.DataFrame): Recipes with the nutritional components.
+        nutrients (list): Nutritional components to be plotted.
+        title (str): Title of the figure.
+    Returns:
+        go.Figure: The box plots, over a logarithmic axis.
+    """
+    values = recipes[nutrients].melt(var_name="nutrient", value_name="value")
+    summary = quantile_summary(values.dropna(), "value", "nutrient")
+    summary = summary.set_index("nutrient").reindex(nutrients).dropna(how="all")
+    return _summary_boxes(summary.iterrows(), title)
+
+
+def _summary_boxes(summaries, title: str) -> go.Figure:
+    """Draws a box per (name, box plot statistics) pair, skipping the empty ones."""
+    fig = go.Figure()
+    for name, summary in summaries:
+        if summary["count"] == 0:
+            continue
+        fig.add_trace(
+            go.Box(
+                name=name,
+                q1=[summary["q1"]],
+                median=[summary["median"]],
+                q3=[summary["q3"]],
+                lowerfence=[summary["lowerfence"]],
+                upperfence=[summary["upperfence"]],
+                mean=[summary["mean"]],
+                marker_color="green",
+            )
+        )
+    fig.update_layout(
+        title=title,
+        title_x=0.5,
+        yaxis=dict(title="Value", type="log"),
+        showlegend=False,
+        template="plotly_white",
+    )
+    return fig
+
+
+def plot_binned_histogram(
+    recipes: pd.DataFrame, nutrient: str, max_bins: int = 50
+) -> go.Figure:
+    """
+    Plots the distribution of a nutrient over some recipes from the counts
+    of `reducers.bin_values`, at most `max_bins` bars whatever the number
+    of recipes.
+    Args:
+        recipes (pd.DataFrame): Recipes with the nutritional components.
+        nutrient (str): Nutritional component to be plotted.
+        max_bins (int): Maximum number of bins drawn.
+    Returns:
+        go.Figure: The histogram, empty when no recipe has a value.
+    """
+    bins = bin_values(recipes[nutrient], max_bins=max_bins)
+    fig = go.Figure(
+        go.Bar(
+            x=bins["center"],
+            y=bins["count"],
+            width=bins["right"] - bins["left"],
+            marker_color="green",
+            name="",
+        )
+    )
+    fig.update_layout(
+        title=f"Distribution of {nutrient}",
+        title_x=0.5,
+        xaxis_title=nutrient,
+        yaxis_title="Recipes",
+        bargap=0,
+        template="plotly_white",
+    )
+    return fig
+
+
 categories = [
     "Calories",
     "Total Fat (g)",
@@ -157,6 +266,15 @@ categories = [
 ]
 
 
-# Generate graphs
-nutrition_hist = plot_top_4_recipes_by_nutrition(combined_df, categories)
-nutrition_hist_ratio = nutrition_bar_ratio_sodium_proteins(combined_df, categories)
+# Generate graphs on first access
+__getattr__ = lazy_attributes(
+    globals(),
+    {
+        "nutrition_hist": lambda module: plot_top_4_recipes_by_nutrition(
+            nutrition_stats.combined_df, categories
+        ),
+        "nutrition_hist_ratio": lambda module: nutrition_bar_ratio_sodium_proteins(
+            nutrition_stats.combined_df, categories
+        ),
+    },
+)
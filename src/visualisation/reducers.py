@@ -0,0 +1,218 @@
+"""
+Server-side reduction of figure data, so that every chart sends a bounded
+number of points to the browser whatever the size of the dataset.
+
+- `bin_values`: fixed-width histogram bins of a numeric column
+- `count_by_period`: counts of dates per day, week, month... whichever is
+  the finest period within the budget
+- `quantile_summary`: the statistics a box plot draws, per group
+- `lttb`: Largest-Triangle-Three-Buckets downsampling of a time series
+- `top_n_with_other`: the n largest categories plus an "Other" total
+
+The budget defaults to `DEFAULT_MAX_POINTS` and can be set for the whole
+app with the MANGETAMAIN_MAX_POINTS environment variable.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+# Environment variable overriding the default point budget of the figures
+MAX_POINTS_ENV = "MANGETAMAIN_MAX_POINTS"
+DEFAULT_MAX_POINTS = 5000
+# Periods tried by `count_by_period`, from the finest to the coarsest
+PERIODS = ("D", "W", "MS", "QS", "YS")
+
+
+def point_budget(max_points: int = None) -> int:
+    """
+    Returns `max_points` when given, otherwise the MANGETAMAIN_MAX_POINTS
+    environment variable or `DEFAULT_MAX_POINTS`.
+
+    Raises:
+        ValueError: If the budget is not a positive integer.
+    """
+    if max_points is None:
+        max_points = int(os.environ.get(MAX_POINTS_ENV, DEFAULT_MAX_POINTS))
+    if max_points < 1:
+        raise ValueError(f"The point budget must be positive, got {max_points}.")
+    return max_points
+
+
+def bin_values(values: pd.Series, max_bins: int = None) -> pd.DataFrame:
+    """
+    Counts numeric values in equal-width bins, missing values ignored.
+
+    Args:
+        values (pd.Series): Numeric values.
+        max_bins (int): Number of bins, defaults to the point budget.
+
+    Returns:
+        pd.DataFrame: `left`, `right`, `center` and `count` of each bin.
+    """
+    values = pd.to_numeric(values, errors="coerce").dropna().to_numpy()
+    bins = point_budget(max_bins)
+    if len(values) == 0:
+        return pd.DataFrame(columns=["left", "right", "center", "count"])
+    counts, edges = np.histogram(values, bins=min(bins, max(len(values), 1)))
+    return pd.DataFrame(
+        {
+            "left": edges[:-1],
+            "right": edges[1:],
+            "center": (edges[:-1] + edges[1:]) / 2,
+            "count": counts,
+        }
+    )
+
+
+def count_by_period(
+    dates: pd.Series, counts: pd.Series = None, max_points: int = None
+) -> pd.DataFrame:
+    """
+    Counts dates per calendar period, using the finest of `PERIODS` (day,
+    week, month, quarter, year) giving at most `max_points` periods.
+
+    Args:
+        dates (pd.Series): Dates, unparsable values are ignored.
+        counts (pd.Series): Optional weight of each date (e.g. the number
+        of interactions of each day), 1 by default.
+        max_points (int): Point budget.
+
+    Returns:
+        pd.DataFrame: `date` (start of the period) and `count` columns.
+    """
+    budget = point_budget(max_points)
+    dates = pd.to_datetime(pd.Series(dates), errors="coerce")
+    weights = pd.Series(1, index=dates.index) if counts is None else counts
+    series = pd.Series(weights.to_numpy(), index=dates.to_numpy())
+    series = series[series.index.notna()]
+    for period in PERIODS:
+        per_period = series.resample(period).sum()
+        if len(per_period) <= budget:
+            break
+    return pd.DataFrame({"date": per_period.index, "count": per_period.to_numpy()})
+
+
+def quantile_summary(
+    df: pd.DataFrame, value_column: str, group_column: str = None
+) -> pd.DataFrame:
+    """
+    Computes the statistics drawn by a box plot, per group: count, mean,
+    min, q1, median, q3, max and the Tukey fences (1.5 IQR, clipped to the
+    data), so the box can be drawn without sending the values.
+
+    Args:
+        df (pd.DataFrame): Data.
+        value_column (str): Numeric column summarized.
+        group_column (str): Optional column to group by.
+
+    Returns:
+        pd.DataFrame: One row per group (a single row without group).
+
+    Raises:
+        KeyError: If a column is not in the DataFrame.
+    """
+    for column in (value_column, group_column):
+        if column is not None and column not in df.columns:
+            raise KeyError(f"The column '{column}' is not in the DataFrame.")
+    values = df[value_column]
+    grouped = values.groupby(df[group_column]) if group_column else values
+    quantiles = grouped.quantile([0.25, 0.5, 0.75])
+    if group_column:
+        quantiles = quantiles.unstack()
+    else:
+        quantiles = quantiles.to_frame().T
+    summary = pd.DataFrame(
+        {
+            "count": grouped.count(),
+            "mean": grouped.mean(),
+            "min": grouped.min(),
+            "q1": quantiles[0.25],
+            "median": quantiles[0.5],
+            "q3": quantiles[0.75],
+            "max": grouped.max(),
+        },
+        index=quantiles.index,
+    )
+    iqr = summary["q3"] - summary["q1"]
+    summary["lowerfence"] = np.maximum(summary["q1"] - 1.5 * iqr, summary["min"])
+    summary["upperfence"] = np.minimum(summary["q3"] + 1.5 * iqr, summary["max"])
+    if group_column:
+        return summary.rename_axis(group_column).reset_index()
+    return summary.reset_index(drop=True)
+
+
+def lttb(x, y, threshold: int = None) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: picks `threshold` points
+    of a series sorted by x that keep its visual shape (peaks and drops).
+
+    Args:
+        x: X values (numbers or datetimes), sorted.
+        y: Y values.
+        threshold (int): Number of points kept, defaults to the budget.
+
+    Returns:
+        np.ndarray: Positions of the kept points, first and last included.
+    """
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    x = x.astype(float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    threshold = point_budget(threshold)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])[:threshold]
+
+    # Buckets of the points between the first and the last one
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        # Average of the next bucket (the last point for the last bucket)
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        # Twice the areas of the triangles (previous point, candidate, next)
+        base = (x[previous] - next_x) * (y[start:end] - y[previous])
+        height = (x[previous] - x[start:end]) * (next_y - y[previous])
+        areas = np.abs(base - height)
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample_series(
+    df: pd.DataFrame, x: str, y: str, max_points: int = None
+) -> pd.DataFrame:
+    """
+    Sorts a time series by `x` and keeps at most `max_points` rows with
+    `lttb`.
+    """
+    df = df.sort_values(x)
+    if len(df) <= point_budget(max_points):
+        return df
+    return df.iloc[lttb(df[x].to_numpy(), df[y].to_numpy(), max_points)]
+
+
+def top_n_with_other(
+    values: pd.Series, n: int = 10, other_label: str = "Other"
+) -> pd.Series:
+    """
+    Keeps the n largest values of a Series indexed by category (e.g. the
+    output of `value_counts`) and sums the others into `other_label`.
+
+    Returns:
+        pd.Series: At most n + 1 values, the largest first.
+    """
+    values = values.sort_values(ascending=False)
+    if len(values) <= n:
+        return values
+    top = values.iloc[:n]
+    other = pd.Series([values.iloc[n:].sum()], index=[other_label])
+    return pd.concat([top, other])
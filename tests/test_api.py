@@ -0,0 +1,127 @@
+import gzip
+import json
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from tornado.testing import AsyncHTTPTestCase
+from src.api import Analytics, make_app
+from src.ranking import NUTRIENT_OBJECTIVES
+from src.snapshot import write_snapshot
+
+
+def sample_snapshot(directory, version: str = "v1", calories: float = 100.0) -> None:
+    """
+    Writes a snapshot of 30 recipes with the tables served by the API.
+
+    Args:
+        directory: Snapshot directory.
+        version (str): Dataset version of the manifest.
+        calories (float): Calories of the first recipe.
+    """
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, 31)
+    names = [f"recipe {i}" for i in ids]
+    combined_df = pd.DataFrame(
+        {"name": names, "id": ids}
+        | {nutrient: rng.uniform(2, 50, 30) for nutrient in NUTRIENT_OBJECTIVES}
+    )
+    combined_df.loc[0, "Calories"] = calories
+    # Recipes without saturated fat or sodium, whose protein ratios are infinite
+    combined_df.loc[1, "Saturated Fat (g)"] = 0.0
+    combined_df.loc[2, "Sodium (mg)"] = 0.0
+    tables = {
+        "combined_df": combined_df,
+        "df_preprocessed": pd.DataFrame(
+            {"name": names, "id": ids, "ingredient_ids": ["[1, 2]"] * 30}
+        ),
+        "recipe_popularity": pd.DataFrame(
+            {"recipe_id": ids, "interaction_count": ids * 2}
+        ),
+        "recipe_tags": pd.DataFrame({"id": ids, "tags": [["easy"]] * 30}),
+        "ingredients": pd.DataFrame(
+            {"replaced": ["salt", "pepper"], "id": [1, 2], "count": [5, 3]}
+        ),
+    }
+    data = {"tables": tables, "figures": {}, "metrics": {"bio_recipes": 30}}
+    write_snapshot(data, directory, version=version)
+
+
+class TestAnalyticsAPI(AsyncHTTPTestCase):
+    """Requests to the API served from a snapshot."""
+
+    def get_app(self):
+        self.directory = tempfile.mkdtemp(prefix="api-test-")
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        sample_snapshot(self.directory)
+        self.analytics = Analytics(self.directory)
+        return make_app(self.analytics)
+
+    def test_endpoints(self):
+        """Test the JSON bodies of the endpoints."""
+        response = self.fetch("/api/metrics")
+        assert response.code == 200
+        assert json.loads(response.body) == {"bio_recipes": 30}
+        top4 = json.loads(self.fetch("/api/top4?nutrient=Protein%20(g)").body)
+        proteins = [recipe["Protein (g)"] for recipe in top4["Protein (g)"]]
+        assert len(proteins) == 4 and proteins == sorted(proteins, reverse=True)
+        ratios = json.loads(self.fetch("/api/ratios").body)
+        assert set(ratios["Sodium (mg)"][0]) >= {"id", "Protein_Sodium_Ratio"}
+        outliers = json.loads(self.fetch("/api/outliers").body)
+        assert outliers["agreement"]["zscore"]["zscore"] == 1.0
+        recipe = json.loads(self.fetch("/api/recipes/3").body)
+        assert recipe["name"] == "recipe 3" and recipe["interaction_count"] == 6
+        assert recipe["ingredient_names"] == ["salt", "pepper"]
+
+    def test_infinite_ratios(self):
+        """
+        Test that the ratios to a zero saturated fat or sodium are served as
+        null rather than as the non-JSON Infinity.
+        """
+
+        def reject(constant):
+            raise ValueError(f"Not JSON: {constant}")
+
+        body = self.fetch("/api/ratios").body
+        ratios = json.loads(body, parse_constant=reject)
+        recipes = {
+            (category, recipe["id"]): recipe
+            for category, records in ratios.items()
+            for recipe in records
+        }
+        assert recipes[("Saturated Fat (g)", 2)]["Protein_Saturated_fat_Ratio"] is None
+        assert recipes[("Sodium (mg)", 3)]["Protein_Sodium_Ratio"] is None
+
+    def test_errors(self):
+        """Test the JSON errors of invalid arguments and unknown recipes."""
+        response = self.fetch("/api/top4?nutrient=Fiber")
+        assert response.code == 400
+        assert "Fiber" in json.loads(response.body)["error"]
+        assert self.fetch("/api/recipes/999").code == 404
+
+    def test_etag_and_gzip(self):
+        """
+        Test that a revalidation of the current version gets an empty 304,
+        and that the body is compressed for the clients accepting gzip.
+        """
+        plain = self.fetch("/api/top4", decompress_response=False)
+        etag = plain.headers["ETag"]
+        assert etag == '"v1"' and "Content-Encoding" not in plain.headers
+        compressed = self.fetch(
+            "/api/top4",
+            headers={"Accept-Encoding": "gzip"},
+            decompress_response=False,
+        )
+        assert compressed.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(compressed.body) == plain.body
+        revalidation = self.fetch("/api/top4", headers={"If-None-Match": etag})
+        assert revalidation.code == 304 and revalidation.body == b""
+
+    def test_new_version_drops_cached_responses(self):
+        """Test that a new snapshot version is served after the next check."""
+        self.fetch("/api/top4")
+        sample_snapshot(self.directory, version="v2", calories=1.0)
+        self.analytics._checked -= 60
+        response = self.fetch("/api/top4?nutrient=Calories")
+        assert response.headers["ETag"] == '"v2"'
+        assert json.loads(response.body)["Calories"][0]["Calories"] == 1.0
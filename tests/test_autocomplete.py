@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+from src.autocomplete import (
+    CACHED_TOP_K,
+    PrefixIndex,
+    ingredient_autocomplete,
+    normalize,
+    recipe_autocomplete,
+)
+
+
+@pytest.fixture
+def recipe_index() -> PrefixIndex:
+    """
+    Fixture that provides the autocomplete of a few recipe names.
+
+    Returns:
+        PrefixIndex: Index with the interaction counts as weights.
+    """
+    names = ["Lemon Cake", "lemonade", "lemon  chicken", "leek soup", "Apple pie"]
+    popularity = pd.DataFrame(
+        {"recipe_id": [1, 2, 3, 5], "interaction_count": [12, 40, 12, 7]}
+    )
+    return recipe_autocomplete(names, [1, 2, 3, 4, 5], popularity)
+
+
+def test_normalize():
+    """Test the lowercase names with collapsed whitespace."""
+    assert normalize("  Lemon \t Cake ") == "lemon cake"
+    assert normalize(None) == ""
+
+
+def test_complete_most_popular_first(recipe_index: PrefixIndex):
+    """
+    Test that the names starting with a prefix are returned most popular
+    first, ties in alphabetical order, whatever the case and spaces.
+    """
+    result = recipe_index.complete("LEM")
+    assert result["name"].tolist() == ["lemonade", "Lemon Cake", "lemon  chicken"]
+    assert result["weight"].tolist() == [40, 12, 12]
+    assert recipe_index.complete("lemon ")["id"].tolist() == [1, 3]
+    assert recipe_index.complete("le", k=1)["id"].tolist() == [2]
+    assert recipe_index.complete("leek soup")["weight"].tolist() == [0]
+    assert recipe_index.complete("zucchini").empty
+
+
+def test_cached_and_uncached_prefixes_agree():
+    """
+    Test that the precomputed short prefixes give the same answers as the
+    ranges searched at query time, for k beyond the cached top names.
+    """
+    names = [f"{a}{b}{c}" for a in "abc" for b in "abc" for c in "abcdefgh"] * 2
+    weights = list(range(len(names)))
+    index = PrefixIndex(names, weights)
+    assert len(index) == len(names)
+    for prefix in ["", "a", "ab", "abc"]:
+        expected = sorted(
+            (w for name, w in zip(names, weights) if name.startswith(prefix)),
+            reverse=True,
+        )
+        for k in (3, CACHED_TOP_K + 5):
+            result = index.complete(prefix, k=k)
+            assert result["weight"].tolist() == expected[:k]
+
+
+def test_ingredient_autocomplete():
+    """Test that every spelling of an ingredient gives one suggestion."""
+    ingredients = pd.DataFrame(
+        {
+            "replaced": ["chicken breast", "chicken breast", "chili powder"],
+            "id": [1252, 1252, 1329],
+            "count": [8695, 8695, 5940],
+        }
+    )
+    result = ingredient_autocomplete(ingredients).complete("chi")
+    assert result["id"].tolist() == [1252, 1329]
+    with pytest.raises(KeyError):
+        ingredient_autocomplete(ingredients.drop(columns="count"))
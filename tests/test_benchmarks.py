@@ -0,0 +1,66 @@
+import ast
+import pandas as pd
+from benchmarks.generators import make_interactions, make_raw_recipes, write_datasets
+from benchmarks.run_benchmarks import compare, measure
+
+
+def make_report(median_s: float, peak_mb: float) -> dict:
+    """Builds a minimal benchmark report with a single stage."""
+    return {
+        "results": {"10k": {"stats_bio": {"median_s": median_s, "peak_mb": peak_mb}}}
+    }
+
+
+def test_make_raw_recipes_columns():
+    """
+    Test that the synthetic recipes have the RAW_recipes columns and a
+    parseable 7-value nutrition list.
+    """
+    recipes = make_raw_recipes(50)
+    assert len(recipes) == 50
+    assert {"name", "id", "tags", "nutrition", "steps", "description"} <= set(
+        recipes.columns
+    )
+    assert len(ast.literal_eval(recipes["nutrition"].iloc[0])) == 7
+
+
+def test_make_interactions_recipe_ids():
+    """Test that the synthetic interactions only reference existing recipes."""
+    recipes = make_raw_recipes(20)
+    interactions = make_interactions(200, recipes["id"].to_numpy())
+    assert interactions["recipe_id"].isin(recipes["id"]).all()
+    assert pd.to_datetime(interactions["date"]).notna().all()
+
+
+def test_write_datasets_layout(tmp_path):
+    """Test that the datasets are written with the layout expected by the app."""
+    paths = write_datasets(str(tmp_path), 30)
+    assert paths["raw_recipes"].endswith("dataset/RAW_recipes.csv.zip")
+    assert len(pd.read_csv(paths["raw_recipes"])) == 30
+    assert len(pd.read_csv(paths["pp_interactions"])) == 30
+
+
+def test_measure_metrics():
+    """Test that measure reports timings, peak memory and returned rows."""
+    metrics = measure(lambda: list(range(1000)), repeat=2)
+    assert metrics["min_s"] <= metrics["median_s"]
+    assert metrics["peak_mb"] > 0
+    assert metrics["rows"] == 1000
+
+
+def test_compare_detects_regressions():
+    """
+    Test that a slowdown beyond the threshold is reported, and that a
+    slowdown within the threshold or a memory increase without a memory
+    threshold is not.
+    """
+    baseline = make_report(1.0, 100.0)
+    assert compare(baseline, make_report(1.1, 300.0), threshold=0.25) == []
+    assert len(compare(baseline, make_report(1.5, 100.0), threshold=0.25)) == 1
+    assert len(compare(baseline, make_report(1.0, 300.0), memory_threshold=0.5)) == 1
+
+
+def test_compare_ignores_tiny_stages():
+    """Test that stages faster than min_seconds are not compared on time."""
+    baseline = make_report(0.001, 1.0)
+    assert compare(baseline, make_report(0.003, 1.0), min_seconds=0.005) == []
@@ -1,6 +1,10 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
+import lzma
 import os
+import tempfile
+import threading
+import zipfile
 import pandas as pd
 from src.data_loader import DataLoader
 
@@ -73,51 +77,84 @@ class TestDataLoader(unittest.TestCase):
     def setUp(self):
         self.data_loader = DataLoader()
 
-    @patch("os.path.exists")
-    @patch("os.makedirs")
-    @patch("os.listdir")
-    @patch("src.data_loader.zipfile.ZipFile")
-    def test_unzip_data_zipfile(self, mock_zipfile, mock_listdir, mock_makedirs, mock_exists):
+    def test_unzip_data_zipfile(self):
         """
             Test the extraction of ZIP files.
 
-            This test checks that ZIP files are extracted correctly using the zipfile module
-            and verifies the creation of the appropriate directory and extracted file paths.
+            This test checks that ZIP files are extracted next to the archive, in the
+            `_extracted` directory, and that the extracted file paths are returned.
         """
-        mock_exists.return_value = False
-        mock_listdir.return_value = ["file1.csv", "file2.csv"]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "test.zip")
+            with zipfile.ZipFile(file_name, "w") as zip_ref:
+                zip_ref.writestr("file1.csv", "col1\n1\n")
+                zip_ref.writestr("file2.csv", "col1\n2\n")
+
+            result = self.data_loader.unzip_data(file_name)
+
+            extracted_dir = os.path.join(tmp_dir, "test_extracted")
+            self.assertEqual(
+                sorted(result),
+                [os.path.join(extracted_dir, f) for f in ("file1.csv", "file2.csv")],
+            )
+            # Only the extracted directory and its lock file are left behind
+            self.assertEqual(
+                sorted(os.listdir(tmp_dir)),
+                ["test.zip", "test_extracted", "test_extracted.lock"],
+            )
+
+    def test_unzip_data_xzfile(self):
+        """
+            Test the decompression of XZ files.
 
-        mock_zip = MagicMock()
-        mock_zipfile.return_value.__enter__.return_value = mock_zip
+            Ensures that the XZ file is decompressed into the `_extracted` directory and
+            that the output file paths match the expected results.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "file1.csv.xz")
+            with lzma.open(file_name, "wb") as xz_file:
+                xz_file.write(b"col1\n1\n")
 
-        file_name = "test.zip"
-        result = self.data_loader.unzip_data(file_name)
+            result = self.data_loader.unzip_data(file_name)
 
-        mock_zip.extractall.assert_called_once()
-        mock_makedirs.assert_called_once_with("test_extracted")
-        self.assertEqual(result, ["test_extracted/file1.csv", "test_extracted/file2.csv"])
+            output_file = os.path.join(tmp_dir, "file1.csv_extracted", "file1.csv")
+            self.assertEqual(result, [output_file])
+            with open(output_file, "rb") as extracted:
+                self.assertEqual(extracted.read(), b"col1\n1\n")
 
-    @patch("os.path.exists")
-    @patch("os.makedirs")
-    @patch("os.listdir")
-    @patch("src.data_loader.DataLoader.decompress_xz")
-    def test_unzip_data_xzfile(self, mock_decompress_xz, mock_listdir, mock_makedirs, mock_exists):
+    def test_unzip_data_concurrent_extracts_once(self):
         """
-            Test the decompression of XZ files.
+            Test that concurrent cold loads of the same archive extract it only once.
 
-            Ensures that the decompress_xz method is called correctly and that the output file
-            paths match the expected results.
+            Several threads unzip the same file at the same time; the archive must be
+            extracted a single time and every thread must get the complete file list.
         """
-        mock_exists.return_value = False
-        mock_listdir.return_value = ["file1.csv"]
-        mock_decompress_xz.return_value = "test_extracted/file1.csv"
-
-        file_name = "test.xz"
-        result = self.data_loader.unzip_data(file_name)
-
-        mock_decompress_xz.assert_called_once_with(file_name, "test_extracted")
-        mock_makedirs.assert_called_once_with("test_extracted")
-        self.assertEqual(result, ["test_extracted/file1.csv"])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "test.zip")
+            with zipfile.ZipFile(file_name, "w") as zip_ref:
+                zip_ref.writestr("file1.csv", "col1\n1\n")
+
+            extract = DataLoader._extract
+            with patch(
+                "src.data_loader.DataLoader._extract", autospec=True, side_effect=extract
+            ) as mock_extract:
+                results = []
+                threads = [
+                    threading.Thread(
+                        target=lambda: results.append(
+                            DataLoader.unzip_data.__wrapped__(self.data_loader, file_name)
+                        )
+                    )
+                    for _ in range(8)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            mock_extract.assert_called_once()
+            expected = [os.path.join(tmp_dir, "test_extracted", "file1.csv")]
+            self.assertEqual(results, [expected] * 8)
 
     @patch("pandas.read_csv")
     @patch("src.data_loader.DataLoader.unzip_data")
@@ -218,3 +255,52 @@ class TestDataLoader(unittest.TestCase):
 
         self.assertEqual(str(context.exception), f"Unsupported file type for {file_name}")
 
+
+    def test_peek_streams_archives(self):
+        """
+        Test peeking at CSV files inside ZIP and XZ archives.
+
+        Only the sampled records are read: the row count is estimated from their
+        size, a quoted field spanning several lines stays in one row, and nothing
+        is extracted next to the archives.
+        """
+        # Records of the same size, with a line break inside the quoted field
+        rows = [f'{i:03d},"line {i:03d}\nnext",{i % 10}.5\n' for i in range(200)]
+        content = ("id,text,value\n" + "".join(rows)).encode()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            zip_name = os.path.join(tmp_dir, "data.csv.zip")
+            with zipfile.ZipFile(zip_name, "w") as zip_ref:
+                zip_ref.writestr("__MACOSX/._data.csv", b"\x00")
+                zip_ref.writestr("data.csv", content)
+            xz_name = os.path.join(tmp_dir, "data.csv.xz")
+            with lzma.open(xz_name, "wb") as xz_file:
+                xz_file.write(content)
+
+            for file_name in (zip_name, xz_name):
+                result = self.data_loader.peek(file_name, n_rows=3, sample_rows=50)
+                self.assertEqual(result["columns"], ["id", "text", "value"])
+                self.assertEqual(result["dtypes"]["value"], "float64")
+                self.assertEqual(result["head"]["text"].tolist()[2], "line 002\nnext")
+                self.assertFalse(result["rows_exact"])
+                self.assertAlmostEqual(result["rows"], 200, delta=5)
+            self.assertEqual(
+                sorted(os.listdir(tmp_dir)), ["data.csv.xz", "data.csv.zip"]
+            )
+
+    def test_peek_exact_rows(self):
+        """
+        Test that the row count is exact when the sample covers the whole CSV file,
+        and for Pickle files, which are loaded whole.
+        """
+        df = pd.DataFrame({"col1": [1, 2, 3], "col2": ["a", "b", "c"]})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_name = os.path.join(tmp_dir, "data.csv")
+            df.to_csv(csv_name, index=False)
+            pkl_name = os.path.join(tmp_dir, "data.pkl")
+            df.to_pickle(pkl_name)
+            for file_name in (csv_name, pkl_name):
+                result = self.data_loader.peek(file_name, n_rows=2)
+                self.assertEqual((result["rows"], result["rows_exact"]), (3, True))
+                pd.testing.assert_frame_equal(result["head"], df.head(2))
+        with self.assertRaises(ValueError):
+            self.data_loader.peek("test.txt")
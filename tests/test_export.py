@@ -0,0 +1,70 @@
+import os
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from src.export import export, iter_csv, recipe_set, write_parquet
+
+
+@pytest.fixture
+def recipes() -> pd.DataFrame:
+    """
+    Fixture that provides 10 recipes whose last tags are missing.
+
+    Returns:
+        pd.DataFrame: `name`, `id`, `tags`, `Calories` and `Protein (g)`
+        columns, with a non-default index.
+    """
+    return pd.DataFrame(
+        {
+            "name": [f"recipe, {i}" for i in range(10)],
+            "id": range(100, 110),
+            "tags": ["['easy']"] * 6 + [None] * 4,
+            "Calories": [50.0, 10.0, 30.0, 10.0, 90.0, 70.0, 20.0, 80.0, 60.0, 40.0],
+            "Protein (g)": [5.0, 1.0, 9.0, 3.0, 7.0, 2.0, 8.0, 4.0, 6.0, 0.5],
+        },
+        index=range(20, 30),
+    )
+
+
+def test_iter_csv_chunks(recipes: pd.DataFrame):
+    """Test that the chunks join into the CSV of the whole DataFrame."""
+    chunks = list(iter_csv(recipes, chunk_rows=3))
+    assert len(chunks) == 4
+    assert b"".join(chunks) == recipes.to_csv(index=False).encode()
+    assert list(iter_csv(recipes.iloc[:0])) == [b"name,id,tags,Calories,Protein (g)\n"]
+
+
+def test_write_parquet_row_groups(tmp_path, recipes: pd.DataFrame):
+    """
+    Test one row group per chunk, and that a chunk of missing values keeps
+    the type of its column.
+    """
+    path = tmp_path / "recipes.parquet"
+    write_parquet(recipes, str(path), chunk_rows=4)
+    assert pq.ParquetFile(path).num_row_groups == 3
+    pd.testing.assert_frame_equal(pd.read_parquet(path), recipes.reset_index(drop=True))
+
+
+def test_export_formats(tmp_path, recipes: pd.DataFrame):
+    """Test the format taken from the extension and the unsupported ones."""
+    output = export(recipes, str(tmp_path / "out" / "recipes.csv"), chunk_rows=3)
+    expected = recipes.reset_index(drop=True).fillna({"tags": float("nan")})
+    pd.testing.assert_frame_equal(pd.read_csv(output), expected)
+    export(recipes, str(tmp_path / "recipes.data"), fmt="parquet")
+    assert len(pd.read_parquet(tmp_path / "recipes.data")) == 10
+    with pytest.raises(ValueError):
+        export(recipes, str(tmp_path / "recipes.xlsx"))
+    assert sorted(os.listdir(tmp_path)) == ["out", "recipes.data"]
+
+
+def test_top_k_recipe_set(recipes: pd.DataFrame):
+    """Test the highest proteins and the lowest calories, ties in order."""
+    tables = {"combined_df": recipes}
+
+    def top_k(nutrient, k):
+        return recipe_set("top_k", nutrient, k, tables)["id"].tolist()
+
+    assert top_k("Protein (g)", 2) == [102, 106]
+    assert top_k("Calories", 3) == [101, 103, 106]
+    with pytest.raises(KeyError):
+        top_k("Fiber (g)", 3)
@@ -0,0 +1,211 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.ingestion import (
+    NUTRIENTS,
+    DatasetStore,
+    count_dates,
+    count_recipe_months,
+    merge_nutrient_stats,
+    nutrient_stats,
+    read_batch,
+    top_k_nutrients,
+    zscore_outliers,
+    zscores,
+)
+from src.nutrition_stats import stats_bio
+from src.outliers import zscore_mask
+from src.popularity import aggregate_interactions
+
+
+@pytest.fixture
+def sample_interactions_df() -> pd.DataFrame:
+    """
+    Fixture that provides a small interactions batch shaped like
+    PP_interactions_mangetamain.csv.
+
+    Returns:
+        pd.DataFrame: Interactions with 'user_id', 'recipe_id' and 'date'.
+    """
+    return pd.DataFrame(
+        {
+            "user_id": [1, 1, 2, 3, 3],
+            "recipe_id": [20, 10, 10, 10, 30],
+            "date": [
+                "2010-05-01",
+                "2009-01-10",
+                "2010-05-01",
+                "2010-07-14",
+                "not a date",
+            ],
+        }
+    )
+
+
+@pytest.fixture
+def sample_nutrients_df() -> pd.DataFrame:
+    """
+    Fixture that provides 12 recipes with random nutrient values, shaped
+    like the output of `stats_bio`.
+
+    Returns:
+        pd.DataFrame: Recipes with 'name', 'id' and the nutrient columns.
+    """
+    rng = np.random.default_rng(0)
+    nutrients = pd.DataFrame(rng.uniform(2, 100, (12, len(NUTRIENTS))))
+    nutrients.columns = NUTRIENTS
+    nutrients.insert(0, "id", range(12))
+    nutrients.insert(0, "name", [f"recipe {i}" for i in range(12)])
+    return nutrients
+
+
+def test_count_dates(sample_interactions_df: pd.DataFrame):
+    """Test that interactions are counted per day, ignoring invalid dates."""
+    counts = count_dates(sample_interactions_df)
+    assert counts["date"].dt.strftime("%Y-%m-%d").tolist() == [
+        "2009-01-10",
+        "2010-05-01",
+        "2010-07-14",
+    ]
+    assert counts["count"].tolist() == [1, 2, 1]
+
+
+def test_merged_nutrient_stats_match_full_stats(sample_nutrients_df: pd.DataFrame):
+    """
+    Test that merging the running stats of two batches gives the mean and
+    z-scores computed over all the recipes at once.
+    """
+    merged = merge_nutrient_stats(
+        nutrient_stats(sample_nutrients_df.iloc[:5]),
+        nutrient_stats(sample_nutrients_df.iloc[5:]),
+    )
+    full = nutrient_stats(sample_nutrients_df)
+    pd.testing.assert_frame_equal(merged, full, check_dtype=False)
+    values = sample_nutrients_df[NUTRIENTS]
+    expected = (values - values.mean()) / values.std(ddof=0)
+    pd.testing.assert_frame_equal(zscores(sample_nutrients_df, merged), expected)
+
+
+def test_top_k_nutrients_keeps_both_ends(sample_nutrients_df: pd.DataFrame):
+    """
+    Test that the top k table of two batches holds the k lowest and k
+    highest recipes of every nutrient over both batches.
+    """
+    merged = top_k_nutrients(
+        pd.concat(
+            [
+                top_k_nutrients(sample_nutrients_df.iloc[:6], k=2),
+                top_k_nutrients(sample_nutrients_df.iloc[6:], k=2),
+            ],
+            ignore_index=True,
+        ),
+        k=2,
+    )
+    for nutrient in NUTRIENTS:
+        column = sample_nutrients_df.set_index("id")[nutrient]
+        expected = set(column.nsmallest(2).index) | set(column.nlargest(2).index)
+        assert expected <= set(merged["id"])
+
+
+def test_store_append_updates_aggregates(
+    tmp_path, sample_interactions_df: pd.DataFrame
+):
+    """
+    Test that each batch is stored, the aggregates cover every batch and
+    only the version of the appended dataset is bumped.
+    """
+    store = DatasetStore(str(tmp_path / "store"))
+    assert store.versions() == {"interactions": 0, "recipes": 0}
+    assert store.append("interactions", sample_interactions_df.iloc[:3]) == 1
+    assert store.append("interactions", sample_interactions_df.iloc[3:]) == 2
+    assert store.versions() == {"interactions": 2, "recipes": 0}
+
+    stored = store.read("interactions")
+    pd.testing.assert_frame_equal(stored, sample_interactions_df)
+    assert store.aggregate("date_counts")["count"].tolist() == [1, 2, 1]
+    popularity = store.aggregate("recipe_popularity")
+    assert popularity["recipe_id"].tolist() == [10, 20, 30]
+    assert popularity["interaction_count"].tolist() == [3, 1, 1]
+    pd.testing.assert_frame_equal(
+        store.aggregate("user_activity"),
+        aggregate_interactions(sample_interactions_df, "user_id"),
+    )
+    month_counts = store.aggregate("recipe_month_counts")
+    assert month_counts["recipe_id"].tolist() == [10, 10, 10, 20]
+    assert month_counts["month"].dt.strftime("%Y-%m").tolist() == [
+        "2009-01",
+        "2010-05",
+        "2010-07",
+        "2010-05",
+    ]
+    assert month_counts["count"].tolist() == [1, 1, 1, 1]
+
+
+def test_store_backfills_aggregates(tmp_path, sample_interactions_df: pd.DataFrame):
+    """
+    Test that the interactions per recipe and month and the per-user
+    aggregates of a store created without them are computed from every
+    stored batch.
+    """
+    store = DatasetStore(str(tmp_path / "store"))
+    store.append("interactions", sample_interactions_df.iloc[:3])
+    for name in ("recipe_month_counts", "user_activity"):
+        os.remove(tmp_path / "store" / "aggregates" / f"{name}.parquet")
+    assert store.recipe_month_counts()["count"].sum() == 3
+    assert store.user_activity()["interaction_count"].sum() == 3
+    store.append("interactions", sample_interactions_df.iloc[3:])
+    pd.testing.assert_frame_equal(
+        store.aggregate("recipe_month_counts"),
+        count_recipe_months(sample_interactions_df),
+    )
+    pd.testing.assert_frame_equal(
+        store.aggregate("user_activity"),
+        aggregate_interactions(sample_interactions_df, "user_id"),
+    )
+
+
+def test_store_zscore_outliers(tmp_path):
+    """
+    Test that the stored recipes flagged against the running statistics
+    of two batches are those flagged over all the recipes at once.
+    """
+    rng = np.random.default_rng(0)
+    values = rng.uniform(10, 60, (30, 7))
+    values[17, 0] = 5000.0
+    recipes = pd.DataFrame(
+        {
+            "name": [f"recipe {i}" for i in range(30)],
+            "id": range(30),
+            "nutrition": [str(row.tolist()) for row in values],
+        }
+    )
+    store = DatasetStore(str(tmp_path / "store"))
+    store.append("recipes", recipes.iloc[:20])
+    store.append("recipes", recipes.iloc[20:])
+    flagged = zscore_outliers(store)
+    nutrients = stats_bio(recipes)
+    expected = nutrients["id"][zscore_mask(nutrients[NUTRIENTS].to_numpy()).any(axis=1)]
+    assert flagged["id"].tolist() == expected.tolist() == [17]
+    assert set(flagged.columns) == {"name", "id", *NUTRIENTS}
+
+
+def test_store_append_invalid_batch(tmp_path, sample_interactions_df: pd.DataFrame):
+    """Test that unknown datasets and missing columns are rejected."""
+    store = DatasetStore(str(tmp_path / "store"))
+    with pytest.raises(KeyError):
+        store.append("users", sample_interactions_df)
+    with pytest.raises(KeyError):
+        store.append("interactions", sample_interactions_df.drop(columns="date"))
+    assert store.versions() == {"interactions": 0, "recipes": 0}
+
+
+def test_read_batch(tmp_path, sample_interactions_df: pd.DataFrame):
+    """Test that CSV and Parquet batches are read and other files rejected."""
+    sample_interactions_df.to_csv(tmp_path / "batch.csv", index=False)
+    sample_interactions_df.to_parquet(tmp_path / "batch.parquet")
+    for name in ("batch.csv", "batch.parquet"):
+        batch = read_batch(str(tmp_path / name))
+        pd.testing.assert_frame_equal(batch, sample_interactions_df)
+    with pytest.raises(ValueError):
+        read_batch(str(tmp_path / "batch.json"))
@@ -0,0 +1,94 @@
+import logging
+import numpy as np
+import pandas as pd
+import pytest
+from src.instrumentation import (
+    PerformanceTracker,
+    current_rss,
+    describe_result,
+    instrumented,
+    track_stage,
+    tracker,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_tracker():
+    """Fixture that clears the process-wide tracker around each test."""
+    tracker.clear()
+    yield
+    tracker.clear()
+
+
+def test_current_rss_positive():
+    """Test that the resident set size of the process can be read."""
+    assert current_rss() > 0
+
+
+def test_describe_result():
+    """Test the rows and bytes reported for the common stage results."""
+    df = pd.DataFrame({"a": np.arange(10, dtype=np.int64)})
+    assert describe_result(df)["rows"] == 10
+    assert describe_result(df)["bytes"] >= 80
+    assert describe_result(np.zeros(4)) == {"rows": 4, "bytes": 32}
+    assert describe_result({"x": 1, "y": 2}) == {"rows": 2, "bytes": None}
+    assert describe_result(None) == {"rows": None, "bytes": None}
+
+
+def test_track_stage_records_and_logs(caplog):
+    """
+    Test that a stage is stored in the tracker and logged with its
+    measurements attached to the log record.
+    """
+    with caplog.at_level(logging.INFO, logger="src.instrumentation"):
+        with track_stage("load", source="file.csv") as stage:
+            stage["rows"] = 3
+    (record,) = tracker.records()
+    assert record["stage"] == "load"
+    assert record["source"] == "file.csv"
+    assert record["rows"] == 3
+    assert record["status"] == "ok"
+    assert record["wall_s"] >= 0 and record["cpu_s"] >= 0
+    perf = [r.perf for r in caplog.records if hasattr(r, "perf")]
+    assert perf and perf[0]["stage"] == "load"
+
+
+def test_track_stage_error_status():
+    """Test that a failing stage is recorded with an error status."""
+    with pytest.raises(ValueError):
+        with track_stage("broken"):
+            raise ValueError("boom")
+    assert tracker.records()[0]["status"] == "error"
+
+
+def test_instrumented_decorator():
+    """
+    Test that the decorator keeps the function metadata and records the
+    rows of the returned DataFrame.
+    """
+
+    @instrumented()
+    def make_frame(n):
+        """Builds a frame."""
+        return pd.DataFrame({"a": range(n)})
+
+    assert make_frame.__name__ == "make_frame"
+    assert len(make_frame(5)) == 5
+    assert tracker.records()[0]["stage"] == "make_frame"
+    assert tracker.records()[0]["rows"] == 5
+
+
+def test_tracker_summary_and_rolling_window():
+    """
+    Test the per-stage summary and that only the most recent records are
+    kept.
+    """
+    local = PerformanceTracker(max_records=3)
+    assert local.summary().empty
+    for wall in (1.0, 2.0, 3.0, 4.0):
+        record = {"stage": "s", "wall_s": wall, "cpu_s": 0.5, "rows": 1}
+        local.add({**record, "bytes": 0, "rss_delta": 0})
+    summary = local.summary()
+    assert summary.loc[0, "calls"] == 3
+    assert summary.loc[0, "wall_mean_s"] == pytest.approx(3.0)
+    assert summary.loc[0, "wall_last_s"] == 4.0
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.ingestion import count_recipe_months
+from src.interaction_cube import DailyInteractions, TagCube
+
+
+@pytest.fixture
+def daily_counts() -> pd.DataFrame:
+    """
+    Fixture that provides random interactions per day from 2015-03-10 to
+    2017-05-20, some days missing, unsorted and one day repeated.
+
+    Returns:
+        pd.DataFrame: `date` and `count` columns.
+    """
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2015-03-10", "2017-05-20", freq="D")
+    counts = pd.DataFrame({"date": dates, "count": rng.integers(0, 50, len(dates))})
+    counts = counts[counts["count"] > 3].sample(frac=1, random_state=0)
+    return pd.concat([counts, pd.DataFrame({"date": [dates[5]], "count": [7]})])
+
+
+def test_from_counts(daily_counts: pd.DataFrame):
+    """Test the dense array: every day covered, missing days counted 0."""
+    daily = DailyInteractions.from_counts(daily_counts)
+    expected = daily_counts.groupby("date")["count"].sum()
+    expected = expected.reindex(pd.date_range("2015-03-10", "2017-05-20"), fill_value=0)
+    assert daily.dates[0] == np.datetime64("2015-03-10") and len(daily) == 803
+    assert daily.counts.tolist() == expected.tolist()
+    assert len(DailyInteractions.from_counts(daily_counts.iloc[:0])) == 0
+
+
+def test_views_match_pandas(daily_counts: pd.DataFrame):
+    """
+    Test the rolling means, monthly totals (partial months left out) and
+    weekday x month means against pandas.
+    """
+    daily = DailyInteractions.from_counts(daily_counts)
+    series = pd.Series(daily.counts, index=pd.DatetimeIndex(daily.dates))
+    np.testing.assert_allclose(
+        daily.rolling_mean(30), series.rolling(30).mean().to_numpy()
+    )
+    assert np.isnan(daily.rolling_mean(1000)).all()
+    with pytest.raises(ValueError):
+        daily.rolling_mean(0)
+
+    years, totals = daily.monthly_totals()
+    assert years.tolist() == [2015, 2016, 2017]
+    monthly = series.resample("MS").sum()
+    assert totals[1].tolist() == monthly["2016"].tolist()
+    # March 2015 and May 2017 are only partly covered
+    assert np.isnan(totals[0, :3]).all() and totals[0, 3] == monthly["2015-04"].iloc[0]
+    assert np.isnan(totals[2, 4:]).all()
+    changes_years, changes = daily.year_over_year()
+    assert changes_years.tolist() == [2016, 2017]
+    assert changes[0, 5] == pytest.approx(totals[1, 5] / totals[0, 5] - 1)
+    assert np.isnan(changes[0, 2]) and np.isnan(changes[1, 4])
+
+    means = series.groupby([series.index.weekday, series.index.month]).mean()
+    np.testing.assert_allclose(daily.seasonality(), means.unstack().to_numpy())
+
+
+@pytest.fixture
+def tagged_interactions() -> tuple:
+    """
+    Fixture that provides random interactions from 2014 to 2016 on 40
+    recipes, and their tags: some recipes have several "bio" tags, one a
+    repeated tag and a few none at all.
+
+    Returns:
+        tuple: `(interactions, recipe_tags)` DataFrames.
+    """
+    rng = np.random.default_rng(0)
+    days = pd.date_range("2014-02-01", "2016-11-30", freq="D")
+    interactions = pd.DataFrame(
+        {
+            "recipe_id": rng.integers(0, 40, 3000) * 10,
+            "date": rng.choice(days, 3000),
+        }
+    )
+    pool = ["vegan", "Organic-farm", "dessert", "easy", "main-dish", "bio"]
+    tags = [list(rng.choice(pool, rng.integers(0, 4))) for _ in range(40)]
+    tags[3] = ["easy", "easy"]
+    recipe_tags = pd.DataFrame({"id": np.arange(40) * 10, "tags": tags})
+    return interactions, recipe_tags
+
+
+def test_tag_cube_matches_join(tagged_interactions: tuple):
+    """
+    Test that the interactions of a set of tags, per year and month, match
+    those of a join of the interactions with the recipe tags, each
+    interaction counted once.
+    """
+    interactions, recipe_tags = tagged_interactions
+    cube = TagCube.from_tables(count_recipe_months(interactions), recipe_tags)
+    mask = cube.matching_tags(["ORGANIC", "vegan"])
+    assert cube.tags[mask].tolist() == ["Organic-farm", "vegan"]
+
+    selected = set(cube.tags[mask])
+    tagged = recipe_tags["tags"].map(lambda tags: bool(selected.intersection(tags)))
+    is_tagged = interactions["recipe_id"].isin(recipe_tags["id"][tagged])
+    years = interactions["date"].dt.year
+    comparison = cube.compare(mask)
+    assert comparison["period"].tolist() == [2014, 2015, 2016]
+    assert comparison["tagged"].tolist() == is_tagged.groupby(years).sum().tolist()
+    assert comparison["other"].tolist() == (~is_tagged).groupby(years).sum().tolist()
+    np.testing.assert_allclose(
+        comparison["share"], is_tagged.groupby(years).mean().to_numpy()
+    )
+
+    months, counts = cube.roll_up(cube.tag_interactions(["easy"]), "month")
+    easy = interactions["recipe_id"].isin(
+        recipe_tags["id"][recipe_tags["tags"].map(lambda tags: "easy" in tags)]
+    )
+    expected = easy.groupby(interactions["date"].dt.to_period("M")).sum()
+    assert months[0] == np.datetime64("2014-02") and len(months) == 34
+    assert counts.tolist() == expected.tolist()
+    with pytest.raises(ValueError):
+        cube.roll_up(counts, "week")
+
+
+def test_tag_cube_slices(tagged_interactions: tuple):
+    """Test the per-tag totals over a period and the period slices."""
+    interactions, recipe_tags = tagged_interactions
+    cube = TagCube.from_tables(count_recipe_months(interactions), recipe_tags)
+    assert cube.months[cube.period("2015", "2015-06")].astype(str).tolist() == [
+        f"2015-0{month}" for month in range(1, 7)
+    ]
+    assert cube.period(end="2013") == slice(0, 0)
+    assert cube.period("2016-11", "2020") == slice(33, 34)
+
+    exploded = interactions.merge(
+        recipe_tags.assign(tags=recipe_tags["tags"].map(set)).explode("tags"),
+        left_on="recipe_id",
+        right_on="id",
+    )
+    in_2015 = exploded[exploded["date"].dt.year == 2015]
+    expected = in_2015["tags"].value_counts()
+    top = cube.top_tags(3, "2015", "2015")
+    assert top.to_dict() == expected.iloc[:3].to_dict()
+    years, per_tag = cube.roll_up(cube.tag_counts)
+    assert per_tag.shape == (3, len(cube.tags))
+    assert per_tag[1].tolist() == expected.reindex(cube.tags, fill_value=0).tolist()
@@ -0,0 +1,66 @@
+import sys
+import types
+import pytest
+from src.lazy_loading import lazy_attributes, reset_lazy_attributes
+
+
+@pytest.fixture
+def lazy_module():
+    """
+    Fixture that registers a module whose attributes are computed lazily,
+    counting the calls of each loader.
+
+    Returns:
+        types.ModuleType: The module, with a `calls` list of loaded keys.
+    """
+    module = types.ModuleType("lazy_test_module")
+    module.calls = []
+
+    def load_base(module):
+        module.calls.append("base")
+        return 10
+
+    def load_pair(module):
+        module.calls.append("pair")
+        return module.base + 1, module.base + 2
+
+    module.__getattr__ = lazy_attributes(
+        module.__dict__, {"base": load_base, ("first", "second"): load_pair}
+    )
+    sys.modules[module.__name__] = module
+    yield module
+    del sys.modules[module.__name__]
+
+
+def test_attributes_loaded_once_on_access(lazy_module):
+    """
+    Test that nothing is computed before the first access and that every
+    loader runs once, a tuple key setting all of its names.
+    """
+    assert lazy_module.calls == []
+    assert lazy_module.second == 12
+    assert lazy_module.first == 11
+    assert lazy_module.base == 10
+    assert lazy_module.calls == ["pair", "base"]
+
+
+def test_from_import_triggers_loading(lazy_module):
+    """Test that `from module import name` computes the attribute."""
+    from lazy_test_module import base
+
+    assert base == 10
+
+
+def test_unknown_attribute(lazy_module):
+    """Test that unknown names still raise AttributeError."""
+    with pytest.raises(AttributeError):
+        lazy_module.missing
+
+
+def test_reset_recomputes_attributes(lazy_module):
+    """Test that reset attributes are computed again on the next access."""
+    assert lazy_module.first == 11
+    reset_lazy_attributes(lazy_module)
+    assert "first" not in vars(lazy_module)
+    assert lazy_module.first == 11
+    assert lazy_module.calls == ["pair", "base", "pair", "base"]
@@ -1,17 +1,30 @@
 import unittest
 from unittest.mock import patch, MagicMock
+import json
 import logging
+import logging.handlers
 import os
-from src.log_config import setup_logging, MaxLevelFilter
+import tempfile
+from src.log_config import (
+    setup_logging,
+    shutdown_logging,
+    parse_log_levels,
+    parse_rate_limit,
+    parse_sampling_rates,
+    JsonFormatter,
+    MaxLevelFilter,
+    RateLimitFilter,
+    SamplingFilter,
+)
 
 
 class TestLogConfig(unittest.TestCase):
     """
     Unit tests for the logging configuration and custom logging filters.
 
-    This class contains tests for verifying the correct setup of logging handlers, 
-    log levels, and the behavior of the `MaxLevelFilter`. It ensures that the logging 
-    system behaves as expected when `setup_logging` is called, and that custom 
+    This class contains tests for verifying the correct setup of logging handlers,
+    log levels, and the behavior of the `MaxLevelFilter`. It ensures that the logging
+    system behaves as expected when `setup_logging` is called, and that custom
     filtering mechanisms operate correctly.
 
     Methods:
@@ -21,21 +34,40 @@ class TestLogConfig(unittest.TestCase):
         Clears any existing handlers to simulate a fresh logger state.
 
     test_setup_logging_sets_correct_handlers():
-        Tests that the `setup_logging` function properly configures two handlers:
+        Tests that the `setup_logging` function adds a queue handler to the
+        logger and gives two handlers to the background queue listener:
         - A DEBUG level handler that logs detailed debugging information.
         - An ERROR level handler that logs error messages only.
-        Also checks that each handler is correctly assigned a formatter and 
-        added to the logger.
+        Also checks that each handler is correctly assigned a formatter.
+
+    test_setup_logging_applies_module_levels():
+        Verifies the per-module levels read from the environment.
+
+    test_parse_log_levels():
+        Verifies the parsing of the per-module level specification.
+
+    test_queued_records_are_written_on_shutdown():
+        Verifies that queued records reach the files once flushed.
+
+    test_json_formatter(), test_json_lines_files():
+        Verify the JSON-lines output and its stage fields.
+
+    test_sampling_filter(), test_rate_limit_filter(),
+    test_parse_sampling_and_rate_limit():
+        Verify the sampling and rate limiting of DEBUG/INFO records.
+
+    test_stage_records_survive_burst():
+        Verifies that no stage measurement is dropped by the rate limit.
 
     test_max_level_filter():
-        Verifies the behavior of the `MaxLevelFilter`, ensuring it filters log records 
+        Verifies the behavior of the `MaxLevelFilter`, ensuring it filters log records
         based on their log level.
         - Allows log messages at levels DEBUG, INFO, and WARNING.
         - Blocks log messages at levels above WARNING (e.g., ERROR).
 
     Usage:
     ------
-    Run this test suite using a unittest-compatible test runner to verify 
+    Run this test suite using a unittest-compatible test runner to verify
     the behavior of the logging configuration.
 
     Dependencies:
@@ -52,11 +84,11 @@ class TestLogConfig(unittest.TestCase):
 
     Notes:
     ------
-    - This test suite ensures that the `setup_logging` function adheres to 
+    - This test suite ensures that the `setup_logging` function adheres to
       best practices by correctly configuring log handlers, levels, and formatters.
-    - The `MaxLevelFilter` is tested to ensure it restricts logging messages 
+    - The `MaxLevelFilter` is tested to ensure it restricts logging messages
       to the specified maximum level.
-    - Mocking is extensively used to simulate file and logger operations without 
+    - Mocking is extensively used to simulate file and logger operations without
       affecting the actual filesystem or logger behavior.
 
     Raises:
@@ -65,6 +97,7 @@ class TestLogConfig(unittest.TestCase):
         - If the expected log handlers are not set up correctly.
         - If the log levels and filtering do not match the specified criteria.
     """
+
     def setUp(self):
         """
         Set up a clean logger state before each test.
@@ -76,18 +109,33 @@ class TestLogConfig(unittest.TestCase):
         logger = logging.getLogger()
         logger.handlers = []  # Clear all handlers to simulate a fresh logger
 
+    def tearDown(self):
+        """
+        Stop the queue listener and detach the handlers added by the test.
+        """
+        shutdown_logging()
+        logging.getLogger().handlers = []
+
+    @patch("logging.handlers.QueueListener")
     @patch("os.makedirs")
     @patch("os.path.exists")
-    @patch("logging.FileHandler")
+    @patch("logging.handlers.RotatingFileHandler")
     @patch("logging.getLogger")
     def test_setup_logging_sets_correct_handlers(
-        self, mock_getLogger, mock_FileHandler, mock_exists, mock_makedirs
+        self,
+        mock_getLogger,
+        mock_FileHandler,
+        mock_exists,
+        mock_makedirs,
+        mock_QueueListener,
     ):
         """
         Test that setup_logging correctly configures logging handlers.
 
         This verifies that:
-        - Two handlers (DEBUG and ERROR) are added to the logger.
+        - A single QueueHandler is added to the root logger.
+        - The DEBUG and ERROR file handlers are given to the queue listener,
+          which is started.
         - The DEBUG handler logs at the DEBUG level.
         - The ERROR handler logs at the ERROR level.
         - Each handler has a formatter assigned.
@@ -117,9 +165,16 @@ class TestLogConfig(unittest.TestCase):
 
         # Call setup_logging
         setup_logging()
+        self.addCleanup(shutdown_logging)
 
-        # Ensure the logger's addHandler method is called twice (once for each handler)
-        self.assertEqual(mock_logger.addHandler.call_count, 2)
+        # Only the queue handler is attached to the logger
+        self.assertEqual(mock_logger.addHandler.call_count, 1)
+        self.assertIsInstance(mock_logger.handlers[0], logging.handlers.QueueHandler)
+
+        # The file handlers are written to by the started listener thread
+        listener_args = mock_QueueListener.call_args.args
+        self.assertEqual(listener_args[1:], (mock_debug_handler, mock_error_handler))
+        mock_QueueListener.return_value.start.assert_called_once()
 
         # Ensure the handlers have correct logging levels
         mock_debug_handler.setLevel.assert_called_once_with(logging.DEBUG)
@@ -129,9 +184,61 @@ class TestLogConfig(unittest.TestCase):
         mock_debug_handler.setFormatter.assert_called_once()
         mock_error_handler.setFormatter.assert_called_once()
 
-        # Now, since we manually appended the handlers, we can check if they were added
-        self.assertIn(mock_debug_handler, mock_logger.handlers)
-        self.assertIn(mock_error_handler, mock_logger.handlers)
+    @patch("logging.handlers.QueueListener")
+    @patch("logging.handlers.RotatingFileHandler")
+    @patch.dict(os.environ, {"MANGETAMAIN_LOG_LEVELS": "tests.module_a=ERROR"})
+    def test_setup_logging_applies_module_levels(
+        self, mock_FileHandler, mock_QueueListener
+    ):
+        """
+        Test that per-module levels are read from MANGETAMAIN_LOG_LEVELS and
+        that explicit overrides take precedence.
+        """
+        setup_logging(levels={"tests.module_b": logging.WARNING})
+        self.addCleanup(shutdown_logging)
+        self.addCleanup(logging.getLogger("tests.module_a").setLevel, logging.NOTSET)
+        self.addCleanup(logging.getLogger("tests.module_b").setLevel, logging.NOTSET)
+
+        self.assertEqual(logging.getLogger("tests.module_a").level, logging.ERROR)
+        self.assertEqual(logging.getLogger("tests.module_b").level, logging.WARNING)
+
+    def test_parse_log_levels(self):
+        """
+        Test the parsing of the per-module level specification.
+        """
+        self.assertEqual(
+            parse_log_levels("data_loader=info, root=WARNING,"),
+            {"data_loader": logging.INFO, "root": logging.WARNING},
+        )
+        self.assertEqual(parse_log_levels(""), {})
+        with self.assertRaises(ValueError):
+            parse_log_levels("data_loader")
+        with self.assertRaises(ValueError):
+            parse_log_levels("data_loader=LOUD")
+
+    def test_queued_records_are_written_on_shutdown(self):
+        """
+        Test that records logged through the queue reach the log files once
+        shutdown_logging has flushed the listener.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            previous = os.getcwd()
+            os.chdir(directory)
+            try:
+                setup_logging()
+                logging.getLogger("tests.queue").info("queued message")
+                logging.getLogger("tests.queue").error("queued error")
+                shutdown_logging()
+                with open(os.path.join("src", "logs", "app_debug.log")) as file:
+                    debug_log = file.read()
+                with open(os.path.join("src", "logs", "app_error.log")) as file:
+                    error_log = file.read()
+            finally:
+                logging.getLogger().handlers = []
+                os.chdir(previous)
+        self.assertIn("tests.queue - INFO - queued message", debug_log)
+        self.assertNotIn("queued error", debug_log)
+        self.assertIn("tests.queue - ERROR - queued error", error_log)
 
     def test_max_level_filter(self):
         """
@@ -155,3 +262,138 @@ class TestLogConfig(unittest.TestCase):
         self.assertTrue(log_filter.filter(record_info))
         self.assertTrue(log_filter.filter(record_warning))
         self.assertFalse(log_filter.filter(record_error))
+
+    def test_json_formatter(self):
+        """
+        Test that the JSON formatter emits one object per record with the
+        session id and the stage measurements attached by track_stage.
+        """
+        record = logging.LogRecord(
+            "instrumentation", logging.INFO, __file__, 1, "stage done", None, None
+        )
+        record.session_id = "abc"
+        record.perf = {"stage": "load_data", "wall_s": 0.5, "rows": 10, "other": 1}
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "instrumentation")
+        self.assertEqual(entry["message"], "stage done")
+        self.assertEqual(entry["session_id"], "abc")
+        self.assertEqual(entry["stage"], "load_data")
+        self.assertEqual(entry["duration"], 0.5)
+        self.assertEqual(entry["rows"], 10)
+        self.assertNotIn("other", entry)
+
+    def test_sampling_filter(self):
+        """
+        Test that only the configured fraction of DEBUG/INFO records is
+        kept, per logger prefix, while warnings are always kept.
+        """
+        draws = iter([0.05, 0.5, 0.05])
+        log_filter = SamplingFilter({"data": 0.1}, rng=lambda: next(draws))
+
+        def record(name, level=logging.INFO):
+            return logging.LogRecord(name, level, __file__, 1, "m", None, None)
+
+        self.assertTrue(log_filter.filter(record("data.loader")))
+        self.assertFalse(log_filter.filter(record("data.loader")))
+        kept = record("data")
+        self.assertTrue(log_filter.filter(kept))
+        self.assertEqual(kept.sample_rate, 0.1)
+        self.assertTrue(log_filter.filter(record("other")))
+        self.assertTrue(log_filter.filter(record("data", logging.WARNING)))
+
+    def test_rate_limit_filter(self):
+        """
+        Test that a call site is limited per window and that the first
+        record of the next window reports the suppressed count.
+        """
+        now = [0.0]
+        log_filter = RateLimitFilter(2, 60, clock=lambda: now[0])
+
+        def record(lineno=1, level=logging.DEBUG):
+            return logging.LogRecord("hot", level, __file__, lineno, "m", None, None)
+
+        self.assertEqual(
+            [log_filter.filter(record()) for _ in range(5)],
+            [True, True, False, False, False],
+        )
+        self.assertTrue(log_filter.filter(record(lineno=2)))
+        self.assertTrue(log_filter.filter(record(level=logging.ERROR)))
+        now[0] = 61.0
+        next_window = record()
+        self.assertTrue(log_filter.filter(next_window))
+        self.assertEqual(next_window.suppressed, 3)
+
+    def test_parse_sampling_and_rate_limit(self):
+        """
+        Test the parsing of the sampling and rate limit specifications.
+        """
+        self.assertEqual(
+            parse_sampling_rates("instrumentation=0.1,root=1"),
+            {"instrumentation": 0.1, "root": 1.0},
+        )
+        with self.assertRaises(ValueError):
+            parse_sampling_rates("instrumentation=2")
+        self.assertEqual(parse_rate_limit("50/60"), (50, 60.0))
+        self.assertIsNone(parse_rate_limit("0"))
+        with self.assertRaises(ValueError):
+            parse_rate_limit("fast")
+
+    @patch.dict(os.environ, {"MANGETAMAIN_LOG_FORMAT": "json"})
+    def test_json_lines_files(self):
+        """
+        Test that the JSON mode writes parseable lines to the .jsonl files.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            previous = os.getcwd()
+            os.chdir(directory)
+            try:
+                setup_logging()
+                logging.getLogger("tests.json").info(
+                    "stage", extra={"perf": {"stage": "s", "wall_s": 1.0}}
+                )
+                shutdown_logging()
+                with open(os.path.join("src", "logs", "app_debug.jsonl")) as file:
+                    entries = [json.loads(line) for line in file]
+            finally:
+                logging.getLogger().handlers = []
+                os.chdir(previous)
+        self.assertEqual(entries[0]["logger"], "tests.json")
+        self.assertEqual(entries[0]["stage"], "s")
+        self.assertEqual(entries[0]["duration"], 1.0)
+        self.assertIsNone(entries[0]["session_id"])
+
+    def test_stage_records_survive_burst(self):
+        """
+        Test that the rate limit is off by default and, once enabled, keeps
+        every stage measurement of a burst logged from one call site.
+        """
+
+        def burst(environ: dict) -> list:
+            with tempfile.TemporaryDirectory() as directory:
+                previous = os.getcwd()
+                os.chdir(directory)
+                try:
+                    with patch.dict(os.environ, environ):
+                        setup_logging()
+                    logger = logging.getLogger("tests.burst")
+                    for i in range(200):
+                        perf = {"stage": "load", "wall_s": float(i)}
+                        logger.info("stage", extra={"perf": perf})
+                        logger.info("chatter")
+                    shutdown_logging()
+                    path = os.path.join("src", "logs", "app_debug.jsonl")
+                    with open(path) as file:
+                        return [json.loads(line) for line in file]
+                finally:
+                    logging.getLogger().handlers = []
+                    os.chdir(previous)
+
+        entries = burst({"MANGETAMAIN_LOG_FORMAT": "json"})
+        self.assertEqual(len(entries), 400)
+        entries = burst(
+            {"MANGETAMAIN_LOG_FORMAT": "json", "MANGETAMAIN_LOG_RATE_LIMIT": "5/60"}
+        )
+        stages = [entry for entry in entries if "stage" in entry]
+        self.assertEqual([entry["duration"] for entry in stages], list(range(200)))
+        self.assertEqual(len(entries) - len(stages), 5)
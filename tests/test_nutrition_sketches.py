@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.nutrition_sketches import NutrientSketchIndex, parse_tags
+
+
+@pytest.fixture
+def sketch_index() -> NutrientSketchIndex:
+    """
+    Fixture that provides the sketches of 2000 recipes with log-normal
+    nutrients, every recipe tagged "even" or "odd" and a third of them "third".
+
+    Returns:
+        NutrientSketchIndex: Sketches of the "Calories" and "Sugar (g)" columns.
+    """
+    rng = np.random.default_rng(0)
+    ids = np.arange(2000)
+    recipes = pd.DataFrame(
+        {
+            "id": ids,
+            "Calories": rng.lognormal(5, 1, len(ids)),
+            "Sugar (g)": rng.lognormal(2, 1.5, len(ids)),
+        }
+    )
+    recipe_tags = pd.DataFrame(
+        {
+            "id": ids,
+            "tags": [
+                ["even" if i % 2 == 0 else "odd"] + (["third"] if i % 3 == 0 else [])
+                for i in ids
+            ],
+        }
+    )
+    return NutrientSketchIndex(recipes, recipe_tags, ["Calories", "Sugar (g)"])
+
+
+def test_parse_tags():
+    """Test the parsing of the stringified tag lists of RAW_recipes."""
+    assert parse_tags("['60-minutes-or-less', 'healthy']") == [
+        "60-minutes-or-less",
+        "healthy",
+    ]
+    assert parse_tags("[]") == []
+    assert parse_tags(np.nan) == []
+
+
+def test_quantiles_close_to_exact(sketch_index: NutrientSketchIndex):
+    """Test that the sketch quantiles are within the bin width of the exact ones."""
+    values = sketch_index.sketch()
+    rng = np.random.default_rng(0)
+    calories = rng.lognormal(5, 1, 2000)
+    qs = [0.05, 0.25, 0.5, 0.75, 0.95]
+    estimated = values.quantiles("Calories", qs)
+    np.testing.assert_allclose(estimated, np.quantile(calories, qs), rtol=0.03)
+    assert values.count("Calories") == 2000
+    assert values.summary("Calories")["max"] == calories.max()
+
+
+def test_merged_tags_equal_all_recipes(sketch_index: NutrientSketchIndex):
+    """
+    Test that merging the sketches of disjoint tags covering every recipe
+    gives the sketch of all the recipes.
+    """
+    merged = sketch_index.sketch(["even", "odd"])
+    everything = sketch_index.sketch()
+    np.testing.assert_array_equal(merged.counts, everything.counts)
+    np.testing.assert_allclose(merged.sums, everything.sums)
+    np.testing.assert_array_equal(merged.minimum, everything.minimum)
+    assert sketch_index.sketch(["third"]).count("Sugar (g)") == 667
+
+
+def test_histogram_bins_capped(sketch_index: NutrientSketchIndex):
+    """Test that the histogram keeps every recipe within `max_bins` bins."""
+    histogram = sketch_index.sketch().histogram("Sugar (g)", max_bins=20)
+    assert len(histogram) <= 20
+    assert histogram["count"].sum() == 2000
+    assert (histogram["left"] < histogram["right"]).all()
+
+
+def test_unknown_tag_and_nutrient(sketch_index: NutrientSketchIndex):
+    """Test the tag lookup and the errors on unknown tags and nutrients."""
+    assert sketch_index.matching_tags("EV") == ["even"]
+    assert sketch_index.sketch([]).count("Calories") == 0
+    with pytest.raises(KeyError):
+        sketch_index.sketch(["missing"])
+    with pytest.raises(KeyError):
+        sketch_index.sketch().quantiles("Fiber (g)", [0.5])
@@ -0,0 +1,101 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from src.outliers import (
+    METHODS,
+    OutlierDetectors,
+    iqr_mask,
+    mad_mask,
+    zscore_mask,
+)
+
+
+@pytest.fixture
+def nutrients() -> pd.DataFrame:
+    """
+    Fixture that provides 500 recipes with normally distributed nutrients
+    and a few extreme values.
+
+    Returns:
+        pd.DataFrame: `name`, `Calories` and `Sugar (g)` columns.
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "name": [f"recipe {i}" for i in range(500)],
+            "Calories": rng.normal(300, 50, 500),
+            "Sugar (g)": rng.normal(20, 5, 500),
+        }
+    )
+    df.loc[[3, 7], "Calories"] = [5000.0, 4000.0]
+    df.loc[11, "Sugar (g)"] = 400.0
+    return df
+
+
+def test_zscore_mask_matches_scipy(nutrients: pd.DataFrame):
+    """
+    Test that the z-score flags match `scipy.stats.zscore`, and that
+    missing values and constant columns are never flagged.
+    """
+    values = nutrients[["Calories", "Sugar (g)"]].to_numpy()
+    expected = np.abs(stats.zscore(values)) > 3
+    np.testing.assert_array_equal(zscore_mask(values), expected)
+    values = np.column_stack([values[:, 0], np.ones(500)])
+    values[0, 0] = np.nan
+    flags = zscore_mask(values)
+    assert not flags[0, 0] and not flags[:, 1].any()
+
+
+def test_robust_detectors_resist_masking():
+    """
+    Test that the MAD and IQR detectors flag a cluster of extreme values
+    that inflates the standard deviation enough to hide it from the z-score.
+    """
+    values = np.concatenate([np.linspace(10, 20, 40), [200.0] * 6])[:, None]
+    assert not zscore_mask(values).any()
+    assert mad_mask(values)[-6:].all() and mad_mask(values).sum() == 6
+    assert iqr_mask(values)[-6:].all() and iqr_mask(values).sum() == 6
+
+
+def test_detectors_counts_and_agreement(nutrients: pd.DataFrame):
+    """Test the counts per column, the agreement matrix and the flagged rows."""
+    detectors = OutlierDetectors(nutrients, ["Calories", "Sugar (g)"])
+    counts = detectors.counts()
+    assert list(counts.columns) == list(METHODS)
+    assert counts.loc["Calories", "zscore"] >= 2
+    assert pd.isna(counts.loc["Calories", "isolation_forest"])
+    assert {3, 7, 11} <= set(detectors.outliers("mad").index)
+    assert detectors.rows("isolation_forest")[[3, 7, 11]].all()
+    agreement = detectors.agreement()
+    assert np.diag(agreement).tolist() == [1.0] * len(METHODS)
+    with pytest.raises(KeyError):
+        detectors.bitmap("dbscan")
+    with pytest.raises(KeyError):
+        OutlierDetectors(nutrients, ["Fiber (g)"])
+
+
+def test_detectors_persisted_per_version(tmp_path, nutrients, monkeypatch):
+    """
+    Test that the bitmaps and the forest persisted for a dataset version
+    are read back without training again, and that other data gets
+    another version.
+    """
+    detectors = OutlierDetectors(nutrients, cache_dir=str(tmp_path))
+    expected = {method: detectors.bitmap(method) for method in METHODS}
+    directory = tmp_path / "outliers" / detectors.version
+    assert os.path.exists(directory / "isolation_forest.joblib")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The forest should not be trained again")
+
+    monkeypatch.setattr("src.outliers.train_isolation_forest", fail)
+    monkeypatch.setattr("src.outliers.MASKS", {})
+    reloaded = OutlierDetectors(nutrients, cache_dir=str(tmp_path))
+    for method in METHODS:
+        np.testing.assert_array_equal(reloaded.bitmap(method), expected[method])
+    changed = nutrients.assign(Calories=nutrients["Calories"] + 1)
+    assert OutlierDetectors(changed, cache_dir=str(tmp_path)).version != (
+        detectors.version
+    )
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.nutrition_stats import stats_bio
+from src.parallel_stats import shutdown_pools, stats_bio_parallel
+
+
+@pytest.fixture(scope="module", autouse=True)
+def pools():
+    """Stops the worker processes started by the tests."""
+    yield
+    shutdown_pools()
+
+
+@pytest.fixture
+def recipes() -> pd.DataFrame:
+    """
+    Fixture that provides 200 recipes with many ties, a missing value, an
+    invalid string and a list of the wrong length, on a non-default index.
+
+    Returns:
+        pd.DataFrame: `name` and `nutrition` columns.
+    """
+    rng = np.random.default_rng(0)
+    values = rng.integers(2, 30, size=(200, 7)).astype(float)
+    values[::3, 0] += 0.5
+    nutrition = [str(row) for row in values.tolist()]
+    nutrition[5], nutrition[17], nutrition[40] = None, "invalid", "[1.0, 2.0]"
+    return pd.DataFrame(
+        {"name": [f"recipe {i}" for i in range(200)], "nutrition": nutrition},
+        index=range(1000, 1200),
+    )
+
+
+@pytest.mark.parametrize("workers, shards", [(1, 1), (2, 7), (2, 200)])
+def test_parallel_matches_serial(recipes: pd.DataFrame, workers: int, shards: int):
+    """Test that the result is identical to the serial one for any sharding."""
+    pd.testing.assert_frame_equal(
+        stats_bio_parallel(recipes, workers, shards),
+        stats_bio(recipes),
+        check_exact=True,
+    )
+
+
+def test_parallel_keeps_integer_columns():
+    """
+    Test that the columns parsed from integers only keep the integer dtype
+    they get in the serial run.
+    """
+    recipes = pd.DataFrame(
+        {"nutrition": [f"[{i}, 10, 50, 500, 80, 20, 30]" for i in range(2, 12)]}
+    )
+    result = stats_bio_parallel(recipes, workers=2, shards=3)
+    assert result["Calories"].dtype == np.int64
+    assert result["Top 4 Calories"].tolist() == [True] * 4 + [False] * 6
+    pd.testing.assert_frame_equal(result, stats_bio(recipes), check_exact=True)
@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+from src.popularity import (
+    aggregate_interactions,
+    compute_popularity,
+    filter_min_interactions,
+    join_popularity,
+    merge_aggregates,
+)
+
+
+@pytest.fixture
+def sample_interactions_df():
+    """
+    Fixture that provides a small interactions DataFrame shaped like
+    PP_interactions_mangetamain.csv.
+
+    Returns:
+        pd.DataFrame: Interactions with 'user_id', 'recipe_id' and 'date'.
+    """
+    return pd.DataFrame(
+        {
+            "user_id": [1, 1, 2, 3, 3, 3],
+            "recipe_id": [20, 10, 10, 10, 30, 20],
+            "date": [
+                "2010-05-01",
+                "2009-01-10",
+                "2011-03-02",
+                "2010-07-14",
+                "not a date",
+                "2010-01-01",
+            ],
+        }
+    )
+
+
+def test_aggregate_interactions_per_recipe(sample_interactions_df: pd.DataFrame):
+    """
+    Test the per-recipe counts, first/last dates and per-year counts, and
+    that the output is sorted by recipe id.
+    """
+    result = aggregate_interactions(sample_interactions_df, "recipe_id")
+    assert result["recipe_id"].tolist() == [10, 20, 30]
+    assert result["interaction_count"].tolist() == [3, 2, 1]
+    assert result["first_interaction"].iloc[0] == pd.Timestamp("2009-01-10")
+    assert result["last_interaction"].iloc[0] == pd.Timestamp("2011-03-02")
+    assert result["interactions_2010"].tolist() == [1, 2, 0]
+    # Recipe 30 only has an unparseable date
+    assert pd.isna(result["first_interaction"].iloc[2])
+
+
+def test_aggregate_interactions_invalid_column(sample_interactions_df: pd.DataFrame):
+    """Test that grouping by a missing column raises a KeyError."""
+    with pytest.raises(KeyError):
+        aggregate_interactions(sample_interactions_df, "invalid_column")
+
+
+def test_merge_aggregates_matches_full_aggregation(
+    sample_interactions_df: pd.DataFrame,
+):
+    """
+    Test that merging the aggregates of two batches gives the aggregates of
+    all the interactions, including year columns present in one batch only.
+    """
+    first = aggregate_interactions(sample_interactions_df.iloc[:2], "recipe_id")
+    second = aggregate_interactions(sample_interactions_df.iloc[2:], "recipe_id")
+    merged = merge_aggregates(first, second, "recipe_id")
+    expected = aggregate_interactions(sample_interactions_df, "recipe_id")
+    pd.testing.assert_frame_equal(merged, expected[merged.columns])
+    assert sorted(merged.columns) == sorted(expected.columns)
+
+
+def test_compute_popularity_tables(sample_interactions_df: pd.DataFrame):
+    """Test that both recipe and user aggregates are computed."""
+    tables = compute_popularity(sample_interactions_df)
+    assert set(tables) == {"recipe_popularity", "user_activity"}
+    assert tables["user_activity"]["interaction_count"].tolist() == [2, 1, 3]
+
+
+def test_join_and_filter_popularity(sample_interactions_df: pd.DataFrame):
+    """
+    Test that the interaction count is joined onto recipes while keeping
+    their index, and that recipes can be filtered on it.
+    """
+    recipes = pd.DataFrame(
+        {"id": [30, 10, 99], "name": ["c", "a", "z"]}, index=[5, 6, 7]
+    )
+    popularity = aggregate_interactions(sample_interactions_df, "recipe_id")
+    joined = join_popularity(recipes, popularity)
+    assert joined.index.tolist() == [5, 6, 7]
+    assert joined["interaction_count"].tolist() == [1, 3, 0]
+    assert filter_min_interactions(joined, 2)["id"].tolist() == [10]
+    with pytest.raises(KeyError):
+        filter_min_interactions(recipes, 1)
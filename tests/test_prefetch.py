@@ -0,0 +1,165 @@
+import threading
+import time
+import pytest
+from src.prefetch import LOW_PRIORITY, PrefetchScheduler
+
+
+@pytest.fixture
+def scheduler() -> PrefetchScheduler:
+    """
+    Fixture that provides a single-worker scheduler recording the order in
+    which its tasks "a", "b" and "c" run.
+
+    Returns:
+        PrefetchScheduler: Scheduler with a `runs` list attribute.
+    """
+    scheduler = PrefetchScheduler(max_workers=1)
+    scheduler.runs = []
+    for name in ("a", "b", "c"):
+        scheduler.register(name, lambda name=name: scheduler.runs.append(name) or name)
+    return scheduler
+
+
+def test_result_runs_task_once(scheduler: PrefetchScheduler):
+    """
+    Test that a task nobody started runs in the calling thread, and only
+    once.
+    """
+    assert scheduler.result("a") == "a"
+    assert scheduler.result("a") == "a"
+    assert scheduler.runs == ["a"]
+    assert scheduler.status() == {"a": "done"}
+
+
+def test_prefetch_priority_order(scheduler: PrefetchScheduler):
+    """
+    Test that queued tasks run in priority order, a hidden section's task
+    queued at low priority running last even when queued first.
+    """
+    release = threading.Event()
+    scheduler.register("blocker", release.wait)
+    scheduler.prefetch(["blocker"])
+    scheduler.prefetch(["c"], LOW_PRIORITY)
+    scheduler.prefetch(["b", "a"])
+    release.set()
+    deadline = time.monotonic() + 10
+    while len(scheduler.runs) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler.runs == ["b", "a", "c"]
+
+
+def test_dependent_tasks_do_not_deadlock(scheduler: PrefetchScheduler):
+    """
+    Test that a task waiting on another one computes it itself when the
+    only worker is busy running it.
+    """
+    scheduler.register("combined", lambda: scheduler.result("a") + "+")
+    scheduler.prefetch(["combined", "a"])
+    assert scheduler.result("combined") == "a+"
+    assert scheduler.runs == ["a"]
+
+
+def test_failed_task_is_retried():
+    """
+    Test that a failure is raised to the caller and that the task runs
+    again on the next request.
+    """
+    scheduler = PrefetchScheduler()
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("boom")
+        return "ok"
+
+    scheduler.register("flaky", flaky)
+    with pytest.raises(ValueError):
+        scheduler.result("flaky")
+    assert scheduler.result("flaky") == "ok"
+    assert len(attempts) == 2
+
+
+def test_invalidate_runs_task_again(scheduler: PrefetchScheduler):
+    """Test that an invalidated task runs again while the others are kept."""
+    scheduler.result("a")
+    scheduler.result("b")
+    scheduler.invalidate(["a", "unknown"])
+    scheduler.result("a")
+    scheduler.result("b")
+    assert scheduler.runs == ["a", "b", "a"]
+
+
+def test_invalidate_source_evicts_dependents_only(scheduler: PrefetchScheduler):
+    """
+    Test that invalidating a source resets it and forgets the tasks
+    depending on it, transitively, while the other tasks are kept.
+    """
+    resets = []
+    scheduler.add_source("dataset:recipes", lambda: resets.append("recipes"))
+    scheduler.register("recipes_df", lambda: "df", ["dataset:recipes"])
+    scheduler.register("figure", lambda: scheduler.result("recipes_df"), ["recipes_df"])
+    scheduler.result("figure")
+    scheduler.result("a")
+    invalidated = scheduler.invalidate(["dataset:recipes"])
+    assert invalidated == ["dataset:recipes", "figure", "recipes_df"]
+    assert resets == ["recipes"]
+    assert scheduler.status() == {"a": "done"}
+    assert scheduler.sources() == ["dataset:recipes"]
+
+
+def test_unregister_forgets_task(scheduler: PrefetchScheduler):
+    """
+    Test that an unregistered task, its result and its dependencies are
+    forgotten, a queued run being skipped.
+    """
+    scheduler.register("figure:2", lambda: "figure", ["a"])
+    scheduler.result("figure:2")
+    scheduler.unregister("figure:2")
+    scheduler.unregister("unknown")
+    assert "figure:2" not in scheduler.status()
+    assert scheduler.dependents(["a"]) == ["a"]
+    with pytest.raises(KeyError):
+        scheduler.result("figure:2")
+
+    release = threading.Event()
+    scheduler.register("blocker", release.wait)
+    scheduler.prefetch(["blocker", "b", "c"])
+    scheduler.unregister("b")
+    release.set()
+    assert scheduler.result("c") == "c"
+    assert scheduler.runs == ["c"]
+
+
+def test_concurrent_results_share_one_computation():
+    """Test that threads asking for the same task wait on one computation."""
+    scheduler = PrefetchScheduler()
+    runs = []
+    release = threading.Event()
+
+    def slow():
+        runs.append(1)
+        release.wait()
+        return len(runs)
+
+    scheduler.register("slow", slow)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(scheduler.result("slow")))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [1, 1, 1, 1]
+    assert len(runs) == 1
+
+
+def test_unknown_task(scheduler: PrefetchScheduler):
+    """Test that unregistered tasks are rejected."""
+    with pytest.raises(KeyError):
+        scheduler.result("missing")
+    with pytest.raises(KeyError):
+        scheduler.prefetch(["missing"])
@@ -0,0 +1,86 @@
+import json
+import os
+import zipfile
+import numpy as np
+import pandas as pd
+import pytest
+from src.profiler import HyperLogLog, profile_chunks, profile_dataset, profile_path
+
+
+def test_hyperloglog_estimates():
+    """Test the distinct counts of small and large sets, and the merge."""
+    sketch = HyperLogLog()
+    sketch.add(pd.Series([1, 2, 2, 3, None]))
+    assert sketch.count() == 3
+    large = HyperLogLog()
+    large.add(pd.Series(np.arange(100_000)))
+    assert large.count() == pytest.approx(100_000, rel=0.03)
+    other = HyperLogLog()
+    other.add(pd.Series(np.arange(50_000, 150_000, dtype=np.float64)))
+    large.merge(other)
+    assert large.count() == pytest.approx(150_000, rel=0.03)
+    with pytest.raises(ValueError):
+        large.merge(HyperLogLog(12))
+
+
+def test_profile_chunks_matches_pandas():
+    """
+    Test that the profile of a DataFrame read in chunks matches pandas on the
+    whole DataFrame, including a column of floats in one chunk and integers in
+    the other, and a column mixing strings and numbers.
+    """
+    df = pd.DataFrame(
+        {
+            "id": [1, 2, 3, 4, 5, 6],
+            "score": [1.5, None, 4.0, 2.0, 2.0, 9.0],
+            "name": ["b", "a", "b", "d", None, "c"],
+            "mixed": ["x", "y", "z", 1, 2, 3],
+        }
+    )
+    profile = profile_chunks([df.iloc[:3], df.iloc[3:]])
+    assert (profile["rows"], profile["chunks"]) == (6, 2)
+    columns = {column["name"]: column for column in profile["columns"]}
+    assert columns["score"]["dtype"] == "float64"
+    assert columns["score"]["nulls"] == 1 and columns["name"]["nulls"] == 1
+    assert columns["score"]["distinct"] == 4 and columns["name"]["distinct"] == 4
+    assert (columns["score"]["min"], columns["score"]["max"]) == (1.5, 9.0)
+    assert (columns["name"]["min"], columns["name"]["max"]) == ("a", "d")
+    assert columns["mixed"]["min"] is None and columns["mixed"]["max"] is None
+    memory = df.iloc[:3].memory_usage(deep=True, index=False)
+    memory += df.iloc[3:].memory_usage(deep=True, index=False)
+    assert profile["memory_bytes"] == memory.sum()
+
+
+def test_profile_dataset_cached_by_fingerprint(tmp_path):
+    """
+    Test that the profile of an archive is stored next to it, read back while
+    the archive is unchanged, and computed again once it changes.
+    """
+    archive = str(tmp_path / "data.csv.zip")
+    with zipfile.ZipFile(archive, "w") as zip_ref:
+        zip_ref.writestr(
+            "data.csv", "id,tag\n" + "".join(f"{i},t{i % 3}\n" for i in range(10))
+        )
+    profile = profile_dataset(archive, chunk_rows=4)
+    assert (profile["rows"], profile["chunks"]) == (10, 3)
+    assert [column["distinct"] for column in profile["columns"]] == [10, 3]
+    # Nothing is extracted next to the archive
+    assert sorted(os.listdir(tmp_path)) == [
+        "data.csv.zip",
+        "data.csv.zip.profile.json",
+        "data.csv.zip.profile.json.lock",
+    ]
+
+    with open(profile_path(archive)) as file:
+        stored = json.load(file)
+    stored["rows"] = -1
+    with open(profile_path(archive), "w") as file:
+        json.dump(stored, file)
+    assert profile_dataset(archive)["rows"] == -1
+
+    with zipfile.ZipFile(archive, "w") as zip_ref:
+        zip_ref.writestr("data.csv", "id,tag\n1,a\n2,b\n")
+    os.utime(archive, ns=(0, 0))
+    assert profile_dataset(archive)["rows"] == 2
+    with pytest.raises(FileNotFoundError):
+        profile_dataset(str(tmp_path / "missing.csv"))
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.ranking import (
+    NUTRIENT_OBJECTIVES,
+    RecipeRanker,
+    normalized_costs,
+    pareto_front,
+)
+
+
+@pytest.fixture
+def sample_combined_df():
+    """
+    Fixture that provides a small `combined_df`-like DataFrame with the
+    seven converted nutritional components.
+
+    Recipe D is at least as good as recipe C on every component and
+    strictly better on proteins, so C is not Pareto-optimal.
+
+    Returns:
+        pd.DataFrame: Recipes with a 'name' column and one column per nutrient.
+    """
+    data = {
+        "name": ["Recipe A", "Recipe B", "Recipe C", "Recipe D"],
+        "Calories": [100, 300, 200, 200],
+        "Total Fat (g)": [5, 2, 3, 3],
+        "Sugar (g)": [4, 4, 4, 4],
+        "Sodium (mg)": [200, 100, 150, 150],
+        "Protein (g)": [10, 30, 15, 20],
+        "Saturated Fat (g)": [2, 2, 2, 2],
+        "Carbohydrates (g)": [30, 20, 25, 25],
+    }
+    return pd.DataFrame(data)
+
+
+def brute_force_pareto(costs: np.ndarray) -> np.ndarray:
+    """Reference O(n²) Pareto front used to check the skyline algorithm."""
+    return np.array(
+        [
+            not any(
+                (other <= point).all() and (other < point).any() for other in costs
+            )
+            for point in costs
+        ]
+    )
+
+
+def test_normalized_costs_directions(sample_combined_df: pd.DataFrame):
+    """
+    Test that costs are scaled to [0, 1] with 0 for the lowest calories and
+    for the highest proteins, and that constant columns are all zeros.
+    """
+    costs = normalized_costs(sample_combined_df, NUTRIENT_OBJECTIVES)
+    assert costs.min() == 0.0 and costs.max() == 1.0
+    assert costs[0, 0] == 0.0
+    assert costs[1, 4] == 0.0
+    assert (costs[:, 2] == 0.0).all()
+
+
+def test_normalized_costs_invalid_column(sample_combined_df: pd.DataFrame):
+    """Test that an unknown nutrient column raises a KeyError."""
+    with pytest.raises(KeyError):
+        normalized_costs(sample_combined_df, {"Fiber (g)": "min"})
+
+
+def test_pareto_front_sample(sample_combined_df: pd.DataFrame):
+    """Test the Pareto front on the sample recipes."""
+    costs = normalized_costs(sample_combined_df, NUTRIENT_OBJECTIVES)
+    assert pareto_front(costs).tolist() == [True, True, False, True]
+
+
+def test_pareto_front_matches_brute_force():
+    """
+    Test that the blocked sort-filter-skyline matches the brute force
+    definition, including duplicated rows and ties.
+    """
+    rng = np.random.default_rng(0)
+    costs = np.round(rng.random((400, 4)), 1)
+    costs[10] = costs[20]
+    expected = brute_force_pareto(costs)
+    result = pareto_front(costs, block_size=32, skyline_chunk=8)
+    assert result.tolist() == expected.tolist()
+
+
+def test_ranker_weights(sample_combined_df: pd.DataFrame):
+    """
+    Test that the weights drive the composite score: favouring proteins
+    ranks recipe B first, favouring calories ranks recipe A first.
+    """
+    ranker = RecipeRanker(sample_combined_df)
+    protein_first = ranker.top({"Protein (g)": 5, "Calories": 0}, k=2)
+    calories_first = ranker.top({"Protein (g)": 0, "Calories": 5}, k=2)
+    assert protein_first["name"].iloc[0] == "Recipe B"
+    assert calories_first["name"].iloc[0] == "Recipe A"
+    assert protein_first["Score"].is_monotonic_decreasing
+
+
+def test_ranker_pareto_only(sample_combined_df: pd.DataFrame):
+    """Test that the Pareto-only ranking never returns a dominated recipe."""
+    ranker = RecipeRanker(sample_combined_df)
+    ranked = ranker.top(k=10, pareto_only=True)
+    assert len(ranked) == 3
+    assert ranked["Pareto optimal"].all()
+    assert "Recipe C" not in ranked["name"].tolist()
+
+
+def test_ranker_invalid_weights(sample_combined_df: pd.DataFrame):
+    """Test that negative or unknown weights raise a ValueError."""
+    ranker = RecipeRanker(sample_combined_df)
+    with pytest.raises(ValueError):
+        ranker.score({"Calories": -1})
+    with pytest.raises(ValueError):
+        ranker.score({"Fiber (g)": 1})
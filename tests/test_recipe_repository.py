@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.ranking import NUTRIENT_OBJECTIVES
+from src.recipe_repository import IdIndex, RecipeRepository, parse_list
+
+
+@pytest.fixture
+def repository() -> RecipeRepository:
+    """
+    Fixture that provides a repository over three recipes, the last one
+    missing from `combined_df` and the popularity table.
+
+    Returns:
+        RecipeRepository: Repository over every kind of table.
+    """
+    raw_recipes = pd.DataFrame(
+        {
+            "name": ["lemon cake", "pea soup", "plain toast"],
+            "id": [38, 7, 500],
+            "minutes": [45, 30, 5],
+            "description": ["moist", None, "quick"],
+            "tags": ["['dessert', 'vegan']", "['soup']", "[]"],
+            "steps": ["[\"don't overbake\", 'cool']", "['boil']", "['toast']"],
+            "ingredients": ["['lemon', 'flour']", "['peas']", "['bread']"],
+        }
+    )
+    preprocessed = pd.DataFrame(
+        {
+            "name": ["lemon cake", "pea soup", "plain toast"],
+            "id": [38, 7, 500],
+            "nutrition": [
+                "[300.0, 20.0, 50.0, 5.0, 10.0, 25.0, 15.0]",
+                "[150.0, 5.0, 4.0, 30.0, 20.0, 5.0, 8.0]",
+                "[80.0, 1.0, 1.0, 8.0, 4.0, 1.0, 5.0]",
+            ],
+            "ingredient_ids": ["[10, 11]", "[12]", "[99]"],
+        }
+    )
+    combined_df = pd.DataFrame(
+        {"name": ["pea soup", "lemon cake"], "id": [7, 38]}
+        | {
+            nutrient: [1.0, 2.0] if objective == "min" else [3.0, 1.0]
+            for nutrient, objective in NUTRIENT_OBJECTIVES.items()
+        }
+        | {"Top 4 Calories": [True, False], "Top 4 Protein": [True, True]}
+    )
+    recipe_popularity = pd.DataFrame(
+        {"recipe_id": [38, 7], "interaction_count": [12, 3]}
+    )
+    ingredients = pd.DataFrame(
+        {"replaced": ["lemon", "flour", "flour", "pea"], "id": [10, 11, 11, 12]}
+    )
+    return RecipeRepository(
+        raw_recipes, preprocessed, combined_df, recipe_popularity, ingredients
+    )
+
+
+def test_id_index():
+    """Test the rows of known ids and -1 for unknown or invalid ids."""
+    index = IdIndex([38, 45, 52])
+    assert [index.position(i) for i in (38, 45, 52)] == [0, 1, 2]
+    assert [index.position(i) for i in (7, 53, -1, "x")] == [-1, -1, -1, -1]
+    np.testing.assert_array_equal(index.positions([52, 1000, 38]), [2, -1, 0])
+    with pytest.raises(ValueError):
+        IdIndex([3, -2])
+
+
+def test_parse_list():
+    """Test the stringified lists of the datasets, apostrophes included."""
+    assert parse_list("['mix', \"don't stir\"]") == ["mix", "don't stir"]
+    assert parse_list("[12, 7]") == [12, 7]
+    assert parse_list("[np.str_('vegan')]") == ["vegan"]
+    assert parse_list(None) == []
+
+
+def test_get_joins_every_table(repository: RecipeRepository):
+    """Test that a record gathers the fields of every table for one id."""
+    record = repository.get(38)
+    assert record["name"] == "lemon cake" and record["minutes"] == 45
+    assert record["tags"] == ["dessert", "vegan"]
+    assert record["steps"] == ["don't overbake", "cool"]
+    assert record["ingredient_names"] == ["lemon", "flour"]
+    assert record["daily_values"]["Sugar"] == 50.0
+    assert record["nutrition"]["Calories"] == 2.0
+    # Lowest values rank first, except for the protein
+    assert record["ranks"]["Calories"] == 2 and record["ranks"]["Protein (g)"] == 2
+    assert record["top_4"] == ["Protein"]
+    assert record["interaction_count"] == 12
+    assert repository.get(7)["ranks"]["Protein (g)"] == 1
+
+
+def test_get_partial_and_unknown_recipes(repository: RecipeRepository):
+    """
+    Test the records of recipes missing from some tables, repositories
+    without RAW_recipes and the unknown ids.
+    """
+    record = repository.get(500)
+    assert record["ingredient_names"] == [None]
+    assert "nutrition" not in record and record["interaction_count"] == 0
+    with pytest.raises(KeyError):
+        repository.get(8)
+    assert 38 in repository and 8 not in repository
+    combined_df = pd.DataFrame(
+        {"name": ["pea soup"], "id": [7]}
+        | {nutrient: [1.0] for nutrient in NUTRIENT_OBJECTIVES}
+    )
+    recipe_tags = pd.DataFrame({"id": [7], "tags": [np.array(["soup", "easy"])]})
+    record = RecipeRepository(combined_df=combined_df, recipe_tags=recipe_tags).get(7)
+    assert record["name"] == "pea soup" and "steps" not in record
+    assert record["tags"] == ["soup", "easy"]
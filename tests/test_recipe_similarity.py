@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.recipe_similarity import (
+    IngredientSimilarityIndex,
+    MinHashLSH,
+    build_ingredient_matrix,
+    parse_id_lists,
+)
+
+
+@pytest.fixture
+def sample_recipes_df():
+    """
+    Fixture that provides a small recipes DataFrame with stringified
+    ingredient id lists, as stored in PP_recipes_mangetamain.csv.
+
+    Returns:
+        pd.DataFrame: Recipes with 'id', 'name' and 'ingredient_ids' columns.
+    """
+    return pd.DataFrame(
+        {
+            "id": [10, 20, 30, 40, 50],
+            "name": ["salad", "same salad", "cake", "soup", "water"],
+            "ingredient_ids": [
+                "[1, 2, 3]",
+                "[3, 2, 1]",
+                "[7, 8, 9]",
+                "[1, 2, 9]",
+                "[]",
+            ],
+        }
+    )
+
+
+def test_parse_id_lists(sample_recipes_df: pd.DataFrame):
+    """
+    Test that stringified lists are flattened in row order with the
+    matching offsets, empty lists included.
+    """
+    indptr, ids = parse_id_lists(sample_recipes_df["ingredient_ids"])
+    assert indptr.tolist() == [0, 3, 6, 9, 12, 12]
+    assert ids[:3].tolist() == [1, 2, 3]
+
+
+def test_parse_id_lists_malformed():
+    """Test that a list with non integer elements raises a ValueError."""
+    with pytest.raises(ValueError):
+        parse_id_lists(pd.Series(["[1, 2]", "[3, abc]"]))
+
+
+def test_build_ingredient_matrix_invalid_column(sample_recipes_df: pd.DataFrame):
+    """Test that a missing ingredient column raises a KeyError."""
+    with pytest.raises(KeyError):
+        build_ingredient_matrix(sample_recipes_df, "invalid_column")
+
+
+def test_build_ingredient_matrix_shape(sample_recipes_df: pd.DataFrame):
+    """
+    Test that the incidence matrix has one row per recipe, one column per
+    distinct ingredient and binary entries.
+    """
+    matrix, ingredient_ids = build_ingredient_matrix(sample_recipes_df)
+    assert matrix.shape == (5, 6)
+    assert ingredient_ids.tolist() == [1, 2, 3, 7, 8, 9]
+    assert set(np.unique(matrix.data)) == {1.0}
+
+
+def test_most_similar_exact(sample_recipes_df: pd.DataFrame):
+    """
+    Test the exact cosine ranking: a recipe with the same ingredients is the
+    best match with a similarity of 1, and the query recipe is excluded.
+    """
+    index = IngredientSimilarityIndex(sample_recipes_df, chunk_size=2)
+    result = index.most_similar(10, k=3)
+    assert result["id"].iloc[0] == 20
+    assert result["similarity"].iloc[0] == pytest.approx(1.0)
+    assert 10 not in result["id"].tolist()
+    assert result["similarity"].is_monotonic_decreasing
+
+
+def test_most_similar_chunked_matches_single(sample_recipes_df: pd.DataFrame):
+    """Test that chunking the queries does not change the results."""
+    chunked = IngredientSimilarityIndex(sample_recipes_df, chunk_size=1)
+    single = IngredientSimilarityIndex(sample_recipes_df, chunk_size=100)
+    positions = np.arange(len(sample_recipes_df))
+    for (rows_a, scores_a), (rows_b, scores_b) in zip(
+        chunked.most_similar_positions(positions, 2),
+        single.most_similar_positions(positions, 2),
+    ):
+        assert rows_a.tolist() == rows_b.tolist()
+        np.testing.assert_allclose(scores_a, scores_b)
+
+
+def test_minhash_lsh_candidates(sample_recipes_df: pd.DataFrame):
+    """
+    Test the approximate index: identical ingredient sets always share a
+    bucket, and a recipe without ingredients has no candidates.
+    """
+    index = IngredientSimilarityIndex(sample_recipes_df)
+    lsh = MinHashLSH(index.incidence, num_perm=32, bands=8)
+    rows, estimates = lsh.query(0, k=2)
+    assert rows[0] == 1
+    assert estimates[0] == pytest.approx(1.0)
+    assert len(lsh.candidates(4)) == 0
+
+
+def test_minhash_lsh_invalid_bands(sample_recipes_df: pd.DataFrame):
+    """Test that num_perm must be divisible by the number of bands."""
+    index = IngredientSimilarityIndex(sample_recipes_df)
+    with pytest.raises(ValueError):
+        MinHashLSH(index.incidence, num_perm=30, bands=8)
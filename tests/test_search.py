@@ -0,0 +1,91 @@
+import os
+import pandas as pd
+import pytest
+from src.search import SearchIndex, load_or_build, tokenize
+
+
+@pytest.fixture
+def recipes() -> pd.DataFrame:
+    """
+    Fixture that provides a few recipes shaped like RAW_recipes.
+
+    Returns:
+        pd.DataFrame: `name`, `id`, `tags`, `description` and `steps` columns.
+    """
+    return pd.DataFrame(
+        {
+            "name": ["lemon cake", "chicken soup", "lemon chicken", "green salad"],
+            "id": [10, 20, 30, 40],
+            "tags": [
+                "['dessert', 'easy']",
+                "['soups-stews']",
+                "['main-dish']",
+                "[np.str_('vegan'), np.str_('easy')]",
+            ],
+            "description": ["a moist cake", None, "zesty and quick", "fresh"],
+            "steps": [
+                "['mix the flour', 'bake']",
+                "['boil the chicken', 'add lemon juice']",
+                "['grill the chicken']",
+                "['toss the leaves']",
+            ],
+        }
+    )
+
+
+def test_tokenize():
+    """Test the lowercase alphanumeric terms without stop words."""
+    assert tokenize("The Best Lemon-Cake, 2 ways!") == [
+        "best",
+        "lemon",
+        "cake",
+        "2",
+        "ways",
+    ]
+    assert tokenize(None) == []
+
+
+def test_search_ranks_by_relevance(recipes: pd.DataFrame):
+    """
+    Test that the recipes matching more query terms, or matching them in
+    their name rather than their steps, rank first, and that recipes
+    without any query term are left out.
+    """
+    index = SearchIndex.build(recipes)
+    results = index.search("lemon chicken")
+    assert results["id"].tolist() == [30, 20, 10]
+    assert results["score"].is_monotonic_decreasing
+    assert index.search("lemon")["id"].tolist()[-1] == 20
+    assert len(index.search("lemon", k=1)) == 1
+    assert index.search("vegan")["id"].tolist() == [40]
+    assert index.search("unknown words").empty
+
+
+def test_save_and_load(tmp_path, recipes: pd.DataFrame):
+    """Test that a saved index gives the same results once loaded."""
+    index = SearchIndex.build(recipes)
+    index.save(tmp_path / "index")
+    loaded = SearchIndex.load(tmp_path / "index")
+    pd.testing.assert_frame_equal(
+        loaded.search("easy chicken"), index.search("easy chicken")
+    )
+    with pytest.raises(FileNotFoundError):
+        SearchIndex.load(tmp_path / "missing")
+    with pytest.raises(KeyError):
+        SearchIndex.build(recipes.drop(columns="steps"))
+
+
+def test_load_or_build_builds_once(tmp_path, recipes: pd.DataFrame):
+    """Test that the index is built on first use only."""
+    calls = []
+
+    def build():
+        calls.append(1)
+        return SearchIndex.build(recipes)
+
+    directory = str(tmp_path / "search" / "v1")
+    load_or_build(directory, build)
+    index = load_or_build(directory, build)
+    assert len(calls) == 1
+    assert os.path.exists(os.path.join(directory, "postings.npy"))
+    assert index.search("soup")["id"].tolist() == [20]
@@ -0,0 +1,133 @@
+import json
+import os
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+from src.snapshot import (
+    SNAPSHOT_FORMAT_VERSION,
+    dataset_version,
+    read_snapshot,
+    write_snapshot,
+)
+from src.search import SearchIndex
+
+
+@pytest.fixture
+def sample_snapshot_data() -> dict:
+    """
+    Fixture that provides a small dashboard data dictionary shaped like the
+    output of `build_snapshot_data`.
+
+    Returns:
+        dict: "tables", "figures" and "metrics".
+    """
+    combined_df = pd.DataFrame(
+        {"name": ["a", "b", "c"], "id": [1, 2, 3], "Calories": [10.0, 20.0, 30.0]},
+        index=[4, 7, 9],
+    )
+    return {
+        "tables": {
+            "combined_df": combined_df,
+            "recipe_popularity": pd.DataFrame(
+                {"recipe_id": [1, 3], "interaction_count": [5, 2]}
+            ),
+        },
+        "figures": {
+            "interactions": go.Figure(go.Bar(x=["2010", "2011"], y=[3, 1])),
+            "nutrition_hist": {
+                "Calories": go.Figure(go.Bar(x=["a"], y=[10.0])),
+                "Sugar (g)": go.Figure(go.Bar(x=["b"], y=[2.0])),
+            },
+        },
+        "metrics": {"bio_recipes": 3, "rate_bio_recipes": 12.5},
+    }
+
+
+def test_write_and_read_snapshot(tmp_path, sample_snapshot_data: dict):
+    """
+    Test that tables (with their index), nested figures and metrics are
+    read back as written, with a versioned manifest.
+    """
+    output = tmp_path / "snapshot"
+    manifest_path = write_snapshot(sample_snapshot_data, output, version="v1")
+    assert os.path.exists(manifest_path)
+
+    snapshot = read_snapshot(output)
+    pd.testing.assert_frame_equal(
+        snapshot["tables"]["combined_df"],
+        sample_snapshot_data["tables"]["combined_df"],
+    )
+    assert snapshot["metrics"] == sample_snapshot_data["metrics"]
+    assert snapshot["manifest"]["format_version"] == SNAPSHOT_FORMAT_VERSION
+    assert snapshot["manifest"]["dataset_version"] == "v1"
+    figure = snapshot["figures"]["nutrition_hist"]["Sugar (g)"]
+    assert isinstance(figure, go.Figure)
+    assert list(figure.data[0].y) == [2.0]
+    assert list(snapshot["figures"]["interactions"].data[0].x) == ["2010", "2011"]
+
+
+def test_write_snapshot_replaces_previous(tmp_path, sample_snapshot_data: dict):
+    """
+    Test that writing again replaces the previous snapshot and leaves no
+    staging directory behind.
+    """
+    output = tmp_path / "snapshot"
+    write_snapshot(sample_snapshot_data, output, version="v1")
+    sample_snapshot_data["metrics"]["bio_recipes"] = 4
+    write_snapshot(sample_snapshot_data, output, version="v2")
+
+    snapshot = read_snapshot(output)
+    assert snapshot["manifest"]["dataset_version"] == "v2"
+    assert snapshot["metrics"]["bio_recipes"] == 4
+    assert os.listdir(tmp_path) == ["snapshot"]
+
+
+def test_snapshot_with_search_index(tmp_path, sample_snapshot_data: dict):
+    """Test that the search index is written with the snapshot and read back."""
+    recipes = pd.DataFrame(
+        {
+            "name": ["lemon cake", "pea soup"],
+            "id": [1, 2],
+            "tags": ["['dessert']", "['soups']"],
+            "description": ["", ""],
+            "steps": ["['bake']", "['boil']"],
+        }
+    )
+    sample_snapshot_data["search_index"] = SearchIndex.build(recipes)
+    output = tmp_path / "snapshot"
+    write_snapshot(sample_snapshot_data, output, version="v1")
+
+    snapshot = read_snapshot(output)
+    assert snapshot["search_index"].search("soup")["id"].tolist() == [2]
+
+
+def test_read_snapshot_errors(tmp_path, sample_snapshot_data: dict):
+    """
+    Test that a missing snapshot and a snapshot written in another format
+    version are rejected.
+    """
+    with pytest.raises(FileNotFoundError):
+        read_snapshot(tmp_path / "missing")
+
+    output = tmp_path / "snapshot"
+    manifest_path = write_snapshot(sample_snapshot_data, output, version="v1")
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    manifest["format_version"] = SNAPSHOT_FORMAT_VERSION + 1
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file)
+    with pytest.raises(ValueError):
+        read_snapshot(output)
+
+
+def test_dataset_version(tmp_path):
+    """
+    Test that the dataset version changes with the content of the sources
+    and ignores missing files.
+    """
+    source = tmp_path / "data.csv"
+    source.write_text("a\n1\n")
+    version = dataset_version([str(source), str(tmp_path / "missing.csv")])
+    assert version == dataset_version([str(source)])
+    source.write_text("a\n1\n2\n")
+    assert dataset_version([str(source)]) != version
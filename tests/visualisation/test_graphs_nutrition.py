@@ -2,6 +2,7 @@ import pytest
 import pandas as pd
 import plotly.graph_objects as go
 from src.visualisation.graphs_nutrition import plot_top_4_recipes_by_nutrition, nutrition_bar_ratio_sodium_proteins  
+from src.visualisation.graphs_nutrition import plot_binned_histogram, plot_summary_boxes
 
 
 @pytest.fixture
@@ -158,3 +159,15 @@ def test_nutrition_bar_ratio_sodium_proteins(sample_combined_df: pd.DataFrame):
 
     # Check the title of one figure to confirm correctness
     assert fig["Protein (g)"].layout.title.text == "Ratios for Top 4 Recipes by Protein (g)"
+
+
+def test_reduced_figures(sample_combined_df: pd.DataFrame):
+    """
+    Test that the box plots and the histogram of some recipes carry their
+    statistics and bin counts rather than the values of the recipes.
+    """
+    fig = plot_summary_boxes(sample_combined_df, ["Calories", "Sugar (g)"], "Outliers")
+    assert [box.name for box in fig.data] == ["Calories", "Sugar (g)"]
+    assert fig.data[0].median == (475.0,) and fig.data[0].y is None
+    fig = plot_binned_histogram(sample_combined_df, "Calories", max_bins=5)
+    assert len(fig.data[0].x) == 5 and sum(fig.data[0].y) == 6
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.visualisation.reducers import (
+    MAX_POINTS_ENV,
+    bin_values,
+    count_by_period,
+    downsample_series,
+    lttb,
+    point_budget,
+    quantile_summary,
+    top_n_with_other,
+)
+
+
+@pytest.fixture
+def daily_dates() -> pd.Series:
+    """
+    Fixture that provides one date per day over 3 years.
+
+    Returns:
+        pd.Series: 1096 consecutive days starting on 2009-01-01.
+    """
+    return pd.Series(pd.date_range("2009-01-01", "2011-12-31", freq="D"))
+
+
+def test_point_budget(monkeypatch):
+    """Test the default budget, the environment override and invalid budgets."""
+    monkeypatch.setenv(MAX_POINTS_ENV, "42")
+    assert point_budget() == 42
+    assert point_budget(7) == 7
+    with pytest.raises(ValueError):
+        point_budget(0)
+
+
+def test_bin_values():
+    """Test that values are counted in equal-width bins, ignoring missing ones."""
+    bins = bin_values(pd.Series([1.0, 2.0, 3.0, None, 10.0]), max_bins=3)
+    assert bins["count"].tolist() == [3, 0, 1]
+    assert bins["left"].iloc[0] == 1.0
+    assert bins["right"].iloc[-1] == 10.0
+
+
+def test_count_by_period_uses_finest_period_within_budget(daily_dates: pd.Series):
+    """
+    Test that dates are counted per day when the budget allows it and per
+    coarser period otherwise, without losing any count.
+    """
+    per_day = count_by_period(daily_dates, max_points=2000)
+    assert len(per_day) == len(daily_dates)
+    per_month = count_by_period(daily_dates, max_points=100)
+    assert len(per_month) == 36
+    assert per_month["count"].sum() == len(daily_dates)
+    assert per_month["date"].iloc[1] == pd.Timestamp("2009-02-01")
+
+
+def test_count_by_period_with_weights():
+    """Test that pre-aggregated counts are summed per period."""
+    dates = pd.Series(["2010-01-01", "2010-01-02", "2010-03-01", "not a date"])
+    counts = pd.Series([2, 3, 4, 100])
+    result = count_by_period(dates, counts, max_points=3)
+    assert result["count"].tolist() == [5, 0, 4]
+
+
+def test_quantile_summary_per_group():
+    """Test the box plot statistics and the fences clipped to the data."""
+    df = pd.DataFrame({"group": ["a", "a", "b", "b", "b"], "value": [1, 2, 3, 4, 100]})
+    summary = quantile_summary(df, "value", "group").set_index("group")
+    assert summary.loc["a", "count"] == 2
+    assert summary.loc["b", "median"] == 4.0
+    assert summary.loc["b", "lowerfence"] == 3.0
+    assert summary.loc["b", "upperfence"] == 100.0
+    with pytest.raises(KeyError):
+        quantile_summary(df, "missing")
+
+
+def test_lttb_keeps_bounds_and_peaks():
+    """
+    Test that LTTB keeps the requested number of points in order, the first
+    and last ones, and an isolated peak.
+    """
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[500] = 50.0
+    selected = lttb(x, y, 20)
+    assert len(selected) == 20
+    assert selected[0] == 0 and selected[-1] == 999
+    assert (np.diff(selected) > 0).all()
+    assert 500 in selected
+    assert lttb(x[:10], y[:10], 20).tolist() == list(range(10))
+
+
+def test_downsample_series_with_dates(daily_dates: pd.Series):
+    """Test that a time series is sorted and reduced to the budget."""
+    df = pd.DataFrame({"date": daily_dates[::-1], "count": range(len(daily_dates))})
+    reduced = downsample_series(df, "date", "count", max_points=50)
+    assert len(reduced) == 50
+    assert reduced["date"].is_monotonic_increasing
+
+
+def test_top_n_with_other():
+    """Test that the smallest categories are summed into 'Other'."""
+    values = pd.Series({"a": 5, "b": 3, "c": 1, "d": 1})
+    result = top_n_with_other(values, n=2)
+    assert result.to_dict() == {"a": 5, "b": 3, "Other": 2}
+    assert top_n_with_other(values, n=4).sum() == 10